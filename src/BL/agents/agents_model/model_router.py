@@ -0,0 +1,374 @@
+"""Latency-SLO-aware model fallback chains with per-model health tracking and circuit breakers."""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from BL.agents.agents_model import model_selection
+from BL.agents.agents_model.model_selection import get_default_model_name
+
+logger = logging.getLogger(__name__)
+
+LLM_MODELS_PATH = Path(__file__).resolve().parent.parent.parent.parent / "core" / "jsons" / "llm_models.json"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@lru_cache(maxsize=1)
+def load_model_catalog() -> Dict[str, str]:
+    """Return the model catalog from llm_models.json as {code: display name}."""
+    data = json.loads(LLM_MODELS_PATH.read_text(encoding="utf-8"))
+    return {m["code"]: m.get("name", m["code"]) for m in data.get("returnValue", []) if m.get("code")}
+
+
+def resolve_model_chain(model_config: Dict[str, Any], default_code: str = "gpt-4.1") -> List[str]:
+    """
+    Return the primary model code followed by its declared fallbacks.
+
+    Args:
+        model_config: Node ``config.model`` ({"code", "fallbacks": [codes]})
+        default_code: Primary code when none is configured
+
+    Returns:
+        Model codes in preference order (duplicates removed)
+    """
+    codes = [get_default_model_name(model_config.get("code", default_code))]
+    for code in model_config.get("fallbacks", []) or []:
+        if code and code not in codes:
+            codes.append(code)
+    return codes
+
+
+def validate_model_chain(codes: Sequence[str], node_name: str = "") -> None:
+    """
+    Check every code of a fallback chain against the model catalog.
+
+    Raises:
+        ValueError: When a code is not in llm_models.json
+    """
+    catalog = load_model_catalog()
+    unknown = [code for code in codes if code not in catalog]
+    if unknown:
+        raise ValueError(
+            f"Node '{node_name}' declares unknown model(s) {unknown} in its fallback chain; "
+            f"known codes: {sorted(catalog)}"
+        )
+
+
+class ModelHealth:
+    """Rolling latency/error window and circuit breaker for one model."""
+
+    def __init__(self, window: int, failure_threshold: int, cooldown_seconds: float):
+        self.samples: deque = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.last_attempt = 0.0
+        self.calls = 0
+        self.failures = 0
+
+    def p95_ms(self) -> Optional[float]:
+        latencies = sorted(latency for latency, ok in self.samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+
+class ModelRouter:
+    """
+    Orders a model fallback chain by current health and records every attempt.
+
+    A model's circuit opens after ``failure_threshold`` consecutive failures or when
+    its windowed error rate exceeds ``max_error_rate``; after ``cooldown_seconds`` one
+    probe call is let through (half-open) and success closes it. Models whose rolling
+    p95 latency breaches the caller's SLO are moved to the end of the chain and probed
+    at most every ``cooldown_seconds``; calls that start on another model because of
+    that are counted as SLO reroutes.
+    """
+
+    def __init__(
+        self,
+        window: int = 50,
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize router.
+
+        Args:
+            window: Samples kept per model for p95 and error rate
+            min_samples: Samples needed before p95/error rate are acted on
+            max_error_rate: Error rate that opens the circuit
+            failure_threshold: Consecutive failures that open the circuit
+            cooldown_seconds: Time an open circuit (or slow model) waits before a probe
+            clock: Monotonic clock in seconds (injectable for tests)
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.clock = clock
+        self._health: Dict[str, ModelHealth] = {}
+        self._lock = threading.Lock()
+        self._fallbacks = 0
+        self._slo_reroutes = 0
+
+    def health(self, model_code: str) -> ModelHealth:
+        with self._lock:
+            health = self._health.get(model_code)
+            if health is None:
+                health = ModelHealth(self.window, self.failure_threshold, self.cooldown_seconds)
+                self._health[model_code] = health
+            return health
+
+    def order(self, codes: Sequence[str], slo_p95_ms: Optional[float] = None) -> List[str]:
+        """
+        Return the chain reordered for the next call.
+
+        Healthy models keep their declared order; SLO breachers follow; open circuits
+        are left out unless their cooldown has passed (then they get one probe).
+        If every circuit is open, the declared chain is returned unchanged.
+        """
+        now = self.clock()
+        healthy, slow = [], []
+        with self._lock:
+            for code in codes:
+                health = self._health.get(code)
+                if health is None:
+                    healthy.append(code)
+                    continue
+                if health.state in (OPEN, HALF_OPEN):
+                    # One probe per cooldown period (a probe that never ran is retried later)
+                    if now - health.opened_at < self.cooldown_seconds:
+                        continue
+                    health.state = HALF_OPEN
+                    health.opened_at = now
+                    healthy.append(code)
+                    continue
+                p95 = health.p95_ms()
+                breaching = (
+                    slo_p95_ms is not None
+                    and p95 is not None
+                    and len(health.samples) >= self.min_samples
+                    and p95 > slo_p95_ms
+                )
+                if breaching and now - health.last_attempt < self.cooldown_seconds:
+                    slow.append(code)
+                else:
+                    healthy.append(code)
+            ordered = healthy + slow
+            if slow and healthy and ordered[0] != next(code for code in codes if code in ordered):
+                # The call starts on another model because the preferred one is too slow
+                self._slo_reroutes += 1
+        return ordered or list(codes)
+
+    def record(self, model_code: str, latency_ms: float, ok: bool) -> None:
+        """Record one attempt and update the model's circuit."""
+        health = self.health(model_code)
+        with self._lock:
+            health.calls += 1
+            health.last_attempt = self.clock()
+            health.samples.append((latency_ms, ok))
+            if ok:
+                health.consecutive_failures = 0
+                if health.state == HALF_OPEN:
+                    # Recovered: start a fresh window so old failures do not reopen it
+                    health.state = CLOSED
+                    health.samples.clear()
+                    health.samples.append((latency_ms, ok))
+                return
+            health.failures += 1
+            health.consecutive_failures += 1
+            too_many_errors = len(health.samples) >= self.min_samples and health.error_rate() > self.max_error_rate
+            if health.state == HALF_OPEN or health.consecutive_failures >= self.failure_threshold or too_many_errors:
+                health.state = OPEN
+                health.opened_at = self.clock()
+
+    def record_fallback(self) -> None:
+        with self._lock:
+            self._fallbacks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-model circuit state, p95 latency and error rate."""
+        with self._lock:
+            models = {
+                code: {
+                    "state": h.state,
+                    "p95Ms": round(h.p95_ms(), 2) if h.p95_ms() is not None else None,
+                    "errorRate": round(h.error_rate(), 4),
+                    "calls": h.calls,
+                    "failures": h.failures,
+                }
+                for code, h in self._health.items()
+            }
+            return {"fallbacks": self._fallbacks, "sloReroutes": self._slo_reroutes, "models": models}
+
+
+class RoutedChatModel:
+    """
+    Chat model facade over a fallback chain (``ainvoke``/``invoke``/``astream``/``bind_tools``).
+
+    Each call tries the chain in the router's current order and moves on when a model
+    raises, times out or could not be created.
+    """
+
+    def __init__(
+        self,
+        chain: Sequence[Tuple[str, Any]],
+        router: ModelRouter,
+        slo_p95_ms: Optional[float] = None,
+        timeout_seconds: Optional[float] = None,
+    ):
+        """
+        Initialize routed model.
+
+        Args:
+            chain: (model code, chat model or None) pairs in preference order
+            router: Shared health tracker
+            slo_p95_ms: Latency SLO for this node (p95, milliseconds)
+            timeout_seconds: Per-attempt timeout for async calls
+        """
+        self.chain = list(chain)
+        self.router = router
+        self.slo_p95_ms = slo_p95_ms
+        self.timeout_seconds = timeout_seconds
+        self._models = dict(self.chain)
+
+    @property
+    def model_codes(self) -> List[str]:
+        return [code for code, _ in self.chain]
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "RoutedChatModel":
+        """Bind tools to every model of the chain."""
+        bound = [(code, model.bind_tools(tools, **kwargs) if model is not None else None) for code, model in self.chain]
+        return RoutedChatModel(bound, self.router, self.slo_p95_ms, self.timeout_seconds)
+
+    def _attempts(self) -> List[Tuple[str, Any]]:
+        return [(code, self._models[code]) for code in self.router.order(self.model_codes, self.slo_p95_ms)]
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        last_error: Optional[BaseException] = None
+        for attempt, (code, model) in enumerate(self._attempts()):
+            if model is None:
+                self.router.record(code, 0.0, ok=False)
+                continue
+            if attempt:
+                self.router.record_fallback()
+            start = time.perf_counter()
+            try:
+                call = model.ainvoke(messages, **kwargs)
+                response = await (asyncio.wait_for(call, self.timeout_seconds) if self.timeout_seconds else call)
+            except Exception as ex:
+                self.router.record(code, (time.perf_counter() - start) * 1000, ok=False)
+                logger.warning("Model %s failed, trying next in chain: %s", code, ex)
+                last_error = ex
+                continue
+            self.router.record(code, (time.perf_counter() - start) * 1000, ok=True)
+            return response
+        raise RuntimeError(f"All models in chain {self.model_codes} failed") from last_error
+
+    def invoke(self, messages: Any, **kwargs: Any) -> Any:
+        last_error: Optional[BaseException] = None
+        for attempt, (code, model) in enumerate(self._attempts()):
+            if model is None:
+                self.router.record(code, 0.0, ok=False)
+                continue
+            if attempt:
+                self.router.record_fallback()
+            start = time.perf_counter()
+            try:
+                response = model.invoke(messages, **kwargs)
+            except Exception as ex:
+                self.router.record(code, (time.perf_counter() - start) * 1000, ok=False)
+                logger.warning("Model %s failed, trying next in chain: %s", code, ex)
+                last_error = ex
+                continue
+            self.router.record(code, (time.perf_counter() - start) * 1000, ok=True)
+            return response
+        raise RuntimeError(f"All models in chain {self.model_codes} failed") from last_error
+
+    async def astream(self, messages: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """Stream from the first healthy model; falls back only before the first chunk."""
+        last_error: Optional[BaseException] = None
+        for attempt, (code, model) in enumerate(self._attempts()):
+            if model is None:
+                self.router.record(code, 0.0, ok=False)
+                continue
+            if attempt:
+                self.router.record_fallback()
+            start = time.perf_counter()
+            streamed = False
+            try:
+                async for chunk in model.astream(messages, **kwargs):
+                    streamed = True
+                    yield chunk
+            except Exception as ex:
+                self.router.record(code, (time.perf_counter() - start) * 1000, ok=False)
+                if streamed:
+                    raise
+                logger.warning("Model %s failed before streaming, trying next in chain: %s", code, ex)
+                last_error = ex
+                continue
+            self.router.record(code, (time.perf_counter() - start) * 1000, ok=True)
+            return
+        raise RuntimeError(f"All models in chain {self.model_codes} failed") from last_error
+
+
+model_router = ModelRouter()
+
+
+def get_routed_model_instance(
+    model_config: Dict[str, Any],
+    temperature: float = 0.0,
+    default_code: str = "gpt-4.1",
+    node_name: str = "",
+    router: Optional[ModelRouter] = None,
+    factory: Optional[Callable[[str, float], Any]] = None,
+) -> Any:
+    """
+    Create the node's model: a plain chat model, or a RoutedChatModel when fallbacks are declared.
+
+    Args:
+        model_config: Node ``config.model`` ({"code", "fallbacks", "sloP95Ms", "timeoutMs"})
+        temperature: Sampling temperature
+        default_code: Primary code when none is configured
+        node_name: Node name used in validation errors
+        router: Health tracker (defaults to the process-wide router)
+        factory: fn(model code, temperature) -> chat model or None (injectable for fakes);
+            defaults to get_dynamic_model_instance, looked up at call time
+
+    Raises:
+        ValueError: When a declared fallback chain contains codes missing from llm_models.json
+    """
+    factory = factory or model_selection.get_dynamic_model_instance
+    codes = resolve_model_chain(model_config, default_code)
+    if len(codes) == 1:
+        return factory(codes[0], temperature)
+    validate_model_chain(codes, node_name)
+    slo = model_config.get("sloP95Ms")
+    timeout_ms = model_config.get("timeoutMs")
+    return RoutedChatModel(
+        [(code, factory(code, temperature)) for code in codes],
+        router or model_router,
+        slo_p95_ms=float(slo) if slo else None,
+        timeout_seconds=float(timeout_ms) / 1000 if timeout_ms else None,
+    )
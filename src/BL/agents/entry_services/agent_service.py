@@ -1,9 +1,10 @@
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator, Dict
 from fastapi import Request
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessageChunk, HumanMessage
 
 from BL.agents.entry_services.build_services.build_agents_provider_service import AgentFactoryProvider
+from BL.v3.streaming.token_channel import chunk_text
 from core.constant import AgentFactoryTypes, AGENTIC_WORKFLOW_JSON_PATH_SIMPLE, AGENTIC_WORKFLOW_JSON_PATH_COMPLEX
 
 
@@ -87,4 +88,70 @@ async def agent_invoke_complex(request: Request):
         return result
 
     except Exception as ex:
-        raise ex
\ No newline at end of file
+        raise ex
+
+async def agent_stream_simple(request: Request) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream tokens from the agent built from agentic_workflow_simple.json
+
+    Request body should contain:
+    {
+        "query": "User question or message"
+    }
+    """
+    query = await _read_query(request, agent_graph_simple)
+    return _astream_agent_tokens(agent_graph_simple, query)
+
+async def agent_stream_complex(request: Request) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream tokens from the agent built from agentic_workflow_complex.json
+
+    Request body should contain:
+    {
+        "query": "User question or message"
+    }
+    """
+    query = await _read_query(request, agent_graph_complex)
+    return _astream_agent_tokens(agent_graph_complex, query)
+
+async def _read_query(request: Request, agent_graph: Any) -> str:
+    """Validate the request payload and agent graph, and return the query"""
+    user_input = await request.json()
+
+    if 'query' not in user_input:
+        raise ValueError("Missing 'query' in request payload.")
+
+    if agent_graph is None:
+        raise ValueError("Agent graph is not properly initialized.")
+
+    return user_input['query']
+
+async def _astream_agent_tokens(agent_graph: Any, query: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the agent graph and yield LLM tokens as they are generated.
+
+    Uses LangGraph's "messages" stream mode, which captures tokens from chat model
+    calls inside nodes (including sub-agents invoked as tools), and "values" mode
+    to keep the final state.
+
+    Yields:
+        {"type": "token", "nodeId", "text"} events, then {"type": "final", "data": state}
+        or {"type": "error", "error": message}
+    """
+    final_state = None
+    try:
+        async for mode, payload in agent_graph.astream(
+            {"messages": [HumanMessage(content=query)], "iteration_count": 0},
+            stream_mode=["messages", "values"],
+        ):
+            if mode == "messages":
+                chunk, metadata = payload
+                if isinstance(chunk, AIMessageChunk):
+                    text = chunk_text(chunk.content)
+                    if text:
+                        yield {"type": "token", "nodeId": metadata.get("langgraph_node", ""), "text": text}
+            else:
+                final_state = payload
+        yield {"type": "final", "data": final_state}
+    except Exception as ex:
+        yield {"type": "error", "error": str(ex)}
@@ -3,12 +3,20 @@ from pathlib import Path
 from typing import Dict, Any, Optional, List
 
 from langgraph.graph import StateGraph, END
-from langchain_core.messages import SystemMessage, ToolMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 from langchain_openai import ChatOpenAI
 
 from BL.agents.build_tools.tools_factory_provider_service import ToolsFactoryProvider
 from BL.agents.states.state import CommonAgentState
-from BL.agents.agents_model.model_selection import get_dynamic_model_instance, get_default_model_name
+from BL.agents.agents_model.model_router import get_routed_model_instance
+from BL.agents.agents_model.model_selection import get_default_model_name
+from BL.v3.accounting.run_accounting import track_node
+from BL.v3.utils.context_window import ContextWindowManager, build_sync_llm_summarizer
+from BL.v3.utils.prompt_builder import CompiledPrompt
+from BL.v3.utils.token_usage import extract_model_name, extract_token_usage
+from BL.v3.utils.tool_call_memo import ToolCallMemo
+from BL.v3.utils.tool_ranker import ToolSelector
+from BL.v3.utils.variable_resolver import VariableResolver
 from core.constant import ToolsFactoryTypes
 
 
@@ -27,6 +35,7 @@ class LangGraphAgentWorkflowBuilder:
         self.edges = workflow["edges"]
 
         self._graph_cache = {}
+        self.variable_resolver = VariableResolver()
 
     # ---------- public ----------
 
@@ -56,15 +65,24 @@ class LangGraphAgentWorkflowBuilder:
         model_code = model_config.get("code", "gpt-4.1")
         model_name = get_default_model_name(model_code)
 
-        # Initialize model
-        llm = get_dynamic_model_instance(model_name, temperature=0.0)
+        # Initialize model (a routed fallback chain when model.fallbacks is declared)
+        llm = get_routed_model_instance(model_config, temperature=0.0, node_name=agent_node.get("name", ""))
         if llm is None:
             # Fallback to default model
             llm = ChatOpenAI(model="gpt-4o", temperature=0)
 
-        # Extract prompt template
+        # Compile the system prompt once: static prefix rendered now, templated suffix per call
         prompt_templates = agent_config.get("promptTemplate", [])
-        system_message = self._build_system_message(prompt_templates)
+        compiled_prompt = self._build_system_message(prompt_templates)
+        static_system_message = None
+        if compiled_prompt.is_static:
+            static_system_message = SystemMessage(
+                content=compiled_prompt.system_content(lambda text: text, model_name)
+            )
+
+        # Optional token budget for the prompt; evicted turns are summarized once into state
+        context_window = ContextWindowManager.from_config(agent_config.get("contextWindow"))
+        summarizer = build_sync_llm_summarizer(llm)
 
         # Extract max iterations
         max_iterations = agent_config.get("maxIterations", 10)
@@ -78,18 +96,69 @@ class LangGraphAgentWorkflowBuilder:
         # Build tools map for execution
         tools_by_name = {tool.name: tool for tool in tools}
 
+        # Optional relevance-ranked tool subset: index built once here, subset bound per call
+        tool_selector = ToolSelector.from_config(
+            agent_config.get("toolSelection"), [(tool.name, tool.description or "") for tool in tools]
+        )
+        bound_llms: Dict[tuple, Any] = {}
+
+        # Repeated calls in a run reuse the earlier result; a repeating call pattern ends the loop
+        tool_call_memo = ToolCallMemo.from_config(agent_config.get("toolCallDedup"))
+        answer_llm = llm.bind_tools(tools, tool_choice="none") if tools else llm
+
+        def select_llm(messages: List[Any]):
+            """Return the model bound to the tools relevant to the current turn."""
+            if tool_selector is None:
+                return llm_with_tools
+            query, called = "", set()
+            for message in reversed(messages):
+                if isinstance(message, AIMessage):
+                    called.update(call.get("name") for call in (message.tool_calls or []))
+                elif isinstance(message, HumanMessage):
+                    query = message.content if isinstance(message.content, str) else str(message.content)
+                    break
+            names = tuple(tool_selector.select(query, required=called))
+            if names not in bound_llms:
+                if len(bound_llms) >= 64:
+                    bound_llms.clear()
+                bound_llms[names] = llm.bind_tools([tools_by_name[name] for name in names])
+            return bound_llms[names]
+
         # Define agent node function
         def agent_node_fn(state: CommonAgentState):
             """Main agent reasoning node - calls LLM with tools"""
             messages = state.get("messages", [])
             iteration_count = state.get("iteration_count", 0)
 
-            # Add system message if not present
+            # Add system message if not present (static prefix first for provider prompt caching)
             if not messages or not isinstance(messages[0], SystemMessage):
-                messages = [SystemMessage(content=system_message)] + messages
-
-            # Call LLM
-            response = llm_with_tools.invoke(messages)
+                system_message = static_system_message or SystemMessage(
+                    content=compiled_prompt.system_content(
+                        lambda text: self.variable_resolver.resolve(text, state), model_name
+                    )
+                )
+                messages = [system_message] + messages
+
+            # Trim what is sent to the token budget; the full history stays in state
+            prompt_messages = messages
+            update = {}
+            if context_window is not None:
+                prompt_messages, summary_record, _ = context_window.fit(
+                    messages, state.get("context_summary"), summarizer
+                )
+                update["context_summary"] = summary_record
+
+            # Call LLM (timed and costed into the current run's accounting)
+            with track_node(agent_id, agent_node.get("name", ""), "agent") as accounting:
+                if state.get("loop_detected"):
+                    # Answer from the tool results so far instead of calling the same tools again
+                    response = answer_llm.invoke(prompt_messages)
+                else:
+                    response = select_llm(messages).invoke(prompt_messages)
+                accounting["usage"] = {
+                    **extract_token_usage(response),
+                    "model": extract_model_name(response, model_name),
+                }
 
             # Increment iteration count
             iteration_count += 1
@@ -97,7 +166,8 @@ class LangGraphAgentWorkflowBuilder:
             # Return updated state with new message and iteration count
             return {
                 "messages": messages + [response],
-                "iteration_count": iteration_count
+                "iteration_count": iteration_count,
+                **update,
             }
 
         # Define tool execution node
@@ -111,17 +181,34 @@ class LangGraphAgentWorkflowBuilder:
 
             tool_calls = last_message.tool_calls or []
             tool_messages = []
+            update = {}
+            memo = dict(state.get("tool_call_memo") or {})
+            if tool_call_memo is not None:
+                history = list(state.get("tool_call_history") or []) + [tool_call_memo.turn_signature(tool_calls)]
+                update = {"tool_call_history": history, "loop_detected": tool_call_memo.detect_loop(history)}
 
             for tool_call in tool_calls:
                 tool_name = tool_call.get("name")
                 tool_args = tool_call.get("args", {})
                 tool_call_id = tool_call.get("id")
 
-                if tool_name in tools_by_name:
+                earlier = tool_call_memo.lookup(memo, tool_name, tool_args) if tool_call_memo is not None else None
+                if earlier is not None:
+                    # Same call earlier in this run: reuse its result
+                    tool_messages.append(
+                        ToolMessage(
+                            content=earlier["content"],
+                            tool_call_id=tool_call_id,
+                            name=tool_name,
+                            additional_kwargs={"memoized": True, "sourceToolCallId": earlier["toolCallId"]},
+                        )
+                    )
+                elif tool_name in tools_by_name:
                     try:
                         # Execute the tool
                         tool = tools_by_name[tool_name]
-                        result = tool.invoke(tool_args)
+                        with track_node(tool_call_id or tool_name, tool_name, "tool"):
+                            result = tool.invoke(tool_args)
 
                         # Create tool message with result
                         tool_messages.append(
@@ -131,6 +218,11 @@ class LangGraphAgentWorkflowBuilder:
                                 name=tool_name
                             )
                         )
+                        if tool_call_memo is not None:
+                            memo[tool_call_memo.call_key(tool_name, tool_args)] = {
+                                "content": str(result),
+                                "toolCallId": tool_call_id,
+                            }
                     except Exception as e:
                         # Return error message
                         tool_messages.append(
@@ -150,7 +242,9 @@ class LangGraphAgentWorkflowBuilder:
                         )
                     )
 
-            return {"messages": messages + tool_messages}
+            if tool_call_memo is not None:
+                update["tool_call_memo"] = memo
+            return {"messages": messages + tool_messages, **update}
 
         # Define routing function
         def should_continue(state: CommonAgentState):
@@ -163,6 +257,10 @@ class LangGraphAgentWorkflowBuilder:
             if iteration_count >= max_iterations:
                 return "end"
 
+            # A repeating call pattern got one reply without tools; do not go back to the tools
+            if state.get("loop_detected"):
+                return "end"
+
             # If last message has tool calls, continue to tools
             if last_message and hasattr(last_message, "tool_calls") and last_message.tool_calls:
                 return "tools"
@@ -199,28 +297,14 @@ class LangGraphAgentWorkflowBuilder:
         self._graph_cache[agent_id] = compiled
         return compiled
 
-    def _build_system_message(self, prompt_templates: list) -> str:
-        """Extract and build system message from prompt templates"""
-        system_messages = []
-        user_messages = []
-
-        for template in prompt_templates:
-            role = template.get("role", "")
-            text = template.get("text", "")
-
-            if role == "system":
-                system_messages.append(text)
-            elif role == "user":
-                user_messages.append(text)
-
-        # Combine system messages
-        combined_system = "\n\n".join(system_messages) if system_messages else "You are a helpful AI assistant."
-
-        # If there are user message templates, add them as context
-        if user_messages:
-            combined_system += "\n\nUser context templates:\n" + "\n".join(user_messages)
-
-        return combined_system
+    def _build_system_message(self, prompt_templates: list) -> CompiledPrompt:
+        """Compile system message from prompt templates into a static prefix and a templated suffix"""
+        return CompiledPrompt.from_templates(
+            prompt_templates,
+            separator="\n\n",
+            include_user_templates=True,
+            default_system="You are a helpful AI assistant.",
+        )
 
 
     def _build_tools_for_agent(self, agent_id: str):
@@ -6,7 +6,7 @@ This module defines the extended agent state structure that supports:
 - Efficient state merging with reducer functions
 """
 
-from typing import Literal, List, Any
+from typing import Any, Dict, List, Literal
 from typing_extensions import TypedDict
 
 class Todo(TypedDict):
@@ -45,3 +45,10 @@ def file_reducer(left, right):
 class CommonAgentState(TypedDict, total=False):
     messages: List[Any]
     iteration_count: int
+    # Rolling summary of turns trimmed from the agent's context window
+    context_summary: Dict[str, Any]
+    # Results of this run's tool calls by tool name and arguments, and the call turns seen
+    tool_call_memo: Dict[str, Dict[str, Any]]
+    tool_call_history: List[str]
+    # Set when the agent repeated the same tool calls; the next reply is made without tools
+    loop_detected: bool
@@ -0,0 +1 @@
+"""Per-run node accounting (latency, tokens, cost) for v3 and legacy workflows."""
@@ -0,0 +1,65 @@
+"""Model price table keyed by the model codes in llm_models.json."""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+LLM_PRICES_PATH = Path(__file__).resolve().parent.parent.parent.parent / "core" / "jsons" / "llm_prices.json"
+
+_PER_TOKENS = 1_000_000
+
+
+@lru_cache(maxsize=1)
+def load_price_table() -> Dict[str, Dict[str, float]]:
+    """Return {model code: {"input", "cachedInput", "output"}} in USD per 1M tokens."""
+    data = json.loads(LLM_PRICES_PATH.read_text(encoding="utf-8"))
+    return data.get("prices", {})
+
+
+def lookup_price(model: str) -> Optional[Dict[str, float]]:
+    """
+    Find the price entry for a model name.
+
+    Provider-reported names (e.g. ``gpt-4.1-mini-2025-04-14``, ``models/gemini-2.5-flash``)
+    resolve to the longest catalog code they start with.
+
+    Args:
+        model: Model code or provider model name
+
+    Returns:
+        Price entry or None when the model is unknown
+    """
+    if not model:
+        return None
+    prices = load_price_table()
+    name = model.split("/")[-1].split(":")[-1]
+    if name in prices:
+        return prices[name]
+    matches = [code for code in prices if name.startswith(code)]
+    return prices[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    """
+    Estimate the USD cost of one call.
+
+    Args:
+        model: Model code or provider model name
+        input_tokens: Prompt tokens, including cached ones
+        output_tokens: Completion tokens
+        cached_tokens: Prompt tokens served from the provider cache
+
+    Returns:
+        Cost in USD, or None when the model has no price entry
+    """
+    price = lookup_price(model)
+    if price is None:
+        return None
+    cached = min(cached_tokens, input_tokens)
+    cost = (
+        (input_tokens - cached) * price.get("input", 0.0)
+        + cached * price.get("cachedInput", price.get("input", 0.0))
+        + output_tokens * price.get("output", 0.0)
+    )
+    return cost / _PER_TOKENS
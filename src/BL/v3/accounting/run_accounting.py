@@ -0,0 +1,217 @@
+"""Per-run node accounting bound to the current request via a ContextVar, plus per-workflow histograms."""
+
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from BL.v3.accounting.price_table import estimate_cost
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+COST_BUCKETS_USD = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+_SERVER_TIMING_NAME = re.compile(r"[^A-Za-z0-9_\-]")
+
+
+class RunAccounting:
+    """Collects one record per node execution for a single run (request)."""
+
+    def __init__(self, workflow: str = ""):
+        """
+        Initialize run accounting.
+
+        Args:
+            workflow: Workflow key the run is reported under (file name or workflow ID)
+        """
+        self.workflow = workflow
+        # Identifies the run in reports and in the chat history store
+        self.run_id = uuid.uuid4().hex
+        # Run cache status set by ainvoke_workflow ("hit", "miss", ...), None when not consulted
+        self.cache_status: Optional[str] = None
+        self.started_at = time.perf_counter()
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        node_id: str,
+        node_name: str,
+        node_type: str,
+        start: float,
+        end: float,
+        usage: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Record one node execution.
+
+        Queue time is the gap between the node starting and the latest earlier node
+        (or the run itself) finishing, i.e. time spent ready but not yet running.
+
+        Args:
+            node_id: Node ID
+            node_name: Node name
+            node_type: Node type
+            start: perf_counter() at node start
+            end: perf_counter() at node end
+            usage: {"inputTokens", "outputTokens", "cachedTokens", "model"} for LLM nodes
+        """
+        usage = usage or {}
+        input_tokens = int(usage.get("inputTokens", 0) or 0)
+        output_tokens = int(usage.get("outputTokens", 0) or 0)
+        cached_tokens = int(usage.get("cachedTokens", 0) or 0)
+        model = usage.get("model", "") or ""
+        cost = estimate_cost(model, input_tokens, output_tokens, cached_tokens) if model else None
+        with self._lock:
+            ready_at = max((r["_end"] for r in self.records if r["_end"] <= start), default=self.started_at)
+            self.records.append(
+                {
+                    "nodeId": node_id,
+                    "nodeName": node_name,
+                    "nodeType": node_type,
+                    "wallMs": round((end - start) * 1000, 3),
+                    "queueMs": round(max(0.0, start - ready_at) * 1000, 3),
+                    "inputTokens": input_tokens,
+                    "outputTokens": output_tokens,
+                    "cachedTokens": cached_tokens,
+                    "model": model,
+                    "costUsd": round(cost, 8) if cost is not None else None,
+                    "_start": start,
+                    "_end": end,
+                }
+            )
+
+    def report(self) -> Dict[str, Any]:
+        """Per-node records in start order and run totals."""
+        with self._lock:
+            records = sorted(self.records, key=lambda r: r["_start"])
+        nodes = [{k: v for k, v in r.items() if not k.startswith("_")} for r in records]
+        end = max((r["_end"] for r in records), default=time.perf_counter())
+        return {
+            "runId": self.run_id,
+            "workflow": self.workflow,
+            "runCache": self.cache_status,
+            "totalMs": round((end - self.started_at) * 1000, 3),
+            "nodes": nodes,
+            "totals": {
+                "nodeCount": len(nodes),
+                "inputTokens": sum(n["inputTokens"] for n in nodes),
+                "outputTokens": sum(n["outputTokens"] for n in nodes),
+                "cachedTokens": sum(n["cachedTokens"] for n in nodes),
+                "costUsd": round(sum(n["costUsd"] or 0.0 for n in nodes), 8),
+            },
+        }
+
+    def server_timing(self, max_entries: int = 30) -> str:
+        """
+        Render a ``Server-Timing`` header value: the run total, then the slowest nodes.
+
+        Args:
+            max_entries: Maximum node entries (headers must stay small)
+        """
+        report = self.report()
+        entries = [f'total;desc="{self.workflow or "run"}";dur={report["totalMs"]}']
+        slowest = sorted(report["nodes"], key=lambda n: n["wallMs"], reverse=True)[:max_entries]
+        for index, node in enumerate(slowest):
+            name = _SERVER_TIMING_NAME.sub("_", node["nodeName"] or node["nodeId"]) or "node"
+            entries.append(f'n{index}-{name};desc="{node["nodeType"]}";dur={node["wallMs"]}')
+        return ", ".join(entries)
+
+
+_current_run: ContextVar[Optional[RunAccounting]] = ContextVar("v3_run_accounting", default=None)
+
+
+def get_run_accounting() -> Optional[RunAccounting]:
+    """Return the accounting of the current run, or None when nothing is being accounted."""
+    return _current_run.get()
+
+
+@contextmanager
+def bind_run_accounting(run: RunAccounting) -> Iterator[RunAccounting]:
+    """Make ``run`` the current run accounting for this context (and tasks it spawns)."""
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+
+@contextmanager
+def track_node(node_id: str, node_name: str, node_type: str) -> Iterator[Dict[str, Any]]:
+    """
+    Time a node execution and record it in the current run (no-op without one).
+
+    The yielded dict may be filled with ``usage`` before the block exits.
+    """
+    run = _current_run.get()
+    slot: Dict[str, Any] = {}
+    if run is None:
+        yield slot
+        return
+    start = time.perf_counter()
+    try:
+        yield slot
+    finally:
+        run.record(node_id, node_name, node_type, start, time.perf_counter(), slot.get("usage"))
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{b}" for b in self.buckets] + ["le_inf"]
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class WorkflowHistograms:
+    """Per-workflow histograms of run latency, run cost and per-node latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._workflows: Dict[str, Dict[str, Any]] = {}
+
+    def observe(self, run: RunAccounting) -> None:
+        """Roll a finished run up into its workflow's histograms."""
+        report = run.report()
+        if not report["nodes"]:
+            return
+        with self._lock:
+            entry = self._workflows.setdefault(
+                report["workflow"] or "unknown",
+                {"runMs": _Histogram(LATENCY_BUCKETS_MS), "costUsd": _Histogram(COST_BUCKETS_USD), "nodes": {}},
+            )
+            entry["runMs"].observe(report["totalMs"])
+            entry["costUsd"].observe(report["totals"]["costUsd"])
+            for node in report["nodes"]:
+                key = node["nodeName"] or node["nodeId"]
+                entry["nodes"].setdefault(key, _Histogram(LATENCY_BUCKETS_MS)).observe(node["wallMs"])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                workflow: {
+                    "runMs": entry["runMs"].to_dict(),
+                    "costUsd": entry["costUsd"].to_dict(),
+                    "nodeMs": {name: h.to_dict() for name, h in entry["nodes"].items()},
+                }
+                for workflow, entry in self._workflows.items()
+            }
+
+
+workflow_histograms = WorkflowHistograms()
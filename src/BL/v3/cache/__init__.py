@@ -0,0 +1 @@
+"""Caching components for v3 workflow system."""
@@ -0,0 +1,197 @@
+"""Cross-turn memoization of node results, stored with the conversation state."""
+
+import copy
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from BL.v3.utils.fingerprint import request_fingerprint
+
+# state["metadata"][MEMO_KEY][node_id] -> memo entry
+MEMO_KEY = "nodeMemo"
+DEFAULT_TTL_SECONDS = 600
+
+
+class MemoStats:
+    """Process-level counters of node memo lookups."""
+
+    def __init__(self):
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0}
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self._counters[name] += amount
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters; ``hitRate`` is hits / lookups."""
+        stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hitRate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+memo_stats = MemoStats()
+
+
+class NodeMemo:
+    """
+    Memo policy of one node, from its ``config.memoize``.
+
+    ``memoize`` is ``true`` or an object:
+    - ``ttlSeconds``: Lifetime of an entry (default 600)
+    - ``dependsOn``: Extra state expressions (e.g. ``flow.contractStatus``) that join the
+      fingerprint, so the entry is not reused once one of them changes
+    - ``invalidatedBy``: Node IDs or names whose run drops the entry (e.g. a tool that
+      updates the contract the memoized tool reads)
+
+    Entries live in ``state["metadata"]["nodeMemo"][<node ID>]``, one per node (the
+    latest successful request), and follow the conversation state from turn to turn.
+    """
+
+    __slots__ = ("node_id", "ttl_seconds", "depends_on", "invalidated_by")
+
+    def __init__(
+        self,
+        node_id: str,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        depends_on: Optional[List[str]] = None,
+        invalidated_by: Optional[List[str]] = None,
+    ):
+        self.node_id = node_id
+        self.ttl_seconds = ttl_seconds
+        self.depends_on = list(depends_on or [])
+        self.invalidated_by = list(invalidated_by or [])
+
+    @classmethod
+    def for_node(cls, node_config: Dict[str, Any]) -> Optional["NodeMemo"]:
+        """Memo policy of a node, or None when the node does not opt in."""
+        setting = node_config.get("config", {}).get("memoize")
+        if not setting:
+            return None
+        setting = setting if isinstance(setting, dict) else {}
+        return cls(
+            node_config.get("id", ""),
+            float(setting.get("ttlSeconds", DEFAULT_TTL_SECONDS)),
+            setting.get("dependsOn"),
+            setting.get("invalidatedBy"),
+        )
+
+    def key(self, request_key: str, resolve: Callable[[str], Any]) -> str:
+        """
+        Memo key of a request.
+
+        Args:
+            request_key: Fingerprint of the upstream request (identity and resolved inputs)
+            resolve: ``template -> value`` on the current state, for ``dependsOn``
+        """
+        depends = {expression: resolve("{{" + expression + "}}") for expression in self.depends_on}
+        return request_fingerprint("memo", request_key, depends)
+
+    def is_live(self, state: Dict[str, Any], key: str) -> bool:
+        """Whether a lookup of ``key`` would hit (not counted in the memo stats)."""
+        entry = ((state.get("metadata") or {}).get(MEMO_KEY) or {}).get(self.node_id)
+        return entry is not None and entry.get("key") == key and time.time() < entry.get("expiresAt", 0)
+
+    def lookup(self, state: Dict[str, Any], key: str) -> Optional[Dict[str, Any]]:
+        """
+        Memoized output for ``key``.
+
+        Returns:
+            A copy of the output with a ``memo`` audit entry, or None (miss or expired)
+        """
+        entry = ((state.get("metadata") or {}).get(MEMO_KEY) or {}).get(self.node_id)
+        if entry is None or entry.get("key") != key:
+            memo_stats.count("misses")
+            return None
+        now = time.time()
+        if now >= entry.get("expiresAt", 0):
+            memo_stats.count("expired")
+            memo_stats.count("misses")
+            return None
+        memo_stats.count("hits")
+        output = copy.deepcopy(entry["output"])
+        if isinstance(output.get("usage"), dict):
+            # No tokens were spent on this turn
+            output["usage"] = {**output["usage"], "inputTokens": 0, "outputTokens": 0, "cachedTokens": 0}
+        output["memo"] = {"hit": True, "key": key[:16], "ageSeconds": round(now - entry.get("storedAt", now), 3)}
+        return output
+
+    def store(self, state: Dict[str, Any], key: str, output: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Record ``output`` for ``key`` and mark it as a miss.
+
+        Returns:
+            Updated state (``metadata`` copied, not mutated)
+        """
+        now = time.time()
+        entry = {
+            "key": key,
+            "output": copy.deepcopy(output),
+            "storedAt": now,
+            "expiresAt": now + self.ttl_seconds,
+            "invalidatedBy": self.invalidated_by,
+        }
+        output["memo"] = {"hit": False, "key": key[:16]}
+        metadata = state.get("metadata") or {}
+        memos = {**(metadata.get(MEMO_KEY) or {}), self.node_id: entry}
+        return {**state, "metadata": {**metadata, MEMO_KEY: memos}}
+
+
+async def call_memoized(
+    node_config: Dict[str, Any],
+    state: Dict[str, Any],
+    request_key: str,
+    call: Callable[[], Awaitable[Dict[str, Any]]],
+    resolve: Callable[[str], Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Run ``call`` unless the node opted in to memoization and has a live entry for this request.
+
+    Args:
+        node_config: Node configuration (``config.memoize``)
+        state: Current state
+        request_key: Fingerprint of the upstream request (identity and resolved inputs)
+        call: Zero-argument coroutine factory returning the node output
+        resolve: ``template -> value`` on the current state (for ``dependsOn``)
+
+    Returns:
+        (output, state carrying the new memo entry)
+    """
+    memo = NodeMemo.for_node(node_config)
+    if memo is None:
+        return await call(), state
+    key = memo.key(request_key, resolve)
+    output = memo.lookup(state, key)
+    if output is not None:
+        return output, state
+    output = await call()
+    if "error" in output:
+        # Failures are not memoized
+        return output, state
+    return output, memo.store(state, key, output)
+
+
+def invalidate_memos(state: Dict[str, Any], node_id: str, node_name: str = "") -> Dict[str, Any]:
+    """
+    Drop the memo entries that list ``node_id`` (or ``node_name``) in ``invalidatedBy``.
+
+    Args:
+        state: State after the node ran
+        node_id: Node that ran
+        node_name: Its name
+
+    Returns:
+        ``state``, or an updated copy when entries were dropped
+    """
+    metadata = state.get("metadata") or {}
+    memos = metadata.get(MEMO_KEY)
+    if not memos:
+        return state
+    names = {node_id, node_name} - {""}
+    kept = {
+        memo_node: entry
+        for memo_node, entry in memos.items()
+        if not names.intersection(entry.get("invalidatedBy") or ())
+    }
+    if len(kept) == len(memos):
+        return state
+    memo_stats.count("invalidated", len(memos) - len(kept))
+    return {**state, "metadata": {**metadata, MEMO_KEY: kept}}
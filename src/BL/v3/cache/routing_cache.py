@@ -0,0 +1,292 @@
+"""Near-duplicate query cache for stateless routing decisions (MinHash + LSH)."""
+
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+# Mersenne prime used for the universal hash permutations
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NORMALIZE_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures over character shingles of a normalized query.
+
+    Everything is local and deterministic (fixed seed), so signatures are stable
+    across processes and need no embeddings or network calls.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 4, seed: int = 1):
+        """
+        Initialize the hasher.
+
+        Args:
+            num_perm: Number of hash permutations (signature length)
+            shingle_size: Character shingle length
+            seed: Seed for the permutation coefficients
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def shingles(self, text: str) -> FrozenSet[str]:
+        """Normalize text and return its set of character shingles."""
+        normalized = _NORMALIZE_PATTERN.sub(" ", (text or "").lower()).strip()
+        if len(normalized) <= self.shingle_size:
+            return frozenset([normalized]) if normalized else frozenset()
+        return frozenset(
+            normalized[i:i + self.shingle_size]
+            for i in range(len(normalized) - self.shingle_size + 1)
+        )
+
+    def signature(self, shingles: FrozenSet[str]) -> Tuple[int, ...]:
+        """Compute the MinHash signature of a shingle set."""
+        if not shingles:
+            return tuple([_MAX_HASH] * self.num_perm)
+        hashed = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+            for s in shingles
+        ]
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashed)
+            for a, b in self._permutations
+        )
+
+
+def _choose_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) with bands * rows == num_perm whose S-curve knee is closest to threshold."""
+    best = (1, num_perm)
+    best_error = float("inf")
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        knee = (1.0 / bands) ** (1.0 / rows)
+        # Bias slightly below the threshold so near matches become candidates;
+        # candidates are verified with exact Jaccard afterwards.
+        error = abs(knee - (threshold - 0.05))
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class _CacheEntry:
+    """A cached decision with the data needed to verify and evict it."""
+
+    __slots__ = ("query", "shingles", "band_keys", "decision", "created_at")
+
+    def __init__(self, query: str, shingles: FrozenSet[str], band_keys: List[Tuple[int, int]], decision: Any):
+        self.query = query
+        self.shingles = shingles
+        self.band_keys = band_keys
+        self.decision = decision
+        self.created_at = time.monotonic()
+
+
+class RoutingDecisionCache:
+    """
+    Caches routing decisions keyed by query text and reuses them for near-duplicates.
+
+    A new query hits when its exact shingle Jaccard similarity with a cached query
+    is at least ``threshold``. LSH banding keeps lookup cost independent of the
+    number of cached queries.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = 3600.0,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum Jaccard similarity for a hit (0..1)
+            num_perm: MinHash signature length
+            max_entries: Maximum number of cached queries (LRU eviction)
+            ttl_seconds: Entry lifetime; None disables expiry
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands, self.rows = _choose_bands(threshold, num_perm)
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, int], Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._counters = {"lookups": 0, "hits": 0, "misses": 0, "stores": 0, "evictions": 0, "falsePositives": 0}
+
+    def lookup(self, query: str) -> Optional[Any]:
+        """
+        Return the cached decision for a near-duplicate query, or None.
+
+        Args:
+            query: Incoming user query
+
+        Returns:
+            Cached decision or None on miss
+        """
+        shingles = self.hasher.shingles(query)
+        band_keys = self._band_keys(shingles)
+        with self._lock:
+            self._counters["lookups"] += 1
+            best_id, best_score = None, 0.0
+            for entry_id in self._candidates(band_keys):
+                entry = self._entries[entry_id]
+                if self._is_expired(entry):
+                    continue
+                score = _jaccard(shingles, entry.shingles)
+                if score >= self.threshold and score > best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self._counters["hits"] += 1
+            return self._entries[best_id].decision
+
+    def store(self, query: str, decision: Any) -> None:
+        """
+        Cache a decision for a query.
+
+        Args:
+            query: User query the decision was made for
+            decision: Decision payload (must be treated as immutable by callers)
+        """
+        shingles = self.hasher.shingles(query)
+        if not shingles:
+            return
+        band_keys = self._band_keys(shingles)
+        with self._lock:
+            self._purge_expired()
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _CacheEntry(query, shingles, band_keys, decision)
+            for key in band_keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            self._counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                oldest_id = next(iter(self._entries))
+                self._remove(oldest_id)
+                self._counters["evictions"] += 1
+
+    def report_false_positive(self, query: str) -> None:
+        """
+        Record that a hit for ``query`` returned a wrong decision and drop the matching entries.
+
+        Args:
+            query: Query whose cached decision turned out to be wrong
+        """
+        shingles = self.hasher.shingles(query)
+        band_keys = self._band_keys(shingles)
+        with self._lock:
+            self._counters["falsePositives"] += 1
+            for entry_id in list(self._candidates(band_keys)):
+                if _jaccard(shingles, self._entries[entry_id].shingles) >= self.threshold:
+                    self._remove(entry_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and configuration for metrics reporting."""
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        hits = counters["hits"]
+        counters["hitRate"] = hits / counters["lookups"] if counters["lookups"] else 0.0
+        counters["falsePositiveRate"] = counters["falsePositives"] / hits if hits else 0.0
+        counters.update({"size": size, "threshold": self.threshold, "bands": self.bands, "rows": self.rows})
+        return counters
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def _band_keys(self, shingles: FrozenSet[str]) -> List[Tuple[int, int]]:
+        signature = self.hasher.signature(shingles)
+        return [
+            (band, hash(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def _candidates(self, band_keys: List[Tuple[int, int]]) -> Set[int]:
+        candidates: Set[int] = set()
+        for key in band_keys:
+            candidates.update(self._buckets.get(key, ()))
+        return candidates
+
+    def _is_expired(self, entry: _CacheEntry) -> bool:
+        return self.ttl_seconds is not None and time.monotonic() - entry.created_at > self.ttl_seconds
+
+    def _purge_expired(self) -> None:
+        if self.ttl_seconds is None:
+            return
+        # Entries are in LRU order, not creation order, so scan all of them
+        for entry_id in [i for i, e in self._entries.items() if self._is_expired(e)]:
+            self._remove(entry_id)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for key in entry.band_keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+
+def _jaccard(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+# Process-level caches, one per routing node (keyed by workflow/node)
+_routing_caches: Dict[str, RoutingDecisionCache] = {}
+_routing_caches_lock = threading.Lock()
+
+
+def get_routing_cache(cache_key: str, cache_config: Optional[Dict[str, Any]] = None) -> RoutingDecisionCache:
+    """
+    Get or create the routing cache for a node.
+
+    Args:
+        cache_key: Unique key for the routing node ("<workflowId>:<version>:<nodeId>")
+        cache_config: Node ``routingCache`` config (threshold, numPerm, maxEntries, ttlSeconds)
+
+    Returns:
+        RoutingDecisionCache instance
+    """
+    cache = _routing_caches.get(cache_key)
+    if cache is not None:
+        return cache
+    cache_config = cache_config or {}
+    with _routing_caches_lock:
+        if cache_key not in _routing_caches:
+            _routing_caches[cache_key] = RoutingDecisionCache(
+                threshold=float(cache_config.get("threshold", 0.85)),
+                num_perm=int(cache_config.get("numPerm", 128)),
+                max_entries=int(cache_config.get("maxEntries", 1024)),
+                ttl_seconds=cache_config.get("ttlSeconds", 3600.0),
+            )
+        return _routing_caches[cache_key]
+
+
+def routing_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Return stats for every routing cache, keyed by cache key."""
+    return {key: cache.stats() for key, cache in list(_routing_caches.items())}
@@ -0,0 +1,322 @@
+"""Full-run result cache for deterministic, side-effect free workflows."""
+
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+
+from BL.v3.utils.fingerprint import request_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Cache modes of one invocation
+USE = "use"  # Return a cached result, else run and store
+REFRESH = "refresh"  # Run and store, ignoring a cached result
+BYPASS = "bypass"  # Run without reading or writing the cache
+
+DEFAULT_TTL_SECONDS = 300.0
+
+# Node types that never have side effects or read state outside the run
+_PURE_NODE_TYPES = (
+    "start", "end", "output", "rule", "variable", "variable update", "variable-update", "llm", "agent"
+)
+
+
+def run_cache_enabled(override: Optional[bool] = None) -> bool:
+    """True when V3_RUN_CACHE=1 (off by default), unless ``override`` is set."""
+    if override is not None:
+        return override
+    return os.getenv("V3_RUN_CACHE", "0").lower() in ("1", "true", "yes")
+
+
+def run_cache_mode(headers: Mapping[str, str]) -> str:
+    """
+    Cache mode requested by HTTP headers.
+
+    ``X-Run-Cache: bypass|refresh`` is explicit; otherwise ``Cache-Control: no-store``
+    bypasses the cache and ``Cache-Control: no-cache`` refreshes it.
+
+    Args:
+        headers: Request headers (case-insensitive mapping)
+
+    Returns:
+        USE, REFRESH or BYPASS
+    """
+    explicit = (headers.get("x-run-cache") or "").strip().lower()
+    if explicit in (USE, REFRESH, BYPASS):
+        return explicit
+    directives = {part.strip().lower() for part in (headers.get("cache-control") or "").split(",")}
+    if "no-store" in directives:
+        return BYPASS
+    if "no-cache" in directives:
+        return REFRESH
+    return USE
+
+
+def node_refusal(node: Dict[str, Any], child_policies: Mapping[str, "RunCachePolicy"]) -> str:
+    """
+    Why a node's result may depend on more than the run inputs, or have side effects.
+
+    Tool nodes must be marked ``config.idempotent``; HTTP nodes must also use GET;
+    workflow nodes must embed a child that is cacheable itself.
+
+    Args:
+        node: Workflow node definition
+        child_policies: Policies of embedded child workflows by workflow node ID
+
+    Returns:
+        Refusal reason, or "" when the node is fine
+    """
+    node_type = node.get("type", "")
+    config = node.get("config", {}) or {}
+    label = node.get("name") or node.get("id", "")
+    if node_type in _PURE_NODE_TYPES:
+        return ""
+    if node_type == "tool":
+        return "" if config.get("idempotent") is True else f"tool node {label} is not marked idempotent"
+    if node_type in ("http request", "http-request"):
+        if str(config.get("method", "GET")).upper() != "GET":
+            return f"http node {label} uses {config.get('method')}"
+        return "" if config.get("idempotent") is True else f"http node {label} is not marked idempotent"
+    if node_type == "workflow":
+        child = child_policies.get(node.get("id", ""))
+        if child is None:
+            return f"workflow node {label} loads its child at run time"
+        return f"workflow node {label}: {child.refusal}" if child.refusal else ""
+    return f"node {label} has type {node_type!r}"
+
+
+class RunCachePolicy:
+    """
+    Whether and how runs of one compiled workflow are cached.
+
+    The version is a digest of the analyzed definition (and of embedded children),
+    so a hot reload or edit never serves results of the previous definition.
+    """
+
+    __slots__ = ("workflow_id", "version", "ttl_seconds", "refusal")
+
+    def __init__(self, workflow_id: str, version: str, ttl_seconds: float, refusal: str = ""):
+        """
+        Args:
+            workflow_id: Workflow ID
+            version: Digest of the compiled definition
+            ttl_seconds: Lifetime of cached results
+            refusal: Why runs are not cached ("" when they are)
+        """
+        self.workflow_id = workflow_id
+        self.version = version
+        self.ttl_seconds = ttl_seconds
+        self.refusal = refusal
+
+    @classmethod
+    def for_workflow(
+        cls, workflow_definition: Dict[str, Any], child_policies: Mapping[str, "RunCachePolicy"]
+    ) -> "RunCachePolicy":
+        """
+        Decide cacheability of a workflow by static analysis of its nodes.
+
+        A top-level ``"runCache": {"enable": false, "ttlSeconds": 60}`` in the
+        definition opts out or sets the TTL (default V3_RUN_CACHE_TTL, 300 seconds).
+
+        Args:
+            workflow_definition: Analyzed workflow definition
+            child_policies: Policies of embedded child workflows by workflow node ID
+
+        Returns:
+            RunCachePolicy of the workflow
+        """
+        settings = workflow_definition.get("runCache") or {}
+        ttl_seconds = float(settings.get("ttlSeconds", os.getenv("V3_RUN_CACHE_TTL", DEFAULT_TTL_SECONDS)))
+        versions = {node_id: child.version for node_id, child in child_policies.items()}
+        workflow_id = workflow_definition.get("agenticWorkflowId", "")
+        version = request_fingerprint("workflow", workflow_id, [workflow_definition, versions])
+        refusal = "" if settings.get("enable", True) else "disabled by runCache.enable"
+        for node in workflow_definition.get("nodes", []):
+            refusal = refusal or node_refusal(node, child_policies)
+        return cls(workflow_id, version, ttl_seconds, refusal)
+
+    def key(self, initial_state: Dict[str, Any]) -> str:
+        """Cache key of a run: workflow version and the canonical initial state."""
+        return request_fingerprint("run", self.version, initial_state)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cacheable": not self.refusal,
+            "reason": self.refusal,
+            "version": self.version[:16],
+            "ttlSeconds": self.ttl_seconds,
+        }
+
+
+class RunCacheBackend(ABC):
+    """Storage of serialized run results, shared by every workflow of the process."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Return the stored value for ``key``, or None when missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        """Store ``value`` under ``key`` for ``ttl_seconds``."""
+
+
+class MemoryRunCacheBackend(RunCacheBackend):
+    """Per-process LRU backend with expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[1]:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    async def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisRunCacheBackend(RunCacheBackend):
+    """
+    Backend shared by every worker through Redis (``redis`` package, asyncio client).
+
+    Expiry is left to Redis (``SET ... PX``).
+    """
+
+    def __init__(self, url: str, prefix: str = "v3:run:"):
+        # Imported here: redis is only needed when this backend is configured
+        from redis import asyncio as redis_asyncio
+
+        self.prefix = prefix
+        self._client = redis_asyncio.from_url(url)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self._client.get(self.prefix + key)
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        await self._client.set(self.prefix + key, value, px=max(1, int(ttl_seconds * 1000)))
+
+
+class RunCacheStats:
+    """Process-level counters of run cache lookups."""
+
+    def __init__(self):
+        self._counters = {
+            "hits": 0, "misses": 0, "stores": 0, "refreshed": 0, "bypassed": 0, "ineligible": 0,
+            "unserializable": 0, "backendErrors": 0,
+        }
+
+    def count(self, name: str) -> None:
+        self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters; ``hitRate`` is hits / lookups."""
+        stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hitRate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+run_cache_stats = RunCacheStats()
+_backend: Optional[RunCacheBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_run_cache_backend() -> RunCacheBackend:
+    """
+    Return the process-wide backend (built on first use).
+
+    V3_RUN_CACHE_BACKEND selects ``memory`` (default, V3_RUN_CACHE_MAX_ENTRIES entries)
+    or ``redis`` (V3_RUN_CACHE_REDIS_URL).
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if os.getenv("V3_RUN_CACHE_BACKEND", "memory").lower() == "redis":
+                    _backend = RedisRunCacheBackend(os.getenv("V3_RUN_CACHE_REDIS_URL", "redis://localhost:6379/0"))
+                else:
+                    _backend = MemoryRunCacheBackend(int(os.getenv("V3_RUN_CACHE_MAX_ENTRIES", "1024")))
+    return _backend
+
+
+def set_run_cache_backend(backend: Optional[RunCacheBackend]) -> None:
+    """Replace the process-wide backend (None: rebuild from the environment on next use)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+async def cached_run(
+    policy: Optional[RunCachePolicy],
+    initial_state: Dict[str, Any],
+    run: Callable[[], Awaitable[Dict[str, Any]]],
+    mode: str = USE,
+) -> Tuple[Dict[str, Any], str]:
+    """
+    Run a workflow through the run cache.
+
+    Backend failures never fail the run: the run goes ahead uncached.
+
+    Args:
+        policy: Run cache policy of the compiled graph (None: not cacheable)
+        initial_state: Initial state of the run (the cache key input)
+        run: Zero-argument coroutine factory running the workflow
+        mode: USE, REFRESH or BYPASS
+
+    Returns:
+        (final state, cache status: "hit", "miss", "refresh", "bypass" or "ineligible")
+    """
+    if mode == BYPASS:
+        run_cache_stats.count("bypassed")
+        return await run(), BYPASS
+    if policy is None or policy.refusal:
+        run_cache_stats.count("ineligible")
+        return await run(), "ineligible"
+
+    backend = get_run_cache_backend()
+    key = policy.key(initial_state)
+    if mode == USE:
+        try:
+            cached = await backend.get(key)
+        except Exception as ex:
+            logger.warning("Run cache lookup failed for %s: %s", policy.workflow_id, ex)
+            run_cache_stats.count("backendErrors")
+            cached = None
+        if cached is not None:
+            run_cache_stats.count("hits")
+            return json.loads(cached), "hit"
+        run_cache_stats.count("misses")
+    else:
+        run_cache_stats.count("refreshed")
+
+    result = await run()
+    try:
+        payload = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+    except (TypeError, ValueError):
+        run_cache_stats.count("unserializable")
+        return result, "miss" if mode == USE else REFRESH
+    try:
+        await backend.set(key, payload, policy.ttl_seconds)
+        run_cache_stats.count("stores")
+    except Exception as ex:
+        logger.warning("Run cache store failed for %s: %s", policy.workflow_id, ex)
+        run_cache_stats.count("backendErrors")
+    return result, "miss" if mode == USE else REFRESH
@@ -0,0 +1,105 @@
+"""Process-level single-flight coalescing of identical in-flight upstream calls."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class _Flight:
+    """One upstream call in flight and the number of callers awaiting it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Shares one upstream call between concurrent callers with the same key.
+
+    The first caller for a key starts the call in its own task; every caller
+    (including the first) awaits that task through a shield, so a cancelled caller
+    only stops waiting. The call is cancelled when its last caller leaves. Nothing
+    is cached once the call completes, so only truly concurrent duplicates are
+    coalesced.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize the group.
+
+        Args:
+            name: Group name used in metrics
+        """
+        self.name = name
+        self._in_flight: Dict[Tuple[int, str], _Flight] = {}
+        self._counters = {"calls": 0, "upstreamCalls": 0, "coalesced": 0, "errors": 0, "cancelled": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` once for all concurrent callers sharing ``key``.
+
+        Args:
+            key: Canonical request fingerprint
+            fn: Zero-argument coroutine factory performing the upstream call
+
+        Returns:
+            (result, led): result of the (shared) upstream call, which callers must not
+            mutate, and whether this caller started it. Only the caller that led a call
+            should account for its cost.
+        """
+        loop = asyncio.get_running_loop()
+        # Tasks are bound to their event loop; scope keys per loop
+        flight_key = (id(loop), key)
+        self._counters["calls"] += 1
+
+        flight = self._in_flight.get(flight_key)
+        led = flight is None
+        if not led:
+            self._counters["coalesced"] += 1
+        else:
+            flight = _Flight(loop.create_task(fn()))
+            self._in_flight[flight_key] = flight
+            self._counters["upstreamCalls"] += 1
+            flight.task.add_done_callback(lambda task: self._finished(flight_key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), led
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Last caller gone: nobody needs the result; later callers start afresh
+                self._counters["cancelled"] += 1
+                if self._in_flight.get(flight_key) is flight:
+                    del self._in_flight[flight_key]
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _finished(self, flight_key: Tuple[int, str], flight: _Flight) -> None:
+        if self._in_flight.get(flight_key) is flight:
+            del self._in_flight[flight_key]
+        if not flight.task.cancelled() and flight.task.exception() is not None:
+            # exception() also marks it retrieved, so a failure nobody awaited is not logged
+            self._counters["errors"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return counters; ``coalesced`` is the number of upstream calls saved and
+        ``cancelled`` the calls cancelled because every caller left.
+        """
+        stats = dict(self._counters)
+        stats["inFlight"] = len(self._in_flight)
+        return stats
+
+
+# Process-level groups, one per upstream kind
+llm_single_flight = SingleFlight("llm")
+tool_single_flight = SingleFlight("tool")
+
+
+def single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    """Return stats for every single-flight group."""
+    return {group.name: group.stats() for group in (llm_single_flight, tool_single_flight)}
@@ -0,0 +1,177 @@
+"""Speculative prefetch of idempotent tool and HTTP calls while the step before them runs."""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Node types whose upstream call may be started ahead of time (when marked idempotent)
+PREFETCH_NODE_TYPES = ("tool", "http request", "http-request")
+
+
+def speculative_prefetch_enabled(override: Optional[bool] = None) -> bool:
+    """True when V3_SPECULATIVE_PREFETCH=1 (off by default), unless ``override`` is set."""
+    if override is not None:
+        return override
+    return os.getenv("V3_SPECULATIVE_PREFETCH", "0").lower() in ("1", "true", "yes")
+
+
+def is_prefetchable(node: Dict[str, Any]) -> bool:
+    """
+    Whether a node's upstream call may run before the node is scheduled.
+
+    The node must be a tool or HTTP node with ``config.idempotent: true``; HTTP nodes
+    must also use GET, since a discarded speculative call must have no side effects.
+    """
+    config = node.get("config", {}) or {}
+    if node.get("type") not in PREFETCH_NODE_TYPES or config.get("idempotent") is not True:
+        return False
+    return node.get("type") == "tool" or str(config.get("method", "GET")).upper() == "GET"
+
+
+class PrefetchStats:
+    """Process-level counters of speculative calls."""
+
+    def __init__(self):
+        self._counters = {"started": 0, "committed": 0, "wasted": 0, "failed": 0}
+        self._hidden_ms = 0.0
+
+    def count(self, name: str) -> None:
+        self._counters[name] += 1
+
+    def hidden(self, ms: float) -> None:
+        self._hidden_ms += ms
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return counters; ``hitRate`` is committed / started, ``hiddenMs`` the upstream
+        time that overlapped the preceding steps of committed calls.
+        """
+        stats = dict(self._counters)
+        stats["hitRate"] = round(stats["committed"] / stats["started"], 4) if stats["started"] else 0.0
+        stats["hiddenMs"] = round(self._hidden_ms, 2)
+        return stats
+
+
+prefetch_stats = PrefetchStats()
+# Speculative calls still running after their run ended (kept referenced until done)
+_detached: set = set()
+
+
+class PrefetchScope:
+    """
+    Speculative calls of one workflow run, keyed by request fingerprint.
+
+    A call is committed when the node it was started for runs with the same request
+    (``take``); calls not taken by the end of the run are discarded. Discarded calls
+    are left to finish rather than cancelled: they may be the leader of a
+    single-flight group other runs are waiting on.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Tuple["asyncio.Task[Any]", float]] = {}
+
+    def start(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Start ``fetch`` in the background unless a call for ``key`` is already pending.
+
+        Args:
+            key: Request fingerprint the node will compute when it runs
+            fetch: Zero-argument coroutine factory performing the upstream call
+        """
+        if key in self._calls:
+            return
+        self._calls[key] = (asyncio.ensure_future(_timed(fetch)), time.perf_counter())
+        prefetch_stats.count("started")
+
+    async def take(self, key: str) -> Tuple[bool, Any]:
+        """
+        Commit the speculative call for ``key``, waiting for it if still running.
+
+        Returns:
+            (True, result), or (False, None) when there is no call for ``key`` or it
+            failed (the node then makes the call itself)
+        """
+        entry = self._calls.pop(key, None)
+        if entry is None:
+            return False, None
+        task, started = entry
+        taken = time.perf_counter()
+        try:
+            result, finished = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                # The node itself was cancelled; let the call finish in the background
+                _detach(task)
+                raise
+            prefetch_stats.count("failed")
+            return False, None
+        except Exception as ex:
+            logger.debug("Speculative call %s failed: %s", key[:12], ex)
+            prefetch_stats.count("failed")
+            return False, None
+        prefetch_stats.count("committed")
+        # Upstream time spent before the node asked for the result
+        prefetch_stats.hidden((min(taken, finished) - started) * 1000)
+        return True, result
+
+    def close(self) -> None:
+        """Discard the calls no node took."""
+        for task, _ in self._calls.values():
+            prefetch_stats.count("wasted")
+            _detach(task)
+        self._calls.clear()
+
+
+async def _timed(fetch: Callable[[], Awaitable[Any]]) -> Tuple[Any, float]:
+    """Run ``fetch`` and return its result with the time it finished."""
+    return await fetch(), time.perf_counter()
+
+
+def _detach(task: "asyncio.Task[Any]") -> None:
+    """Keep a discarded call referenced until it finishes."""
+    if task.done():
+        _forget(task)
+        return
+    _detached.add(task)
+    task.add_done_callback(_forget)
+
+
+def _forget(task: "asyncio.Task[Any]") -> None:
+    _detached.discard(task)
+    if not task.cancelled():
+        # Retrieve so a failed discarded call is not logged as unhandled
+        task.exception()
+
+
+_current_scope: ContextVar[Optional[PrefetchScope]] = ContextVar("v3_prefetch_scope", default=None)
+
+
+def current_prefetch_scope() -> Optional[PrefetchScope]:
+    """Return the prefetch scope of the current run, if any."""
+    return _current_scope.get()
+
+
+@contextmanager
+def bind_prefetch_scope() -> Iterator[PrefetchScope]:
+    """Bind a prefetch scope for one workflow run; unused calls are discarded on exit."""
+    scope = PrefetchScope()
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+        scope.close()
+
+
+async def take_prefetched(key: str) -> Tuple[bool, Any]:
+    """Commit the current run's speculative call for ``key`` (``(False, None)`` without one)."""
+    scope = _current_scope.get()
+    if scope is None:
+        return False, None
+    return await scope.take(key)
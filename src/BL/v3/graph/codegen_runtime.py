@@ -0,0 +1,68 @@
+"""Helpers imported by generated workflow modules (see ``workflow_codegen``)."""
+
+from typing import Any, Dict, Sequence
+
+from langgraph.graph import END
+
+from BL.v3.graph.native_interpreter import STATE_KEYS
+from BL.v3.utils.variable_resolver import VariableResolver
+
+__all__ = [
+    "END",
+    "STATE_KEYS",
+    "evaluate_expression",
+    "finish_template",
+    "greater_than",
+    "less_than",
+    "merge_state",
+    "nested_get",
+]
+
+_resolver = VariableResolver()
+_STATE_KEY_SET = frozenset(STATE_KEYS)
+
+
+def evaluate_expression(parts: Sequence[str], state: Dict[str, Any]) -> Any:
+    """Value of a pre-split ``{{...}}`` expression (scopes without an inlined accessor)."""
+    return _resolver._evaluate_parts(parts, state)
+
+
+def nested_get(obj: Any, path: Sequence[str]) -> Any:
+    """Nested lookup with the resolver's semantics ("" when missing)."""
+    return _resolver._nested_get(obj, path, "")
+
+
+def finish_template(resolved: str, template: str) -> Any:
+    """Apply ``VariableResolver.resolve``'s bool/number parsing to an interpolated string."""
+    if resolved == template and resolved not in ["", None]:
+        try:
+            if resolved.lower() in ["true", "false"]:
+                return resolved.lower() == "true"
+            if "." in resolved:
+                return float(resolved)
+            return int(resolved)
+        except ValueError:
+            pass
+    return resolved
+
+
+def greater_than(field_value: Any, expected_value: Any) -> bool:
+    try:
+        return float(field_value) > float(expected_value)
+    except (ValueError, TypeError):
+        return False
+
+
+def less_than(field_value: Any, expected_value: Any) -> bool:
+    try:
+        return float(field_value) < float(expected_value)
+    except (ValueError, TypeError):
+        return False
+
+
+def merge_state(state: Dict[str, Any], result: Dict[str, Any]) -> None:
+    """Write a step's returned state into ``state`` (WorkflowState keys only)."""
+    if result:
+        for key, value in result.items():
+            if key in _STATE_KEY_SET:
+                state[key] = value
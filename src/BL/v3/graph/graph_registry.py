@@ -0,0 +1,410 @@
+"""Compiled workflow graphs by ID/version with incremental hot reload."""
+
+import asyncio
+import copy
+import logging
+import time
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from BL.v3.cache.run_cache import RunCachePolicy
+from BL.v3.graph.node_bindings import NodeBindings
+from BL.v3.graph.workflow_analyzer import analyze_workflow, node_name_index, rewrite_node_references
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.repository.workflow_repository import WorkflowEntry, WorkflowRepository, get_workflow_repository
+
+logger = logging.getLogger(__name__)
+
+# Editor-only node/edge fields that never affect execution
+_LAYOUT_FIELDS = ("position", "positionAbsolute", "selected", "dragging", "width", "height")
+# Top-level bookkeeping fields that change on every save
+_BOOKKEEPING_FIELDS = ("version", "lastModifiedVersion", "rebasedFromVersion", "updatedBy", "updatedOn")
+_PROMPT_NODE_TYPES = ("agent", "llm")
+
+
+def child_workflow_ids(workflow_definition: Dict[str, Any]) -> FrozenSet[str]:
+    """IDs of the workflows referenced by the static workflow nodes of a definition."""
+    return frozenset(
+        node.get("config", {}).get("agenticWorkflowId", "")
+        for node in workflow_definition.get("nodes", [])
+        if node.get("type") == "workflow"
+        and node.get("config", {}).get("agenticWorkflowId")
+        and node.get("config", {}).get("agenticWorkflowIdMode", "static") == "static"
+    )
+
+
+def prompt_only_changes(
+    old_definition: Dict[str, Any], new_definition: Dict[str, Any]
+) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """
+    Compare two versions of a workflow for changes that need no recompilation.
+
+    Args:
+        old_definition: Definition the graph was compiled from
+        new_definition: Definition now on disk
+
+    Returns:
+        {node ID: new promptTemplate} for agent/llm nodes whose prompt changed (empty
+        for layout/bookkeeping-only edits), or None when anything else changed
+    """
+    old_normalized, old_prompts = _normalize(old_definition)
+    new_normalized, new_prompts = _normalize(new_definition)
+    if old_normalized != new_normalized:
+        return None
+    return {
+        node_id: prompt
+        for node_id, prompt in new_prompts.items()
+        if old_prompts.get(node_id) != prompt
+    }
+
+
+def _normalize(definition: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    normalized = {k: v for k, v in definition.items() if k not in _BOOKKEEPING_FIELDS}
+    prompts: Dict[str, Any] = {}
+    nodes = []
+    for node in definition.get("nodes", []):
+        node = {k: v for k, v in node.items() if k not in _LAYOUT_FIELDS}
+        if node.get("type") in _PROMPT_NODE_TYPES and "promptTemplate" in node.get("config", {}):
+            config = dict(node["config"])
+            prompts[node["id"]] = config.pop("promptTemplate")
+            node["config"] = config
+        nodes.append(node)
+    normalized["nodes"] = nodes
+    normalized["edges"] = [
+        {k: v for k, v in edge.items() if k not in _LAYOUT_FIELDS} for edge in definition.get("edges", [])
+    ]
+    return normalized, prompts
+
+
+class CompiledWorkflow:
+    """One compiled workflow version and what it was built from."""
+
+    __slots__ = ("workflow_id", "version", "path", "mtime_ns", "definition", "graph", "children", "bindings")
+
+    def __init__(
+        self,
+        entry: WorkflowEntry,
+        definition: Dict[str, Any],
+        graph: Any,
+        bindings: NodeBindings,
+    ):
+        self.workflow_id = entry.workflow_id
+        self.version = entry.version
+        self.path = entry.path
+        self.mtime_ns = entry.mtime_ns
+        self.definition = definition
+        self.graph = graph
+        self.children = child_workflow_ids(definition)
+        self.bindings = bindings
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.workflow_id, self.version)
+
+
+class WorkflowGraphRegistry:
+    """
+    Compiled graphs for the workflows in a repository, kept current incrementally.
+
+    ``reload`` finds workflows whose file changed since they were compiled:
+    prompt-only edits swap patched copies of the nodes and executors into the graph; other edits rebuild that
+    workflow and every workflow embedding it (directly or transitively), reusing the
+    compiled graphs of everything else. The new graphs replace the old ones in one
+    assignment, so runs already holding a graph finish on the version they started on.
+    """
+
+    def __init__(self, repository: Optional[WorkflowRepository] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            repository: Workflow repository (default: the process-wide one)
+        """
+        self.repository = repository or get_workflow_repository()
+        self._graphs: Dict[Tuple[str, str], CompiledWorkflow] = {}
+        self._lock = asyncio.Lock()
+        self._builds = 0
+        self._reloads = 0
+        self._prompt_patches = 0
+        self._last_reload: Dict[str, Any] = {}
+
+    async def aget(self, workflow_id: str, version: Optional[str] = None) -> Any:
+        """
+        Return the compiled graph of a workflow, building or reloading it when needed.
+
+        Args:
+            workflow_id: agenticWorkflowId
+            version: Exact version, or None for the latest
+
+        Returns:
+            Compiled LangGraph graph
+
+        Raises:
+            LookupError: When the repository has no such workflow/version
+        """
+        entry = await self.repository.aresolve(workflow_id, version)
+        if entry is None:
+            raise LookupError(f"Workflow {workflow_id} (version {version or 'latest'}) not found")
+        return await self.aget_entry(entry)
+
+    async def aget_entry(self, entry: WorkflowEntry) -> Any:
+        """Return the compiled graph for a repository entry (see ``aget``)."""
+        record = self._graphs.get((entry.workflow_id, entry.version))
+        if record is not None and record.mtime_ns == entry.mtime_ns:
+            return record.graph
+        if record is not None:
+            # The file changed and no watcher picked it up yet
+            await self.areload()
+        async with self._lock:
+            record = self._graphs.get((entry.workflow_id, entry.version))
+            if record is None:
+                definition = await self.repository.aload(entry.workflow_id, entry.version or None)
+                if definition is None:
+                    raise LookupError(f"Workflow {entry.workflow_id} could not be loaded from {entry.path}")
+                built = await self._build([definition], self._graphs)
+                self._graphs = {**self._graphs, **built}
+                record = self._graphs[(entry.workflow_id, entry.version)]
+            return record.graph
+
+    def get_record(self, workflow_id: str, version: str) -> Optional[CompiledWorkflow]:
+        """Return the current compiled record for an exact workflow ID/version."""
+        return self._graphs.get((workflow_id, version))
+
+    async def areload(self) -> Dict[str, Any]:
+        """
+        Pick up changed workflow files and rebuild only what they affect.
+
+        Returns:
+            Report: {"patched", "rebuilt", "removed"} as "id@version" labels and
+            {"failed": {label: error}} for workflows that kept their old graph
+        """
+        async with self._lock:
+            started = time.perf_counter()
+            await self.repository.arefresh()
+            current = dict(self._graphs)
+            report: Dict[str, Any] = {"patched": [], "rebuilt": [], "removed": [], "failed": {}}
+            changed_ids: Set[str] = set()
+            patched_ids: Set[str] = set()
+            rebuild: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+            for key, record in list(current.items()):
+                entry = self.repository.entry_for_file(record.path)
+                if entry is not None and entry.mtime_ns == record.mtime_ns:
+                    continue
+                definition = None
+                if entry is not None and entry.workflow_id == record.workflow_id:
+                    definition = await self.repository.aload(entry.workflow_id, entry.version or None)
+                if definition is None:
+                    # File deleted or now holds another workflow
+                    del current[key]
+                    changed_ids.add(record.workflow_id)
+                    report["removed"].append(_label(key))
+                    continue
+                patches = prompt_only_changes(record.definition, definition)
+                if patches is not None:
+                    del current[key]
+                    patched = self._patch_prompts(record, entry, definition, patches)
+                    current[patched.key] = patched
+                    report["patched"].append(_label(patched.key))
+                    if patches:
+                        patched_ids.add(record.workflow_id)
+                    continue
+                changed_ids.add(record.workflow_id)
+                rebuild[key] = definition
+
+            # Everything embedding a changed workflow is rebuilt against the new version
+            for key in self._ancestors(changed_ids, current):
+                if key not in rebuild:
+                    record = current[key]
+                    rebuild[key] = record.definition
+            for key in rebuild:
+                current.pop(key, None)
+
+            if rebuild:
+                built = await self._build(list(rebuild.values()), current, report["failed"])
+                for key in rebuild:
+                    if _label(key) in report["failed"] and key in self._graphs:
+                        # Keep serving the old graph
+                        current[key] = self._graphs[key]
+                current.update(built)
+                report["rebuilt"] = sorted(_label(key) for key in built)
+            if patched_ids:
+                # Their run cache versions cover the patched children's
+                self._refresh_embedding_policies(patched_ids, current)
+
+            self._graphs = current
+            self._reloads += 1
+            report["ms"] = round((time.perf_counter() - started) * 1000, 3)
+            if report["patched"] or report["rebuilt"] or report["removed"] or report["failed"]:
+                logger.info("Workflow reload: %s", report)
+            self._last_reload = report
+            return report
+
+    async def _build(
+        self,
+        definitions: List[Dict[str, Any]],
+        reusable: Dict[Tuple[str, str], CompiledWorkflow],
+        failures: Optional[Dict[str, str]] = None,
+    ) -> Dict[Tuple[str, str], CompiledWorkflow]:
+        """Compile definitions with one builder, reusing ``reusable`` graphs for their children."""
+        builder = WorkflowGraphBuilder(workflow_loader=self.repository.aload)
+        for record in reusable.values():
+            latest = await self.repository.aresolve(record.workflow_id)
+            if latest is not None and latest.version == record.version:
+                builder.add_compiled(record.definition, record.graph)
+        for definition in definitions:
+            try:
+                await builder.build(definition)
+            except Exception as ex:
+                if failures is None:
+                    raise
+                key = (definition.get("agenticWorkflowId", ""), str(definition.get("version", "") or ""))
+                failures[_label(key)] = str(ex)
+                logger.exception("Workflow reload: rebuilding %s failed", _label(key))
+
+        built: Dict[Tuple[str, str], CompiledWorkflow] = {}
+        for workflow_id, (definition, graph) in builder.built_workflows().items():
+            entry = await self.repository.aresolve(workflow_id, str(definition.get("version", "") or "") or None)
+            if entry is None:
+                continue
+            record = CompiledWorkflow(entry, definition, graph, builder.node_bindings(workflow_id))
+            built[record.key] = record
+            self._builds += 1
+        return built
+
+    def _patch_prompts(
+        self,
+        record: CompiledWorkflow,
+        entry: WorkflowEntry,
+        definition: Dict[str, Any],
+        patches: Dict[str, List[Dict[str, Any]]],
+    ) -> CompiledWorkflow:
+        """
+        Swap copies of the nodes with new prompt text (and of their executors) into the
+        graph; keep the graph. Runs that already started keep the nodes they pinned.
+        The run cache policy is recomputed (``areload`` then does so for the workflows
+        embedding this one), so cached runs of the old prompts are not served.
+        """
+        # Same node-name -> ID rewrite the analyzer applies at build time
+        name_to_id = node_name_index(definition)
+        updates = {}
+        for node_id, prompt_template in patches.items():
+            node, executor = record.bindings.current.get(node_id, (None, None))
+            if node is None:
+                continue
+            prompt_template = rewrite_node_references(copy.deepcopy(prompt_template), name_to_id)
+            node = {**node, "config": {**node.get("config", {}), "promptTemplate": prompt_template}}
+            if hasattr(executor, "with_prompt"):
+                executor = executor.with_prompt(node)
+            updates[node_id] = (node, executor)
+            self._prompt_patches += 1
+        record.bindings.replace(updates)
+        patched = CompiledWorkflow(entry, definition, record.graph, record.bindings)
+        if updates:
+            _refresh_run_cache_policy(patched)
+        return patched
+
+    def _refresh_embedding_policies(
+        self, workflow_ids: Set[str], records: Dict[Tuple[str, str], CompiledWorkflow]
+    ) -> None:
+        """Recompute the run cache policies of the records embedding ``workflow_ids``, children first."""
+        pending = self._ancestors(workflow_ids, records)
+        while pending:
+            pending_ids = {records[key].workflow_id for key in pending}
+            ready = [key for key in pending if not records[key].children & pending_ids] or list(pending)
+            for key in ready:
+                _refresh_run_cache_policy(records[key])
+                pending.discard(key)
+
+    def _ancestors(
+        self, workflow_ids: Set[str], records: Dict[Tuple[str, str], CompiledWorkflow]
+    ) -> Set[Tuple[str, str]]:
+        """Keys of the records that embed any of ``workflow_ids``, transitively."""
+        affected = set(workflow_ids)
+        keys: Set[Tuple[str, str]] = set()
+        grew = True
+        while grew:
+            grew = False
+            for key, record in records.items():
+                if key not in keys and record.children & affected:
+                    keys.add(key)
+                    affected.add(record.workflow_id)
+                    grew = True
+        return keys
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "graphs": sorted(_label(key) for key in self._graphs),
+            "builds": self._builds,
+            "reloads": self._reloads,
+            "promptPatches": self._prompt_patches,
+            "lastReload": self._last_reload,
+        }
+
+
+def _refresh_run_cache_policy(record: CompiledWorkflow) -> None:
+    """Recompute a record's run cache policy from its definition and its children's current policies."""
+    if getattr(record.graph, "run_cache_policy", None) is None:
+        return
+    child_policies = {}
+    for node_id, (_, executor) in record.bindings.current.items():
+        child_graph = getattr(getattr(executor, "subworkflow", None), "graph", None)
+        policy = getattr(child_graph, "run_cache_policy", None)
+        if policy is not None:
+            child_policies[node_id] = policy
+    record.graph.run_cache_policy = RunCachePolicy.for_workflow(
+        analyze_workflow(record.definition).definition, child_policies
+    )
+
+
+def _label(key: Tuple[str, str]) -> str:
+    return f"{key[0]}@{key[1]}" if key[1] else key[0]
+
+
+class WorkflowWatcher:
+    """Polls the repository directories and reloads the registry when files change."""
+
+    def __init__(self, registry: WorkflowGraphRegistry, interval: float = 2.0):
+        """
+        Initialize the watcher.
+
+        Args:
+            registry: Registry to reload
+            interval: Seconds between checks
+        """
+        self.registry = registry
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start polling on the running event loop (no-op when already running)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop polling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.registry.areload()
+            except Exception:
+                logger.exception("Workflow watcher: reload failed")
+
+
+_default_registry: Optional[WorkflowGraphRegistry] = None
+
+
+def get_graph_registry() -> WorkflowGraphRegistry:
+    """Return the process-wide registry over the default repository."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = WorkflowGraphRegistry()
+    return _default_registry
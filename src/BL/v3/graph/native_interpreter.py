@@ -0,0 +1,187 @@
+"""Native interpreter for acyclic workflows: runs compiled steps directly, without Pregel scheduling."""
+
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langgraph.graph import END
+
+from BL.v3.state.workflow_state import WorkflowState
+
+logger = logging.getLogger(__name__)
+
+# State channels in schema order (LangGraph drops other keys and returns channels in this order)
+STATE_KEYS: Tuple[str, ...] = tuple(WorkflowState.__annotations__)
+_STATE_KEY_SET = frozenset(STATE_KEYS)
+
+
+def native_engine_enabled() -> bool:
+    """True unless V3_NATIVE_ENGINE=0."""
+    return os.getenv("V3_NATIVE_ENGINE", "1").lower() not in ("0", "false", "no")
+
+
+def single_target_router(route_fn: Callable[[Dict[str, Any]], str], targets: List[str]):
+    """
+    Mark a conditional-edge router as returning exactly one target.
+
+    Args:
+        route_fn: Router returning a step ID or END
+        targets: Every step ID (or END) the router can return
+
+    Returns:
+        ``route_fn``, usable by the native interpreter
+    """
+    route_fn.single_target = True
+    route_fn.targets = list(targets)
+    return route_fn
+
+
+class RouteRecorder:
+    """
+    Stand-in for a StateGraph while edges are added: forwards every edge to the
+    graph and records it, so the same routing drives both engines.
+    """
+
+    def __init__(self, graph: Any):
+        self.graph = graph
+        self.edges: Dict[str, List[str]] = defaultdict(list)
+        self.routers: Dict[str, List[Callable]] = defaultdict(list)
+
+    def add_edge(self, source: str, target: str) -> None:
+        self.graph.add_edge(source, target)
+        if target not in self.edges[source]:
+            self.edges[source].append(target)
+
+    def add_conditional_edges(self, source: str, path: Callable, *args: Any, **kwargs: Any) -> None:
+        self.graph.add_conditional_edges(source, path, *args, **kwargs)
+        self.routers[source].append(path)
+
+
+class NativeProgram:
+    """Steps and routing of an acyclic workflow, run in order on one state dict."""
+
+    __slots__ = ("workflow_id", "entry", "steps", "next_step", "routers")
+
+    def __init__(
+        self,
+        workflow_id: str,
+        entry: str,
+        steps: Dict[str, Callable],
+        next_step: Dict[str, str],
+        routers: Dict[str, Callable],
+    ):
+        """
+        Args:
+            workflow_id: Workflow the program was compiled from
+            entry: First step
+            steps: Step ID -> node function ``(state, config) -> state``
+            next_step: Step ID -> static successor (or END)
+            routers: Step ID -> single-target router ``(state) -> step ID or END``
+        """
+        self.workflow_id = workflow_id
+        self.entry = entry
+        self.steps = steps
+        self.next_step = next_step
+        self.routers = routers
+
+    async def ainvoke(self, initial_state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run the workflow and return the final state, as the LangGraph graph would.
+
+        Args:
+            initial_state: Initial state (keys outside WorkflowState are dropped)
+
+        Returns:
+            Final state with the WorkflowState keys that have a value, in schema order
+        """
+        state = {key: initial_state[key] for key in STATE_KEYS if key in initial_state}
+        step_id = self.entry
+        while step_id != END:
+            result = await self.steps[step_id](dict(state), None)
+            if result:
+                for key, value in result.items():
+                    if key in _STATE_KEY_SET:
+                        state[key] = value
+            router = self.routers.get(step_id)
+            step_id = router(state) if router is not None else self.next_step.get(step_id, END)
+        return {key: state[key] for key in STATE_KEYS if key in state}
+
+
+def compile_native_program(
+    workflow_id: str, entry: Optional[str], steps: Dict[str, Callable], recorder: RouteRecorder
+) -> Tuple[Optional[NativeProgram], str]:
+    """
+    Compile the recorded routing into a NativeProgram when the workflow allows it.
+
+    The program runs one step at a time, so the workflow must have no cycles, no
+    fan-out (a step with several static successors runs them in parallel under
+    LangGraph) and only single-target routers (rules).
+
+    Args:
+        workflow_id: Workflow ID (for logging)
+        entry: Entry step
+        steps: Step ID -> node function
+        recorder: RouteRecorder the builder added the edges through
+
+    Returns:
+        (program, "") or (None, reason the workflow needs LangGraph)
+    """
+    if entry not in steps:
+        return None, "no entry step"
+    next_step: Dict[str, str] = {}
+    routers: Dict[str, Callable] = {}
+    successors: Dict[str, List[str]] = {}
+    for step_id in steps:
+        static = recorder.edges.get(step_id, [])
+        conditional = recorder.routers.get(step_id, [])
+        if len(static) + len(conditional) > 1:
+            return None, f"step {step_id} fans out"
+        if conditional:
+            router = conditional[0]
+            if not getattr(router, "single_target", False):
+                return None, f"step {step_id} has a multi-target router"
+            routers[step_id] = router
+            successors[step_id] = [t for t in router.targets if t != END]
+        elif static:
+            next_step[step_id] = static[0]
+            successors[step_id] = [t for t in static if t != END]
+        else:
+            successors[step_id] = []
+
+    # Cycle check (iterative DFS over every possible transition)
+    state_of: Dict[str, int] = {}
+    for root in steps:
+        if root in state_of:
+            continue
+        stack = [(root, iter(successors.get(root, [])))]
+        state_of[root] = 1
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                state_of[node] = 2
+                stack.pop()
+            elif state_of.get(child) == 1:
+                return None, f"cycle through step {child}"
+            elif child not in state_of:
+                state_of[child] = 1
+                stack.append((child, iter(successors.get(child, []))))
+
+    return NativeProgram(workflow_id, entry, dict(steps), next_step, routers), ""
+
+
+def native_program_of(graph: Any) -> Optional[NativeProgram]:
+    """
+    Return the native program attached to a compiled graph when it may run natively.
+
+    Graphs with a checkpointer or interrupts always run on LangGraph.
+    """
+    program = getattr(graph, "native_program", None)
+    if program is None or not native_engine_enabled():
+        return None
+    if getattr(graph, "checkpointer", None) or getattr(graph, "interrupt_before_nodes", None) or getattr(
+        graph, "interrupt_after_nodes", None
+    ):
+        return None
+    return program
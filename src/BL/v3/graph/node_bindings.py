@@ -0,0 +1,56 @@
+"""Node definition/executor tables of compiled workflows, pinned per run."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+Binding = Tuple[Dict[str, Any], Any]
+
+
+class NodeBindings:
+    """
+    Node ID -> (node definition, executor) of one compiled workflow.
+
+    Node functions look their pair up here when they start instead of closing
+    over it, so a hot reload can swap in patched copies (``replace``) without
+    touching the pairs runs are using. A run bound with ``pin_node_bindings``
+    keeps the table it saw first for its whole duration (child workflows
+    included); outside a pinned run each node start sees the current table.
+    """
+
+    __slots__ = ("current",)
+
+    def __init__(self, bindings: Optional[Dict[str, Binding]] = None):
+        self.current: Dict[str, Binding] = dict(bindings or {})
+
+    def get(self, node_id: str) -> Binding:
+        """Return the (node definition, executor) pair the current run uses for ``node_id``."""
+        pinned = _pinned_bindings.get()
+        if pinned is None:
+            return self.current[node_id]
+        table = pinned.get(id(self))
+        if table is None:
+            table = pinned.setdefault(id(self), self.current)
+        return table[node_id]
+
+    def replace(self, updates: Dict[str, Binding]) -> None:
+        """Swap in new pairs for some nodes (one assignment; pinned runs are unaffected)."""
+        self.current = {**self.current, **updates}
+
+
+# Per run: id(NodeBindings) -> table the run pinned
+_pinned_bindings: ContextVar[Optional[Dict[int, Dict[str, Binding]]]] = ContextVar("v3_node_bindings", default=None)
+
+
+@contextmanager
+def pin_node_bindings() -> Iterator[None]:
+    """Pin node bindings for one workflow run (no-op inside a run that already pinned them)."""
+    if _pinned_bindings.get() is not None:
+        yield
+        return
+    _pinned_bindings.set({})
+    try:
+        yield
+    finally:
+        # Not reset(token): an abandoned stream may be closed from another context
+        _pinned_bindings.set(None)
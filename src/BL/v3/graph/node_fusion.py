@@ -0,0 +1,115 @@
+"""Fusion of cheap control nodes (variable updates, rules) into the step that precedes them."""
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+# Node types that only transform state and route; they never call out of the process
+FUSIBLE_NODE_TYPES = ("variable", "variable update", "variable-update", "rule")
+# Node types that are never compiled into a step
+_NON_STEP_NODE_TYPES = ("start", "output")
+
+
+class FusionPlan:
+    """
+    Compiled steps of a workflow after fusion.
+
+    ``steps`` maps each graph node (step) to the workflow nodes it runs, in order: the
+    step's own node first, then the cheap nodes folded into it. The step routes like
+    its last member. Cheap nodes reached only through fused steps get no step of their
+    own.
+    """
+
+    __slots__ = ("steps", "entry")
+
+    def __init__(self, steps: Dict[str, List[str]], entry: Optional[str]):
+        self.steps = steps
+        self.entry = entry
+
+    def last_member(self, step_id: str) -> str:
+        return self.steps[step_id][-1]
+
+    def folded(self) -> Dict[str, List[str]]:
+        """Steps that run more than their own node: step ID -> folded node IDs."""
+        return {step_id: members[1:] for step_id, members in self.steps.items() if len(members) > 1}
+
+    def route_edges(self, edges: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Edges between steps: each step takes the outgoing edges of its last member.
+
+        Args:
+            edges: Workflow edges (after analysis)
+
+        Returns:
+            Edges from non-step nodes (start) as they are, plus the outgoing edges of
+            every step's last member re-sourced to the step
+        """
+        out_edges: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for edge in edges:
+            out_edges[edge.get("source")].append(edge)
+        routed = [edge for edge in edges if edge.get("source") not in self.steps]
+        for step_id, members in self.steps.items():
+            last = members[-1]
+            for edge in out_edges.get(last, []):
+                routed.append(edge if last == step_id else {**edge, "source": step_id})
+        return routed
+
+
+def plan_node_fusion(workflow_definition: Dict[str, Any], fuse: bool = True) -> FusionPlan:
+    """
+    Plan the compiled steps of an (analyzed) workflow.
+
+    A node absorbs the cheap node after it when that is its only outgoing edge; the
+    chain continues until a rule (which routes), a non-cheap node, an output or a
+    cycle. A cheap node with several predecessors is folded into each of them, so
+    it only keeps a step of its own when it is the entry point or a branch target
+    that cannot be folded (e.g. a handoff target of an agent with other edges).
+
+    Args:
+        workflow_definition: Analyzed workflow definition (see ``analyze_workflow``)
+        fuse: False for one step per node (no fusion)
+
+    Returns:
+        FusionPlan with the steps reachable from the entry point
+    """
+    nodes_by_id = {node["id"]: node for node in workflow_definition.get("nodes", [])}
+    out_edges: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for edge in workflow_definition.get("edges", []):
+        out_edges[edge.get("source")].append(edge)
+
+    start_ids = [node_id for node_id, node in nodes_by_id.items() if node.get("type") == "start"]
+    entry = None
+    if start_ids and out_edges.get(start_ids[0]):
+        entry = out_edges[start_ids[0]][0].get("target")
+
+    if not fuse:
+        steps = {
+            node_id: [node_id]
+            for node_id, node in nodes_by_id.items()
+            if node.get("type") not in _NON_STEP_NODE_TYPES
+        }
+        return FusionPlan(steps, entry)
+
+    def chain_from(head: str) -> List[str]:
+        chain = [head]
+        current = head
+        while nodes_by_id[current].get("type") != "rule" and len(out_edges.get(current, [])) == 1:
+            target = out_edges[current][0].get("target")
+            if target in chain or nodes_by_id.get(target, {}).get("type") not in FUSIBLE_NODE_TYPES:
+                break
+            chain.append(target)
+            current = target
+        return chain
+
+    # Only steps reachable from the entry point are compiled
+    steps: Dict[str, List[str]] = {}
+    pending = [entry] if entry in nodes_by_id else []
+    while pending:
+        step_id = pending.pop()
+        if step_id in steps or nodes_by_id[step_id].get("type") in _NON_STEP_NODE_TYPES:
+            continue
+        steps[step_id] = chain_from(step_id)
+        for edge in out_edges.get(steps[step_id][-1], []):
+            target = edge.get("target")
+            if target in nodes_by_id and target not in steps:
+                pending.append(target)
+    return FusionPlan(steps, entry)
@@ -0,0 +1,403 @@
+"""Parallel execution of independent branches: node read/write sets and fan-out planning."""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from BL.v3.cache.node_memo import MEMO_KEY
+from BL.v3.graph.workflow_analyzer import TEMPLATE_PATTERN
+
+# Type of the synthetic node that stands for a parallel group while routing
+PARALLEL_NODE_TYPE = "parallel"
+# Key of a whole scope (e.g. every flow variable), or of the whole state as scope
+ANY = "*"
+
+# Node types whose effects are their templates, variableUpdates and own output
+_TEMPLATE_NODE_TYPES = ("tool", "http request", "http-request", "variable", "variable update", "variable-update", "rule")
+_MODEL_NODE_TYPES = ("llm", "agent")
+_UNKNOWN = (ANY, ANY)
+
+StateKey = Tuple[str, str]
+
+
+class NodeEffects:
+    """
+    State a node (or a branch of nodes) may read and write.
+
+    Keys are ``(scope, name)`` pairs: ``("flow", "supplierId")``, ``("nodes", <node ID>)``,
+    ``("messages", "*")`` for the thread, or ``("*", "*")`` for anything.
+    """
+
+    __slots__ = ("reads", "writes")
+
+    def __init__(self, reads: Optional[Set[StateKey]] = None, writes: Optional[Set[StateKey]] = None):
+        self.reads = reads or set()
+        self.writes = writes or set()
+
+    def update(self, other: "NodeEffects") -> None:
+        self.reads |= other.reads
+        self.writes |= other.writes
+
+    def conflicts(self, other: "NodeEffects") -> List[str]:
+        """
+        Why two branches cannot run at the same time (empty when independent).
+
+        Both must not write the same state, and neither may read what the other writes.
+        """
+        reasons = [f"both write {name}" for name in _overlap(self.writes, other.writes)]
+        reasons += [f"one reads {name} written by the other" for name in self.reads_written_by(other)]
+        reasons += [f"one reads {name} written by the other" for name in other.reads_written_by(self)]
+        return reasons
+
+    def reads_written_by(self, other: "NodeEffects") -> List[str]:
+        """State this reads that ``other`` may write."""
+        return _overlap(self.reads, other.writes)
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {
+            "reads": sorted(_key_name(key) for key in self.reads),
+            "writes": sorted(_key_name(key) for key in self.writes),
+        }
+
+
+def node_effects(node: Dict[str, Any]) -> NodeEffects:
+    """
+    Static read/write sets of a workflow node.
+
+    Reads come from the ``{{...}}`` templates of its config and variableUpdates,
+    writes from its variableUpdates and its own output (``nodes.<id>``). Agents,
+    LLMs and workflow nodes add what their executors touch (thread, context window
+    summaries, child outputs); unknown node types may read and write anything.
+
+    Args:
+        node: Workflow node definition (after analysis, node references are IDs)
+
+    Returns:
+        NodeEffects of the node
+    """
+    node_type = node.get("type", "")
+    config = node.get("config", {}) or {}
+    updates = list(node.get("variableUpdates", []) or [])
+    effects = NodeEffects(writes={("nodes", node.get("id", ""))})
+    if node_type not in _TEMPLATE_NODE_TYPES + _MODEL_NODE_TYPES + ("workflow",):
+        effects.reads.add(_UNKNOWN)
+        effects.writes.add(_UNKNOWN)
+        return effects
+
+    for expression in _expressions([config, updates]):
+        key = _template_key(expression)
+        if key is not None:
+            effects.reads.add(key)
+
+    if node_type == "agent":
+        effects.reads |= {("messages", ANY), ("system", "userQuery")}
+        effects.writes.add(("messages", ANY))
+        router_config = config.get("preRouter", {}) or {}
+        if router_config.get("enable"):
+            # Imported here: executors import model clients
+            from BL.v3.nodes.executors.agent_executor import DEFAULT_PRE_ROUTE_UPDATES
+
+            updates += router_config.get("variableUpdates", DEFAULT_PRE_ROUTE_UPDATES)
+    if node_type in _MODEL_NODE_TYPES and config.get("contextWindow"):
+        effects.reads.add(("metadata", "contextSummaries"))
+        effects.writes.add(("metadata", "contextSummaries"))
+    if node_type == "workflow":
+        # The child starts from the request-scoped system variables
+        effects.reads.add(("system", ANY))
+        if not updates:
+            # Child outputs are bound by name to flow variables and its replies appended
+            effects.writes |= {("flow", ANY), ("messages", ANY)}
+    memoize = config.get("memoize")
+    if memoize and node_type != "workflow":
+        # Memo entries live in metadata; dependsOn expressions join the memo key
+        effects.reads.add(("metadata", MEMO_KEY))
+        effects.writes.add(("metadata", MEMO_KEY))
+        for expression in (memoize.get("dependsOn") or []) if isinstance(memoize, dict) else []:
+            key = _template_key(expression)
+            if key is not None:
+                effects.reads.add(key)
+
+    for update in updates:
+        key = _field_key(update.get("fieldName", ""))
+        if key is None:
+            continue
+        effects.writes.add(key)
+        if update.get("operation", "set") != "set":
+            effects.reads.add(key)
+    return effects
+
+
+class ParallelGroup:
+    """Independent branches after a fan-out node, run concurrently and joined before ``join``."""
+
+    __slots__ = ("group_id", "source", "branches", "join", "join_edge")
+
+    def __init__(self, group_id: str, source: str, branches: List[List[str]], join: str, join_edge: Dict[str, Any]):
+        """
+        Args:
+            group_id: Step ID of the group
+            source: Node whose outgoing edges fan out
+            branches: Node IDs of each branch, in edge order
+            join: Node all branches lead to (a node with several predecessors, or an output)
+            join_edge: Edge from the first branch to ``join`` (kept for routing)
+        """
+        self.group_id = group_id
+        self.source = source
+        self.branches = branches
+        self.join = join
+        self.join_edge = join_edge
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"source": self.source, "branches": self.branches, "join": self.join}
+
+
+class ParallelPlan:
+    """Parallel groups of a workflow and the fan-outs that stay sequential (with the reason)."""
+
+    __slots__ = ("groups", "refused")
+
+    def __init__(self, groups: Dict[str, ParallelGroup], refused: Dict[str, str]):
+        self.groups = groups
+        self.refused = refused
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"groups": [group.to_dict() for group in self.groups.values()], "refused": dict(self.refused)}
+
+    def routing_definition(self, workflow_definition: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The workflow with each group as one node: ``source -> group -> join``.
+
+        Branch nodes are left out; steps, fusion and edges are planned on this copy.
+        """
+        if not self.groups:
+            return workflow_definition
+        branch_nodes = {node_id for group in self.groups.values() for branch in group.branches for node_id in branch}
+        sources = {group.source: group for group in self.groups.values()}
+        nodes = [node for node in workflow_definition.get("nodes", []) if node["id"] not in branch_nodes]
+        edges = []
+        for edge in workflow_definition.get("edges", []):
+            source = edge.get("source")
+            if source in branch_nodes:
+                continue
+            if source in sources and edge.get("type") != "handoff":
+                continue
+            edges.append(edge)
+        for group in self.groups.values():
+            nodes.append({"id": group.group_id, "type": PARALLEL_NODE_TYPE, "name": f"parallel after {group.source}"})
+            edges.append({"source": group.source, "target": group.group_id})
+            edges.append({**group.join_edge, "source": group.group_id})
+        return {**workflow_definition, "nodes": nodes, "edges": edges}
+
+
+def plan_parallel_branches(workflow_definition: Dict[str, Any], enabled: bool = True) -> ParallelPlan:
+    """
+    Find fan-outs whose branches can run concurrently.
+
+    A node with several regular (non-handoff) outgoing edges, none to a rule, fans
+    out. Each branch is the chain of nodes from one target, each with a single
+    predecessor and a single outgoing edge, up to the join: the first node with
+    several predecessors, or an output. All branches must reach the same join, and
+    no branch may write state another branch reads or writes (see ``node_effects``).
+    Fan-outs that do not qualify keep the sequential routing of ``_build_edges``.
+
+    Args:
+        workflow_definition: Analyzed workflow definition
+        enabled: False to plan no groups
+
+    Returns:
+        ParallelPlan (groups keyed by step ID, refused fan-outs keyed by source node ID)
+    """
+    groups: Dict[str, ParallelGroup] = {}
+    refused: Dict[str, str] = {}
+    if not enabled:
+        return ParallelPlan(groups, refused)
+
+    nodes_by_id = {node["id"]: node for node in workflow_definition.get("nodes", [])}
+    out_edges: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    in_degree: Dict[str, int] = defaultdict(int)
+    for edge in workflow_definition.get("edges", []):
+        out_edges[edge.get("source")].append(edge)
+        in_degree[edge.get("target")] += 1
+
+    def is_output(node_id: str) -> bool:
+        return node_id == "output" or nodes_by_id.get(node_id, {}).get("type") == "output"
+
+    for source_id, source_node in nodes_by_id.items():
+        if source_node.get("type") in ("start", "rule"):
+            continue
+        edges = out_edges.get(source_id, [])
+        regular = [edge for edge in edges if edge.get("type") != "handoff"]
+        targets = [edge.get("target") for edge in regular]
+        if len(regular) < 2 or len(regular) < len(edges):
+            continue
+        if any(nodes_by_id.get(target, {}).get("type") == "rule" for target in targets):
+            continue
+        if len(set(targets)) < len(targets):
+            refused[source_id] = "two edges lead to the same node"
+            continue
+        if any(is_output(target) for target in targets):
+            refused[source_id] = "a branch goes straight to the output"
+            continue
+
+        branches: List[List[str]] = []
+        joins: List[Tuple[str, Dict[str, Any]]] = []
+        reason = ""
+        for target in targets:
+            branch, current, last_edge = [], target, None
+            while True:
+                if is_output(current) or (branch and in_degree[current] > 1):
+                    break
+                node = nodes_by_id.get(current)
+                outgoing = out_edges.get(current, [])
+                if node is None or node.get("type") in ("start", "rule") or current in branch:
+                    reason = f"branch through {current} is not a plain chain"
+                    break
+                if in_degree[current] > 1:
+                    reason = f"{current} is also reached from outside the branch"
+                    break
+                if len(outgoing) != 1 or outgoing[0].get("type") == "handoff":
+                    reason = f"{current} has {len(outgoing)} outgoing edges"
+                    break
+                branch.append(current)
+                last_edge = outgoing[0]
+                current = last_edge.get("target")
+            if reason:
+                break
+            branches.append(branch)
+            joins.append((current, last_edge))
+        if not reason and len({"output" if is_output(join) else join for join, _ in joins}) > 1:
+            reason = "branches do not meet at one node"
+        if not reason:
+            reason = _branch_conflicts(branches, nodes_by_id)
+        if reason:
+            refused[source_id] = reason
+            continue
+        group_id = f"{source_id}__parallel"
+        groups[group_id] = ParallelGroup(group_id, source_id, branches, joins[0][0], joins[0][1])
+    return ParallelPlan(groups, refused)
+
+
+def branch_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of ``state`` for one branch: scopes (flow, nodes, messages, ...) are copied one level deep."""
+    return {key: _copy_scope(value) for key, value in state.items()}
+
+
+def join_branch_states(state: Dict[str, Any], results: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge the states returned by concurrent branches into ``state``.
+
+    Each branch's changes (per variable for dict scopes, whole values otherwise) are
+    applied in branch order. The plan guarantees branches do not write the same state.
+
+    Args:
+        state: State the branches started from
+        results: States returned by the branches (started from ``branch_state(state)``)
+
+    Returns:
+        Joined state
+    """
+    joined = branch_state(state)
+    for result in results:
+        for key, value in result.items():
+            before = state.get(key)
+            if isinstance(value, dict) and isinstance(before, dict):
+                target = joined[key]
+                for name, item in value.items():
+                    if name not in before or before[name] is not item:
+                        target[name] = item
+                for name in before:
+                    if name not in value:
+                        target.pop(name, None)
+            elif key not in state or (value is not before and value != before):
+                joined[key] = value
+    return joined
+
+
+def _branch_conflicts(branches: List[List[str]], nodes_by_id: Dict[str, Any]) -> str:
+    invalidators = _memo_invalidators(nodes_by_id)
+    effects = []
+    for branch in branches:
+        branch_effects = NodeEffects()
+        for node_id in branch:
+            branch_effects.update(node_effects(nodes_by_id[node_id]))
+            if {node_id, nodes_by_id[node_id].get("name", "")} & invalidators:
+                # Running the node drops memo entries of other nodes
+                branch_effects.writes.add(("metadata", MEMO_KEY))
+        effects.append(branch_effects)
+    for index, first in enumerate(effects):
+        for offset, second in enumerate(effects[index + 1:], start=index + 1):
+            reasons = first.conflicts(second)
+            if reasons:
+                return f"branches via {branches[index][0]} and {branches[offset][0]}: {reasons[0]}"
+    return ""
+
+
+def _copy_scope(value: Any) -> Any:
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+def _memo_invalidators(nodes_by_id: Dict[str, Any]) -> Set[str]:
+    """IDs and names listed in the ``memoize.invalidatedBy`` of any node."""
+    invalidators: Set[str] = set()
+    for node in nodes_by_id.values():
+        memoize = (node.get("config", {}) or {}).get("memoize")
+        if isinstance(memoize, dict):
+            invalidators.update(memoize.get("invalidatedBy") or [])
+    return invalidators
+
+
+def _expressions(value: Any) -> Iterable[str]:
+    if isinstance(value, str):
+        for match in TEMPLATE_PATTERN.finditer(value):
+            yield match.group(1).strip()
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _expressions(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _expressions(item)
+
+
+def _template_key(expression: str) -> Optional[StateKey]:
+    """State read by a template expression (None for the node's own output)."""
+    parts = expression.split(".")
+    scope = parts[0]
+    if scope in ("flow", "system", "nodes"):
+        return (scope, parts[1]) if len(parts) >= 2 else (scope, ANY)
+    if scope == "thread":
+        return ("messages", ANY)
+    if scope == "interface":
+        return ("interface", ANY)
+    return None
+
+
+def _field_key(field_name: str) -> Optional[StateKey]:
+    """State written by a variable update's ``fieldName``."""
+    parts = field_name.split(".")
+    if len(parts) < 2:
+        return None
+    if parts[0] == "thread" and parts[1] == "messages":
+        return ("messages", ANY)
+    return (parts[0], parts[1])
+
+
+def _overlap(first: Set[StateKey], second: Set[StateKey]) -> List[str]:
+    names = []
+    for scope, name in first:
+        for other_scope, other_name in second:
+            same_scope = scope == other_scope or ANY in (scope, other_scope)
+            if same_scope and (name == other_name or ANY in (name, other_name)):
+                names.append(_key_name((scope, name) if name != ANY else (other_scope, other_name)))
+    return sorted(set(names))
+
+
+def _key_name(key: StateKey) -> str:
+    scope, name = key
+    if scope == ANY:
+        return "any state"
+    if scope == "messages":
+        return "the thread"
+    return scope if name == ANY else f"{scope}.{name}"
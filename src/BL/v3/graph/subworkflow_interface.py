@@ -0,0 +1,135 @@
+"""Interface-scoped state for child workflow invocations (inputs in, declared outputs out)."""
+
+import copy
+from typing import Any, Dict, List, Optional
+
+from BL.v3.utils.variable_resolver import VariableResolver
+
+
+def child_initial_state(
+    workflow_definition: Dict[str, Any], inputs: Dict[str, Any], parent_state: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Build the state a child workflow starts from.
+
+    The child gets its own flow defaults, an empty thread and node map, the resolved
+    call-site inputs under ``interface.inputs`` and a copy of the request-scoped
+    ``system`` variables. Nothing else of the parent state is passed down.
+
+    Args:
+        workflow_definition: Child workflow JSON
+        inputs: Inputs resolved from the workflow node's ``config.inputs``
+        parent_state: Parent state at the call site
+
+    Returns:
+        Initial child state
+    """
+    flow_defaults = {
+        variable["name"]: copy.deepcopy(variable.get("default"))
+        for variable in workflow_definition.get("variables", {}).get("flow", [])
+        if variable.get("name")
+    }
+    return {
+        "messages": [],
+        "flow": flow_defaults,
+        "system": dict(parent_state.get("system", {}) or {}),
+        "nodes": {},
+        "toolResults": {},
+        "iteration_count": 0,
+        "interface": {"inputs": inputs},
+    }
+
+
+def declared_output_nodes(workflow_definition: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the child's output nodes that declare an ``outputMapping``."""
+    return [
+        node
+        for node in workflow_definition.get("nodes", [])
+        if node.get("type") == "output" and node.get("config", {}).get("outputMapping")
+    ]
+
+
+def collect_child_outputs(
+    workflow_definition: Dict[str, Any],
+    final_state: Dict[str, Any],
+    variable_resolver: VariableResolver,
+    output_nodes: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Resolve the child's declared outputs against its final state.
+
+    Outputs come from the ``outputMapping`` of the output node the run ended on (the
+    first one whose predecessor ran), plus the names in ``interface.outputs``; a
+    declared output missing from the mapping is read from the child's flow
+    variables, and ``response`` falls back to the last assistant message.
+
+    Args:
+        workflow_definition: Child workflow JSON
+        final_state: Child state after the run
+        variable_resolver: Resolver for mapping templates
+        output_nodes: Pre-computed ``declared_output_nodes`` (optional)
+
+    Returns:
+        Output values keyed by output name
+    """
+    output_nodes = declared_output_nodes(workflow_definition) if output_nodes is None else output_nodes
+    executed = set(final_state.get("nodes", {}) or {})
+    chosen = None
+    if output_nodes:
+        incoming = {}
+        for edge in workflow_definition.get("edges", []):
+            incoming.setdefault(edge.get("target"), set()).add(edge.get("source"))
+        chosen = next((n for n in output_nodes if incoming.get(n["id"], set()) & executed), output_nodes[0])
+
+    outputs: Dict[str, Any] = {}
+    if chosen is not None:
+        for name, mapping in chosen["config"]["outputMapping"].items():
+            template = mapping.get("value", "") if isinstance(mapping, dict) else mapping
+            outputs[name] = variable_resolver.resolve_value(template, final_state)
+
+    flow = final_state.get("flow", {}) or {}
+    for name in (workflow_definition.get("interface", {}) or {}).get("outputs", {}) or {}:
+        if name in outputs:
+            continue
+        if name in flow:
+            outputs[name] = flow[name]
+        elif name == "response":
+            outputs[name] = _last_assistant_text(final_state.get("messages", []))
+    return outputs
+
+
+def bind_outputs_by_name(outputs: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Default binding of child outputs for workflow nodes without ``variableUpdates``.
+
+    Outputs named like an existing parent flow variable overwrite it, and the child's
+    non-user ``messages`` (its replies; the caller already holds the user turn) are
+    appended to the parent thread.
+
+    Args:
+        outputs: Child outputs from ``collect_child_outputs``
+        state: Parent state
+
+    Returns:
+        Updated parent state (shallow copy)
+    """
+    flow = dict(state.get("flow", {}) or {})
+    for name, value in outputs.items():
+        if name in flow:
+            flow[name] = value
+    updated = {**state, "flow": flow}
+    child_messages = outputs.get("messages")
+    if isinstance(child_messages, list):
+        replies = [m for m in child_messages if not (isinstance(m, dict) and m.get("role") == "user")]
+        updated["messages"] = list(state.get("messages", [])) + replies
+    return updated
+
+
+def _last_assistant_text(messages: List[Any]) -> str:
+    for message in reversed(messages or []):
+        if isinstance(message, dict):
+            if message.get("role") == "assistant":
+                return str(message.get("content", ""))
+        elif getattr(message, "type", "") == "ai":
+            return str(getattr(message, "content", ""))
+    return ""
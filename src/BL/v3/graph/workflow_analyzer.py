@@ -0,0 +1,377 @@
+"""Static analysis of workflow definitions before compilation (prune, normalize, validate)."""
+
+import copy
+import re
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from BL.v3.nodes.node_registry import NodeRegistry
+
+TEMPLATE_PATTERN = re.compile(r"\{\{([^}]+)\}\}")
+
+# Canvas-only node types that never execute
+EDITOR_ONLY_NODE_TYPES = ("note",)
+# Node types the builder handles itself
+BUILDER_NODE_TYPES = ("start", "output")
+# System variables set by the API (see build_initial_state_from_user_input)
+BUILTIN_SYSTEM_VARIABLES = ("userQuery", "attachments")
+# Scopes the variable resolver does not validate statically
+_DYNAMIC_SCOPES = ("nodeOutput", "interface")
+
+ERROR = "error"
+WARNING = "warning"
+
+
+class WorkflowIssue:
+    """One problem found in a workflow definition."""
+
+    __slots__ = ("severity", "code", "node_id", "node_name", "message")
+
+    def __init__(self, severity: str, code: str, message: str, node: Optional[Dict[str, Any]] = None):
+        self.severity = severity
+        self.code = code
+        self.node_id = (node or {}).get("id", "")
+        self.node_name = (node or {}).get("name", "") or self.node_id
+        self.message = message
+
+    def __str__(self) -> str:
+        where = f"node '{self.node_name}' ({self.node_id}): " if self.node_id else ""
+        return f"[{self.severity}] {where}{self.message}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "severity": self.severity,
+            "code": self.code,
+            "nodeId": self.node_id,
+            "nodeName": self.node_name,
+            "message": self.message,
+        }
+
+
+class WorkflowValidationError(ValueError):
+    """Raised when a workflow definition has errors that prevent compilation."""
+
+    def __init__(self, workflow_name: str, issues: List[WorkflowIssue]):
+        self.workflow_name = workflow_name
+        self.issues = issues
+        lines = "\n".join(f"  {issue}" for issue in issues)
+        super().__init__(f"Workflow '{workflow_name}' is invalid:\n{lines}")
+
+
+class WorkflowAnalysis:
+    """Result of ``analyze_workflow``: the definition to compile and the issues found."""
+
+    def __init__(
+        self,
+        workflow_name: str,
+        source: Dict[str, Any],
+        definition: Dict[str, Any],
+        issues: List[WorkflowIssue],
+        removed: Dict[str, str],
+    ):
+        """
+        Args:
+            workflow_name: Workflow name used in messages
+            source: Definition as loaded
+            definition: Pruned and normalized copy of the definition
+            issues: Problems found, in discovery order
+            removed: {node ID: reason} for nodes left out of the graph
+        """
+        self.workflow_name = workflow_name
+        self.source = source
+        self.definition = definition
+        self.issues = issues
+        self.removed = removed
+
+    @property
+    def errors(self) -> List[WorkflowIssue]:
+        return [issue for issue in self.issues if issue.severity == ERROR]
+
+    @property
+    def warnings(self) -> List[WorkflowIssue]:
+        return [issue for issue in self.issues if issue.severity == WARNING]
+
+    def raise_for_errors(self) -> None:
+        """Raise WorkflowValidationError when any error was found."""
+        if self.errors:
+            raise WorkflowValidationError(self.workflow_name, self.errors)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "workflow": self.workflow_name,
+            "removedNodes": dict(self.removed),
+            "issues": [issue.to_dict() for issue in self.issues],
+        }
+
+
+def node_name_index(definition: Dict[str, Any]) -> Dict[str, str]:
+    """Map node names to IDs for names used by exactly one node."""
+    ids_by_name: Dict[str, List[str]] = defaultdict(list)
+    for node in definition.get("nodes", []):
+        if node.get("name"):
+            ids_by_name[node["name"]].append(node["id"])
+    return {name: ids[0] for name, ids in ids_by_name.items() if len(ids) == 1}
+
+
+def rewrite_node_references(value: Any, name_to_id: Dict[str, str]) -> Any:
+    """
+    Rewrite ``{{nodes.<name>...}}`` templates to ``{{nodes.<id>...}}``.
+
+    Node outputs are stored under node IDs, while the editor lets authors reference
+    nodes by name; without the rewrite those templates resolve to empty.
+
+    Args:
+        value: String, list or dict (templates are rewritten recursively)
+        name_to_id: From ``node_name_index``
+
+    Returns:
+        Rewritten copy (strings without node-name references are returned as is)
+    """
+    if isinstance(value, str):
+        if "nodes." not in value:
+            return value
+
+        def replace(match: "re.Match") -> str:
+            parts = match.group(1).strip().split(".")
+            if len(parts) >= 2 and parts[0] == "nodes" and parts[1] in name_to_id:
+                parts[1] = name_to_id[parts[1]]
+                return "{{" + ".".join(parts) + "}}"
+            return match.group(0)
+
+        return TEMPLATE_PATTERN.sub(replace, value)
+    if isinstance(value, list):
+        return [rewrite_node_references(item, name_to_id) for item in value]
+    if isinstance(value, dict):
+        return {key: rewrite_node_references(item, name_to_id) for key, item in value.items()}
+    return value
+
+
+def analyze_workflow(
+    workflow_definition: Dict[str, Any],
+    is_registered: Callable[[str], bool] = NodeRegistry.is_registered,
+) -> WorkflowAnalysis:
+    """
+    Prune, normalize and validate a workflow definition before it is compiled.
+
+    - Editor-only nodes (notes) and nodes unreachable from the start node are
+      dropped, with the edges touching them.
+    - Node types must be registered.
+    - ``{{...}}`` paths must name a declared (or assigned) flow/system/thread
+      variable or an existing node; node-name references are rewritten to IDs.
+    - Rule edges must map each rule (and the else branch) to one target.
+
+    Args:
+        workflow_definition: Workflow JSON definition (not modified)
+        is_registered: Node type check (default: NodeRegistry)
+
+    Returns:
+        WorkflowAnalysis with the definition to compile and the issues found
+    """
+    name = workflow_definition.get("name") or workflow_definition.get("agenticWorkflowId", "") or "workflow"
+    definition = copy.deepcopy(workflow_definition)
+    nodes: List[Dict[str, Any]] = definition.get("nodes", [])
+    edges: List[Dict[str, Any]] = definition.get("edges", [])
+    nodes_by_id = {node["id"]: node for node in nodes}
+    issues: List[WorkflowIssue] = []
+    removed: Dict[str, str] = {}
+
+    # Editor-only nodes
+    for node in nodes:
+        if node.get("type") in EDITOR_ONLY_NODE_TYPES:
+            removed[node["id"]] = "editor-only"
+
+    # Dangling edges
+    for edge in edges:
+        for end in ("source", "target"):
+            if edge.get(end) not in nodes_by_id:
+                issues.append(
+                    WorkflowIssue(WARNING, "dangling-edge", f"edge {edge.get('id', '')} has unknown {end} '{edge.get(end)}'")
+                )
+
+    # Reachability from the start node
+    start_ids = [node["id"] for node in nodes if node.get("type") == "start"]
+    if not start_ids:
+        issues.append(WorkflowIssue(ERROR, "no-start", "workflow has no start node"))
+    else:
+        successors: Dict[str, List[str]] = defaultdict(list)
+        for edge in edges:
+            successors[edge.get("source")].append(edge.get("target"))
+        reachable: Set[str] = set(start_ids)
+        stack = list(start_ids)
+        while stack:
+            for target in successors[stack.pop()]:
+                if target in nodes_by_id and target not in reachable and target not in removed:
+                    reachable.add(target)
+                    stack.append(target)
+        for node in nodes:
+            if node["id"] not in reachable and node["id"] not in removed:
+                removed[node["id"]] = "unreachable"
+                issues.append(WorkflowIssue(WARNING, "unreachable", "not reachable from start; not compiled", node))
+
+    kept = [node for node in nodes if node["id"] not in removed]
+    definition["nodes"] = kept
+    definition["edges"] = [
+        edge
+        for edge in edges
+        if edge.get("source") in nodes_by_id
+        and edge.get("target") in nodes_by_id
+        and edge.get("source") not in removed
+        and edge.get("target") not in removed
+    ]
+
+    # Node types
+    for node in kept:
+        node_type = node.get("type", "")
+        if node_type not in BUILDER_NODE_TYPES and not is_registered(node_type):
+            issues.append(WorkflowIssue(ERROR, "unknown-type", f"node type '{node_type}' is not registered", node))
+
+    # Template paths
+    name_to_id = node_name_index(workflow_definition)
+    declared = _declared_variables(workflow_definition)
+    for node in kept:
+        for key in ("config", "variableUpdates"):
+            if key not in node:
+                continue
+            for expr in _template_expressions(node[key]):
+                problem = _check_expression(expr, declared, nodes_by_id, name_to_id, removed)
+                if problem:
+                    issues.append(WorkflowIssue(WARNING, "template-path", f"{{{{{expr}}}}}: {problem}", node))
+            node[key] = rewrite_node_references(node[key], name_to_id)
+
+    # Rule handles
+    for node in kept:
+        if node.get("type") == "rule":
+            issues.extend(_check_rule_handles(node, definition["edges"], nodes_by_id))
+
+    return WorkflowAnalysis(name, workflow_definition, definition, issues, removed)
+
+
+def _declared_variables(definition: Dict[str, Any]) -> Dict[str, Set[str]]:
+    """Variable names per scope: declared in ``variables`` or assigned by any variable update."""
+    variables = definition.get("variables", {}) or {}
+    declared: Dict[str, Set[str]] = {
+        "flow": {v.get("name") for v in variables.get("flow", []) or [] if v.get("name")},
+        "system": {v.get("name") for v in variables.get("system", []) or [] if v.get("name")}
+        | set(BUILTIN_SYSTEM_VARIABLES),
+        "thread": {"messages"},
+    }
+    for node in definition.get("nodes", []):
+        for update in node.get("variableUpdates", []) or []:
+            parts = str(update.get("fieldName", "")).split(".")
+            if len(parts) >= 2 and parts[0] in declared:
+                declared[parts[0]].add(parts[1])
+    return declared
+
+
+def _template_expressions(value: Any) -> Iterable[str]:
+    if isinstance(value, str):
+        for match in TEMPLATE_PATTERN.finditer(value):
+            yield match.group(1).strip()
+    elif isinstance(value, list):
+        for item in value:
+            yield from _template_expressions(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _template_expressions(item)
+
+
+def _check_expression(
+    expr: str,
+    declared: Dict[str, Set[str]],
+    nodes_by_id: Dict[str, Any],
+    name_to_id: Dict[str, str],
+    removed: Dict[str, str],
+) -> Optional[str]:
+    """Return a problem description for a template expression, or None when it is valid."""
+    parts = expr.split(".")
+    scope = parts[0]
+    field = parts[1].split("[")[0] if len(parts) > 1 else ""
+    if scope in _DYNAMIC_SCOPES:
+        return None
+    if scope in declared:
+        if not field:
+            return f"incomplete {scope} path"
+        if field not in declared[scope]:
+            return f"{scope} variable '{field}' is never declared or assigned"
+        return None
+    if scope == "nodes":
+        node_id = name_to_id.get(field, field)
+        if node_id not in nodes_by_id:
+            return f"unknown node '{field}'"
+        if node_id in removed:
+            return f"node '{field}' is {removed[node_id]} and never produces output"
+        return None
+    return f"unknown scope '{scope}' (always resolves to empty)"
+
+
+def _check_rule_handles(
+    rule_node: Dict[str, Any], edges: List[Dict[str, Any]], nodes_by_id: Dict[str, Any]
+) -> List[WorkflowIssue]:
+    """Check that each rule and the else branch select exactly one target."""
+    issues: List[WorkflowIssue] = []
+    rule_edges = [edge for edge in edges if edge.get("source") == rule_node["id"]]
+    rule_ids = [rule.get("ruleId", "") for rule in rule_node.get("config", {}).get("rules", [])]
+
+    def target_names(matched: List[Dict[str, Any]]) -> str:
+        return ", ".join(
+            sorted({nodes_by_id.get(e.get("target"), {}).get("name") or str(e.get("target")) for e in matched})
+        )
+
+    # The builder matches handles by substring, so one rule ID may hit several edges
+    claimed: Dict[int, List[str]] = defaultdict(list)
+    for rule_id in rule_ids:
+        if not rule_id:
+            continue
+        rule_str = rule_id if rule_id.startswith("r-") else f"r-{rule_id}"
+        matched = [
+            edge for edge in rule_edges
+            if rule_str in edge.get("sourceHandle", "") or rule_id in edge.get("sourceHandle", "")
+        ]
+        for edge in matched:
+            claimed[id(edge)].append(rule_id)
+        if not matched:
+            issues.append(
+                WorkflowIssue(WARNING, "rule-without-edge", f"rule {rule_id} has no edge; it ends the workflow", rule_node)
+            )
+        elif len({edge.get("target") for edge in matched}) > 1:
+            issues.append(
+                WorkflowIssue(
+                    ERROR,
+                    "ambiguous-rule-handle",
+                    f"rule {rule_id} matches several edge handles ({target_names(matched)})",
+                    rule_node,
+                )
+            )
+    for edge in rule_edges:
+        if len(claimed.get(id(edge), [])) > 1:
+            issues.append(
+                WorkflowIssue(
+                    ERROR,
+                    "ambiguous-rule-handle",
+                    f"handle '{edge.get('sourceHandle')}' matches rules {', '.join(claimed[id(edge)])}",
+                    rule_node,
+                )
+            )
+
+    else_edges = [
+        edge for edge in rule_edges
+        if not claimed.get(id(edge))
+        and ("else" in edge.get("sourceHandle", "").lower() or "default" in edge.get("sourceHandle", "").lower())
+    ]
+    if len({edge.get("target") for edge in else_edges}) > 1:
+        issues.append(
+            WorkflowIssue(
+                ERROR, "ambiguous-rule-handle", f"several else branches ({target_names(else_edges)})", rule_node
+            )
+        )
+    for edge in rule_edges:
+        if not claimed.get(id(edge)) and edge not in else_edges:
+            issues.append(
+                WorkflowIssue(
+                    WARNING,
+                    "unused-rule-handle",
+                    f"handle '{edge.get('sourceHandle')}' matches no rule; the edge is never taken",
+                    rule_node,
+                )
+            )
+    return issues
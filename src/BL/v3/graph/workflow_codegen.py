@@ -0,0 +1,359 @@
+"""Generated Python modules for acyclic workflows (inlined templates, rule if-chains, routing)."""
+
+import ast
+import hashlib
+import json
+import logging
+import os
+import re
+import stat
+import types
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from langgraph.graph import END
+
+from BL.v3.graph.native_interpreter import NativeProgram
+from BL.v3.utils.variable_resolver import VariableResolver, compile_template, single_expression
+
+logger = logging.getLogger(__name__)
+
+# Bump when the generated code changes shape; older modules are regenerated
+CODEGEN_VERSION = 3
+
+_CONDITION_CODE = {
+    "equals": "{f} == {e}",
+    "is not empty": 'bool({f}) and str({f}).strip() != ""',
+    "is empty": 'not bool({f}) or str({f}).strip() == ""',
+    "contains": "str({e}) in str({f})",
+    "not equals": "{f} != {e}",
+    "greater than": "greater_than({f}, {e})",
+    "less than": "less_than({f}, {e})",
+}
+_constant_resolver = VariableResolver()
+
+
+def codegen_enabled(workflow_id: str, override: Optional[bool] = None) -> bool:
+    """
+    Whether a workflow should run from a generated module.
+
+    Args:
+        workflow_id: agenticWorkflowId
+        override: Builder setting; None reads V3_CODEGEN ("1" for every workflow, or a
+            comma-separated list of workflow IDs)
+    """
+    if override is not None:
+        return override
+    setting = os.getenv("V3_CODEGEN", "").strip()
+    if setting.lower() in ("1", "true", "yes", "all"):
+        return True
+    return workflow_id in {item.strip() for item in setting.split(",") if item.strip()}
+
+
+def codegen_dir() -> Path:
+    """Directory for generated modules (V3_CODEGEN_DIR, default ``~/.cache/uranus-v3-codegen``)."""
+    cache_home = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(os.getenv("V3_CODEGEN_DIR") or Path(cache_home) / "uranus-v3-codegen")
+
+
+def private_dir(directory: Path) -> Path:
+    """
+    Create ``directory`` (0700) or check an existing one before modules are read from it.
+
+    Raises:
+        ValueError: When it is a symlink, not a directory, or (on POSIX) owned by another
+            user; group/other permissions are removed from a directory this user owns
+    """
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = os.lstat(directory)
+    if stat.S_ISLNK(info.st_mode) or not stat.S_ISDIR(info.st_mode):
+        raise ValueError(f"Codegen directory {directory} is not a plain directory")
+    if hasattr(os, "getuid"):
+        if info.st_uid != os.getuid():
+            raise ValueError(f"Codegen directory {directory} is owned by another user")
+        if info.st_mode & 0o077:
+            os.chmod(directory, 0o700)
+    return directory
+
+
+def workflow_fingerprint(workflow_definition: Dict[str, Any], fuse_nodes: bool) -> str:
+    """Hash of everything the generated module depends on."""
+    payload = json.dumps(
+        {"codegen": CODEGEN_VERSION, "fuse": fuse_nodes, "definition": workflow_definition},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GeneratedProgram:
+    """A NativeProgram whose routing and step loop run from a generated module."""
+
+    __slots__ = ("program", "module", "path")
+
+    def __init__(self, program: NativeProgram, module: Any, path: Path):
+        self.program = program
+        self.module = module
+        self.path = path
+
+    @property
+    def workflow_id(self) -> str:
+        return self.program.workflow_id
+
+    async def ainvoke(self, initial_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the workflow (same contract as ``NativeProgram.ainvoke``)."""
+        return await self.module.run(self.program.steps, initial_state)
+
+
+def load_generated_program(
+    workflow_definition: Dict[str, Any],
+    program: NativeProgram,
+    fuse_nodes: bool,
+    directory: Optional[Path] = None,
+) -> GeneratedProgram:
+    """
+    Load the generated module of a workflow version, (re)writing it when missing or stale.
+
+    The module is always generated from the definition; the file is rewritten unless it
+    already holds exactly that source, and the module is compiled from the generated
+    source in memory, so nothing placed in the directory (or its __pycache__) is executed.
+
+    Args:
+        workflow_definition: Analyzed definition the program was built from
+        program: Native program of the compiled graph (steps and routers)
+        fuse_nodes: Builder fusion setting (part of the fingerprint)
+        directory: Module directory (default ``codegen_dir()``)
+
+    Returns:
+        GeneratedProgram running ``program``'s steps
+
+    Raises:
+        ValueError: When the workflow cannot be expressed as a generated module
+    """
+    directory = private_dir(directory or codegen_dir())
+    fingerprint = workflow_fingerprint(workflow_definition, fuse_nodes)
+    path = directory / _module_file_name(workflow_definition)
+
+    source = generate_module_source(workflow_definition, program, fingerprint)
+    if _file_digest(path) != hashlib.sha256(source.encode("utf-8")).hexdigest():
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(source)
+        os.replace(tmp_path, path)
+        logger.info("Generated workflow module %s", path)
+    module = _load(path, source, fingerprint)
+    if not _is_current(module, fingerprint, program):
+        raise ValueError(f"Generated module {path} does not match workflow {program.workflow_id}")
+    return GeneratedProgram(program, module, path)
+
+
+def generate_module_source(workflow_definition: Dict[str, Any], program: NativeProgram, fingerprint: str) -> str:
+    """
+    Generate the Python source of a workflow module.
+
+    The module has one predicate per rule (conditions inlined, templates pre-split),
+    one router per rule step (if-chain returning the target resolved at build time),
+    one route lookup per agent step with handoff edges and a ``run(steps, initial_state)`` step loop with the transitions written out.
+
+    Args:
+        workflow_definition: Analyzed workflow definition
+        program: Native program (entry, steps, static successors, rule and handoff routers)
+        fingerprint: ``workflow_fingerprint`` of the definition
+
+    Returns:
+        Module source
+
+    Raises:
+        ValueError: For routers without rule or handoff metadata or values that are not literals
+    """
+    step_ids = list(program.steps)
+    lines: List[str] = [
+        '"""Generated workflow module. Do not edit: regenerated when the workflow changes."""',
+        "",
+        "from BL.v3.graph.codegen_runtime import (",
+        "    END,",
+        "    STATE_KEYS,",
+        "    evaluate_expression,",
+        "    finish_template,",
+        "    greater_than,",
+        "    less_than,",
+        "    merge_state,",
+        "    nested_get,",
+        ")",
+        "",
+        f"CODEGEN_VERSION = {CODEGEN_VERSION}",
+        f"FINGERPRINT = {fingerprint!r}",
+        f"WORKFLOW_ID = {program.workflow_id!r}",
+        f"WORKFLOW_NAME = {str(workflow_definition.get('name', '')).strip()!r}",
+        f"WORKFLOW_VERSION = {str(workflow_definition.get('version', '') or '')!r}",
+        f"ENTRY = {program.entry!r}",
+        f"STEP_IDS = {tuple(step_ids)!r}",
+    ]
+
+    router_names: Dict[str, str] = {}
+    for step_index, step_id in enumerate(step_ids):
+        router = program.routers.get(step_id)
+        if router is None:
+            continue
+        router_names[step_id] = f"_route_{step_index}"
+        if hasattr(router, "handoff_routes"):
+            lines += ["", ""] + _handoff_router_source(router_names[step_id], step_id, router)
+            continue
+        if not hasattr(router, "rules") or not hasattr(router, "route_table"):
+            raise ValueError(f"Step {step_id} has a router without rule or handoff metadata")
+        predicate_names = []
+        for rule_index, rule in enumerate(router.rules):
+            predicate_name = f"_rule_{step_index}_{rule_index}"
+            predicate_names.append((predicate_name, rule.get("ruleId", "")))
+            lines += ["", ""] + _predicate_source(predicate_name, rule)
+        lines += ["", "", f"def {router_names[step_id]}(state):", f'    """Route after step {step_id}."""']
+        for predicate_name, rule_id in predicate_names:
+            lines += [f"    if {predicate_name}(state):", f"        return {_target(router.route_table[rule_id])}"]
+        lines.append(f"    return {_target(router.route_table['default'])}")
+
+    lines += [
+        "",
+        "",
+        "async def run(steps, initial_state):",
+        '    """Run the workflow; ``steps`` are the compiled step functions by step ID."""',
+    ]
+    for step_index, step_id in enumerate(step_ids):
+        lines.append(f"    step_{step_index} = steps[{step_id!r}]")
+    lines += [
+        "    state = {key: initial_state[key] for key in STATE_KEYS if key in initial_state}",
+        "    step_id = ENTRY",
+        "    while step_id != END:",
+    ]
+    for step_index, step_id in enumerate(step_ids):
+        keyword = "if" if step_index == 0 else "elif"
+        if step_id in router_names:
+            transition = f"{router_names[step_id]}(state)"
+        else:
+            transition = _target(program.next_step.get(step_id, END))
+        lines += [
+            f"        {keyword} step_id == {step_id!r}:",
+            f"            merge_state(state, await step_{step_index}(dict(state), None))",
+            f"            step_id = {transition}",
+        ]
+    lines += [
+        "        else:",
+        '            raise KeyError(f"Unknown step {step_id}")',
+        "    return {key: state[key] for key in STATE_KEYS if key in state}",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def _handoff_router_source(name: str, step_id: str, router: Any) -> List[str]:
+    """The handoff router of an agent step: the agent's route, else its regular edge."""
+    routes = ", ".join(f"{route!r}: {_target(target)}" for route, target in router.handoff_routes.items())
+    fallback = _target(router.fallback)
+    return [
+        f"{name.upper()}_TARGETS = {{{routes}}}",
+        "",
+        "",
+        f"def {name}(state):",
+        f'    """Route after agent step {step_id}."""',
+        f"    route = state.get('nodes', {{}}).get({router.agent_id!r}, {{}}).get('route')",
+        f"    return {name.upper()}_TARGETS.get(route, {fallback}) if route else {fallback}",
+    ]
+
+
+def _predicate_source(name: str, rule: Dict[str, Any]) -> List[str]:
+    """``RuleEvaluator.evaluate_rule`` for one rule, as straight-line code."""
+    lines = [f"def {name}(state):", f"    # Rule {str(rule.get('ruleId', ''))!r}"]
+    if not rule.get("enable", True):
+        return lines + ["    return False"]
+    conditions = rule.get("conditions", [])
+    logic_type = rule.get("logicType", "AND")
+    if not conditions or logic_type == "default":
+        return lines + ["    return True"]
+    results = []
+    for index, condition in enumerate(conditions):
+        field_name, expected_name = f"f{index}", f"e{index}"
+        lines += [
+            f"    {field_name} = {_value_code(condition.get('field', ''))}",
+            f"    {expected_name} = {_value_code(condition.get('value', ''))}",
+        ]
+        code = _CONDITION_CODE.get(condition.get("operator", ""), "False")
+        lines.append(f"    c{index} = {code.format(f=field_name, e=expected_name)}")
+        results.append(f"c{index}")
+    joiner = " or " if logic_type == "OR" else " and "
+    return lines + [f"    return bool({joiner.join(results)})"]
+
+
+def _value_code(template: Any) -> str:
+    """Expression computing ``VariableResolver.resolve_value(template, state)``."""
+    parts = single_expression(template) if isinstance(template, str) else None
+    if parts is not None:
+        return _accessor(parts)
+    return _template_code(template)
+
+
+def _template_code(template: Any) -> str:
+    """Expression computing ``VariableResolver.resolve(template, state)``."""
+    if not isinstance(template, str):
+        return _literal(template)
+    segments = compile_template(template)
+    if not any(isinstance(segment, tuple) for segment in segments):
+        # No expressions: the value does not depend on the state
+        return _literal(_constant_resolver.resolve(template, {}))
+    pieces = [repr(segment) if isinstance(segment, str) else f"str({_accessor(segment)})" for segment in segments]
+    joined = pieces[0] if len(pieces) == 1 else f'"".join(({", ".join(pieces)},))'
+    return f"finish_template({joined}, {template!r})"
+
+
+def _accessor(parts: tuple) -> str:
+    """Inlined lookup for flow/system variables; other scopes go through the resolver."""
+    if parts[0] in ("flow", "system"):
+        if len(parts) == 2:
+            return f'state.get({parts[0]!r}, {{}}).get({parts[1]!r}, "")'
+        return f"nested_get(state.get({parts[0]!r}, {{}}), {tuple(parts[1:])!r})"
+    return f"evaluate_expression({tuple(parts)!r}, state)"
+
+
+def _literal(value: Any) -> str:
+    code = repr(value)
+    try:
+        if ast.literal_eval(code) == value:
+            return code
+    except (ValueError, SyntaxError):
+        pass
+    raise ValueError(f"Value {code[:40]} cannot be written as a literal")
+
+
+def _target(target: Union[str, Any]) -> str:
+    return "END" if target == END else repr(target)
+
+
+def _module_file_name(workflow_definition: Dict[str, Any]) -> str:
+    workflow_id = str(workflow_definition.get("agenticWorkflowId", "") or "workflow")
+    version = str(workflow_definition.get("version", "") or "latest")
+    slug = re.sub(r"[^0-9A-Za-z_]", "_", f"{workflow_id}_{version}")[:80]
+    digest = hashlib.sha1(f"{workflow_id}\0{version}".encode("utf-8")).hexdigest()[:8]
+    return f"wf_{slug}_{digest}.py"
+
+
+def _file_digest(path: Path) -> Optional[str]:
+    """SHA-256 of a module file's content, or None when it cannot be read."""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _load(path: Path, source: str, fingerprint: str) -> Any:
+    """Build a generated module from ``source`` (``path`` only names it in tracebacks)."""
+    module = types.ModuleType(f"uranus_v3_codegen.{path.stem}_{fingerprint[:8]}")
+    module.__file__ = str(path)
+    exec(compile(source, str(path), "exec"), module.__dict__)
+    return module
+
+
+def _is_current(module: Any, fingerprint: str, program: NativeProgram) -> bool:
+    return (
+        getattr(module, "CODEGEN_VERSION", None) == CODEGEN_VERSION
+        and getattr(module, "FINGERPRINT", None) == fingerprint
+        and tuple(getattr(module, "STEP_IDS", ())) == tuple(program.steps)
+    )
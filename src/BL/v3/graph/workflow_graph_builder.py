@@ -1,18 +1,50 @@
 """Main graph builder for v3 workflow system."""
 
-import json
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+import asyncio
+import inspect
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, StateGraph
 
+from BL.v3.accounting.run_accounting import track_node
+from BL.v3.cache.node_memo import NodeMemo, invalidate_memos
+from BL.v3.cache.run_cache import RunCachePolicy
+from BL.v3.cache.speculative_prefetch import current_prefetch_scope, is_prefetchable, speculative_prefetch_enabled
+from BL.v3.graph.native_interpreter import (
+    RouteRecorder,
+    compile_native_program,
+    native_program_of,
+    single_target_router,
+)
+from BL.v3.graph.node_bindings import NodeBindings
+from BL.v3.graph.node_fusion import plan_node_fusion
+from BL.v3.graph.parallel_branches import (
+    NodeEffects,
+    branch_state,
+    join_branch_states,
+    node_effects,
+    plan_parallel_branches,
+)
+from BL.v3.graph.workflow_codegen import codegen_enabled, load_generated_program
+from BL.v3.graph.workflow_analyzer import WorkflowAnalysis, analyze_workflow
+from BL.v3.graph.subworkflow_interface import (
+    child_initial_state,
+    collect_child_outputs,
+    declared_output_nodes,
+)
 from BL.v3.interfaces.graph_builder import IGraphBuilder
 from BL.v3.nodes.executors.workflow_executor import WorkflowNodeExecutor
 from BL.v3.nodes.node_registry import NodeRegistry
-from BL.v3.state.workflow_state import WorkflowState, state_reducer
+from BL.v3.repository.workflow_repository import get_workflow_repository
+from BL.v3.state.workflow_state import WorkflowState
 from BL.v3.utils.rule_evaluator import RuleEvaluator
 from BL.v3.utils.variable_resolver import VariableResolver
 
+logger = logging.getLogger(__name__)
+
 
 class WorkflowGraphBuilder(IGraphBuilder):
     """
@@ -26,24 +58,114 @@ class WorkflowGraphBuilder(IGraphBuilder):
     - Variable updates
     """
 
-    def __init__(self, workflow_loader=None):
+    def __init__(
+        self,
+        workflow_loader=None,
+        fuse_nodes: Optional[bool] = None,
+        codegen: Optional[bool] = None,
+        parallel_branches: Optional[bool] = None,
+        speculative_prefetch: Optional[bool] = None,
+    ):
         """
         Initialize graph builder.
 
         Args:
-            workflow_loader: Function to load workflow JSON by ID
+            workflow_loader: Function (sync or async) to load workflow JSON by ID;
+                defaults to the indexed repository over core/jsons
+            fuse_nodes: Fold cheap control nodes into the preceding step (see
+                ``plan_node_fusion``); defaults to on unless V3_NODE_FUSION=0
+            codegen: Run acyclic workflows from generated modules (see
+                ``workflow_codegen``); None reads V3_CODEGEN
+            parallel_branches: Run independent branches after a fan-out concurrently
+                (see ``plan_parallel_branches``); defaults to on unless V3_PARALLEL_BRANCHES=0
+            speculative_prefetch: Start idempotent tool/HTTP calls that may come next while
+                an LLM or agent step runs; None reads V3_SPECULATIVE_PREFETCH (off by default)
         """
+        if fuse_nodes is None:
+            fuse_nodes = os.getenv("V3_NODE_FUSION", "1").lower() not in ("0", "false", "no")
+        if parallel_branches is None:
+            parallel_branches = os.getenv("V3_PARALLEL_BRANCHES", "1").lower() not in ("0", "false", "no")
+        self.fuse_nodes = fuse_nodes
+        self.parallel_branches = parallel_branches
+        self.speculative_prefetch = speculative_prefetch_enabled(speculative_prefetch)
+        self.codegen = codegen
         self.variable_resolver = VariableResolver()
         self.rule_evaluator = RuleEvaluator(self.variable_resolver)
-        self.workflow_loader = workflow_loader or self._default_workflow_loader
+        self.workflow_loader = workflow_loader or get_workflow_repository().aload
         self._workflow_cache: Dict[str, Any] = {}
         self._graph_cache: Dict[str, Any] = {}
         self._build_stack: Set[str] = set()  # Track workflows being built (cycle detection)
+        # Workflows compiled by this builder: ID -> (definition, compiled graph)
+        self._built: Dict[str, Tuple[Dict[str, Any], Any]] = {}
+        # Per workflow ID: node ID -> (node definition, executor), swapped by prompt patches
+        self._node_bindings: Dict[str, NodeBindings] = {}
+        # Static analysis per workflow ID (pruned definition + issues)
+        self._analyses: Dict[str, WorkflowAnalysis] = {}
+        # Native programs of acyclic workflows, attached to their compiled graphs
+        self._native_programs: Dict[str, Any] = {}
+
+    def add_compiled(self, workflow_definition: Dict[str, Any], compiled: Any) -> None:
+        """
+        Reuse an already compiled workflow (e.g. an unchanged child during a reload).
+
+        Args:
+            workflow_definition: Workflow JSON definition the graph was compiled from
+            compiled: Compiled LangGraph graph
+        """
+        workflow_id = workflow_definition.get("agenticWorkflowId", "")
+        self._workflow_cache[workflow_id] = workflow_definition
+        self._graph_cache[workflow_id] = compiled
+
+    def built_workflows(self) -> Dict[str, Tuple[Dict[str, Any], Any]]:
+        """Workflows compiled by this builder (not ``add_compiled`` ones): ID -> (definition, graph)."""
+        return dict(self._built)
+
+    def node_bindings(self, workflow_id: str) -> NodeBindings:
+        """Node ID -> (node definition, executor) table of a workflow compiled by this builder."""
+        return self._node_bindings.get(workflow_id) or NodeBindings()
+
+    def analyze(self, workflow_definition: Dict[str, Any]) -> WorkflowAnalysis:
+        """
+        Run the static analysis pass on a workflow (cached per workflow ID).
+
+        Warnings are logged once; errors are left to the caller (``build`` raises).
+
+        Args:
+            workflow_definition: Workflow JSON definition
+
+        Returns:
+            WorkflowAnalysis with the pruned definition to compile
+        """
+        workflow_id = workflow_definition.get("agenticWorkflowId", "")
+        analysis = self._analyses.get(workflow_id)
+        if analysis is not None and analysis.source is workflow_definition:
+            return analysis
+        analysis = analyze_workflow(workflow_definition)
+        self._analyses[workflow_id] = analysis
+        if analysis.removed:
+            logger.debug(
+                "Workflow '%s': %d node(s) not compiled: %s",
+                analysis.workflow_name,
+                len(analysis.removed),
+                ", ".join(f"{node_id} ({reason})" for node_id, reason in analysis.removed.items()),
+            )
+        if analysis.warnings:
+            logger.warning(
+                "Workflow '%s' has %d warning(s):\n%s",
+                analysis.workflow_name,
+                len(analysis.warnings),
+                "\n".join(f"  {issue}" for issue in analysis.warnings),
+            )
+        return analysis
 
     async def build(self, workflow_definition: Dict[str, Any]) -> Any:
         """
         Build a LangGraph graph from workflow definition (async).
 
+        The definition goes through ``analyze`` first: editor-only and unreachable
+        nodes are dropped, node-name templates are rewritten to IDs, and errors
+        (unknown node types, ambiguous rule handles) raise WorkflowValidationError.
+
         Args:
             workflow_definition: Complete workflow JSON definition
 
@@ -61,13 +183,45 @@ class WorkflowGraphBuilder(IGraphBuilder):
         self._build_stack.add(workflow_id)
 
         try:
-            graph = self._build_graph(workflow_definition)
+            analysis = self.analyze(workflow_definition)
+            analysis.raise_for_errors()
+            subworkflows = await self._embed_subworkflows(analysis.definition)
+            graph = self._build_graph(analysis.definition, subworkflows)
             compiled = graph.compile()
+            # ainvoke_workflow runs acyclic workflows on this instead of Pregel
+            program = self._native_programs.pop(workflow_id, None)
+            if program is not None and codegen_enabled(workflow_id, self.codegen):
+                program = self._generated_program(analysis.definition, program)
+            compiled.native_program = program
+            # ainvoke_workflow serves repeated runs of side-effect free workflows from the run cache
+            compiled.run_cache_policy = RunCachePolicy.for_workflow(
+                analysis.definition,
+                {
+                    node_id: runner.run_cache_policy
+                    for node_id, runner in subworkflows.items()
+                    if getattr(runner, "run_cache_policy", None) is not None
+                },
+            )
+            if compiled.run_cache_policy.refusal:
+                logger.debug("Workflow %s runs are not cached: %s", workflow_id, compiled.run_cache_policy.refusal)
             self._graph_cache[workflow_id] = compiled
+            self._built[workflow_id] = (workflow_definition, compiled)
             return compiled
         finally:
             self._build_stack.remove(workflow_id)
 
+    def _generated_program(self, workflow_definition: Dict[str, Any], program: Any) -> Any:
+        """Load (or generate) the workflow's module; keep the interpreted program if that fails."""
+        try:
+            return load_generated_program(workflow_definition, program, self.fuse_nodes)
+        except Exception as ex:
+            logger.warning(
+                "Workflow %s: generated module unavailable (%s); using the interpreter",
+                program.workflow_id,
+                ex,
+            )
+            return program
+
     async def build_workflow_node(
         self, workflow_id: str, workflow_config: Dict[str, Any]
     ) -> Any:
@@ -79,95 +233,252 @@ class WorkflowGraphBuilder(IGraphBuilder):
             workflow_config: Configuration for the workflow node
 
         Returns:
-            LangGraph node or tool representing the workflow
+            Async callable ``(state, inputs=None) -> outputs`` running the child workflow
         """
         # Load workflow definition
-        workflow_def = self.workflow_loader(workflow_id)
+        workflow_def = await self._load_child_definition(workflow_id)
         if not workflow_def:
             raise ValueError(f"Workflow {workflow_id} not found")
 
         # Build the workflow graph (async)
         workflow_graph = await self.build(workflow_def)
+        return self._subworkflow_runner(workflow_def, workflow_graph, workflow_config)
+
+    def _subworkflow_runner(
+        self, workflow_def: Dict[str, Any], workflow_graph: Any, workflow_config: Dict[str, Any]
+    ):
+        """Wrap a compiled child graph as ``(state, inputs=None, config=None) -> outputs``."""
+        # Output mappings are read from the analyzed copy (node-name templates rewritten)
+        workflow_def = self.analyze(workflow_def).definition
+        output_nodes = declared_output_nodes(workflow_def)
+
+        async def workflow_node_fn(
+            state: WorkflowState,
+            inputs: Optional[Dict[str, Any]] = None,
+            config: Optional[RunnableConfig] = None,
+        ) -> Dict[str, Any]:
+            """Run the child on its interface inputs and return its declared outputs (async)."""
+            if inputs is None:
+                inputs = {
+                    key: self.variable_resolver.resolve(value_template, state)
+                    for key, value_template in workflow_config.get("inputs", {}).items()
+                }
+
+            # The child only sees its inputs and the request-scoped system variables
+            child_state = child_initial_state(workflow_def, inputs, state)
+            # Passing the parent's run config makes this a nested run of the parent
+            # (shared callbacks/streaming, checkpoint namespace under the parent).
+            # Without one the parent runs natively, and so does an acyclic child.
+            program = native_program_of(workflow_graph) if config is None else None
+            if program is not None:
+                result = await program.ainvoke(child_state)
+            else:
+                result = await workflow_graph.ainvoke(child_state, config)
 
-        # Return async callable node function
-        async def workflow_node_fn(state: WorkflowState) -> WorkflowState:
-            """Execute workflow node (async)."""
-            # Resolve inputs from config
-            inputs_config = workflow_config.get("inputs", {})
-            resolved_inputs = {}
-            for key, value_template in inputs_config.items():
-                resolved_inputs[key] = self.variable_resolver.resolve(value_template, state)
-
-            # Prepare state for workflow
-            workflow_state = {
-                **state,
-                "interface": {
-                    "inputs": resolved_inputs,
-                },
-            }
+            # Only the declared outputs flow back; the caller applies them as a delta
+            return collect_child_outputs(workflow_def, result, self.variable_resolver, output_nodes)
 
-            # Invoke workflow asynchronously
-            result = await workflow_graph.ainvoke(workflow_state)
+        return workflow_node_fn
 
-            # Merge results back
-            return state_reducer(state, result)
+    async def _embed_subworkflows(self, workflow_definition: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Resolve and compile the children of static workflow nodes once, at build time.
 
-        return workflow_node_fn
+        Args:
+            workflow_definition: Parent workflow JSON definition
+
+        Returns:
+            {workflow node ID: child runner}; nodes whose child cannot be resolved now
+            (dynamic IDs, unknown workflows) are left to load on first execution
+        """
+        subworkflows: Dict[str, Any] = {}
+        for node in workflow_definition.get("nodes", []):
+            if node.get("type") != "workflow":
+                continue
+            config = node.get("config", {})
+            workflow_id = config.get("agenticWorkflowId", "")
+            if (
+                not workflow_id
+                or "{{" in workflow_id
+                or config.get("agenticWorkflowIdMode", "static") != "static"
+            ):
+                continue
+            child_def = await self._load_child_definition(workflow_id)
+            if not child_def:
+                logger.warning(
+                    "Workflow node %s: workflow %s not found at build time; it will be loaded on first run",
+                    node.get("name") or node["id"],
+                    workflow_id,
+                )
+                continue
+            if child_def.get("agenticWorkflowId", "") in self._build_stack:
+                raise ValueError(f"Circular dependency detected: workflow {workflow_id}")
+            try:
+                child_graph = await self.build(child_def)
+            except ValueError as ex:
+                logger.warning(
+                    "Workflow node %s: could not embed workflow %s (%s); it will be built on first run",
+                    node.get("name") or node["id"],
+                    workflow_id,
+                    ex,
+                )
+                continue
+            runner = self._subworkflow_runner(child_def, child_graph, config)
+            runner.run_cache_policy = getattr(child_graph, "run_cache_policy", None)
+            runner.graph = child_graph
+            subworkflows[node["id"]] = runner
+        return subworkflows
+
+    async def _load_child_definition(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """Load a child workflow definition by ID through the loader (cached per builder)."""
+        if workflow_id in self._workflow_cache:
+            return self._workflow_cache[workflow_id]
+        workflow_def = self.workflow_loader(workflow_id)
+        if inspect.isawaitable(workflow_def):
+            workflow_def = await workflow_def
+        if workflow_def:
+            self._workflow_cache[workflow_id] = workflow_def
+        return workflow_def
+
+    def _build_graph(
+        self, workflow_definition: Dict[str, Any], subworkflows: Optional[Dict[str, Any]] = None
+    ) -> StateGraph:
+        """
+        Build LangGraph StateGraph from workflow definition.
 
-    def _build_graph(self, workflow_definition: Dict[str, Any]) -> StateGraph:
-        """Build LangGraph StateGraph from workflow definition."""
+        Args:
+            workflow_definition: Workflow JSON definition
+            subworkflows: Child runners embedded at build time, keyed by workflow node ID
+        """
+        subworkflows = subworkflows or {}
         nodes = workflow_definition.get("nodes", [])
-        edges = workflow_definition.get("edges", [])
+        workflow_id = workflow_definition.get("agenticWorkflowId", "")
+        workflow_key = f"{workflow_id}:{workflow_definition.get('version', '') or ''}"
 
-        # Create graph
-        graph = StateGraph(WorkflowState, reducer=state_reducer)
+        # Create graph (channels keep the last value: every step writes the state once)
+        graph = StateGraph(WorkflowState)
 
         # Index nodes by ID
         nodes_by_id = {node["id"]: node for node in nodes}
-        nodes_by_type = {}
-        for node in nodes:
-            node_type = node.get("type", "")
-            if node_type not in nodes_by_type:
-                nodes_by_type[node_type] = []
-            nodes_by_type[node_type].append(node)
+
+        # Independent branches after a fan-out become one step that runs them
+        # concurrently; steps and edges are planned with each group as one node
+        parallel = plan_parallel_branches(workflow_definition, enabled=self.parallel_branches)
+        for source_id, reason in parallel.refused.items():
+            logger.warning(
+                "Workflow %s: branches after node %s cannot run in parallel (%s); only one is taken",
+                workflow_id,
+                source_id,
+                reason,
+            )
+        routing_definition = parallel.routing_definition(workflow_definition)
+        edges = routing_definition.get("edges", [])
 
         # Build node functions for all nodes except start/output.
         # Add all node types (agent, llm, rule, tool, workflow, etc.) so that edges
         # between them are valid; previously we only added handoff tool/workflow nodes,
         # which caused "Found edge starting at unknown node" when an edge started at
         # a non-handoff tool (e.g. v83ozem).
+        # With fusion, cheap control nodes run inside the step before them and the step
+        # routes like its last member.
+        plan = plan_node_fusion(routing_definition, fuse=self.fuse_nodes)
         node_functions = {}
-        for node in nodes:
-            node_id = node["id"]
-            node_type = node.get("type", "")
-
-            # Skip start and output - handled specially
-            if node_type in ["start", "output"]:
-                continue
-
-            # Build node function
-            node_fn = self._build_node_function(node, nodes_by_id)
-            node_functions[node_id] = node_fn
-            graph.add_node(node_id, node_fn)
-
-        # Build edges (only from nodes that were added to the graph)
+        member_functions: Dict[str, Any] = {}
+        bindings = NodeBindings()
+        self._node_bindings[workflow_id] = bindings
+
+        def member_function(member_id: str):
+            if member_id not in member_functions:
+                node = nodes_by_id[member_id]
+                node_fn = self._build_node_function(
+                    node, nodes_by_id, subworkflows.get(member_id), workflow_key, bindings
+                )
+                member_functions[member_id] = node_fn
+                bindings.current[member_id] = (node, node_fn.executor)
+            return member_functions[member_id]
+
+        def chain_function(member_ids: List[str]):
+            if len(member_ids) == 1:
+                return member_function(member_ids[0])
+            return self._build_fused_function([member_function(member_id) for member_id in member_ids])
+
+        for group_id, group in parallel.groups.items():
+            member_functions[group_id] = self._build_parallel_function(
+                [chain_function(branch) for branch in group.branches]
+            )
+        # Model steps may start the calls of the idempotent nodes after them; the
+        # candidates are filled in once the routing is known
+        prefetch_candidates: Dict[str, List[str]] = {}
+        for step_id, members in plan.steps.items():
+            step_fn = chain_function(members)
+            if self.speculative_prefetch and any(
+                nodes_by_id.get(member_id, {}).get("type") in ("llm", "agent") for member_id in members
+            ):
+                step_fn = self._build_prefetching_function(
+                    step_fn, prefetch_candidates.setdefault(step_id, []), nodes_by_id, bindings
+                )
+            node_functions[step_id] = step_fn
+            graph.add_node(step_id, step_fn)
+
+        # Build edges between steps (only from nodes that were added to the graph)
         added_node_ids = set(node_functions.keys())
-        self._build_edges(graph, edges, nodes_by_id, nodes_by_type, added_node_ids)
+        step_nodes_by_id = {node["id"]: node for node in routing_definition.get("nodes", [])}
+        routing_nodes_by_id = dict(step_nodes_by_id)
+        for step_id, members in plan.folded().items():
+            routing_nodes_by_id[step_id] = {**step_nodes_by_id[members[-1]], "id": step_id}
+        routing_nodes_by_type: Dict[str, List[Dict[str, Any]]] = {}
+        for node in routing_nodes_by_id.values():
+            routing_nodes_by_type.setdefault(node.get("type", ""), []).append(node)
+        recorder = RouteRecorder(graph)
+        self._build_edges(recorder, plan.route_edges(edges), routing_nodes_by_id, routing_nodes_by_type, added_node_ids)
+
+        for step_id, candidates in prefetch_candidates.items():
+            step_effects = NodeEffects()
+            for member_id in plan.steps[step_id]:
+                step_effects.update(node_effects(nodes_by_id[member_id]))
+            next_steps = list(recorder.edges.get(step_id, []))
+            for router in recorder.routers.get(step_id, []):
+                next_steps += getattr(router, "targets", [])
+            for next_step in dict.fromkeys(next_steps):
+                if next_step in parallel.groups:
+                    heads = [branch[0] for branch in parallel.groups[next_step].branches]
+                else:
+                    heads = plan.steps.get(next_step, [])[:1]
+                for head in heads:
+                    node = nodes_by_id[head]
+                    # Calls whose inputs the step may change would not be committed
+                    if is_prefetchable(node) and not node_effects(node).reads_written_by(step_effects):
+                        candidates.append(head)
+            if candidates:
+                logger.debug(
+                    "Workflow %s: step %s prefetches %s", workflow_id, step_id, candidates
+                )
 
         # Set entry point
-        start_nodes = nodes_by_type.get("start", [])
-        if start_nodes:
-            start_node_id = start_nodes[0]["id"]
-            # Find edges from start
-            start_edges = [e for e in edges if e.get("source") == start_node_id]
-            if start_edges:
-                target = start_edges[0].get("target")
-                graph.set_entry_point(target)
+        if plan.entry in added_node_ids:
+            graph.set_entry_point(plan.entry)
+
+        program, reason = compile_native_program(workflow_id, plan.entry, node_functions, recorder)
+        if program is None:
+            logger.debug("Workflow %s runs on LangGraph only: %s", workflow_id, reason)
+        self._native_programs[workflow_id] = program
 
         return graph
 
-    def _build_node_function(self, node: Dict[str, Any], nodes_by_id: Dict[str, Any]):
-        """Build a LangGraph node function for a node."""
+    def _build_node_function(
+        self,
+        node: Dict[str, Any],
+        nodes_by_id: Dict[str, Any],
+        subworkflow: Any = None,
+        workflow_key: str = "",
+        bindings: Optional[NodeBindings] = None,
+    ):
+        """
+        Build a LangGraph node function for a node (``subworkflow``: embedded child runner;
+        ``workflow_key``: "<workflowId>:<version>" scoping the executor's per-node state;
+        ``bindings``: table the function takes its node definition and executor from when
+        it runs, so prompt patches swap them without touching running calls).
+        """
         node_id = node["id"]
         node_type = node.get("type", "")
 
@@ -175,19 +486,30 @@ class WorkflowGraphBuilder(IGraphBuilder):
         if node_type == "workflow":
             executor = WorkflowNodeExecutor(
                 variable_resolver=self.variable_resolver,
-                graph_builder=self
+                graph_builder=self,
+                subworkflow=subworkflow,
             )
         else:
             executor = NodeRegistry.create_executor(node_type)
+        if hasattr(executor, "workflow_key"):
+            executor.workflow_key = workflow_key
+        executor.prepare(node)
+        built = (node, executor)
 
-        async def node_fn(state: WorkflowState) -> WorkflowState:
+        async def node_fn(state: WorkflowState, config: RunnableConfig = None) -> WorkflowState:
             """Execute node and return updated state (async)."""
+            node, executor = bindings.get(node_id) if bindings is not None else built
             # Enrich state with node definitions so variable resolution can reference
             # other nodes' config/definition (e.g. {{nodes.<id>.config.xyz}}) even when
             # that node has not run yet. nodes_by_id is used by the variable resolver
             # when resolving nodes.* expressions.
             state_with_graph = {**state, "_graph_nodes_by_id": nodes_by_id}
-            result = await executor.execute(node, state_with_graph)
+            with track_node(node_id, node.get("name", ""), node_type) as accounting:
+                if node_type == "workflow":
+                    result = await executor.execute(node, state_with_graph, run_config=config)
+                else:
+                    result = await executor.execute(node, state_with_graph)
+                accounting["usage"] = result.get("output", {}).get("usage")
 
             # Extract output and updated state
             node_output = result.get("output", {})
@@ -195,6 +517,8 @@ class WorkflowGraphBuilder(IGraphBuilder):
 
             # Strip internal graph context before returning (do not leak into workflow state)
             updated_state.pop("_graph_nodes_by_id", None)
+            # Drop memoized results this node makes stale (memoize.invalidatedBy)
+            updated_state = invalidate_memos(updated_state, node_id, node.get("name", ""))
 
             # Store node output in state
             if "nodes" not in updated_state:
@@ -203,17 +527,83 @@ class WorkflowGraphBuilder(IGraphBuilder):
 
             return updated_state
 
+        node_fn.executor = executor
         return node_fn
 
+    def _build_fused_function(self, member_functions: List[Any]):
+        """Run several node functions as one graph step, each on the state the previous returned."""
+
+        async def fused_fn(state: WorkflowState, config: RunnableConfig = None) -> WorkflowState:
+            """Execute the fused nodes in order and return the final state (async)."""
+            for member_fn in member_functions:
+                state = await member_fn(state, config)
+            return state
+
+        return fused_fn
+
+    def _build_prefetching_function(
+        self, step_fn: Any, candidates: List[str], nodes_by_id: Dict[str, Any], bindings: NodeBindings
+    ):
+        """Start the speculative calls of the ``candidates`` node IDs when the step starts, then run it."""
+
+        async def prefetching_fn(state: WorkflowState, config: RunnableConfig = None) -> WorkflowState:
+            """Start speculative calls (when the run has a prefetch scope) and execute the step (async)."""
+            scope = current_prefetch_scope() if candidates else None
+            if scope is not None:
+                state_with_graph = {**state, "_graph_nodes_by_id": nodes_by_id}
+                for node_id in candidates:
+                    node, executor = bindings.get(node_id)
+                    try:
+                        key, fetch = executor.speculative_request(node, state_with_graph)
+                        if self._memo_hit(node, executor, key, state_with_graph):
+                            # The node will reuse its memoized output and make no call
+                            continue
+                        scope.start(key, fetch)
+                    except Exception as ex:
+                        logger.debug("No speculative call for node %s: %s", node.get("id"), ex)
+            return await step_fn(state, config)
+
+        return prefetching_fn
+
+    @staticmethod
+    def _memo_hit(node: Dict[str, Any], executor: Any, request_key: str, state: Dict[str, Any]) -> bool:
+        """Whether ``node`` has a live memo entry for the request ``request_key`` on ``state``."""
+        memo = NodeMemo.for_node(node)
+        if memo is None:
+            return False
+        key = memo.key(request_key, lambda template: executor.variable_resolver.resolve_value(template, state))
+        return memo.is_live(state, key)
+
+    def _build_parallel_function(self, branch_functions: List[Any]):
+        """Run independent branches concurrently, each on its own copy of the state, then join them."""
+
+        async def parallel_fn(state: WorkflowState, config: RunnableConfig = None) -> WorkflowState:
+            """Execute the branches concurrently and return the joined state (async)."""
+            tasks = [asyncio.ensure_future(branch_fn(branch_state(state), config)) for branch_fn in branch_functions]
+            try:
+                results = await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+            return join_branch_states(state, results)
+
+        return parallel_fn
+
     def _build_edges(
         self,
-        graph: StateGraph,
+        graph: RouteRecorder,
         edges: List[Dict[str, Any]],
         nodes_by_id: Dict[str, Any],
         nodes_by_type: Dict[str, List[Dict[str, Any]]],
         added_node_ids: Set[str],
     ) -> None:
-        """Build edges in the graph. Only adds edges from nodes that are in added_node_ids."""
+        """
+        Build edges in the graph. Only adds edges from nodes that are in added_node_ids.
+
+        Edges go through a RouteRecorder wrapping the StateGraph, so the native
+        interpreter routes exactly like LangGraph.
+        """
         # Group edges by source (excluding start node edges)
         edges_by_source: Dict[str, List[Dict[str, Any]]] = {}
         for edge in edges:
@@ -239,32 +629,20 @@ class WorkflowGraphBuilder(IGraphBuilder):
             if rule_edges:
                 # Build conditional routing function
                 def build_rule_router(rules: List[Dict[str, Any]], rule_edges: List[Dict[str, Any]]):
+                    # Target per possible match (each ruleId, or "default" when none
+                    # matches), resolved once from the edge handles
+                    route_table = {
+                        matched_rule_id: self._rule_target(matched_rule_id, rule_edges, nodes_by_id)
+                        for matched_rule_id in [rule.get("ruleId", "") for rule in rules] + ["default"]
+                    }
+
                     def route_fn(state: WorkflowState) -> str:
                         """Route based on rule evaluation."""
-                        matched_rule_id = self.rule_evaluator.evaluate_rules(rules, state)
-
-                        # Find edge with matching rule ID
-                        for edge in rule_edges:
-                            source_handle = edge.get("sourceHandle", "")
-                            rule_id_str = matched_rule_id if matched_rule_id.startswith("r-") else f"r-{matched_rule_id}"
-                            if rule_id_str in source_handle or matched_rule_id in source_handle:
-                                target = edge.get("target")
-                                if target == "output" or nodes_by_id.get(target, {}).get("type") == "output":
-                                    return END
-                                return target
-
-                        # Default/else
-                        for edge in rule_edges:
-                            source_handle = edge.get("sourceHandle", "")
-                            if "else" in source_handle.lower() or "default" in source_handle.lower():
-                                target = edge.get("target")
-                                if target == "output" or nodes_by_id.get(target, {}).get("type") == "output":
-                                    return END
-                                return target
-
-                        return END
-
-                    return route_fn
+                        return route_table[self.rule_evaluator.evaluate_rules(rules, state)]
+
+                    route_fn.rules = rules
+                    route_fn.route_table = route_table
+                    return single_target_router(route_fn, list(route_table.values()))
 
                 graph.add_conditional_edges(rule_id, build_rule_router(rules, rule_edges))
 
@@ -282,68 +660,111 @@ class WorkflowGraphBuilder(IGraphBuilder):
             if source_type == "rule":
                 continue
 
-            # Handoff edges should be represented in the graph as normal transitions
-            handoff_edges = [e for e in source_edges if e.get("type") == "handoff"]
-            for edge in handoff_edges:
-                target = edge.get("target")
-                if not target:
-                    continue
-                if target == "output" or nodes_by_id.get(target, {}).get("type") == "output":
-                    graph.add_edge(source_id, END)
-                elif target in added_node_ids:
-                    graph.add_edge(source_id, target)
-
             # Regular edges (non-handoff)
             regular_edges = [e for e in source_edges if e.get("type") != "handoff"]
+            default_target = self._default_target(regular_edges, nodes_by_id, added_node_ids)
 
-            if not regular_edges:
-                continue
-
-            if len(regular_edges) == 1:
-                # Single edge - direct connection (target must be in graph or END)
-                target = regular_edges[0].get("target")
-                target_node = nodes_by_id.get(target, {})
-                if target == "output" or target_node.get("type") == "output":
-                    graph.add_edge(source_id, END)
-                elif target in added_node_ids:
-                    graph.add_edge(source_id, target)
-            else:
-                # Multiple edges - route to first non-rule target (must be in graph)
-                rule_targets = [
-                    e.get("target")
-                    for e in regular_edges
-                    if nodes_by_id.get(e.get("target", ""), {}).get("type") == "rule"
-                    and e.get("target") in added_node_ids
-                ]
-
-                if rule_targets:
-                    graph.add_edge(source_id, rule_targets[0])
-                else:
-                    target = regular_edges[0].get("target")
-                    if target == "output" or nodes_by_id.get(target, {}).get("type") == "output":
-                        graph.add_edge(source_id, END)
-                    elif target in added_node_ids:
-                        graph.add_edge(source_id, target)
+            handoff_edges = [e for e in source_edges if e.get("type") == "handoff"]
+            if source_type == "agent" and handoff_edges:
+                # One transition per step: the handoff target chosen by the agent,
+                # else the regular edge
+                graph.add_conditional_edges(
+                    source_id,
+                    self._build_handoff_router(source_node, handoff_edges, nodes_by_id, added_node_ids, default_target),
+                )
+            elif default_target is not None:
+                graph.add_edge(source_id, default_target)
 
         # Output nodes are not added to the graph; edges to output are already END above
 
-    def _default_workflow_loader(self, workflow_id: str) -> Optional[Dict[str, Any]]:
-        """Default workflow loader - loads from JSON files."""
-        # Try to find workflow JSON file
-        json_dir = Path(__file__).parent.parent.parent.parent / "core" / "jsons"
-
-        # Try common filenames
-        for filename in [
-            f"agentic_workflow_{workflow_id}.json",
-            f"{workflow_id}.json",
-        ]:
-            file_path = json_dir / filename
-            if file_path.exists():
-                with open(file_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-
-        # Try loading from cache if workflow was already loaded
-        if workflow_id in self._workflow_cache:
-            return self._workflow_cache[workflow_id]
-
+    @staticmethod
+    def _default_target(
+        regular_edges: List[Dict[str, Any]], nodes_by_id: Dict[str, Any], added_node_ids: Set[str]
+    ) -> Optional[str]:
+        """Target of a node's regular edges: the first rule target, else the first edge; None if not in the graph."""
+        if len(regular_edges) > 1:
+            # Multiple edges - route to the first rule target (must be in graph)
+            rule_targets = [
+                e.get("target")
+                for e in regular_edges
+                if nodes_by_id.get(e.get("target", ""), {}).get("type") == "rule"
+                and e.get("target") in added_node_ids
+            ]
+            if rule_targets:
+                return rule_targets[0]
+        for edge in regular_edges[:1]:
+            target = edge.get("target")
+            if target == "output" or nodes_by_id.get(target, {}).get("type") == "output":
+                return END
+            if target in added_node_ids:
+                return target
         return None
+
+    @staticmethod
+    def _rule_target(matched_rule_id: str, rule_edges: List[Dict[str, Any]], nodes_by_id: Dict[str, Any]) -> str:
+        """Target of a rule node for a matched rule ID: its handle, else the else/default handle, else END."""
+        rule_id_str = matched_rule_id if matched_rule_id.startswith("r-") else f"r-{matched_rule_id}"
+        matched_edge = next(
+            (
+                edge for edge in rule_edges
+                if rule_id_str in edge.get("sourceHandle", "") or matched_rule_id in edge.get("sourceHandle", "")
+            ),
+            None,
+        )
+        if matched_edge is None:
+            # Default/else
+            matched_edge = next(
+                (
+                    edge for edge in rule_edges
+                    if "else" in edge.get("sourceHandle", "").lower() or "default" in edge.get("sourceHandle", "").lower()
+                ),
+                None,
+            )
+        if matched_edge is None:
+            return END
+        target = matched_edge.get("target")
+        if target == "output" or nodes_by_id.get(target, {}).get("type") == "output":
+            return END
+        return target
+
+    def _build_handoff_router(
+        self,
+        agent_node: Dict[str, Any],
+        handoff_edges: List[Dict[str, Any]],
+        nodes_by_id: Dict[str, Any],
+        added_node_ids: Set[str],
+        default_target: Optional[str] = None,
+    ):
+        """
+        Build a conditional router for an agent's handoff edges.
+
+        The agent output's ``route`` may name the handoff tool, the target node name
+        or the target node ID. Without a route, the agent's regular edge is taken
+        (END when it has none), so each step has exactly one successor.
+        """
+        agent_id = agent_node["id"]
+        tool_names = {t.get("_id"): t.get("name") for t in agent_node.get("config", {}).get("tools", [])}
+        targets_by_route: Dict[str, str] = {}
+        for edge in handoff_edges:
+            target = edge.get("target")
+            if target == "output" or nodes_by_id.get(target, {}).get("type") == "output":
+                target = END
+            elif target not in added_node_ids:
+                continue
+            labels = [edge.get("target"), nodes_by_id.get(edge.get("target"), {}).get("name")]
+            labels.append(tool_names.get(edge.get("data", {}).get("toolId")))
+            for label in labels:
+                if label:
+                    targets_by_route.setdefault(label, target)
+        fallback = END if default_target is None else default_target
+
+        def route_fn(state: WorkflowState) -> str:
+            """Route to the handoff target chosen by the agent (or pre-router)."""
+            route = state.get("nodes", {}).get(agent_id, {}).get("route")
+            return targets_by_route.get(route, fallback) if route else fallback
+
+        route_fn.agent_id = agent_id
+        route_fn.handoff_routes = targets_by_route
+        route_fn.fallback = fallback
+        targets = list(dict.fromkeys(list(targets_by_route.values()) + [fallback]))
+        return single_target_router(route_fn, targets)
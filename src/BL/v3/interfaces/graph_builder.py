@@ -32,6 +32,6 @@ class IGraphBuilder(ABC):
             workflow_config: Configuration for the workflow node
 
         Returns:
-            LangGraph node or tool representing the workflow
+            Async callable ``(state, inputs=None) -> outputs`` running the child workflow
         """
         pass
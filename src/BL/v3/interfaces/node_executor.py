@@ -21,6 +21,17 @@ class INodeExecutor(ABC):
         """
         pass
 
+    def prepare(self, node_config: Dict[str, Any]) -> None:
+        """
+        Build-time hook called once per node before the graph is compiled.
+
+        Executors can override it to precompute per-node artifacts (e.g. prompts).
+
+        Args:
+            node_config: Node configuration from JSON
+        """
+        pass
+
     @abstractmethod
     def get_output_schema(self) -> Dict[str, Any]:
         """
@@ -1,17 +1,36 @@
 """Executor for agent nodes."""
 
-from typing import Any, Dict, List
+import copy
+import random
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 
-from BL.agents.agents_model.model_selection import get_dynamic_model_instance, get_default_model_name
+from BL.agents.agents_model.model_router import get_routed_model_instance, resolve_model_chain, validate_model_chain
+from BL.agents.agents_model.model_selection import get_default_model_name
+from BL.v3.cache.routing_cache import get_routing_cache
 from BL.v3.nodes.executors.base_executor import BaseNodeExecutor
+from BL.v3.routing.pre_router import PreRouteDecision, get_pre_router
+from BL.v3.streaming.token_channel import get_token_channel
+from BL.v3.utils.token_usage import extract_model_name, extract_token_usage
+from BL.v3.utils.tool_ranker import ToolSelector
+from BL.v3.utils.variable_resolver import VariableResolver
+
+# Routing variables written when the pre-router skips the LLM (matches the agent_lock rule pattern)
+DEFAULT_PRE_ROUTE_UPDATES = [
+    {"fieldName": "flow.currentAgentName", "operation": "set", "value": "{{nodeOutput.route}}"},
+]
 
 
 class AgentNodeExecutor(BaseNodeExecutor):
     """Executor for agent nodes - LLM-based reasoning agents."""
 
+    def __init__(self, variable_resolver: VariableResolver = None):
+        super().__init__(variable_resolver)
+        # Node ID -> (tool schemas in declaration order, optional relevance selector)
+        self._tools: Dict[str, Tuple[List[Dict[str, Any]], Optional[ToolSelector]]] = {}
+
     async def execute(self, node_config: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute agent node - runs LLM with tools and prompts (async).
@@ -25,18 +44,46 @@ class AgentNodeExecutor(BaseNodeExecutor):
         """
         config = node_config.get("config", {})
 
+        # Optional local pre-router: a confident rule/classifier decision skips the LLM
+        router_config = config.get("preRouter", {})
+        pre_router = None
+        if router_config.get("enable"):
+            pre_router = get_pre_router(self.node_key(node_config), router_config)
+            decision = pre_router.decide(state.get("system", {}).get("userQuery", ""))
+            if decision is not None:
+                return self._pre_routed(decision, router_config, state)
+
+        # Optional near-duplicate routing cache for stateless entry decisions
+        cache_config = config.get("routingCache", {})
+        routing_cache = None
+        cache_query = ""
+        cached_output: Optional[Dict[str, Any]] = None
+        if cache_config.get("enable") and self._is_stateless_entry(state):
+            cache_query = state.get("system", {}).get("userQuery", "")
+            routing_cache = get_routing_cache(self.node_key(node_config), cache_config)
+            cached_output = routing_cache.lookup(cache_query) if cache_query else None
+            verify_rate = float(cache_config.get("verifySampleRate", 0.0))
+            if cached_output is not None and random.random() >= verify_rate:
+                channel = get_token_channel() if config.get("streamResponse") else None
+                if channel is not None:
+                    channel.emit(
+                        {"type": "token", "nodeId": node_config.get("id", ""), "text": cached_output.get("text", "")}
+                    )
+                return self._finish({**copy.deepcopy(cached_output), "routingCacheHit": True}, node_config, state)
+
         # Get model configuration
         model_config = config.get("model", {})
         model_code = model_config.get("code", "gpt-4.1")
         model_name = get_default_model_name(model_code)
 
-        # Initialize LLM
-        llm = get_dynamic_model_instance(model_name, temperature=0.0)
+        # Initialize LLM (a routed fallback chain when config.model.fallbacks is declared)
+        llm = get_routed_model_instance(model_config, temperature=0.0, node_name=node_config.get("name", ""))
 
-        # Build system message from prompt templates
-        prompt_templates = config.get("promptTemplate", [])
-        
-        system_message = self._build_system_message(prompt_templates)
+        # System prompt: static prefix compiled at build time, dynamic suffix resolved now
+        compiled_prompt = self._get_compiled_prompt(node_config)
+        system_content = compiled_prompt.system_content(
+            lambda text: self.variable_resolver.resolve(text, state), model_name
+        )
 
         # Get messages from state
         messages = state.get("messages", [])
@@ -47,8 +94,8 @@ class AgentNodeExecutor(BaseNodeExecutor):
 
         # Build message list with system message
         langchain_messages = []
-        if system_message:
-            langchain_messages.append(SystemMessage(content=system_message))
+        if system_content:
+            langchain_messages.append(SystemMessage(content=system_content))
 
         # Convert state messages to LangChain messages
         for msg in messages:
@@ -62,46 +109,167 @@ class AgentNodeExecutor(BaseNodeExecutor):
             else:
                 langchain_messages.append(msg)
 
-        # Get tools (if any) - simplified for now
-        tools = config.get("tools", [])
+        # Keep the prompt within the node's token budget (optional)
+        langchain_messages, state, window_stats = await self._fit_context_window(
+            node_config, langchain_messages, state, llm
+        )
+
+        # Bind the declared tools (handoffs included), or their relevance-ranked subset
+        tool_schemas, tool_selector = self._get_tools(node_config)
         llm_with_tools = llm
-        if tools:
-            # In a full implementation, tools would be built and bound here
-            # For now, we'll use the LLM without tools
-            pass
+        if tool_selector is not None:
+            names = set(tool_selector.select(state.get("system", {}).get("userQuery", "")))
+            tool_schemas = [schema for schema in tool_schemas if schema["function"]["name"] in names]
+        if tool_schemas:
+            llm_with_tools = llm.bind_tools(tool_schemas)
 
-        # Invoke LLM (async)
-        response = await llm_with_tools.ainvoke(langchain_messages)
+        # Invoke LLM (async); stream tokens to the client when the run is streaming
+        channel = get_token_channel() if config.get("streamResponse") else None
+        if channel is not None:
+            response = await self._astream_llm(
+                llm_with_tools, langchain_messages, node_config.get("id", ""), channel
+            )
+        else:
+            response = await llm_with_tools.ainvoke(langchain_messages)
 
         # Extract response content
         response_content = response.content if hasattr(response, "content") else str(response)
+        tool_calls = getattr(response, "tool_calls", None) or []
+        if tool_selector is not None and tool_calls:
+            tool_selector.record_use(call.get("name", "") for call in tool_calls)
 
         # Build output
         output = {
             "text": response_content,
             "messages": [{"role": "assistant", "content": response_content}],
         }
+        if tool_calls:
+            # The handoff tool the model called drives routing (see _build_handoff_router)
+            output["route"] = tool_calls[0].get("name", "")
+
+        if routing_cache is not None and cache_query:
+            # Only the routing decision counts: the wording of the reply may differ
+            disagrees = cached_output is not None and self._routing_decision(
+                cached_output, node_config, state
+            ) != self._routing_decision(output, node_config, state)
+            if disagrees:
+                # Sampled verification of a hit disagreed with the model
+                routing_cache.report_false_positive(cache_query)
+            if cached_output is None or disagrees:
+                routing_cache.store(cache_query, copy.deepcopy(output))
+
+        # Per-node token usage, including provider prompt-cache reads
+        output["usage"] = extract_token_usage(response)
+        output["usage"]["model"] = extract_model_name(response, model_name)
+        if window_stats is not None:
+            output["usage"]["contextWindow"] = window_stats
+
+        result = self._finish(output, node_config, state)
+
+        # The LLM's routing choice becomes classifier training data
+        if pre_router is not None and output.get("route"):
+            pre_router.record_llm_decision(state.get("system", {}).get("userQuery", ""), output["route"])
+
+        return result
+
+    def _routing_decision(
+        self, output: Dict[str, Any], node_config: Dict[str, Any], state: Dict[str, Any]
+    ) -> Tuple[Any, Any]:
+        """
+        Where an output sends the conversation: the handoff tool called and the
+        ``flow.currentAgentName`` the node's variable updates leave behind.
+
+        Args:
+            output: Agent output (fresh or cached)
+            node_config: Agent node configuration
+            state: Current state (not modified)
+
+        Returns:
+            (route, currentAgentName) tuple
+        """
+        updated_state = self._apply_variable_updates(copy.deepcopy(output), node_config, state)
+        return output.get("route"), updated_state.get("flow", {}).get("currentAgentName")
+
+    def _finish(self, output: Dict[str, Any], node_config: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply variable updates and append the assistant reply to the thread.
 
+        Without a handoff tool call, an update of ``flow.currentAgentName`` is the
+        agent's route.
+        """
         # Apply variable updates
+        previous_agent_name = state.get("flow", {}).get("currentAgentName")
         updated_state = self._apply_variable_updates(output, node_config, state)
+        if not output.get("route"):
+            agent_name = updated_state.get("flow", {}).get("currentAgentName")
+            if agent_name and agent_name != previous_agent_name:
+                output["route"] = agent_name
 
         # Add to messages in state
         if "messages" not in updated_state:
             updated_state["messages"] = []
-        updated_state["messages"].append({"role": "assistant", "content": response_content})
+        updated_state["messages"].append({"role": "assistant", "content": output.get("text", "")})
+
+        return {
+            "output": output,
+            "state": updated_state,
+        }
 
+    def _pre_routed(
+        self, decision: PreRouteDecision, router_config: Dict[str, Any], state: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Write the routing variables for a pre-router decision without calling the LLM."""
+        output = {"text": "", "route": decision.route, "preRouted": decision.to_dict()}
+        updates = router_config.get("variableUpdates", DEFAULT_PRE_ROUTE_UPDATES)
+        updated_state = self.variable_resolver.apply_variable_updates(updates, output, state)
         return {
             "output": output,
             "state": updated_state,
         }
 
-    def _build_system_message(self, prompt_templates: List[Dict[str, Any]]) -> str:
-        """Build system message from prompt templates."""
-        system_parts = []
-        for template in prompt_templates:
-            if template.get("role") == "system":
-                system_parts.append(template.get("text", ""))
-        return "\n".join(system_parts)
+    def _is_stateless_entry(self, state: Dict[str, Any]) -> bool:
+        """True when the thread holds only the opening user message (no prior turns)."""
+        messages = state.get("messages", [])
+        if len(messages) > 1:
+            return False
+        for msg in messages:
+            role = msg.get("role", "user") if isinstance(msg, dict) else getattr(msg, "type", "human")
+            if role not in ("user", "human"):
+                return False
+        return True
+
+    def _get_tools(self, node_config: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[ToolSelector]]:
+        """
+        Return the node's tool schemas and tool selector, building them on first use.
+
+        Args:
+            node_config: Agent node configuration (config.tools, config.toolSelection)
+
+        Returns:
+            (OpenAI function schemas of the enabled tools, ToolSelector or None)
+        """
+        node_id = node_config.get("id", "")
+        tools = self._tools.get(node_id)
+        if tools is None:
+            config = node_config.get("config", {})
+            declared = [
+                tool for tool in config.get("tools", [])
+                if tool.get("name") and tool.get("config", {}).get("enabled", True)
+            ]
+            schemas = [_tool_schema(tool) for tool in declared]
+            selector = ToolSelector.from_config(
+                config.get("toolSelection"), [(tool["name"], tool.get("description", "")) for tool in declared]
+            )
+            tools = self._tools[node_id] = (schemas, selector)
+        return tools
+
+    def prepare(self, node_config: Dict[str, Any]) -> None:
+        """Compile the system prompt and tools and validate the model fallback chain once at build time."""
+        self._get_compiled_prompt(node_config)
+        self._get_tools(node_config)
+        model_config = node_config.get("config", {}).get("model", {})
+        if model_config.get("fallbacks"):
+            validate_model_chain(resolve_model_chain(model_config), node_config.get("name", ""))
 
     def get_output_schema(self) -> Dict[str, Any]:
         """Return output schema for agent node."""
@@ -109,6 +277,21 @@ class AgentNodeExecutor(BaseNodeExecutor):
             "type": "object",
             "properties": {
                 "text": {"type": "string"},
+                "usage": {"type": "object"},
                 "messages": {"type": "array"},
+                "route": {"type": "string"},
+                "preRouted": {"type": "object"},
             },
         }
+
+
+def _tool_schema(tool: Dict[str, Any]) -> Dict[str, Any]:
+    """Agent tool as sent to the provider (OpenAI function format)."""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool["name"],
+            "description": tool.get("description", ""),
+            "parameters": tool.get("config", {}).get("schema") or {"type": "object", "properties": {}},
+        },
+    }
@@ -1,8 +1,15 @@
 """Base executor with common functionality."""
 
-from typing import Any, Dict
+import copy
+from typing import Any, Dict, List, Optional, Tuple
 
+from langchain_core.messages import AIMessageChunk
+
+from BL.agents.agents_model.model_selection import get_dynamic_model_instance, get_default_model_name
 from BL.v3.interfaces.node_executor import INodeExecutor
+from BL.v3.streaming.token_channel import TokenChannel, chunk_text
+from BL.v3.utils.context_window import ContextWindowManager, build_llm_summarizer
+from BL.v3.utils.prompt_builder import CompiledPrompt
 from BL.v3.utils.variable_resolver import VariableResolver
 
 
@@ -17,6 +24,9 @@ class BaseNodeExecutor(INodeExecutor):
             variable_resolver: Variable resolver instance
         """
         self.variable_resolver = variable_resolver or VariableResolver()
+        self._compiled_prompts: Dict[str, CompiledPrompt] = {}
+        # "<workflowId>:<version>" of the graph the node belongs to (set by the builder)
+        self.workflow_key = ""
 
     async def execute(self, node_config: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -45,6 +55,22 @@ class BaseNodeExecutor(INodeExecutor):
             },
         }
 
+    def node_key(self, node_config: Dict[str, Any]) -> str:
+        """
+        Key of the node across workflows: ``<workflowId>:<version>:<nodeId>``.
+
+        Node IDs are only unique within one workflow version; process-wide per-node
+        state (caches, routers) is keyed by this.
+
+        Args:
+            node_config: Node configuration
+
+        Returns:
+            Scoped key, or the bare node ID when no workflow was bound
+        """
+        node_id = node_config.get("id", "")
+        return f"{self.workflow_key}:{node_id}" if self.workflow_key else node_id
+
     def _resolve_inputs(self, inputs_config: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Resolve input templates to actual values.
@@ -77,3 +103,111 @@ class BaseNodeExecutor(INodeExecutor):
         """
         updates = node_config.get("variableUpdates", [])
         return self.variable_resolver.apply_variable_updates(updates, node_output, state)
+
+    def _get_compiled_prompt(self, node_config: Dict[str, Any]) -> CompiledPrompt:
+        """
+        Return the node's compiled system prompt, compiling it on first use.
+
+        Args:
+            node_config: Node configuration with promptTemplate
+
+        Returns:
+            CompiledPrompt for the node
+        """
+        compiled = self._compiled_prompts.get(node_config.get("id", ""))
+        if compiled is None:
+            compiled = self.refresh_prompt(node_config)
+        return compiled
+
+    def refresh_prompt(self, node_config: Dict[str, Any]) -> CompiledPrompt:
+        """
+        (Re)compile the node's system prompt from its current promptTemplate.
+
+        Args:
+            node_config: Node configuration with promptTemplate
+
+        Returns:
+            New CompiledPrompt for the node
+        """
+        prompt_templates = node_config.get("config", {}).get("promptTemplate", [])
+        compiled = CompiledPrompt.from_templates(prompt_templates)
+        self._compiled_prompts[node_config.get("id", "")] = compiled
+        return compiled
+
+    def with_prompt(self, node_config: Dict[str, Any]) -> "BaseNodeExecutor":
+        """
+        Copy of this executor with the node's prompt compiled from ``node_config``.
+
+        Used by hot reload when only prompt text changed; this executor (and the runs
+        using it) keep the prompt they have.
+
+        Args:
+            node_config: Node configuration with the new promptTemplate
+
+        Returns:
+            New executor sharing everything else with this one
+        """
+        patched = copy.copy(self)
+        patched._compiled_prompts = dict(self._compiled_prompts)
+        patched.refresh_prompt(node_config)
+        return patched
+
+    async def _astream_llm(
+        self, llm: Any, messages: List[Any], node_id: str, channel: TokenChannel
+    ) -> Any:
+        """
+        Stream an LLM call, forwarding tokens to the run's channel.
+
+        Args:
+            llm: Chat model (or runnable) supporting astream
+            messages: Messages to send
+            node_id: Node ID attached to each token event
+            channel: Token channel of the current run
+
+        Returns:
+            The full message assembled from all chunks
+        """
+        full = None
+        async for chunk in llm.astream(messages):
+            text = chunk_text(getattr(chunk, "content", ""))
+            if text:
+                channel.emit({"type": "token", "nodeId": node_id, "text": text})
+            full = chunk if full is None else full + chunk
+        return full if full is not None else AIMessageChunk(content="")
+
+    async def _fit_context_window(
+        self, node_config: Dict[str, Any], messages: List[Any], state: Dict[str, Any], llm: Any
+    ) -> Tuple[List[Any], Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Trim messages to the node's ``contextWindow`` token budget.
+
+        The rolling summary of evicted turns is kept in
+        ``state["metadata"]["contextSummaries"][<node key>]`` (see ``node_key``) and
+        only extended when new messages fall out of the window.
+
+        Args:
+            node_config: Node configuration with optional config.contextWindow
+            messages: Full message list (system prompt first)
+            state: Current state
+            llm: Node model, used for summaries unless contextWindow.summaryModel is set
+
+        Returns:
+            (messages to send, state carrying the updated summary, token stats or None when disabled)
+        """
+        window_config = node_config.get("config", {}).get("contextWindow")
+        manager = ContextWindowManager.from_config(window_config)
+        if manager is None:
+            return messages, state, None
+
+        summary_llm = llm
+        if window_config.get("summaryModel"):
+            summary_llm = get_dynamic_model_instance(
+                get_default_model_name(window_config["summaryModel"]), temperature=0.0
+            ) or llm
+
+        node_key = self.node_key(node_config)
+        metadata = state.get("metadata", {}) or {}
+        summaries = metadata.get("contextSummaries", {}) or {}
+        fitted, record, stats = await manager.afit(messages, summaries.get(node_key), build_llm_summarizer(summary_llm))
+        updated_state = {**state, "metadata": {**metadata, "contextSummaries": {**summaries, node_key: record}}}
+        return fitted, updated_state, stats
@@ -2,11 +2,14 @@
 
 import asyncio
 import json
-from typing import Any, Dict
+from typing import Any, Awaitable, Callable, Dict, Tuple
 
 import requests
 
+from BL.v3.cache.node_memo import call_memoized
+from BL.v3.cache.speculative_prefetch import take_prefetched
 from BL.v3.nodes.executors.base_executor import BaseNodeExecutor
+from BL.v3.utils.fingerprint import request_fingerprint
 
 
 def _do_http_request(method: str, url: str, headers: Dict[str, Any], body: Dict[str, Any]) -> Any:
@@ -36,6 +39,62 @@ class HttpRequestNodeExecutor(BaseNodeExecutor):
         Returns:
             HTTP response output
         """
+        key, fetch = self.speculative_request(node_config, state)
+
+        async def call() -> Dict[str, Any]:
+            # Make HTTP request in thread pool (requests is sync), unless a speculative
+            # call for this exact request already did
+            try:
+                prefetched, response = await take_prefetched(key)
+                if not prefetched:
+                    response = await fetch()
+
+                # Parse response
+                try:
+                    response_data = response.json()
+                except json.JSONDecodeError:
+                    response_data = {"text": response.text}
+
+                return {
+                    "statusCode": response.status_code,
+                    "headers": dict(response.headers),
+                    "body": response_data,
+                }
+            except Exception as e:
+                return {
+                    "error": str(e),
+                    "statusCode": 500,
+                }
+
+        # GET nodes with config.memoize reuse the response of an identical earlier request
+        if node_config.get("config", {}).get("method", "GET").upper() == "GET":
+            output, state = await call_memoized(
+                node_config, state, key, call, lambda template: self.variable_resolver.resolve_value(template, state)
+            )
+        else:
+            output = await call()
+
+        # Apply variable updates
+        updated_state = self._apply_variable_updates(output, node_config, state)
+
+        return {
+            "output": output,
+            "state": updated_state,
+        }
+
+    def speculative_request(
+        self, node_config: Dict[str, Any], state: Dict[str, Any]
+    ) -> Tuple[str, Callable[[], Awaitable[Any]]]:
+        """
+        Resolve the node's request on ``state`` without sending it.
+
+        Args:
+            node_config: HTTP request node configuration
+            state: Current state
+
+        Returns:
+            (request fingerprint, coroutine factory sending the request)
+        """
         config = node_config.get("config", {})
 
         # Extract HTTP config
@@ -50,36 +109,8 @@ class HttpRequestNodeExecutor(BaseNodeExecutor):
         if isinstance(body, dict):
             body = {k: self.variable_resolver.resolve(v, state) for k, v in body.items()}
 
-        # Make HTTP request in thread pool (requests is sync)
-        try:
-            response = await asyncio.to_thread(
-                _do_http_request, method, url, headers, body
-            )
-
-            # Parse response
-            try:
-                response_data = response.json()
-            except json.JSONDecodeError:
-                response_data = {"text": response.text}
-
-            output = {
-                "statusCode": response.status_code,
-                "headers": dict(response.headers),
-                "body": response_data,
-            }
-        except Exception as e:
-            output = {
-                "error": str(e),
-                "statusCode": 500,
-            }
-
-        # Apply variable updates
-        updated_state = self._apply_variable_updates(output, node_config, state)
-
-        return {
-            "output": output,
-            "state": updated_state,
-        }
+        key = request_fingerprint("http", f"{method} {url}", {"headers": headers, "body": body})
+        return key, lambda: asyncio.to_thread(_do_http_request, method, url, headers, body)
 
     def get_output_schema(self) -> Dict[str, Any]:
         """Return output schema for HTTP request node."""
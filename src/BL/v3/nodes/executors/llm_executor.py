@@ -5,8 +5,14 @@ from typing import Any, Dict
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 
-from BL.agents.agents_model.model_selection import get_dynamic_model_instance, get_default_model_name
+from BL.agents.agents_model.model_router import get_routed_model_instance, resolve_model_chain, validate_model_chain
+from BL.agents.agents_model.model_selection import get_default_model_name
+from BL.v3.cache.node_memo import call_memoized
+from BL.v3.cache.single_flight import llm_single_flight
 from BL.v3.nodes.executors.base_executor import BaseNodeExecutor
+from BL.v3.streaming.token_channel import get_token_channel
+from BL.v3.utils.fingerprint import request_fingerprint
+from BL.v3.utils.token_usage import extract_model_name, extract_token_usage
 
 
 class LLMNodeExecutor(BaseNodeExecutor):
@@ -30,23 +36,69 @@ class LLMNodeExecutor(BaseNodeExecutor):
         model_code = model_config.get("code", "gpt-4.1")
         model_name = get_default_model_name(model_code)
 
-        # Initialize LLM
-        llm = get_dynamic_model_instance(model_name, temperature=0.0)
+        # Initialize LLM (a routed fallback chain when config.model.fallbacks is declared)
+        llm = get_routed_model_instance(model_config, temperature=0.0, node_name=node_config.get("name", ""))
 
         # Get prompt
         prompt_template = config.get("prompt", "")
         prompt = self.variable_resolver.resolve(prompt_template, state)
 
-        # Invoke LLM (async)
-        response = await llm.ainvoke([HumanMessage(content=prompt)])
-
-        # Extract response
-        response_content = response.content if hasattr(response, "content") else str(response)
-
-        output = {
-            "text": response_content,
-            "prompt": prompt,
-        }
+        # System prompt from promptTemplate: static prefix compiled at build time first,
+        # so provider prefix caching applies; user-role templates follow as the request
+        llm_messages = []
+        compiled_prompt = self._get_compiled_prompt(node_config)
+        system_content = compiled_prompt.system_content(
+            lambda text: self.variable_resolver.resolve(text, state), model_name
+        )
+        if system_content:
+            llm_messages.append(SystemMessage(content=system_content))
+        for template in config.get("promptTemplate", []):
+            if template.get("role") == "user":
+                user_text = self.variable_resolver.resolve(template.get("text", ""), state)
+                llm_messages.append(HumanMessage(content=str(user_text)))
+        if prompt or len(llm_messages) == 0:
+            llm_messages.append(HumanMessage(content=prompt))
+
+        # Keep the prompt within the node's token budget (optional)
+        llm_messages, state, window_stats = await self._fit_context_window(node_config, llm_messages, state, llm)
+
+        # Invoke LLM (async); stream tokens when requested, otherwise identical
+        # concurrent calls share one upstream request
+        channel = get_token_channel() if config.get("streamResponse") else None
+        request_key = request_fingerprint("llm", {"model": model_name, "temperature": 0.0}, llm_messages)
+
+        async def call() -> Dict[str, Any]:
+            led = True
+            if channel is not None:
+                response = await self._astream_llm(llm, llm_messages, node_config.get("id", ""), channel)
+            elif config.get("singleFlight", True):
+                response, led = await llm_single_flight.do(request_key, lambda: llm.ainvoke(llm_messages))
+            else:
+                response = await llm.ainvoke(llm_messages)
+
+            # Extract response
+            response_content = response.content if hasattr(response, "content") else str(response)
+
+            output = {
+                "text": response_content,
+                "prompt": prompt,
+                "usage": extract_token_usage(response),
+            }
+            output["usage"]["model"] = extract_model_name(response, model_name)
+            if not led:
+                # The caller that started the shared call accounts for its tokens
+                output["usage"].update(inputTokens=0, outputTokens=0, cachedTokens=0)
+                output["singleFlight"] = {"shared": True}
+            if window_stats is not None:
+                output["usage"]["contextWindow"] = window_stats
+            return output
+
+        # Reuse the answer of an earlier turn for the same prompt (config.memoize)
+        output, state = await call_memoized(
+            node_config, state, request_key, call, lambda template: self.variable_resolver.resolve_value(template, state)
+        )
+        if channel is not None and output.get("memo", {}).get("hit"):
+            channel.emit({"type": "token", "nodeId": node_config.get("id", ""), "text": output["text"]})
 
         # Apply variable updates
         updated_state = self._apply_variable_updates(output, node_config, state)
@@ -56,11 +108,19 @@ class LLMNodeExecutor(BaseNodeExecutor):
             "state": updated_state,
         }
 
+    def prepare(self, node_config: Dict[str, Any]) -> None:
+        """Compile the system prompt and validate the model fallback chain once at build time."""
+        self._get_compiled_prompt(node_config)
+        model_config = node_config.get("config", {}).get("model", {})
+        if model_config.get("fallbacks"):
+            validate_model_chain(resolve_model_chain(model_config), node_config.get("name", ""))
+
     def get_output_schema(self) -> Dict[str, Any]:
         """Return output schema for LLM node."""
         return {
             "type": "object",
             "properties": {
                 "text": {"type": "string"},
+                "usage": {"type": "object"},
             },
         }
@@ -1,9 +1,14 @@
 """Executor for tool nodes (async)."""
 
 import asyncio
-from typing import Any, Dict
+import copy
+from typing import Any, Awaitable, Callable, Dict, Tuple
 
+from BL.v3.cache.node_memo import call_memoized
+from BL.v3.cache.single_flight import tool_single_flight
+from BL.v3.cache.speculative_prefetch import take_prefetched
 from BL.v3.nodes.executors.base_executor import BaseNodeExecutor
+from BL.v3.utils.fingerprint import request_fingerprint
 
 
 class ToolNodeExecutor(BaseNodeExecutor):
@@ -23,6 +28,45 @@ class ToolNodeExecutor(BaseNodeExecutor):
         # Yield to event loop so this coroutine works properly in async context
         await asyncio.sleep(0)
 
+        key, fetch = self.speculative_request(node_config, state)
+
+        async def call() -> Dict[str, Any]:
+            # A call started speculatively for this exact request is committed; otherwise
+            # identical concurrent calls of idempotent tools share one upstream call
+            prefetched, output = await take_prefetched(key)
+            if not prefetched:
+                output = await fetch()
+            if prefetched or _single_flight(node_config.get("config", {})):
+                # Shared with other callers; never mutate it
+                output = copy.deepcopy(output)
+            return output
+
+        # Nodes with config.memoize reuse the output of an identical earlier request
+        output, state = await call_memoized(
+            node_config, state, key, call, lambda template: self.variable_resolver.resolve_value(template, state)
+        )
+
+        # Apply variable updates
+        updated_state = self._apply_variable_updates(output, node_config, state)
+
+        return {
+            "output": output,
+            "state": updated_state,
+        }
+
+    def speculative_request(
+        self, node_config: Dict[str, Any], state: Dict[str, Any]
+    ) -> Tuple[str, Callable[[], Awaitable[Any]]]:
+        """
+        Resolve the node's tool call on ``state`` without making it.
+
+        Args:
+            node_config: Tool node configuration
+            state: Current state
+
+        Returns:
+            (request fingerprint, coroutine factory making the call)
+        """
         config = node_config.get("config", {})
 
         # Resolve tool parameters (CPU-bound; keep fast)
@@ -31,22 +75,27 @@ class ToolNodeExecutor(BaseNodeExecutor):
         for key, value_template in parameters.items():
             resolved_params[key] = self.variable_resolver.resolve(value_template, state)
 
+        tool_id = config.get("toolId", "")
+        key = request_fingerprint("tool", tool_id, resolved_params)
+        if not _single_flight(config):
+            return key, lambda: self._call_tool(tool_id, resolved_params)
+
+        async def fetch() -> Dict[str, Any]:
+            output, _ = await tool_single_flight.do(key, lambda: self._call_tool(tool_id, resolved_params))
+            return output
+
+        return key, fetch
+
+    async def _call_tool(self, tool_id: str, resolved_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Perform the upstream tool call."""
         # Tool execution would happen here (use asyncio.to_thread() for blocking calls)
         # For now, return resolved parameters as output
-        output = {
-            "toolId": config.get("toolId", ""),
+        return {
+            "toolId": tool_id,
             "parameters": resolved_params,
             "status": "executed",
         }
 
-        # Apply variable updates
-        updated_state = self._apply_variable_updates(output, node_config, state)
-
-        return {
-            "output": output,
-            "state": updated_state,
-        }
-
     def get_output_schema(self) -> Dict[str, Any]:
         """Return output schema for tool node."""
         return {
@@ -56,3 +105,8 @@ class ToolNodeExecutor(BaseNodeExecutor):
                 "parameters": {"type": "object"},
             },
         }
+
+
+def _single_flight(config: Dict[str, Any]) -> bool:
+    """Coalesce concurrent identical calls: ``singleFlight``, else only for ``idempotent`` tools."""
+    return bool(config.get("singleFlight", config.get("idempotent", False)))
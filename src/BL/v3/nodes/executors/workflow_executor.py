@@ -1,7 +1,8 @@
 """Executor for workflow nodes - supports recursive composition."""
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
+from BL.v3.graph.subworkflow_interface import bind_outputs_by_name
 from BL.v3.nodes.executors.base_executor import BaseNodeExecutor
 
 
@@ -15,24 +16,33 @@ class WorkflowNodeExecutor(BaseNodeExecutor):
     - Tools (callable from agents)
     """
 
-    def __init__(self, variable_resolver=None, graph_builder=None):
+    def __init__(self, variable_resolver=None, graph_builder=None, subworkflow=None):
         """
         Initialize workflow executor.
 
         Args:
             variable_resolver: Variable resolver instance
             graph_builder: Graph builder for recursive workflow loading
+            subworkflow: Child runner embedded at build time (skips per-call loading)
         """
         super().__init__(variable_resolver)
         self.graph_builder = graph_builder
-
-    async def execute(self, node_config: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+        self.subworkflow = subworkflow
+        self._runners: Dict[str, Any] = {}
+
+    async def execute(
+        self,
+        node_config: Dict[str, Any],
+        state: Dict[str, Any],
+        run_config: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
         """
         Execute workflow node (async).
 
         Args:
             node_config: Workflow node configuration
             state: Current state
+            run_config: Parent LangGraph run config, so the child runs nested in the parent run
 
         Returns:
             Workflow output dictionary
@@ -51,38 +61,28 @@ class WorkflowNodeExecutor(BaseNodeExecutor):
                 "state": state,
             }
 
-        # If graph_builder is available, invoke the workflow
-        if self.graph_builder:
+        # If the child is embedded or graph_builder is available, invoke the workflow
+        if self.subworkflow is not None or self.graph_builder:
             try:
-                # Build workflow node function (returns async LangGraph node function)
-                workflow_node_fn = await self.graph_builder.build_workflow_node(workflow_id, config)
-
-                # Prepare state for workflow invocation
-                workflow_state = {
-                    **state,
-                    "interface": {
-                        "inputs": resolved_inputs,
-                    },
-                }
-
-                # Invoke workflow node function (async)
-                result_state = await workflow_node_fn(workflow_state)
+                workflow_node_fn = self.subworkflow
+                if workflow_node_fn is None:
+                    # Not embedded at build time: build the runner once per workflow ID
+                    if workflow_id not in self._runners:
+                        self._runners[workflow_id] = await self.graph_builder.build_workflow_node(
+                            workflow_id, config
+                        )
+                    workflow_node_fn = self._runners[workflow_id]
+
+                # Run the child on its interface inputs; only its declared outputs come back
+                outputs = await workflow_node_fn(state, resolved_inputs, run_config)
 
-                # Extract relevant output from result
-                # Look for output node result or use workflow state
-                output_nodes = result_state.get("nodes", {})
-                output_result = output_nodes.get("output", {})
-                
                 output = {
                     "workflowId": workflow_id,
                     "inputs": resolved_inputs,
                     "status": "completed",
-                    "messages": result_state.get("messages", []),
-                    "result": output_result,
+                    **outputs,
+                    "outputs": outputs,
                 }
-                
-                # Update state with workflow result (already merged by node function)
-                state = result_state
             except Exception as e:
                 output = {
                     "error": str(e),
@@ -97,7 +97,10 @@ class WorkflowNodeExecutor(BaseNodeExecutor):
                 "status": "pending",
             }
 
-        # Apply variable updates
+        # Child outputs reach the parent state only here: through the node's
+        # variableUpdates, or by name when the node declares none
+        if output.get("status") == "completed" and not node_config.get("variableUpdates"):
+            state = bind_outputs_by_name(output["outputs"], state)
         updated_state = self._apply_variable_updates(output, node_config, state)
 
         return {
@@ -113,5 +116,6 @@ class WorkflowNodeExecutor(BaseNodeExecutor):
                 "workflowId": {"type": "string"},
                 "inputs": {"type": "object"},
                 "status": {"type": "string"},
+                "outputs": {"type": "object"},
             },
         }
@@ -24,6 +24,7 @@ def register_all_nodes():
     NodeRegistry.register("http-request", HttpRequestNodeExecutor)  # Alternative naming
     NodeRegistry.register("variable update", VariableUpdateNodeExecutor)
     NodeRegistry.register("variable-update", VariableUpdateNodeExecutor)  # Alternative naming
+    NodeRegistry.register("variable", VariableUpdateNodeExecutor)  # Editor palette naming
     NodeRegistry.register("tool", ToolNodeExecutor)
     # Note: Guardrail can be added later as needed
 
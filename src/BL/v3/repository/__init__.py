@@ -0,0 +1 @@
+"""Workflow definition repository for v3 workflow system."""
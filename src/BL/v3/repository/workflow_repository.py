@@ -0,0 +1,391 @@
+"""Indexed repository of workflow JSON files (agenticWorkflowId/version -> file)."""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WORKFLOW_JSON_DIR = Path(__file__).resolve().parent.parent.parent.parent / "core" / "jsons"
+
+# Workflow exports start with agenticWorkflowId and end with version, so the index
+# only needs the first and last few KB of each file
+_HEADER_BYTES = 4096
+_HEAD_PATTERN = re.compile(r'^\s*\{\s*"agenticWorkflowId"\s*:\s*"([^"]*)"')
+_NAME_PATTERN = re.compile(r'"name"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_TAIL_PATTERN = re.compile(r'"version"\s*:\s*"([^"]*)"\s*\}\s*$')
+_NUMERIC_VERSION = re.compile(r"^v?(\d+)$")
+
+
+class WorkflowEntry:
+    """Index entry: where one version of a workflow lives."""
+
+    __slots__ = ("workflow_id", "version", "name", "path", "mtime_ns", "size")
+
+    def __init__(self, workflow_id: str, version: str, name: str, path: Path, mtime_ns: int, size: int):
+        self.workflow_id = workflow_id
+        self.version = version
+        self.name = name
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "agenticWorkflowId": self.workflow_id,
+            "version": self.version,
+            "name": self.name,
+            "file": str(self.path),
+        }
+
+
+def version_key(version: str) -> Tuple[int, int, str]:
+    """Sort key for versions: numeric (``v<timestamp>``) versions rank above opaque ones."""
+    match = _NUMERIC_VERSION.match(version or "")
+    if match:
+        return (1, int(match.group(1)), version)
+    return (0, 0, version or "")
+
+
+class WorkflowRepository:
+    """
+    Index of workflow definitions under one or more directories.
+
+    The directories are scanned once; each file contributes an index entry read from
+    its first and last few KB (``agenticWorkflowId``, top-level ``name`` and
+    ``version``). Definitions are parsed on first load, off the event loop, and kept
+    in a small LRU keyed by file and mtime. Refreshes only re-read files whose mtime
+    or size changed.
+    """
+
+    def __init__(
+        self,
+        directories: Optional[Iterable[Path]] = None,
+        refresh_interval: float = 5.0,
+        max_parsed: int = 32,
+    ):
+        """
+        Initialize the repository.
+
+        Args:
+            directories: Directories scanned recursively for ``*.json`` (default: core/jsons)
+            refresh_interval: Seconds after which a lookup re-checks the directories for
+                changes (0 = on every lookup, None = only on explicit refresh)
+            max_parsed: Parsed definitions kept in memory
+        """
+        self.directories = [Path(d) for d in (directories or [WORKFLOW_JSON_DIR])]
+        self.refresh_interval = refresh_interval
+        self.max_parsed = max_parsed
+        self._lock = threading.Lock()
+        self._files: Dict[Path, Tuple[int, int, Optional[WorkflowEntry]]] = {}
+        self._index: Dict[str, Dict[str, WorkflowEntry]] = {}
+        self._parsed: "OrderedDict[Path, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._last_refresh: Optional[float] = None
+        self._scans = 0
+        self._header_reads = 0
+        self._parses = 0
+
+    # region Index
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """
+        Re-scan the directories and update the index for new, changed and removed files.
+
+        Returns:
+            {"added", "changed", "removed"}: workflow IDs affected by this refresh
+        """
+        seen: Dict[Path, Tuple[int, int]] = {}
+        for directory in self.directories:
+            if not directory.is_dir():
+                continue
+            for root, _, files in os.walk(directory):
+                for file_name in files:
+                    if not file_name.endswith(".json"):
+                        continue
+                    path = Path(root) / file_name
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    seen[path] = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            known = dict(self._files)
+        updates: Dict[Path, Tuple[int, int, Optional[WorkflowEntry]]] = {}
+        for path, (mtime_ns, size) in seen.items():
+            previous = known.get(path)
+            if previous is not None and previous[0] == mtime_ns and previous[1] == size:
+                continue
+            updates[path] = (mtime_ns, size, self._read_entry(path, mtime_ns, size))
+        removed = [path for path in known if path not in seen]
+
+        changes: Dict[str, List[str]] = {"added": [], "changed": [], "removed": []}
+        with self._lock:
+            for path in removed:
+                entry = self._files.pop(path)[2]
+                self._parsed.pop(path, None)
+                if entry is not None:
+                    self._unindex(entry)
+                    changes["removed"].append(entry.workflow_id)
+            for path, (mtime_ns, size, entry) in updates.items():
+                previous = self._files.get(path)
+                self._files[path] = (mtime_ns, size, entry)
+                cached = self._parsed.get(path)
+                if cached is not None and cached[0] != mtime_ns:
+                    del self._parsed[path]
+                if previous is not None and previous[2] is not None:
+                    self._unindex(previous[2])
+                if entry is not None:
+                    self._add_to_index(entry)
+                    changes["changed" if previous is not None else "added"].append(entry.workflow_id)
+            self._last_refresh = time.monotonic()
+            self._scans += 1
+        return changes
+
+    async def arefresh(self) -> Dict[str, List[str]]:
+        """Async ``refresh`` (directory walk and reads run in a worker thread)."""
+        return await asyncio.to_thread(self.refresh)
+
+    def _read_entry(self, path: Path, mtime_ns: int, size: int) -> Optional[WorkflowEntry]:
+        """Build the index entry for a file, or None when it is not a workflow definition."""
+        try:
+            with open(path, "rb") as f:
+                head = f.read(_HEADER_BYTES)
+                if size > _HEADER_BYTES:
+                    f.seek(max(size - _HEADER_BYTES, _HEADER_BYTES))
+                    tail = f.read()
+                else:
+                    tail = head
+        except OSError as ex:
+            logger.warning("Workflow repository: cannot read %s: %s", path, ex)
+            return None
+        self._header_reads += 1
+        head_text = head.decode("utf-8", errors="ignore")
+        head_match = _HEAD_PATTERN.match(head_text)
+        tail_match = _TAIL_PATTERN.search(tail.decode("utf-8", errors="ignore"))
+        if head_match and tail_match:
+            name_match = _NAME_PATTERN.search(head_text)
+            name = json.loads(f'"{name_match.group(1)}"') if name_match else ""
+            return WorkflowEntry(head_match.group(1), tail_match.group(1), name, path, mtime_ns, size)
+
+        # Unusual layout: parse the whole file once to decide
+        definition = self._parse_file(path)
+        if not isinstance(definition, dict) or not definition.get("agenticWorkflowId") or "nodes" not in definition:
+            return None
+        entry = WorkflowEntry(
+            definition["agenticWorkflowId"],
+            str(definition.get("version", "") or ""),
+            definition.get("name", "") or "",
+            path,
+            mtime_ns,
+            size,
+        )
+        self._remember(path, mtime_ns, definition)
+        return entry
+
+    def _add_to_index(self, entry: WorkflowEntry) -> None:
+        versions = self._index.setdefault(entry.workflow_id, {})
+        existing = versions.get(entry.version)
+        if existing is not None and existing.path != entry.path:
+            # Keep the first file by path order so lookups stay deterministic
+            logger.warning(
+                "Workflow repository: %s version %s found in %s and %s; using %s",
+                entry.workflow_id,
+                entry.version,
+                existing.path,
+                entry.path,
+                min(existing.path, entry.path),
+            )
+            if existing.path < entry.path:
+                return
+        versions[entry.version] = entry
+
+    def _unindex(self, entry: WorkflowEntry) -> None:
+        versions = self._index.get(entry.workflow_id, {})
+        if versions.get(entry.version) is entry:
+            del versions[entry.version]
+            # Another file may carry the same ID/version
+            for _, _, other in self._files.values():
+                if other is not None and other.workflow_id == entry.workflow_id and other.version == entry.version:
+                    self._add_to_index(other)
+        if not versions:
+            self._index.pop(entry.workflow_id, None)
+
+    def _refresh_due(self) -> bool:
+        if self._last_refresh is None:
+            return True
+        if self.refresh_interval is None:
+            return False
+        return time.monotonic() - self._last_refresh >= self.refresh_interval
+
+    # endregion
+
+    # region Lookup
+
+    def resolve(self, workflow_id: str, version: Optional[str] = None) -> Optional[WorkflowEntry]:
+        """
+        Find the index entry for a workflow (sync; refreshes when due).
+
+        Args:
+            workflow_id: agenticWorkflowId
+            version: Exact version, or None for the latest
+
+        Returns:
+            Entry or None when unknown
+        """
+        if self._refresh_due():
+            self.refresh()
+        return self._lookup(workflow_id, version)
+
+    async def aresolve(self, workflow_id: str, version: Optional[str] = None) -> Optional[WorkflowEntry]:
+        """Async ``resolve``."""
+        if self._refresh_due():
+            await self.arefresh()
+        return self._lookup(workflow_id, version)
+
+    def _lookup(self, workflow_id: str, version: Optional[str]) -> Optional[WorkflowEntry]:
+        with self._lock:
+            versions = self._index.get(workflow_id)
+            if not versions:
+                return None
+            if version:
+                return versions.get(version)
+            return versions[max(versions, key=version_key)]
+
+    def load(self, workflow_id: str, version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Load a workflow definition (sync).
+
+        Args:
+            workflow_id: agenticWorkflowId
+            version: Exact version, or None for the latest
+
+        Returns:
+            Parsed definition or None when unknown
+        """
+        entry = self.resolve(workflow_id, version)
+        if entry is None:
+            return None
+        return self._cached(entry) or self._load_entry(entry)
+
+    async def aload(self, workflow_id: str, version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Load a workflow definition; files are parsed in a worker thread (usable as ``workflow_loader``)."""
+        entry = await self.aresolve(workflow_id, version)
+        if entry is None:
+            return None
+        cached = self._cached(entry)
+        if cached is not None:
+            return cached
+        return await asyncio.to_thread(self._load_entry, entry)
+
+    def entry_for_file(self, file_path: Any) -> Optional[WorkflowEntry]:
+        """
+        Return the entry indexed from a file, without refreshing.
+
+        Args:
+            file_path: Indexed file path, or a bare file name that is unique in the index
+
+        Returns:
+            Entry or None when the file is not (or no longer) an indexed workflow
+        """
+        path = Path(file_path)
+        with self._lock:
+            state = self._files.get(path) or self._files.get(path.resolve())
+            if state is not None:
+                return state[2]
+            matches = [entry for p, (_, _, entry) in self._files.items() if p.name == path.name and entry]
+        return matches[0] if len(matches) == 1 else None
+
+    async def aentry_for_file(self, file_path: Any) -> Optional[WorkflowEntry]:
+        """Async ``entry_for_file`` that refreshes the index first when due."""
+        if self._refresh_due():
+            await self.arefresh()
+        return self.entry_for_file(file_path)
+
+    def entries(self) -> List[WorkflowEntry]:
+        """All indexed entries, by workflow ID then version."""
+        if self._refresh_due():
+            self.refresh()
+        with self._lock:
+            return [
+                entry
+                for workflow_id in sorted(self._index)
+                for _, entry in sorted(self._index[workflow_id].items(), key=lambda item: version_key(item[0]))
+            ]
+
+    def _cached(self, entry: WorkflowEntry) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cached = self._parsed.get(entry.path)
+            if cached is None or cached[0] != entry.mtime_ns:
+                return None
+            self._parsed.move_to_end(entry.path)
+            return cached[1]
+
+    def _load_entry(self, entry: WorkflowEntry) -> Optional[Dict[str, Any]]:
+        definition = self._parse_file(entry.path)
+        if isinstance(definition, dict) and definition.get("agenticWorkflowId") == entry.workflow_id:
+            self._remember(entry.path, entry.mtime_ns, definition)
+            return definition
+
+        # The file changed after it was indexed: pick the change up and retry once
+        self.refresh()
+        current = self._lookup(entry.workflow_id, entry.version or None)
+        if current is None:
+            return None
+        definition = self._parse_file(current.path)
+        if isinstance(definition, dict) and definition.get("agenticWorkflowId") == current.workflow_id:
+            self._remember(current.path, current.mtime_ns, definition)
+            return definition
+        return None
+
+    def _parse_file(self, path: Path) -> Optional[Any]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                definition = json.load(f)
+        except (OSError, ValueError) as ex:
+            logger.warning("Workflow repository: cannot parse %s: %s", path, ex)
+            return None
+        self._parses += 1
+        return definition
+
+    def _remember(self, path: Path, mtime_ns: int, definition: Dict[str, Any]) -> None:
+        with self._lock:
+            self._parsed[path] = (mtime_ns, definition)
+            self._parsed.move_to_end(path)
+            while len(self._parsed) > self.max_parsed:
+                self._parsed.popitem(last=False)
+
+    # endregion
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "directories": [str(d) for d in self.directories],
+                "files": len(self._files),
+                "workflows": len(self._index),
+                "versions": sum(len(v) for v in self._index.values()),
+                "parsed": len(self._parsed),
+                "scans": self._scans,
+                "headerReads": self._header_reads,
+                "parses": self._parses,
+            }
+
+
+_default_repository: Optional[WorkflowRepository] = None
+_default_repository_lock = threading.Lock()
+
+
+def get_workflow_repository() -> WorkflowRepository:
+    """Return the process-wide repository over ``core/jsons``."""
+    global _default_repository
+    with _default_repository_lock:
+        if _default_repository is None:
+            _default_repository = WorkflowRepository()
+        return _default_repository
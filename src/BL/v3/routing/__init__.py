@@ -0,0 +1 @@
+"""Pre-routing components for v3 agent nodes."""
@@ -0,0 +1,469 @@
+"""Local pre-routing in front of agent nodes: keyword/regex rules plus a classifier trained on logged decisions."""
+
+import atexit
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from BL.v3.utils.tool_ranker import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def default_decision_log() -> Path:
+    """Decision log file: V3_ROUTING_DECISION_LOG, default ``routing_decisions.jsonl`` in the working directory."""
+    return Path(os.getenv("V3_ROUTING_DECISION_LOG", "routing_decisions.jsonl"))
+
+
+class PreRouteDecision:
+    """A confident routing decision made without the LLM."""
+
+    __slots__ = ("route", "confidence", "source")
+
+    def __init__(self, route: str, confidence: float, source: str):
+        self.route = route
+        self.confidence = confidence
+        self.source = source
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"route": self.route, "confidence": round(self.confidence, 4), "source": self.source}
+
+
+class RouteRule:
+    """Regex patterns that select one route."""
+
+    def __init__(self, route: str, patterns: Iterable[str], confidence: float = 1.0):
+        """
+        Initialize rule.
+
+        Args:
+            route: Route label (handoff tool name or target node name/id)
+            patterns: Regular expressions, matched case-insensitively; any match selects the route
+            confidence: Confidence reported when this rule alone matches
+        """
+        self.route = route
+        self.patterns = [re.compile(p, re.IGNORECASE) for p in patterns]
+        self.confidence = confidence
+
+    def matches(self, text: str) -> bool:
+        return any(p.search(text) for p in self.patterns)
+
+
+class NaiveBayesRouteClassifier:
+    """Multinomial naive Bayes over unigram and bigram terms; small, fast and retrainable."""
+
+    def __init__(self, alpha: float = 1.0):
+        """
+        Initialize classifier.
+
+        Args:
+            alpha: Laplace smoothing
+        """
+        self.alpha = alpha
+        self._class_counts: Counter = Counter()
+        self._term_counts: Dict[str, Counter] = defaultdict(Counter)
+        self._class_totals: Counter = Counter()
+        self._vocabulary: set = set()
+
+    @staticmethod
+    def _features(text: str) -> List[str]:
+        terms = tokenize(text)
+        return terms + [f"{a}_{b}" for a, b in zip(terms, terms[1:])]
+
+    @property
+    def example_count(self) -> int:
+        return sum(self._class_counts.values())
+
+    def fit(self, examples: Iterable[Tuple[str, str]]) -> "NaiveBayesRouteClassifier":
+        """
+        Train on (text, route) examples (adds to what was already learned).
+
+        Args:
+            examples: Iterable of (query text, route label)
+        """
+        for text, route in examples:
+            features = self._features(text)
+            self._class_counts[route] += 1
+            self._term_counts[route].update(features)
+            self._class_totals[route] += len(features)
+            self._vocabulary.update(features)
+        return self
+
+    def predict(self, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Predict the route for a text.
+
+        Returns:
+            (route, posterior probability) or None when untrained or no known terms
+        """
+        if len(self._class_counts) < 2:
+            return None
+        features = [f for f in self._features(text) if f in self._vocabulary]
+        if not features:
+            return None
+        total = self.example_count
+        vocabulary_size = len(self._vocabulary)
+        log_scores = {}
+        for route, count in self._class_counts.items():
+            denominator = self._class_totals[route] + self.alpha * vocabulary_size
+            counts = self._term_counts[route]
+            score = math.log(count / total)
+            for feature in features:
+                score += math.log((counts.get(feature, 0) + self.alpha) / denominator)
+            log_scores[route] = score
+        best = max(log_scores, key=log_scores.get)
+        norm = sum(math.exp(s - log_scores[best]) for s in log_scores.values())
+        return best, 1.0 / norm
+
+
+class RoutingDecisionLog:
+    """
+    Append-only JSONL log of (query, route) decisions used to train the classifier.
+
+    ``append`` only buffers the line; a writer thread appends the buffered lines to
+    the file every ``flush_interval_ms``, so recording a decision never does file I/O
+    on the caller's thread (the event loop). When ``max_pending`` lines are waiting,
+    further decisions are dropped and counted.
+    """
+
+    def __init__(self, path: Optional[Path] = None, flush_interval_ms: float = 500, max_pending: int = 10000):
+        """
+        Initialize the log.
+
+        Args:
+            path: JSONL file (default: ``default_decision_log()``)
+            flush_interval_ms: Longest time a decision waits in the buffer
+            max_pending: Buffered lines after which decisions are dropped
+        """
+        self.path = Path(path) if path else default_decision_log()
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self._cond = threading.Condition()
+        self._pending: List[str] = []
+        self._buffered = 0
+        self._written = 0
+        self._dropped = 0
+        self._closed = False
+        self._writer: Optional[threading.Thread] = None
+
+    def append(self, query: str, route: str, source: str) -> None:
+        """Buffer one decision for the writer thread (best-effort; never blocks, never raises)."""
+        if not query or not route:
+            return
+        line = json.dumps({"query": query, "route": route, "source": source, "ts": time.time()}, ensure_ascii=False)
+        with self._cond:
+            if self._closed or len(self._pending) >= self.max_pending:
+                self._dropped += 1
+                if self._dropped == 1 or self._dropped % 1000 == 0:
+                    logger.warning("Routing decision log %s is behind: %d decisions dropped", self.path, self._dropped)
+                return
+            self._pending.append(line + "\n")
+            self._buffered += 1
+            if len(self._pending) == 1:
+                # The writer sleeps until there is something to write
+                self._cond.notify_all()
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="routing-decision-log", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every buffered decision is written (or given up on).
+
+        Returns:
+            False when ``timeout`` seconds passed first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._buffered
+            while self._written < target and self._writer is not None and self._writer.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.notify_all()
+                self._cond.wait(0.1 if remaining is None else min(remaining, 0.1))
+        return True
+
+    def close(self) -> None:
+        """Write out buffered decisions and stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+            writer = self._writer
+        if writer is not None:
+            writer.join()
+
+    def stats(self) -> Dict[str, int]:
+        """Buffered, written and dropped decision counts."""
+        with self._cond:
+            return {"pending": len(self._pending), "written": self._written, "dropped": self._dropped}
+
+    def _writer_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._closed:
+                    # Gather more lines; flush() and close() wake the writer early
+                    self._cond.wait(self.flush_interval)
+                lines, self._pending = self._pending, []
+                if not lines and self._closed:
+                    return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("".join(lines))
+            except OSError as ex:
+                logger.warning("Could not append %d routing decisions to %s: %s", len(lines), self.path, ex)
+            with self._cond:
+                self._written += len(lines)
+                self._cond.notify_all()
+
+    def examples(self, sources: Optional[Iterable[str]] = None) -> List[Tuple[str, str]]:
+        """
+        Load logged (query, route) pairs.
+
+        Args:
+            sources: Only decisions from these sources (default: LLM and labelled decisions)
+        """
+        allowed = set(sources or ("llm", "label"))
+        self.flush()
+        if not self.path.exists():
+            return []
+        examples = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("source") in allowed and record.get("query") and record.get("route"):
+                    examples.append((record["query"], record["route"]))
+        return examples
+
+
+class PreRouter:
+    """
+    Decides a route before the agent LLM runs, when rules or the classifier are confident.
+
+    Rules come first: a single matching route is taken with the rule's confidence;
+    several matching routes are ambiguous and fall through to the classifier.
+    """
+
+    def __init__(
+        self,
+        rules: Optional[List[RouteRule]] = None,
+        classifier: Optional[NaiveBayesRouteClassifier] = None,
+        min_confidence: float = 0.9,
+        decision_log: Optional[RoutingDecisionLog] = None,
+        min_examples: int = 20,
+        retrain_every: int = 50,
+    ):
+        """
+        Initialize pre-router.
+
+        Args:
+            rules: Keyword/regex rules
+            classifier: Trained classifier (optional)
+            min_confidence: Minimum confidence needed to skip the LLM
+            decision_log: Where LLM decisions are logged for retraining (optional)
+            min_examples: Logged decisions needed before a classifier is trained
+            retrain_every: Retrain from the log after this many new LLM decisions (0: never)
+        """
+        self.rules = rules or []
+        self.classifier = classifier
+        self.min_confidence = min_confidence
+        self.decision_log = decision_log
+        self.min_examples = min_examples
+        self.retrain_every = retrain_every
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._skipped = 0
+        self._new_decisions = 0
+        self._retrains = 0
+        self._retraining: Optional[threading.Thread] = None
+        self._routes: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"decisions": 0, "rule": 0, "classifier": 0, "confidenceSum": 0.0}
+        )
+
+    @classmethod
+    def from_config(cls, router_config: Dict[str, Any]) -> "PreRouter":
+        """
+        Build a pre-router from agent ``config.preRouter``.
+
+        Args:
+            router_config: {"rules": [{"route", "patterns", "confidence"}], "minConfidence",
+                "classifier": {"enable", "decisionLog", "minExamples", "retrainEvery"}}
+        """
+        rules = [
+            RouteRule(r["route"], r.get("patterns", []), float(r.get("confidence", 1.0)))
+            for r in router_config.get("rules", [])
+            if r.get("route")
+        ]
+        classifier_config = router_config.get("classifier", {}) or {}
+        decision_log = None
+        if classifier_config.get("enable", False):
+            decision_log = RoutingDecisionLog(classifier_config.get("decisionLog"))
+        router = cls(
+            rules,
+            None,
+            float(router_config.get("minConfidence", 0.9)),
+            decision_log,
+            min_examples=int(classifier_config.get("minExamples", 20)),
+            retrain_every=int(classifier_config.get("retrainEvery", 50)),
+        )
+        # The first training reads the whole log: until it is done, only rules decide
+        router.start_retrain()
+        return router
+
+    def retrain(self) -> bool:
+        """
+        Train a new classifier on the whole decision log and swap it in.
+
+        Returns:
+            True when the log had enough examples and the classifier was replaced
+        """
+        if self.decision_log is None:
+            return False
+        examples = self.decision_log.examples()
+        if len(examples) < self.min_examples:
+            return False
+        classifier = NaiveBayesRouteClassifier().fit(examples)
+        with self._lock:
+            self.classifier = classifier
+            self._retrains += 1
+        return True
+
+    def decide(self, query: str) -> Optional[PreRouteDecision]:
+        """
+        Return a confident decision for the query, or None to fall through to the LLM.
+
+        Args:
+            query: User query
+        """
+        decision = self._candidate(query)
+        confident = decision is not None and decision.confidence >= self.min_confidence
+        with self._lock:
+            self._calls += 1
+            if confident:
+                self._skipped += 1
+                route_stats = self._routes[decision.route]
+                route_stats["decisions"] += 1
+                route_stats[decision.source] += 1
+                route_stats["confidenceSum"] += decision.confidence
+        return decision if confident else None
+
+    def _candidate(self, query: str) -> Optional[PreRouteDecision]:
+        if not query:
+            return None
+        matched = [rule for rule in self.rules if rule.matches(query)]
+        routes = {rule.route for rule in matched}
+        if len(routes) == 1:
+            return PreRouteDecision(matched[0].route, max(r.confidence for r in matched), "rule")
+        if self.classifier is not None:
+            prediction = self.classifier.predict(query)
+            if prediction is not None:
+                route, confidence = prediction
+                if not routes or route in routes:
+                    return PreRouteDecision(route, confidence, "classifier")
+        return None
+
+    def record_llm_decision(self, query: str, route: str) -> None:
+        """
+        Log a decision made by the LLM (training data for the classifier).
+
+        Every ``retrain_every`` decisions the classifier is retrained from the log in
+        a background thread, so it learns from the LLM while the process runs.
+        """
+        if self.decision_log is None:
+            return
+        self.decision_log.append(query, route, "llm")
+        with self._lock:
+            self._new_decisions += 1
+            if self.retrain_every <= 0 or self._new_decisions < self.retrain_every:
+                return
+        if self.start_retrain():
+            with self._lock:
+                self._new_decisions = 0
+
+    def start_retrain(self) -> bool:
+        """
+        Start ``retrain`` in a background thread (file reads and training stay off the
+        caller's thread).
+
+        Returns:
+            False when there is no decision log or a retrain is already running
+        """
+        if self.decision_log is None:
+            return False
+        with self._lock:
+            if self._retraining is not None and self._retraining.is_alive():
+                return False
+            self._retraining = threading.Thread(target=self.retrain, name="pre-router-retrain", daemon=True)
+            self._retraining.start()
+        return True
+
+    def wait_for_retrain(self, timeout: Optional[float] = None) -> None:
+        """Wait for a background retrain to finish (tests and benchmarks)."""
+        thread = self._retraining
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Skip rate and per-route decision counts and mean confidence."""
+        with self._lock:
+            routes = {
+                route: {
+                    "decisions": int(s["decisions"]),
+                    "rule": int(s["rule"]),
+                    "classifier": int(s["classifier"]),
+                    "meanConfidence": round(s["confidenceSum"] / s["decisions"], 4) if s["decisions"] else 0.0,
+                }
+                for route, s in self._routes.items()
+            }
+            return {
+                "calls": self._calls,
+                "skipped": self._skipped,
+                "skipRate": round(self._skipped / self._calls, 4) if self._calls else 0.0,
+                "classifierExamples": self.classifier.example_count if self.classifier else 0,
+                "retrains": self._retrains,
+                "decisionLog": self.decision_log.stats() if self.decision_log else None,
+                "routes": routes,
+            }
+
+
+_routers: Dict[str, PreRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_pre_router(router_key: str, router_config: Dict[str, Any]) -> PreRouter:
+    """
+    Return the process-wide pre-router for an agent node, creating it on first use.
+
+    Args:
+        router_key: Agent node key ("<workflowId>:<version>:<nodeId>")
+        router_config: Agent ``config.preRouter``
+    """
+    with _routers_lock:
+        router = _routers.get(router_key)
+        if router is None:
+            router = PreRouter.from_config(router_config)
+            _routers[router_key] = router
+        return router
+
+
+def pre_router_stats() -> Dict[str, Any]:
+    """Stats for every pre-router in this process, keyed by agent node key."""
+    with _routers_lock:
+        routers = dict(_routers)
+    return {key: router.stats() for key, router in routers.items()}
@@ -36,6 +36,9 @@ class WorkflowState(TypedDict, total=False):
     # Additional metadata
     metadata: Dict[str, Any]
 
+    # Child workflow interface ({"inputs": {...}} set by the calling workflow node)
+    interface: Dict[str, Any]
+
 
 def state_reducer(left: WorkflowState, right: WorkflowState) -> WorkflowState:
     """
@@ -0,0 +1 @@
+"""Streaming components for v3 workflow system."""
@@ -0,0 +1,39 @@
+"""Encoding of stream events for streaming HTTP responses (NDJSON or SSE)."""
+
+import json
+from typing import Any, AsyncIterator, Dict
+
+from fastapi.encoders import jsonable_encoder
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def wants_sse(accept_header: str, body: Dict[str, Any]) -> bool:
+    """True when the client asked for Server-Sent Events instead of NDJSON."""
+    if str(body.get("streamFormat", "")).lower() == "sse":
+        return True
+    return SSE_MEDIA_TYPE in (accept_header or "")
+
+
+def encode_event(event: Dict[str, Any], sse: bool) -> str:
+    """
+    Encode one event as an NDJSON line or an SSE frame.
+
+    Args:
+        event: Event dict (may contain LangChain messages; made JSON-safe here)
+        sse: Encode as SSE when True, NDJSON otherwise
+
+    Returns:
+        Encoded text chunk
+    """
+    data = json.dumps(jsonable_encoder(event), ensure_ascii=False, separators=(",", ":"))
+    if sse:
+        return f"event: {event.get('type', 'message')}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+async def encode_stream(events: AsyncIterator[Dict[str, Any]], sse: bool) -> AsyncIterator[str]:
+    """Encode an async stream of events for a StreamingResponse body."""
+    async for event in events:
+        yield encode_event(event, sse)
@@ -0,0 +1,172 @@
+"""Compact node-level event stream for v3 workflow runs (built on LangGraph astream_events)."""
+
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from BL.v3.graph.node_bindings import pin_node_bindings
+from BL.v3.streaming.token_channel import chunk_text
+
+NODE_START = "node_start"
+NODE_END = "node_end"
+STATE_DELTA = "state_delta"
+TOKEN = "token"
+RUN_END = "run_end"
+
+DEFAULT_EVENT_TYPES = (NODE_START, NODE_END, STATE_DELTA, RUN_END)
+DEFAULT_FIELDS = ("flow",)
+
+_MISSING = object()
+
+
+class StreamFilter:
+    """
+    Selects which event types and state fields are serialized.
+
+    Fields are dotted paths into the state, e.g. ``flow.partialViewData``,
+    ``flow.isPvRendered``, ``nodes`` or ``messages``; ``*`` selects everything.
+    """
+
+    def __init__(self, event_types: Optional[Iterable[str]] = None, fields: Optional[Iterable[str]] = None):
+        """
+        Initialize filter.
+
+        Args:
+            event_types: Event types to emit (defaults to node/delta/run events, no tokens)
+            fields: State paths to include in deltas and the final state (defaults to "flow")
+        """
+        self.event_types = set(event_types or DEFAULT_EVENT_TYPES)
+        paths = [str(f).strip() for f in (fields or DEFAULT_FIELDS) if str(f).strip()]
+        self.select_all = "*" in paths
+        self.paths: List[List[str]] = [p.split(".") for p in paths if p != "*"]
+        self.top_level_keys = {p[0] for p in self.paths}
+
+    def wants(self, event_type: str) -> bool:
+        """True when this event type should be emitted."""
+        return event_type in self.event_types
+
+    def select(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Project a (delta or full) state dict onto the requested paths."""
+        if self.select_all:
+            return {k: v for k, v in data.items() if not k.startswith("_")}
+        selected: Dict[str, Any] = {}
+        for path in self.paths:
+            value = data
+            for part in path:
+                if not isinstance(value, dict) or part not in value:
+                    value = _MISSING
+                    break
+                value = value[part]
+            if value is _MISSING:
+                continue
+            target = selected
+            for part in path[:-1]:
+                target = target.setdefault(part, {})
+            target[path[-1]] = value
+        return selected
+
+    def state_delta(self, previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compute the changed parts of ``current`` relative to ``previous``, restricted to the filter.
+
+        Dict fields report changed sub-keys only; ``messages`` reports appended items.
+        """
+        keys = current.keys() if self.select_all else self.top_level_keys & current.keys()
+        delta: Dict[str, Any] = {}
+        for key in keys:
+            if key.startswith("_"):
+                continue
+            value = current[key]
+            old = previous.get(key, _MISSING)
+            if isinstance(value, list) and isinstance(old, list) and len(value) >= len(old):
+                if value[len(old):]:
+                    delta[key] = value[len(old):]
+            elif isinstance(value, dict) and isinstance(old, dict):
+                changed = {k: v for k, v in value.items() if old.get(k, _MISSING) != v}
+                if changed:
+                    delta[key] = changed
+            elif old is _MISSING or old != value:
+                delta[key] = value
+        return self.select(delta)
+
+
+async def astream_node_events(
+    graph: Any,
+    initial_state: Dict[str, Any],
+    stream_filter: Optional[StreamFilter] = None,
+    config: Optional[Dict[str, Any]] = None,
+    on_run_end: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run a workflow graph and yield compact node-level events as nodes start and finish.
+
+    Args:
+        graph: Compiled LangGraph graph
+        initial_state: Initial state dictionary
+        stream_filter: Event type and field selection
+        config: Run config (e.g. the thread of a checkpointed conversation)
+        on_run_end: Called with the whole (unfiltered) final state when the run
+            finishes, before run_end is sent (e.g. to record the turn)
+
+    Yields:
+        node_start / node_end / state_delta / token events, then run_end with the
+        filtered final state (or an error event)
+    """
+    stream_filter = stream_filter or StreamFilter()
+    snapshot = dict(initial_state)
+    started_at: Dict[str, float] = {}
+    final_state: Optional[Dict[str, Any]] = None
+
+    try:
+        # Prompt patches of a hot reload apply from the next run
+        with pin_node_bindings():
+            async for event in graph.astream_events(initial_state, config, version="v2"):
+                kind = event.get("event", "")
+                metadata = event.get("metadata", {}) or {}
+                node_id = metadata.get("langgraph_node", "")
+                depth = len(event.get("parent_ids", []) or [])
+
+                # Root graph run finished: keep final state
+                if kind == "on_chain_end" and depth == 0:
+                    output = event.get("data", {}).get("output")
+                    if isinstance(output, dict):
+                        final_state = output
+                    continue
+
+                if kind == "on_chat_model_stream":
+                    if stream_filter.wants(TOKEN):
+                        chunk = event.get("data", {}).get("chunk")
+                        text = chunk_text(getattr(chunk, "content", ""))
+                        if text:
+                            yield {"type": TOKEN, "nodeId": node_id, "text": text}
+                    continue
+
+                # Only node runs themselves (not runnables nested inside a node)
+                if not node_id or event.get("name") != node_id:
+                    continue
+
+                run_id = event.get("run_id", "")
+                if kind == "on_chain_start":
+                    started_at[run_id] = time.perf_counter()
+                    if stream_filter.wants(NODE_START):
+                        yield {"type": NODE_START, "nodeId": node_id, "depth": depth}
+                elif kind == "on_chain_end":
+                    start = started_at.pop(run_id, None)
+                    duration_ms = round((time.perf_counter() - start) * 1000, 2) if start is not None else None
+                    if stream_filter.wants(NODE_END):
+                        yield {"type": NODE_END, "nodeId": node_id, "depth": depth, "durationMs": duration_ms}
+                    output = event.get("data", {}).get("output")
+                    # Deltas only for the top-level graph; nested (child workflow) nodes
+                    # update a different state
+                    if depth == 1 and isinstance(output, dict):
+                        if stream_filter.wants(STATE_DELTA):
+                            delta = stream_filter.state_delta(snapshot, output)
+                            if delta:
+                                yield {"type": STATE_DELTA, "nodeId": node_id, "delta": delta}
+                        snapshot = {**snapshot, **output}
+
+            if on_run_end is not None:
+                on_run_end(final_state or snapshot)
+            if stream_filter.wants(RUN_END):
+                yield {"type": RUN_END, "state": stream_filter.select(final_state or snapshot)}
+    except Exception as ex:
+        yield {"type": "error", "error": str(ex)}
@@ -0,0 +1,92 @@
+"""Per-run async channel carrying streamed LLM tokens from executors to the HTTP layer."""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+_SENTINEL = object()
+
+# Bound for the duration of a streaming run; LangGraph node tasks inherit it
+_current_channel: ContextVar[Optional["TokenChannel"]] = ContextVar("v3_token_channel", default=None)
+
+
+class TokenChannel:
+    """
+    Unbounded async queue of stream events for one workflow run.
+
+    Producers (executors) call ``emit`` synchronously; the consumer iterates the
+    channel with ``async for`` until ``close`` is called.
+    """
+
+    def __init__(self):
+        """Initialize an open channel."""
+        self._queue: "asyncio.Queue[Any]" = asyncio.Queue()
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        """True once the producer side has been closed."""
+        return self._closed
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        """
+        Publish an event to the consumer. Ignored after close.
+
+        Args:
+            event: JSON-serializable event dict with a "type" key
+        """
+        if not self._closed:
+            self._queue.put_nowait(event)
+
+    def close(self) -> None:
+        """Close the channel; the consumer stops after draining pending events."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put_nowait(_SENTINEL)
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            event = await self._queue.get()
+            if event is _SENTINEL:
+                return
+            yield event
+
+
+def get_token_channel() -> Optional[TokenChannel]:
+    """Return the channel bound to the current run, or None when not streaming."""
+    channel = _current_channel.get()
+    if channel is None or channel.closed:
+        return None
+    return channel
+
+
+@contextmanager
+def bind_token_channel(channel: TokenChannel) -> Iterator[TokenChannel]:
+    """
+    Bind a channel to the current context for the duration of a run.
+
+    Args:
+        channel: Channel to bind
+
+    Yields:
+        The bound channel
+    """
+    token = _current_channel.set(channel)
+    try:
+        yield channel
+    finally:
+        _current_channel.reset(token)
+
+
+def chunk_text(content: Any) -> str:
+    """Extract plain text from a message chunk's content (string or provider content blocks)."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in content
+            if not isinstance(block, dict) or block.get("type", "text") == "text"
+        )
+    return ""
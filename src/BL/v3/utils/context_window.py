@@ -0,0 +1,328 @@
+"""Token-budgeted context window management with a rolling summary of older turns."""
+
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+# Rough per-message overhead of chat formats (role, separators)
+_MESSAGE_OVERHEAD_TOKENS = 4
+_SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+_SUMMARY_INSTRUCTION = (
+    "You maintain a rolling summary of a conversation between a user and an assistant. "
+    "Update the existing summary with the new messages. Keep every fact, identifier, "
+    "selection and decision the assistant may need later; drop pleasantries. "
+    "Reply with the updated summary only."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate (about four characters per token for English/JSON).
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    return (len(text) + 3) // 4
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+        )
+    return str(content or "")
+
+
+def message_role(message: Any) -> str:
+    """Return a normalized role ("system", "user", "assistant", "tool") for a message."""
+    if isinstance(message, dict):
+        role = message.get("role", "user")
+    else:
+        role = getattr(message, "type", "human")
+    return {"human": "user", "ai": "assistant"}.get(role, role)
+
+
+def estimate_message_tokens(message: Any) -> int:
+    """Estimate the prompt tokens one message contributes (content plus tool calls)."""
+    if isinstance(message, dict):
+        content = message.get("content", "")
+        tool_calls = message.get("tool_calls")
+    else:
+        content = getattr(message, "content", "")
+        tool_calls = getattr(message, "tool_calls", None)
+    tokens = estimate_tokens(_content_text(content)) + _MESSAGE_OVERHEAD_TOKENS
+    if tool_calls:
+        tokens += estimate_tokens(json.dumps(tool_calls, default=str))
+    return tokens
+
+
+def estimate_messages_tokens(messages: List[Any]) -> int:
+    """Estimate the prompt tokens of a message list."""
+    return sum(estimate_message_tokens(m) for m in messages)
+
+
+class _Group:
+    """Messages that must be kept or dropped together (e.g. a tool call and its results)."""
+
+    __slots__ = ("start", "messages", "pinned", "tokens")
+
+    def __init__(self, start: int, messages: List[Any], pinned: bool):
+        self.start = start
+        self.messages = messages
+        self.pinned = pinned
+        self.tokens = estimate_messages_tokens(messages)
+
+
+class ContextWindowManager:
+    """
+    Fits a message list into a per-node token budget.
+
+    System messages, tool exchanges (assistant tool calls with their tool results)
+    and the latest user message are pinned. Remaining messages are kept newest
+    first while they fit; older ones are folded once into a rolling summary that
+    the caller stores in state, so it is extended rather than recomputed each turn.
+    A new summary is measured again: if it does not fit next to the kept messages it
+    is summarized once more to the room left, and the copy sent is truncated if it
+    still does not fit.
+    """
+
+    def __init__(self, max_tokens: int, summarize: bool = True, summary_max_tokens: int = 512):
+        """
+        Initialize manager.
+
+        Args:
+            max_tokens: Prompt token budget for the node
+            summarize: Fold evicted messages into a rolling summary (otherwise drop them)
+            summary_max_tokens: Soft cap on summary length requested from the summarizer
+        """
+        self.max_tokens = max_tokens
+        self.summarize = summarize
+        self.summary_max_tokens = summary_max_tokens
+
+    @classmethod
+    def from_config(cls, window_config: Optional[Dict[str, Any]]) -> Optional["ContextWindowManager"]:
+        """
+        Build a manager from a node ``contextWindow`` config, or None when disabled.
+
+        Args:
+            window_config: {"maxTokens": int, "summarize": bool, "summaryMaxTokens": int, "enable": bool}
+        """
+        if not window_config or not window_config.get("enable", True) or not window_config.get("maxTokens"):
+            return None
+        return cls(
+            max_tokens=int(window_config["maxTokens"]),
+            summarize=bool(window_config.get("summarize", True)),
+            summary_max_tokens=int(window_config.get("summaryMaxTokens", 512)),
+        )
+
+    def plan(self, messages: List[Any], record: Optional[Dict[str, Any]]) -> Tuple[List[_Group], List[Any], int]:
+        """
+        Decide which messages to keep and which to fold into the summary.
+
+        Args:
+            messages: Full message list (system prompt first)
+            record: Summary record from state ({"text", "coveredUpto"}) or None
+
+        Returns:
+            (kept groups, newly evicted messages, new coveredUpto index)
+        """
+        record = record or {}
+        covered = int(record.get("coveredUpto", 0))
+        if covered > len(messages):
+            # Different/shorter thread than the one summarized: start over
+            covered, record = 0, {}
+        summary_tokens = estimate_tokens(record.get("text", ""))
+
+        groups = _group_messages(messages)
+        pinned = [g for g in groups if g.pinned]
+        candidates = [g for g in groups if not g.pinned and g.start >= covered]
+
+        budget = self.max_tokens - sum(g.tokens for g in pinned) - summary_tokens
+        kept_unpinned: List[_Group] = []
+        evicted: List[_Group] = []
+        for group in reversed(candidates):
+            if not evicted and group.tokens <= budget:
+                kept_unpinned.append(group)
+                budget -= group.tokens
+            else:
+                # Keep the kept window contiguous: everything older is evicted too
+                evicted.append(group)
+
+        new_covered = covered
+        if evicted:
+            last_evicted = max(evicted, key=lambda g: g.start)
+            new_covered = last_evicted.start + len(last_evicted.messages)
+        kept = sorted(pinned + kept_unpinned, key=lambda g: g.start)
+        evicted_messages = [m for g in sorted(evicted, key=lambda g: g.start) for m in g.messages]
+        return kept, evicted_messages, new_covered
+
+    def fit(
+        self,
+        messages: List[Any],
+        record: Optional[Dict[str, Any]],
+        summarizer: Optional[Callable[[str, List[Any], int], str]] = None,
+    ) -> Tuple[List[Any], Dict[str, Any], Dict[str, Any]]:
+        """
+        Fit messages into the budget using a synchronous summarizer.
+
+        Args:
+            messages: Full message list (system prompt first)
+            record: Summary record from state or None
+            summarizer: fn(previous_summary, new_messages, max_tokens) -> summary
+
+        Returns:
+            (messages to send, updated summary record, token stats)
+        """
+        kept, evicted, covered = self.plan(messages, record)
+        summary = (record or {}).get("text", "") if covered <= len(messages) else ""
+        if evicted and self.summarize and summarizer is not None:
+            summary = summarizer(summary, evicted, self.summary_max_tokens)
+            room = self._summary_room(kept)
+            if _summary_message_tokens(summary) > room > 0:
+                summary = summarizer(summary, [], _summary_text_tokens(room))
+        return self._assemble(messages, kept, evicted, covered, summary)
+
+    async def afit(
+        self,
+        messages: List[Any],
+        record: Optional[Dict[str, Any]],
+        summarizer: Optional[Callable[[str, List[Any], int], Awaitable[str]]] = None,
+    ) -> Tuple[List[Any], Dict[str, Any], Dict[str, Any]]:
+        """
+        Fit messages into the budget using an async summarizer (see ``fit``).
+        """
+        kept, evicted, covered = self.plan(messages, record)
+        summary = (record or {}).get("text", "") if covered <= len(messages) else ""
+        if evicted and self.summarize and summarizer is not None:
+            summary = await summarizer(summary, evicted, self.summary_max_tokens)
+            room = self._summary_room(kept)
+            if _summary_message_tokens(summary) > room > 0:
+                summary = await summarizer(summary, [], _summary_text_tokens(room))
+        return self._assemble(messages, kept, evicted, covered, summary)
+
+    def _summary_room(self, kept: List[_Group]) -> int:
+        """Tokens left for the summary message once the kept messages are in."""
+        return self.max_tokens - sum(g.tokens for g in kept)
+
+    def _assemble(
+        self, messages: List[Any], kept: List[_Group], evicted: List[Any], covered: int, summary: str
+    ) -> Tuple[List[Any], Dict[str, Any], Dict[str, Any]]:
+        # The record keeps the whole summary; only the copy sent is cut to the room left
+        sent_summary = _truncate_summary(summary, self._summary_room(kept))
+        fitted: List[Any] = []
+        summary_inserted = not sent_summary
+        for group in kept:
+            if not summary_inserted and message_role(group.messages[0]) != "system":
+                fitted.append(SystemMessage(content=_SUMMARY_PREFIX + sent_summary))
+                summary_inserted = True
+            fitted.extend(group.messages)
+        if not summary_inserted:
+            fitted.append(SystemMessage(content=_SUMMARY_PREFIX + sent_summary))
+
+        record = {"text": summary, "coveredUpto": covered}
+        stats = {
+            "budgetTokens": self.max_tokens,
+            "tokensBefore": estimate_messages_tokens(messages),
+            "tokensAfter": estimate_messages_tokens(fitted),
+            "evictedMessages": len(evicted),
+            "summarized": bool(evicted and summary),
+            "summaryTruncated": sent_summary != summary,
+        }
+        return fitted, record, stats
+
+
+def _summary_message_tokens(summary: str) -> int:
+    """Estimated tokens of the system message carrying ``summary`` (0 when empty)."""
+    if not summary:
+        return 0
+    return estimate_tokens(_SUMMARY_PREFIX + summary) + _MESSAGE_OVERHEAD_TOKENS
+
+
+def _summary_text_tokens(room: int) -> int:
+    """Tokens the summary text may take when its message must fit in ``room``."""
+    return max(1, room - _MESSAGE_OVERHEAD_TOKENS - estimate_tokens(_SUMMARY_PREFIX))
+
+
+def _truncate_summary(summary: str, room: int) -> str:
+    """Cut ``summary`` so its message fits in ``room`` tokens (empty when nothing fits)."""
+    if _summary_message_tokens(summary) <= room:
+        return summary
+    max_chars = (room - _MESSAGE_OVERHEAD_TOKENS) * 4 - len(_SUMMARY_PREFIX)
+    return summary[:max_chars].rstrip() if max_chars > 0 else ""
+
+
+def _group_messages(messages: List[Any]) -> List[_Group]:
+    """Group messages into atomic units and mark the pinned ones."""
+    last_user_index = max(
+        (i for i, m in enumerate(messages) if message_role(m) == "user"), default=-1
+    )
+    groups: List[_Group] = []
+    i = 0
+    while i < len(messages):
+        message = messages[i]
+        role = message_role(message)
+        tool_calls = message.get("tool_calls") if isinstance(message, dict) else getattr(message, "tool_calls", None)
+        if role == "assistant" and tool_calls:
+            j = i + 1
+            while j < len(messages) and message_role(messages[j]) == "tool":
+                j += 1
+            groups.append(_Group(i, messages[i:j], pinned=True))
+            i = j
+            continue
+        pinned = role in ("system", "tool") or i == last_user_index
+        groups.append(_Group(i, [message], pinned=pinned))
+        i += 1
+    return groups
+
+
+def _transcript(previous_summary: str, messages: List[Any]) -> str:
+    lines = []
+    if previous_summary:
+        lines.append(f"Existing summary:\n{previous_summary}\n")
+    lines.append("New messages:")
+    for message in messages:
+        content = message.get("content", "") if isinstance(message, dict) else getattr(message, "content", "")
+        lines.append(f"{message_role(message)}: {_content_text(content)}")
+    return "\n".join(lines)
+
+
+def build_llm_summarizer(llm: Any) -> Callable[[str, List[Any], int], Awaitable[str]]:
+    """
+    Build an async summarizer backed by a chat model.
+
+    Args:
+        llm: Chat model used to update the rolling summary
+
+    Returns:
+        async fn(previous_summary, new_messages, max_tokens) -> summary
+    """
+
+    async def _summarize(previous_summary: str, messages: List[Any], max_tokens: int) -> str:
+        instruction = f"{_SUMMARY_INSTRUCTION} Stay under about {max_tokens} tokens."
+        response = await llm.ainvoke(
+            [SystemMessage(content=instruction), HumanMessage(content=_transcript(previous_summary, messages))]
+        )
+        return _content_text(getattr(response, "content", response))
+
+    return _summarize
+
+
+def build_sync_llm_summarizer(llm: Any) -> Callable[[str, List[Any], int], str]:
+    """Synchronous variant of ``build_llm_summarizer`` for sync graph nodes."""
+
+    def _summarize(previous_summary: str, messages: List[Any], max_tokens: int) -> str:
+        instruction = f"{_SUMMARY_INSTRUCTION} Stay under about {max_tokens} tokens."
+        response = llm.invoke(
+            [SystemMessage(content=instruction), HumanMessage(content=_transcript(previous_summary, messages))]
+        )
+        return _content_text(getattr(response, "content", response))
+
+    return _summarize
@@ -0,0 +1,45 @@
+"""Canonical request fingerprints used to key caches and call coalescing."""
+
+import hashlib
+import json
+from typing import Any
+
+
+def _canonical_default(value: Any) -> Any:
+    """JSON fallback for LangChain messages and other non-JSON values."""
+    if hasattr(value, "type") and hasattr(value, "content"):
+        return {
+            "type": value.type,
+            "content": value.content,
+            "tool_calls": getattr(value, "tool_calls", None) or None,
+            "tool_call_id": getattr(value, "tool_call_id", None),
+        }
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+def canonical_json(value: Any) -> str:
+    """Serialize a value to a stable JSON string (sorted keys, no whitespace)."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_canonical_default)
+
+
+def request_fingerprint(kind: str, identity: Any, payload: Any) -> str:
+    """
+    Build a canonical fingerprint for an upstream request.
+
+    Args:
+        kind: Request kind (e.g. "llm", "tool")
+        identity: What is called (model name and params, tool id, ...)
+        payload: Resolved request inputs (messages, parameters, ...)
+
+    Returns:
+        Hex digest uniquely identifying the request
+    """
+    digest = hashlib.sha256()
+    digest.update(kind.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(canonical_json(identity).encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(canonical_json(payload).encode("utf-8"))
+    return digest.hexdigest()
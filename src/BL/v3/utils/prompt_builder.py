@@ -0,0 +1,114 @@
+"""Build-time prompt assembly with a cacheable static prefix and a per-call dynamic suffix."""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Union
+
+TEMPLATE_PATTERN = re.compile(r"\{\{([^}]+)\}\}")
+
+# Providers that need an explicit cache breakpoint (OpenAI caches prefixes automatically)
+_EXPLICIT_CACHE_PREFIXES = ("claude", "anthropic:")
+
+
+class CompiledPrompt:
+    """
+    System prompt split once, at build time, into a static prefix and a dynamic suffix.
+
+    The prefix is everything before the first line containing a ``{{...}}`` template
+    and is rendered exactly once. The suffix holds the remaining text and is resolved
+    against state on every call. Keeping the prefix byte-identical across calls lets
+    provider-side prompt caching apply to it.
+    """
+
+    def __init__(self, static_prefix: str, dynamic_suffix: str = ""):
+        """
+        Initialize compiled prompt.
+
+        Args:
+            static_prefix: Fully rendered text with no templates
+            dynamic_suffix: Text containing templates, resolved per call
+        """
+        self.static_prefix = static_prefix
+        self.dynamic_suffix = dynamic_suffix
+
+    @classmethod
+    def from_text(cls, text: str) -> "CompiledPrompt":
+        """Split a single prompt text at the first line that contains a template."""
+        match = TEMPLATE_PATTERN.search(text)
+        if not match:
+            return cls(text)
+        split_at = text.rfind("\n", 0, match.start()) + 1
+        return cls(text[:split_at], text[split_at:])
+
+    @classmethod
+    def from_templates(
+        cls,
+        prompt_templates: List[Dict[str, Any]],
+        separator: str = "\n",
+        include_user_templates: bool = False,
+        default_system: str = "",
+    ) -> "CompiledPrompt":
+        """
+        Compile ``promptTemplate`` entries into a single system prompt.
+
+        Args:
+            prompt_templates: promptTemplate list from node config
+            separator: Separator between system template texts
+            include_user_templates: Append user-role templates as a context block (legacy builder format)
+            default_system: Text used when there are no system templates
+
+        Returns:
+            CompiledPrompt instance
+        """
+        system_parts = [t.get("text", "") for t in prompt_templates if t.get("role") == "system"]
+        text = separator.join(system_parts) if system_parts else default_system
+        if include_user_templates:
+            user_parts = [t.get("text", "") for t in prompt_templates if t.get("role") == "user"]
+            if user_parts:
+                text += "\n\nUser context templates:\n" + "\n".join(user_parts)
+        return cls.from_text(text)
+
+    @property
+    def is_static(self) -> bool:
+        """True when the prompt has no templates."""
+        return not self.dynamic_suffix
+
+    def render_suffix(self, resolve: Callable[[str], Any]) -> str:
+        """Resolve the dynamic suffix with the given template resolver."""
+        if not self.dynamic_suffix:
+            return ""
+        resolved = resolve(self.dynamic_suffix)
+        return resolved if isinstance(resolved, str) else str(resolved)
+
+    def render(self, resolve: Callable[[str], Any]) -> str:
+        """Return the full system prompt text."""
+        return self.static_prefix + self.render_suffix(resolve)
+
+    def system_content(self, resolve: Callable[[str], Any], model_name: str = "") -> Union[str, List[Dict[str, Any]]]:
+        """
+        Build system message content ordered for provider prompt caching.
+
+        For Anthropic models the static prefix is sent as its own text block carrying
+        a ``cache_control`` breakpoint; other providers get a plain string whose
+        prefix is stable, which is what automatic prefix caching needs.
+
+        Args:
+            resolve: Template resolver for the dynamic suffix
+            model_name: Model name used to pick the provider format
+
+        Returns:
+            String or list of content blocks for a SystemMessage
+        """
+        suffix = self.render_suffix(resolve)
+        if not uses_explicit_cache_control(model_name) or not self.static_prefix:
+            return self.static_prefix + suffix
+        blocks: List[Dict[str, Any]] = [
+            {"type": "text", "text": self.static_prefix, "cache_control": {"type": "ephemeral"}},
+        ]
+        if suffix:
+            blocks.append({"type": "text", "text": suffix})
+        return blocks
+
+
+def uses_explicit_cache_control(model_name: Optional[str]) -> bool:
+    """True when the provider needs explicit ``cache_control`` breakpoints."""
+    return bool(model_name) and model_name.lower().startswith(_EXPLICIT_CACHE_PREFIXES)
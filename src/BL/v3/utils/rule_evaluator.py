@@ -54,9 +54,10 @@ class RuleEvaluator(IRuleEvaluator):
             operator = condition.get("operator", "")
             expected_value = condition.get("value", "")
 
-            # Resolve field and value templates
-            field_value = self.variable_resolver.resolve(field, state)
-            expected_value = self.variable_resolver.resolve(expected_value, state)
+            # Resolve field and value templates (a single expression keeps its type,
+            # so {{flow.isPvRendered}} equals true compares booleans)
+            field_value = self.variable_resolver.resolve_value(field, state)
+            expected_value = self.variable_resolver.resolve_value(expected_value, state)
 
             # Evaluate condition
             result = self._evaluate_condition(field_value, operator, expected_value)
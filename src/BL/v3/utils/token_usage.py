@@ -0,0 +1,50 @@
+"""Token usage extraction from LangChain chat model responses."""
+
+from typing import Any, Dict
+
+
+def extract_token_usage(response: Any) -> Dict[str, int]:
+    """
+    Extract input/output/cached token counts from a chat model response.
+
+    Reads the provider-neutral ``usage_metadata`` first and falls back to the
+    OpenAI ``token_usage`` block in ``response_metadata``.
+
+    Args:
+        response: AIMessage (or chunk) returned by a chat model
+
+    Returns:
+        Dict with inputTokens, outputTokens and cachedTokens (0 when unknown)
+    """
+    usage = {"inputTokens": 0, "outputTokens": 0, "cachedTokens": 0}
+
+    usage_metadata = getattr(response, "usage_metadata", None) or {}
+    if usage_metadata:
+        usage["inputTokens"] = int(usage_metadata.get("input_tokens", 0) or 0)
+        usage["outputTokens"] = int(usage_metadata.get("output_tokens", 0) or 0)
+        details = usage_metadata.get("input_token_details", {}) or {}
+        usage["cachedTokens"] = int(details.get("cache_read", 0) or 0)
+        return usage
+
+    response_metadata = getattr(response, "response_metadata", None) or {}
+    token_usage = response_metadata.get("token_usage") or response_metadata.get("usage") or {}
+    if token_usage:
+        usage["inputTokens"] = int(token_usage.get("prompt_tokens", token_usage.get("input_tokens", 0)) or 0)
+        usage["outputTokens"] = int(token_usage.get("completion_tokens", token_usage.get("output_tokens", 0)) or 0)
+        prompt_details = token_usage.get("prompt_tokens_details", {}) or {}
+        usage["cachedTokens"] = int(
+            prompt_details.get("cached_tokens", token_usage.get("cache_read_input_tokens", 0)) or 0
+        )
+    return usage
+
+
+def extract_model_name(response: Any, default: str = "") -> str:
+    """
+    Return the model that actually served a response (provider-reported), or ``default``.
+
+    Args:
+        response: AIMessage (or chunk) returned by a chat model
+        default: Configured model code
+    """
+    response_metadata = getattr(response, "response_metadata", None) or {}
+    return response_metadata.get("model_name") or response_metadata.get("model") or default
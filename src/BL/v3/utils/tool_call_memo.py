@@ -0,0 +1,119 @@
+"""Run-scoped deduplication of agent tool calls and detection of repeated call sequences."""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from BL.v3.utils.fingerprint import request_fingerprint
+
+# Longest repeating pattern of tool-call turns looked for (e.g. A, B, A, B is period 2)
+MAX_LOOP_PERIOD = 3
+
+
+class ToolCallMemoStats:
+    """Process-level counters of deduplicated tool calls and stopped loops."""
+
+    def __init__(self):
+        self._counters = {"calls": 0, "deduplicated": 0, "loopsStopped": 0}
+
+    def count(self, name: str) -> None:
+        self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters; ``dedupRate`` is deduplicated / calls."""
+        stats = dict(self._counters)
+        stats["dedupRate"] = round(stats["deduplicated"] / stats["calls"], 4) if stats["calls"] else 0.0
+        return stats
+
+
+tool_call_memo_stats = ToolCallMemoStats()
+
+
+class ToolCallMemo:
+    """
+    Policy of an agent's tool-call memo, from agent ``config.toolCallDedup``.
+
+    Within one run, a call with the same tool name and arguments as an earlier
+    successful call returns that call's result instead of running the tool again.
+    A run also stops calling tools once the agent repeats the same sequence of
+    tool-call turns ``loopRepeats`` times in a row.
+
+    The memo and the turn history are kept in the agent state, so they start empty
+    on every invocation of the agent graph.
+    """
+
+    __slots__ = ("exclude", "loop_repeats")
+
+    def __init__(self, exclude: Iterable[str] = (), loop_repeats: int = 3):
+        """
+        Args:
+            exclude: Tool names always executed (e.g. tools whose result changes on every call)
+            loop_repeats: Consecutive repetitions of a turn pattern that stop the loop (0 = never)
+        """
+        self.exclude = set(exclude)
+        self.loop_repeats = loop_repeats
+
+    @classmethod
+    def from_config(cls, dedup_config: Optional[Dict[str, Any]]) -> Optional["ToolCallMemo"]:
+        """
+        Build the memo policy from agent ``config.toolCallDedup`` (on by default).
+
+        Args:
+            dedup_config: {"enable": bool, "exclude": [tool names], "loopRepeats": int}
+
+        Returns:
+            ToolCallMemo, or None when disabled
+        """
+        dedup_config = dedup_config or {}
+        if not dedup_config.get("enable", True):
+            return None
+        return cls(dedup_config.get("exclude", []), int(dedup_config.get("loopRepeats", 3)))
+
+    @staticmethod
+    def call_key(tool_name: str, tool_args: Any) -> str:
+        """Key of a call: tool name and canonicalized arguments."""
+        return request_fingerprint("tool-call", tool_name, tool_args)
+
+    def lookup(self, memo: Dict[str, Dict[str, Any]], tool_name: str, tool_args: Any) -> Optional[Dict[str, Any]]:
+        """
+        Earlier result of the same call in this run.
+
+        Args:
+            memo: Run memo, ``call key -> {"content", "toolCallId"}``
+            tool_name: Tool name
+            tool_args: Tool arguments
+
+        Returns:
+            The memo entry, or None when the call must run
+        """
+        tool_call_memo_stats.count("calls")
+        if tool_name in self.exclude:
+            return None
+        entry = memo.get(self.call_key(tool_name, tool_args))
+        if entry is not None:
+            tool_call_memo_stats.count("deduplicated")
+        return entry
+
+    def turn_signature(self, tool_calls: Sequence[Dict[str, Any]]) -> str:
+        """Key of one agent turn: its tool calls in order."""
+        return request_fingerprint("tool-turn", "", [[call.get("name"), call.get("args", {})] for call in tool_calls])
+
+    def detect_loop(self, history: List[str]) -> bool:
+        """
+        Whether the latest turns repeat one pattern ``loop_repeats`` times in a row.
+
+        Args:
+            history: Turn signatures of the run, oldest first (the current turn last)
+
+        Returns:
+            True when the agent should stop calling tools
+        """
+        if self.loop_repeats < 2:
+            return False
+        for period in range(1, MAX_LOOP_PERIOD + 1):
+            window = period * self.loop_repeats
+            if len(history) < window:
+                break
+            tail = history[-window:]
+            if all(tail[index] == tail[index % period] for index in range(window)):
+                tool_call_memo_stats.count("loopsStopped")
+                return True
+        return False
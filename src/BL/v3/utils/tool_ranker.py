@@ -0,0 +1,172 @@
+"""BM25 relevance ranking of agent tools, used to bind only the tools a request needs."""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+")
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z])(?=[A-Z])")
+_STOPWORDS = frozenset(
+    "a an and are as at be by do for from has have i if in into is it its me my not of on or "
+    "our please the this that to use used user when with you your only tool".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms (snake_case and camelCase identifiers are split too).
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms without stopwords
+    """
+    text = _CAMEL_BOUNDARY.sub(" ", text or "")
+    return [t for t in (m.lower() for m in _TOKEN_PATTERN.findall(text)) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 index over a small, fixed document set."""
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        """
+        Build index.
+
+        Args:
+            documents: Document texts
+            k1: Term frequency saturation
+            b: Length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._term_freqs: List[Counter] = [Counter(tokenize(doc)) for doc in documents]
+        self._lengths = [sum(tf.values()) for tf in self._term_freqs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        doc_freq: Counter = Counter()
+        for tf in self._term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(self._term_freqs)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def __len__(self) -> int:
+        return len(self._term_freqs)
+
+    def scores(self, query: str) -> List[float]:
+        """Score every document against the query."""
+        terms = [t for t in tokenize(query) if t in self._idf]
+        result = [0.0] * len(self._term_freqs)
+        if not terms:
+            return result
+        for i, tf in enumerate(self._term_freqs):
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[i] / (self._avg_length or 1.0))
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self._idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            result[i] = score
+        return result
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """
+        Return the top-k (document index, score) pairs with a positive score.
+
+        Args:
+            query: Query text
+            top_k: Number of results
+        """
+        ranked = sorted(
+            ((i, s) for i, s in enumerate(self.scores(query)) if s > 0), key=lambda item: item[1], reverse=True
+        )
+        return ranked[:top_k]
+
+
+class ToolSelector:
+    """
+    Picks the tools to bind for one LLM call: BM25 top-k over tool names and
+    descriptions, plus an always-include set. When nothing in the query matches,
+    the top-k by prior (configured weight plus observed calls) is bound instead.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[Tuple[str, str]],
+        top_k: int = 5,
+        always_include: Iterable[str] = (),
+        priors: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Build the tool index (once, at graph build time).
+
+        Args:
+            tools: (name, description) pairs in declaration order
+            top_k: Number of ranked tools to bind
+            always_include: Tool names bound on every call
+            priors: Tool name -> prior weight used when the query matches nothing
+                (default 0; ties keep declaration order)
+        """
+        self.tool_names = [name for name, _ in tools]
+        self.top_k = top_k
+        self.always_include: Set[str] = {name for name in always_include if name in self.tool_names}
+        self.priors: Dict[str, float] = {name: float(weight) for name, weight in (priors or {}).items()}
+        self._uses: Counter = Counter()
+        # Names are repeated so identifier terms weigh more than description prose
+        self.index = BM25Index([f"{name} {name} {description}" for name, description in tools])
+
+    @classmethod
+    def from_config(
+        cls, selection_config: Optional[Dict[str, Any]], tools: Sequence[Tuple[str, str]]
+    ) -> Optional["ToolSelector"]:
+        """
+        Build a selector from agent ``config.toolSelection``, or None when disabled.
+
+        Args:
+            selection_config: {"mode": "bm25", "topK": int, "alwaysInclude": [tool names],
+                "priors": {tool name: weight}}
+            tools: (name, description) pairs
+        """
+        if not selection_config or selection_config.get("mode", "all") != "bm25":
+            return None
+        top_k = int(selection_config.get("topK", 5))
+        if len(tools) <= top_k:
+            return None
+        return cls(
+            tools,
+            top_k=top_k,
+            always_include=selection_config.get("alwaysInclude", []),
+            priors=selection_config.get("priors"),
+        )
+
+    def record_use(self, names: Iterable[str]) -> None:
+        """Count tool calls the model made; frequently called tools rank higher by prior."""
+        self._uses.update(name for name in names if name in self.tool_names)
+
+    def default_tools(self) -> List[str]:
+        """Top-k tool names by prior (configured weight plus observed calls), in declaration order."""
+        order = sorted(
+            range(len(self.tool_names)),
+            key=lambda i: (-(self.priors.get(self.tool_names[i], 0.0) + self._uses[self.tool_names[i]]), i),
+        )
+        chosen = {self.tool_names[i] for i in order[: self.top_k]}
+        return [name for name in self.tool_names if name in chosen]
+
+    def select(self, query: str, required: Iterable[str] = ()) -> List[str]:
+        """
+        Select tool names for a query, in declaration order.
+
+        Args:
+            query: Text the ranking is based on (typically the latest user message)
+            required: Tool names that must be bound (e.g. tools already called in this turn)
+
+        Returns:
+            Selected tool names; the top-k by prior when nothing in the query matches
+        """
+        ranked = self.index.search(query, self.top_k)
+        if ranked:
+            chosen = {self.tool_names[i] for i, _ in ranked}
+        else:
+            chosen = set(self.default_tools())
+        chosen |= self.always_include | set(required)
+        return [name for name in self.tool_names if name in chosen]
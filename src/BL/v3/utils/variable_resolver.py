@@ -1,10 +1,40 @@
 """Variable resolver implementation for template resolution and state updates."""
 
+import copy
 import re
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 from BL.v3.interfaces.variable_resolver import IVariableResolver
 
+_TEMPLATE_PATTERN = re.compile(r"\{\{([^}]+)\}\}")
+
+
+@lru_cache(maxsize=4096)
+def compile_template(template: str) -> Tuple[Union[str, Tuple[str, ...]], ...]:
+    """
+    Split a template into literal text and pre-split expressions (cached).
+
+    ``"Hi {{flow.name}}!"`` compiles to ``("Hi ", ("flow", "name"), "!")``.
+    """
+    segments: List[Union[str, Tuple[str, ...]]] = []
+    position = 0
+    for match in _TEMPLATE_PATTERN.finditer(template):
+        if match.start() > position:
+            segments.append(template[position:match.start()])
+        segments.append(tuple(match.group(1).strip().split(".")))
+        position = match.end()
+    if position < len(template):
+        segments.append(template[position:])
+    return tuple(segments)
+
+
+@lru_cache(maxsize=4096)
+def single_expression(template: str) -> Optional[Tuple[str, ...]]:
+    """Pre-split expression when the whole template is one ``{{...}}`` (cached)."""
+    match = _TEMPLATE_PATTERN.fullmatch(template.strip())
+    return tuple(match.group(1).strip().split(".")) if match else None
+
 
 class VariableResolver(IVariableResolver):
     """
@@ -17,7 +47,7 @@ class VariableResolver(IVariableResolver):
     - {{nodeOutput.field}} - current node output
     """
 
-    TEMPLATE_PATTERN = re.compile(r"\{\{([^}]+)\}\}")
+    TEMPLATE_PATTERN = _TEMPLATE_PATTERN
 
     def resolve(self, template: str, state: Dict[str, Any]) -> Any:
         """
@@ -33,11 +63,10 @@ class VariableResolver(IVariableResolver):
         if not isinstance(template, str):
             return template
 
-        def replace_match(match):
-            expr = match.group(1).strip()
-            return str(self._evaluate_expression(expr, state))
-
-        resolved = self.TEMPLATE_PATTERN.sub(replace_match, template)
+        resolved = "".join(
+            segment if isinstance(segment, str) else str(self._evaluate_parts(segment, state))
+            for segment in compile_template(template)
+        )
 
         # Try to parse as number/boolean if no templates were found
         if resolved == template and resolved not in ["", None]:
@@ -54,6 +83,26 @@ class VariableResolver(IVariableResolver):
 
         return resolved
 
+    def resolve_value(self, template: Any, state: Dict[str, Any]) -> Any:
+        """
+        Resolve a template, keeping the raw value when it is a single expression.
+
+        ``"{{thread.messages}}"`` yields the message list and ``"{{flow.isPvRendered}}"``
+        the stored boolean, where ``resolve`` would stringify them.
+
+        Args:
+            template: Template string or literal value
+            state: Current workflow state
+
+        Returns:
+            Resolved value
+        """
+        if isinstance(template, str):
+            parts = single_expression(template)
+            if parts is not None:
+                return self._evaluate_parts(parts, state)
+        return self.resolve(template, state)
+
     def _evaluate_expression(self, expr: str, state: Dict[str, Any]) -> Any:
         """
         Evaluate a single expression like "flow.agentId" or "nodes.nodeId.output".
@@ -65,7 +114,10 @@ class VariableResolver(IVariableResolver):
         Returns:
             Resolved value or empty string if not found
         """
-        parts = expr.split(".")
+        return self._evaluate_parts(expr.split("."), state)
+
+    def _evaluate_parts(self, parts: Sequence[str], state: Dict[str, Any]) -> Any:
+        """Evaluate an expression already split on ".", e.g. ("flow", "agentId")."""
 
         if len(parts) == 0:
             return ""
@@ -84,6 +136,10 @@ class VariableResolver(IVariableResolver):
                 return system.get(parts[1], "")
             return self._nested_get(system, parts[1:], "")
 
+        # Handle thread messages
+        if parts[0] == "thread" and len(parts) == 2 and parts[1] == "messages":
+            return state.get("messages", [])
+
         # Handle node outputs or node definitions: nodes.nodeId.field
         # Prefer state["nodes"] (executed node outputs); fall back to _graph_nodes_by_id
         # (workflow node definitions) when the node has not run yet or when referencing
@@ -149,6 +205,16 @@ class VariableResolver(IVariableResolver):
         updated_state = {**state}
         updated_state["nodeOutput"] = node_output
 
+        # Scopes the updates write to are copied (one level; _apply_update copies what it
+        # changes below that), so the caller's state is never mutated
+        scopes = {update.get("fieldName", "").split(".")[0] for update in updates}
+        for scope in ("flow", "system", "thread"):
+            if scope in scopes and scope in updated_state:
+                updated_state[scope] = dict(updated_state[scope])
+        if "thread" in scopes and "messages" in updated_state:
+            # Messages are only appended, never changed in place
+            updated_state["messages"] = list(updated_state["messages"])
+
         # Ensure nested structures exist
         if "flow" not in updated_state:
             updated_state["flow"] = {}
@@ -167,8 +233,11 @@ class VariableResolver(IVariableResolver):
             operation = update.get("operation", "set")
             value_template = update.get("value", "")
 
-            # Resolve value template
-            value = self.resolve(value_template, updated_state)
+            # Resolve value template (a single expression keeps its type, e.g. lists for extend);
+            # containers are copied so later updates cannot change the state they came from
+            value = self.resolve_value(value_template, updated_state)
+            if isinstance(value, (dict, list)):
+                value = copy.deepcopy(value)
 
             # Apply operation
             self._apply_update(updated_state, field_name, operation, value, update)
@@ -190,8 +259,8 @@ class VariableResolver(IVariableResolver):
             expected_value = condition.get("value", "")
 
             # Resolve field and value
-            field_value = self.resolve(field, state)
-            expected_value = self.resolve(expected_value, state)
+            field_value = self.resolve_value(field, state)
+            expected_value = self.resolve_value(expected_value, state)
 
             # Evaluate condition
             result = self._evaluate_condition(field_value, operator, expected_value)
@@ -251,7 +320,14 @@ class VariableResolver(IVariableResolver):
                     messages.append({"content": value, "role": role})
                 elif operation == "extend":
                     if isinstance(value, list):
-                        messages.extend([{"content": v, "role": role} for v in value])
+                        # Messages (e.g. a child workflow's thread) are kept as they are
+                        messages.extend(
+                            [
+                                v if isinstance(v, dict) and "role" in v and "content" in v
+                                else {"content": v, "role": role}
+                                for v in value
+                            ]
+                        )
                     else:
                         messages.append({"content": value, "role": role})
                 return
@@ -262,11 +338,14 @@ class VariableResolver(IVariableResolver):
         else:
             return
 
-        # Navigate to target field
+        # Navigate to target field; nested dicts may be shared with the caller's state,
+        # so those on the path are copied before they are written to
         current = target
-        for i, part in enumerate(field_path[:-1]):
+        for part in field_path[:-1]:
             if part not in current:
                 current[part] = {}
+            elif isinstance(current[part], dict):
+                current[part] = dict(current[part])
             current = current[part]
 
         final_field = field_path[-1]
@@ -278,12 +357,12 @@ class VariableResolver(IVariableResolver):
             if final_field not in current:
                 current[final_field] = []
             if isinstance(current[final_field], list):
-                current[final_field].append(value)
+                current[final_field] = current[final_field] + [value]
         elif operation == "extend":
             if final_field not in current:
                 current[final_field] = []
             if isinstance(current[final_field], list):
                 if isinstance(value, list):
-                    current[final_field].extend(value)
+                    current[final_field] = current[final_field] + value
                 else:
-                    current[final_field].append(value)
+                    current[final_field] = current[final_field] + [value]
@@ -1,12 +1,23 @@
 """Main entry point for building workflows from JSON."""
 
+import asyncio
 import json
 import logging
 from pathlib import Path
-from typing import Any, Dict, Optional
-
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from BL.v3.accounting.run_accounting import get_run_accounting
+from BL.v3.cache.node_memo import MEMO_KEY
+from BL.v3.cache.run_cache import USE, cached_run, run_cache_enabled
+from BL.v3.cache.speculative_prefetch import bind_prefetch_scope
+from BL.v3.graph.graph_registry import get_graph_registry
+from BL.v3.graph.native_interpreter import native_program_of
+from BL.v3.graph.node_bindings import pin_node_bindings
 from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
 from BL.v3.nodes.register_nodes import register_all_nodes  # Ensure nodes are registered
+from BL.v3.repository.workflow_repository import get_workflow_repository
+from BL.v3.streaming.token_channel import TokenChannel, bind_token_channel, get_token_channel
+from DAL.sqlite_checkpointer import get_checkpointer
 
 logger = logging.getLogger(__name__)
 
@@ -162,24 +173,171 @@ async def build_workflow_from_file(file_path: str) -> tuple:
     return graph, workflow_definition
 
 
-async def ainvoke_workflow(graph: Any, initial_state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def _checkpointed_graph(graph: Any) -> Any:
+    """Return a copy of the graph bound to the conversation checkpointer (cached on the graph)."""
+    checkpointer = get_checkpointer()
+    checkpointed = getattr(graph, "_v3_checkpointed", None)
+    if checkpointed is None or checkpointed.checkpointer is not checkpointer:
+        # Rebound when the process-wide checkpointer was replaced (set_checkpointer)
+        checkpointed = graph.copy(update={"checkpointer": checkpointer})
+        graph._v3_checkpointed = checkpointed
+    return checkpointed
+
+
+# Metadata kept with the checkpointed thread on the server; never taken from a request body
+SERVER_METADATA_KEYS = (MEMO_KEY, "contextSummaries")
+
+
+def client_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Return request-supplied ``metadata`` without the entries only the server may write.
+
+    Memoized node results are returned without calling upstream and context summaries
+    are sent to the model as system messages, so neither is accepted from a client;
+    they carry over through the thread's checkpoints instead (see ``bind_conversation``).
+
+    Args:
+        metadata: ``metadata`` from the request body, or None
+
+    Returns:
+        Metadata safe to start a run with
+    """
+    return {key: value for key, value in (metadata or {}).items() if key not in SERVER_METADATA_KEYS}
+
+
+async def bind_conversation(
+    graph: Any, thread_id: str, initial_state: Dict[str, Any]
+) -> Tuple[Any, Dict[str, Any], Dict[str, Any]]:
+    """
+    Prepare a turn of a multi-turn conversation identified by ``thread_id``.
+
+    The state of the thread's last turn is loaded from the checkpointer and the new
+    turn is added to it: messages are appended, flow variables and metadata carry
+    over (the previous turn wins over the defaults of the new one), system and
+    interface inputs come from the new turn, and per-run fields (node outputs, tool
+    results, iteration count) start empty.
+
+    Args:
+        graph: Compiled LangGraph graph
+        thread_id: Conversation ID
+        initial_state: Initial state of the new turn (build_initial_state_from_user_input)
+
+    Returns:
+        (checkpointed graph, run config, initial state of the turn)
+    """
+    checkpointed = _checkpointed_graph(graph)
+    config = {"configurable": {"thread_id": thread_id}}
+    snapshot = await checkpointed.aget_state(config)
+    previous = snapshot.values if snapshot is not None else {}
+    if not previous:
+        return checkpointed, config, initial_state
+    state = {
+        **initial_state,
+        "messages": list(previous.get("messages") or []) + list(initial_state.get("messages") or []),
+        "flow": {**(initial_state.get("flow") or {}), **(previous.get("flow") or {})},
+        "nodes": {},
+        "toolResults": {},
+        "iteration_count": 0,
+    }
+    metadata = {**(previous.get("metadata") or {}), **(initial_state.get("metadata") or {})}
+    if metadata:
+        state["metadata"] = metadata
+    return checkpointed, config, state
+
+
+async def ainvoke_workflow(
+    graph: Any,
+    initial_state: Optional[Dict[str, Any]] = None,
+    run_cache: str = USE,
+    thread_id: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Invoke a workflow graph with initial state (async).
 
+    Acyclic workflows without fan-out, checkpointer or interrupts run on the native
+    interpreter (same steps and routing, no Pregel scheduling); everything else
+    runs on LangGraph. V3_NATIVE_ENGINE=0 always uses LangGraph. Speculative calls
+    (V3_SPECULATIVE_PREFETCH) are scoped to the run; those no node took are discarded.
+    Prompts patched in by a hot reload apply from the next run (see NodeBindings).
+    With V3_RUN_CACHE=1, runs of workflows the static analysis found side-effect free
+    are served from the run cache; streamed runs and checkpointed graphs are not cached.
+    With a ``thread_id`` the run continues that conversation (see bind_conversation)
+    and is checkpointed to the SQLite checkpointer (V3_CHECKPOINT_DB).
+
     Args:
         graph: Compiled LangGraph graph
         initial_state: Initial state dictionary
+        run_cache: Run cache mode: "use" (default), "refresh" or "bypass"
+        thread_id: Conversation ID (None: stateless run)
 
     Returns:
         Final state after workflow execution
     """
     if initial_state is None:
         initial_state = _default_initial_state()
-
-    result = await graph.ainvoke(initial_state)
+    config = None
+    if thread_id:
+        graph, config, initial_state = await bind_conversation(graph, thread_id, initial_state)
+
+    async def _run() -> Dict[str, Any]:
+        program = native_program_of(graph)
+        with bind_prefetch_scope(), pin_node_bindings():
+            if program is not None:
+                return await program.ainvoke(initial_state)
+            result = await graph.ainvoke(initial_state, config)
+            return result
+
+    if not run_cache_enabled() or get_token_channel() is not None or getattr(graph, "checkpointer", None):
+        return await _run()
+    result, status = await cached_run(getattr(graph, "run_cache_policy", None), initial_state, _run, run_cache)
+    run = get_run_accounting()
+    if run is not None:
+        run.cache_status = status
     return result
 
 
+async def astream_workflow_tokens(
+    graph: Any, initial_state: Optional[Dict[str, Any]] = None, thread_id: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Invoke a workflow graph and stream LLM tokens as they are produced (async).
+
+    Agent/LLM nodes with ``streamResponse`` enabled forward tokens through a per-run
+    TokenChannel. The final state is still assembled as in ainvoke_workflow and is
+    emitted as the last event.
+
+    Args:
+        graph: Compiled LangGraph graph
+        initial_state: Initial state dictionary
+        thread_id: Conversation ID (None: stateless run)
+
+    Yields:
+        {"type": "token", "nodeId", "text"} events, then {"type": "final", "data": state}
+        or {"type": "error", "error": message}
+    """
+    channel = TokenChannel()
+
+    async def _run() -> None:
+        with bind_token_channel(channel):
+            try:
+                result = await ainvoke_workflow(graph, initial_state, thread_id=thread_id)
+                channel.emit({"type": "final", "data": result})
+            except Exception as ex:
+                logger.exception("Streaming workflow run failed")
+                channel.emit({"type": "error", "error": str(ex)})
+            finally:
+                channel.close()
+
+    run_task = asyncio.create_task(_run())
+    try:
+        async for event in channel:
+            yield event
+    finally:
+        # Client disconnected before the run finished
+        if not run_task.done():
+            run_task.cancel()
+
+
 def _default_initial_state() -> Dict[str, Any]:
     """Return default initial state for workflow invocation."""
     return {
@@ -196,6 +354,8 @@ async def get_v3_graph_for_file(file_path: str) -> Any:
     """
     Build and cache a single workflow graph by file path (e.g. for demo API).
     Same path returns cached graph. Log file is updated on every call (build or cache hit).
+    Files in the workflow repository (matched by path, or by a unique file name) go
+    through the graph registry and pick up hot reloads.
 
     Args:
         file_path: Path to workflow JSON file
@@ -206,6 +366,16 @@ async def get_v3_graph_for_file(file_path: str) -> Any:
     global _v3_graph_cache, _v3_workflow_definition, _v3_graph_file
     # Write immediately so we know this path was hit (helps debug empty log)
     _write_graph_log(f"get_v3_graph_for_file called: {file_path}\nLog path: {_get_graph_log_path()}\n")
+    # Files indexed by the workflow repository are served (and hot reloaded) by the registry
+    entry = await get_workflow_repository().aentry_for_file(file_path)
+    if entry is not None:
+        register_all_nodes()
+        registry = get_graph_registry()
+        graph = await registry.aget_entry(entry)
+        record = registry.get_record(entry.workflow_id, entry.version)
+        if record is not None:
+            _log_graph_structure(graph, record.definition, str(entry.path))
+        return graph
     if _v3_graph_cache is not None and _v3_graph_file == file_path:
         if _v3_workflow_definition is not None:
             _log_graph_structure(_v3_graph_cache, _v3_workflow_definition, file_path)
@@ -217,13 +387,34 @@ async def get_v3_graph_for_file(file_path: str) -> Any:
     return _v3_graph_cache
 
 
+async def get_v3_graph_for_workflow(workflow_id: str, version: Optional[str] = None) -> Any:
+    """
+    Return the compiled graph of a workflow by agenticWorkflowId, via the graph registry.
+
+    Graphs are built once and kept current by the registry's incremental reload.
+
+    Args:
+        workflow_id: agenticWorkflowId of the workflow
+        version: Exact version, or None for the latest
+
+    Returns:
+        Compiled LangGraph graph
+
+    Raises:
+        LookupError: When the repository has no such workflow/version
+    """
+    register_all_nodes()
+    return await get_graph_registry().aget(workflow_id, version)
+
+
 def build_initial_state_from_user_input(user_query: str, **kwargs: Any) -> Dict[str, Any]:
     """
     Build initial workflow state from user input (e.g. from API body).
 
     Args:
         user_query: User message/query string
-        **kwargs: Optional overrides (e.g. flow, system, attachments, interface_inputs)
+        **kwargs: Optional overrides (e.g. flow, system, attachments, interface_inputs,
+            metadata carried over from the previous turn: context summaries, node memos)
 
     Returns:
         Initial state dict for invoke_workflow / ainvoke_workflow
@@ -249,4 +440,6 @@ def build_initial_state_from_user_input(user_query: str, **kwargs: Any) -> Dict[
         },
     }
     state["messages"] = [{"role": "user", "content": user_query}]
+    if kwargs.get("metadata"):
+        state["metadata"] = dict(kwargs["metadata"])
     return state
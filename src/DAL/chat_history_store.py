@@ -0,0 +1,521 @@
+"""Write-behind store of conversation transcripts and run summaries."""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    thread_id TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chat_messages_thread ON chat_messages (thread_id, id);
+CREATE TABLE IF NOT EXISTS run_summaries (
+    run_id TEXT PRIMARY KEY,
+    thread_id TEXT NOT NULL,
+    workflow TEXT NOT NULL,
+    total_ms REAL,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    cost_usd REAL,
+    run_cache TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS run_summaries_thread ON run_summaries (thread_id, created_at);
+"""
+
+
+class HistoryMessage:
+    """One message of a conversation transcript."""
+
+    __slots__ = ("thread_id", "run_id", "role", "content", "created_at")
+
+    def __init__(self, thread_id: str, run_id: str, role: str, content: str, created_at: float):
+        """
+        Args:
+            thread_id: Conversation ID
+            run_id: Run (turn) that produced the message
+            role: "user", "assistant", ...
+            content: Message text
+            created_at: Unix time the turn was recorded
+        """
+        self.thread_id = thread_id
+        self.run_id = run_id
+        self.role = role
+        self.content = content
+        self.created_at = created_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"runId": self.run_id, "role": self.role, "content": self.content, "createdAt": self.created_at}
+
+
+class RunSummary:
+    """Totals of one run (turn) of a conversation."""
+
+    __slots__ = (
+        "run_id", "thread_id", "workflow", "total_ms", "input_tokens", "output_tokens", "cost_usd", "run_cache",
+        "created_at",
+    )
+
+    def __init__(
+        self,
+        run_id: str,
+        thread_id: str,
+        workflow: str,
+        total_ms: Optional[float],
+        input_tokens: int,
+        output_tokens: int,
+        cost_usd: Optional[float],
+        run_cache: Optional[str],
+        created_at: float,
+    ):
+        """
+        Args:
+            run_id: Run ID
+            thread_id: Conversation ID
+            workflow: Workflow the run executed
+            total_ms: Run duration
+            input_tokens: LLM input tokens of the run
+            output_tokens: LLM output tokens of the run
+            cost_usd: LLM cost of the run
+            run_cache: Run cache status ("hit", "miss", ...) or None
+            created_at: Unix time the run was recorded
+        """
+        self.run_id = run_id
+        self.thread_id = thread_id
+        self.workflow = workflow
+        self.total_ms = total_ms
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cost_usd = cost_usd
+        self.run_cache = run_cache
+        self.created_at = created_at
+
+    @classmethod
+    def from_report(cls, run_id: str, thread_id: str, report: Dict[str, Any], created_at: float) -> "RunSummary":
+        """Build a summary from a RunAccounting report."""
+        totals = report.get("totals", {})
+        return cls(
+            run_id,
+            thread_id,
+            report.get("workflow", ""),
+            report.get("totalMs"),
+            totals.get("inputTokens", 0),
+            totals.get("outputTokens", 0),
+            totals.get("costUsd"),
+            report.get("runCache"),
+            created_at,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "runId": self.run_id,
+            "workflow": self.workflow,
+            "totalMs": self.total_ms,
+            "inputTokens": self.input_tokens,
+            "outputTokens": self.output_tokens,
+            "costUsd": self.cost_usd,
+            "runCache": self.run_cache,
+            "createdAt": self.created_at,
+        }
+
+
+class ChatHistoryBackend(ABC):
+    """Storage of transcripts and run summaries behind the write-behind store."""
+
+    @abstractmethod
+    async def write_batch(self, messages: Sequence[HistoryMessage], runs: Sequence[RunSummary]) -> None:
+        """Store a batch of messages and run summaries (atomically where the backend can)."""
+
+    @abstractmethod
+    async def load_messages(self, thread_id: str, limit: Optional[int] = None) -> List[HistoryMessage]:
+        """Return the messages of a thread in order (the last ``limit`` when set)."""
+
+    @abstractmethod
+    async def load_runs(self, thread_id: str, limit: Optional[int] = None) -> List[RunSummary]:
+        """Return the run summaries of a thread in order (the last ``limit`` when set)."""
+
+    async def close(self) -> None:
+        """Release the backend's resources."""
+
+
+class SQLiteChatHistoryBackend(ChatHistoryBackend):
+    """
+    Backend on a local SQLite file in WAL mode.
+
+    Queries run in a worker thread, so the event loop never waits on the disk.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite database file (created with its directory when missing)
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    async def write_batch(self, messages: Sequence[HistoryMessage], runs: Sequence[RunSummary]) -> None:
+        await asyncio.to_thread(self._write_batch, messages, runs)
+
+    async def load_messages(self, thread_id: str, limit: Optional[int] = None) -> List[HistoryMessage]:
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT thread_id, run_id, role, content, created_at FROM chat_messages WHERE thread_id = ? "
+            "ORDER BY id DESC LIMIT ?",
+            (thread_id, -1 if limit is None else limit),
+        )
+        return [HistoryMessage(*row) for row in reversed(rows)]
+
+    async def load_runs(self, thread_id: str, limit: Optional[int] = None) -> List[RunSummary]:
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT run_id, thread_id, workflow, total_ms, input_tokens, output_tokens, cost_usd, run_cache, "
+            "created_at FROM run_summaries WHERE thread_id = ? ORDER BY created_at DESC LIMIT ?",
+            (thread_id, -1 if limit is None else limit),
+        )
+        return [RunSummary(*row) for row in reversed(rows)]
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _write_batch(self, messages: Sequence[HistoryMessage], runs: Sequence[RunSummary]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO chat_messages (thread_id, run_id, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(m.thread_id, m.run_id, m.role, m.content, m.created_at) for m in messages],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO run_summaries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        r.run_id, r.thread_id, r.workflow, r.total_ms, r.input_tokens, r.output_tokens, r.cost_usd,
+                        r.run_cache, r.created_at,
+                    )
+                    for r in runs
+                ],
+            )
+
+    def _query(self, sql: str, params: tuple) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+
+def _message_text(message: Any) -> Dict[str, str]:
+    """{"role", "content"} of a state message (dict or LangChain message), content as text."""
+    if isinstance(message, dict):
+        role, content = message.get("role", ""), message.get("content", "")
+    else:
+        role, content = getattr(message, "type", ""), getattr(message, "content", "")
+    if not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False, default=str)
+    return {"role": role, "content": content}
+
+
+def turn_messages(final_messages: Sequence[Any], user_query: str) -> List[Dict[str, str]]:
+    """
+    Messages of the latest turn: from the last user message with ``user_query`` to the end.
+
+    Args:
+        final_messages: ``messages`` of the final state (may hold earlier turns)
+        user_query: Query of the turn
+
+    Returns:
+        [{"role", "content"}] of the turn (every message when the query is not found)
+    """
+    messages = [_message_text(message) for message in final_messages]
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index]["role"] in ("user", "human") and messages[index]["content"] == user_query:
+            return messages[index:]
+    return messages
+
+
+class ChatHistoryStats:
+    """Counters of a chat history store."""
+
+    def __init__(self):
+        self._counters = {
+            "turns": 0, "messages": 0, "runs": 0, "flushes": 0, "rowsWritten": 0, "dropped": 0,
+            "failedFlushes": 0, "backpressureWaits": 0,
+        }
+        self._flush_ms = 0.0
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self._counters[name] += amount
+
+    def observe_flush(self, rows: int, elapsed_ms: float) -> None:
+        self._counters["flushes"] += 1
+        self._counters["rowsWritten"] += rows
+        self._flush_ms += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters; ``avgFlushMs`` is the mean time of one batch write."""
+        stats = dict(self._counters)
+        stats["avgFlushMs"] = round(self._flush_ms / stats["flushes"], 3) if stats["flushes"] else 0.0
+        return stats
+
+
+class ChatHistoryStore:
+    """
+    Write-behind repository of conversation transcripts and run summaries.
+
+    ``record_turn`` only appends to an in-memory buffer; a task on the event loop
+    writes the buffer to the backend in one batch when it reaches ``batch_size``
+    records or ``flush_interval_ms`` after the first pending record. The buffer holds
+    at most ``max_pending`` records: ``record_turn`` drops a turn that does not fit
+    (it never makes a response wait), ``arecord_turn`` waits for room instead.
+    A failed batch is put back and retried on the next interval while it fits.
+    """
+
+    def __init__(
+        self,
+        backend: ChatHistoryBackend,
+        *,
+        batch_size: int = 100,
+        flush_interval_ms: float = 500.0,
+        max_pending: int = 10000,
+    ):
+        """
+        Args:
+            backend: Storage backend
+            batch_size: Pending records that trigger a write without waiting for the interval
+            flush_interval_ms: Longest time a pending record waits for its batch
+            max_pending: Most records buffered in memory
+        """
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.stats = ChatHistoryStats()
+        self._messages: List[HistoryMessage] = []
+        self._runs: List[RunSummary] = []
+        self._enqueued = 0
+        self._written = 0
+        self._failures = 0
+        self._task: Optional[asyncio.Task] = None
+        # Bound to the loop of the writer task (created with it)
+        self._has_pending: Optional[asyncio.Event] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._changed: Optional[asyncio.Condition] = None
+
+    @property
+    def pending(self) -> int:
+        """Records buffered and not yet written."""
+        return len(self._messages) + len(self._runs)
+
+    def record_turn(
+        self,
+        thread_id: str,
+        run_id: str,
+        messages: Sequence[Dict[str, str]],
+        report: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Buffer the messages and run summary of a turn without waiting (call on the event loop).
+
+        Args:
+            thread_id: Conversation ID
+            run_id: Run ID of the turn
+            messages: [{"role", "content"}] of the turn
+            report: RunAccounting report of the run, if accounted
+
+        Returns:
+            False when the buffer was full and the turn was dropped
+        """
+        size = len(messages) + (1 if report is not None else 0)
+        if self.pending + size > self.max_pending:
+            self.stats.count("dropped", size)
+            return False
+        self._append(thread_id, run_id, messages, report)
+        return True
+
+    async def arecord_turn(
+        self,
+        thread_id: str,
+        run_id: str,
+        messages: Sequence[Dict[str, str]],
+        report: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Buffer a turn, waiting for the writer when the buffer is full (backpressure).
+
+        Returns:
+            False when the turn alone exceeds ``max_pending`` and was dropped
+        """
+        size = len(messages) + (1 if report is not None else 0)
+        if size > self.max_pending:
+            self.stats.count("dropped", size)
+            return False
+        if self.pending + size > self.max_pending:
+            self.stats.count("backpressureWaits")
+            changed = self._ensure_writer()
+            async with changed:
+                self._batch_ready.set()
+                await changed.wait_for(lambda: self.pending + size <= self.max_pending)
+        self._append(thread_id, run_id, messages, report)
+        return True
+
+    async def flush(self) -> None:
+        """Wait until every record buffered so far is written, or until a batch write fails."""
+        if self._written >= self._enqueued:
+            return
+        target, failures = self._enqueued, self._failures
+        changed = self._ensure_writer()
+        async with changed:
+            self._batch_ready.set()
+            await changed.wait_for(lambda: self._written >= target or self._failures > failures)
+
+    async def transcript(self, thread_id: str, limit: Optional[int] = None) -> List[HistoryMessage]:
+        """Messages of a thread, including buffered ones."""
+        await self.flush()
+        return await self.backend.load_messages(thread_id, limit)
+
+    async def runs(self, thread_id: str, limit: Optional[int] = None) -> List[RunSummary]:
+        """Run summaries of a thread, including buffered ones."""
+        await self.flush()
+        return await self.backend.load_runs(thread_id, limit)
+
+    async def aclose(self) -> None:
+        """Write out the buffer, stop the writer and close the backend."""
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.backend.close()
+
+    def _append(
+        self, thread_id: str, run_id: str, messages: Sequence[Dict[str, str]], report: Optional[Dict[str, Any]]
+    ) -> None:
+        now = time.time()
+        for message in messages:
+            self._messages.append(
+                HistoryMessage(thread_id, run_id, message.get("role", ""), message.get("content", ""), now)
+            )
+        if report is not None:
+            self._runs.append(RunSummary.from_report(run_id, thread_id, report, now))
+            self.stats.count("runs")
+        self._enqueued += len(messages) + (1 if report is not None else 0)
+        self.stats.count("turns")
+        self.stats.count("messages", len(messages))
+        self._ensure_writer()
+        self._has_pending.set()
+        if self.pending >= self.batch_size:
+            self._batch_ready.set()
+
+    def _ensure_writer(self) -> asyncio.Condition:
+        """Start the writer task on the running loop (again after a loop change)."""
+        if self._task is None or self._task.done():
+            self._has_pending = asyncio.Event()
+            self._batch_ready = asyncio.Event()
+            self._changed = asyncio.Condition()
+            if self.pending:
+                self._has_pending.set()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._changed
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_pending.wait()
+            if not self._batch_ready.is_set():
+                # Gather a batch; a full batch or a flush wakes the writer early
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            messages, self._messages = self._messages, []
+            runs, self._runs = self._runs, []
+            self._has_pending.clear()
+            self._batch_ready.clear()
+            size = len(messages) + len(runs)
+            started = time.perf_counter()
+            failed = False
+            try:
+                await self.backend.write_batch(messages, runs)
+                self.stats.observe_flush(size, (time.perf_counter() - started) * 1000)
+                self._written += size
+            except Exception:
+                logger.exception("Chat history batch of %d records could not be written", size)
+                self.stats.count("failedFlushes")
+                self._failures += 1
+                failed = True
+                if size <= self.max_pending - self.pending:
+                    # Retry with the next batch
+                    self._messages[:0] = messages
+                    self._runs[:0] = runs
+                    self._has_pending.set()
+                else:
+                    self.stats.count("dropped", size)
+                    self._written += size
+            async with self._changed:
+                self._changed.notify_all()
+            if failed:
+                await asyncio.sleep(self.flush_interval)
+
+
+_store: Optional[ChatHistoryStore] = None
+
+
+def chat_history_enabled() -> bool:
+    """True unless V3_CHAT_HISTORY=0."""
+    return os.getenv("V3_CHAT_HISTORY", "1").lower() not in ("0", "false", "no")
+
+
+def get_chat_history_store() -> ChatHistoryStore:
+    """
+    Return the process-wide store (opened on first use).
+
+    V3_CHAT_HISTORY_DB sets the SQLite file (default ``chat_history.sqlite``);
+    V3_CHAT_HISTORY_BATCH, V3_CHAT_HISTORY_FLUSH_MS and V3_CHAT_HISTORY_MAX_PENDING
+    the batch size (100), flush interval (500 ms) and buffer bound (10000 records).
+    """
+    global _store
+    if _store is None:
+        _store = ChatHistoryStore(
+            SQLiteChatHistoryBackend(os.getenv("V3_CHAT_HISTORY_DB", "chat_history.sqlite")),
+            batch_size=int(os.getenv("V3_CHAT_HISTORY_BATCH", "100")),
+            flush_interval_ms=float(os.getenv("V3_CHAT_HISTORY_FLUSH_MS", "500")),
+            max_pending=int(os.getenv("V3_CHAT_HISTORY_MAX_PENDING", "10000")),
+        )
+    return _store
+
+
+def set_chat_history_store(store: Optional[ChatHistoryStore]) -> None:
+    """Replace the process-wide store (None: reopen from the environment on next use)."""
+    global _store
+    _store = store
+
+
+def chat_history_stats() -> Dict[str, Any]:
+    """Counters of the process-wide store ({} until a turn opened it)."""
+    if _store is None:
+        return {}
+    return {**_store.stats.stats(), "pending": _store.pending}
+
+
+async def aclose_chat_history_store() -> None:
+    """Write out and close the process-wide store, if it was opened."""
+    global _store
+    if _store is not None:
+        store, _store = _store, None
+        await store.aclose()
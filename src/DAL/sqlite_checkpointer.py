@@ -0,0 +1,753 @@
+"""LangGraph checkpointer on local SQLite: WAL, batched write-behind, channel deltas and a hot in-memory tier."""
+
+import asyncio
+import atexit
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+
+logger = logging.getLogger(__name__)
+
+# Typed value (serializer type tag, bytes) as produced by serde.dumps_typed
+Typed = Tuple[str, bytes]
+
+# Stored type of a value equal to an earlier blob of the same channel; the data is that blob's version
+_ALIAS = "alias"
+# Suffix of the stored type of zlib-compressed values
+_ZLIB = "+zlib"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+"""
+
+_INSERT_CHECKPOINT = "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_INSERT_BLOB = "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)"
+_INSERT_WRITE = "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+_REPLACE_WRITE = "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+class _HotCheckpoint:
+    """Latest checkpoint of a thread namespace, serialized, with its channel blobs and pending writes."""
+
+    __slots__ = ("checkpoint_id", "checkpoint", "metadata", "parent_id", "blobs", "writes", "written")
+
+    def __init__(
+        self,
+        checkpoint_id: str,
+        checkpoint: Typed,
+        metadata: Typed,
+        parent_id: Optional[str],
+        blobs: Dict[str, Tuple[Any, Typed, str]],
+        writes: Dict[Tuple[str, int], Tuple[str, str, Typed, str]],
+        written: Dict[str, Tuple[Any, Typed, Typed]],
+    ):
+        """
+        Args:
+            checkpoint_id: Checkpoint ID
+            checkpoint: Serialized checkpoint without channel values
+            metadata: Serialized checkpoint metadata
+            parent_id: Parent checkpoint ID
+            blobs: channel -> (version, serialized value, version whose row holds the bytes)
+            writes: (task ID, index) -> (task ID, channel, serialized value, task path)
+            written: channel -> (last value written, serialized, stored form) of the writes
+        """
+        self.checkpoint_id = checkpoint_id
+        self.checkpoint = checkpoint
+        self.metadata = metadata
+        self.parent_id = parent_id
+        self.blobs = blobs
+        self.writes = writes
+        self.written = written
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    Async-capable LangGraph checkpointer on a local SQLite database in WAL mode.
+
+    - Deltas: a superstep stores only the channels whose value changed; a channel
+      written with an unchanged value (every v3 node returns the whole state) is stored
+      as an alias of the earlier blob, and so are pending writes equal to it.
+    - Compression: values of at least ``compress_min_bytes`` are zlib-compressed.
+    - Write-behind: rows are queued and written by a background thread in one
+      transaction per batch (``batch_size`` rows or ``flush_interval_ms``). Reads of
+      anything but a hot checkpoint flush first, so they always see every write.
+      The queue is bounded (``max_pending_rows``): producers wait for the writer
+      when it is full.
+    - Hot tier: the latest checkpoint of the ``hot_threads`` most recent threads is
+      kept serialized in memory, so resuming a conversation needs no query.
+
+    Rows queued when the process dies are lost; ``flush``/``close`` (also run at exit)
+    write them out. A batch that fails is put back at the head of the queue and retried
+    after ``flush_interval_ms``; ``flush`` raises instead of reporting it as written.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        serde: Optional[SerializerProtocol] = None,
+        hot_threads: int = 256,
+        batch_size: int = 256,
+        flush_interval_ms: float = 20.0,
+        max_pending_rows: int = 20000,
+        compress_min_bytes: int = 512,
+    ):
+        """
+        Args:
+            path: SQLite database file (created with its directory when missing)
+            serde: Serializer (default: LangGraph's JsonPlusSerializer)
+            hot_threads: Threads whose latest checkpoint stays in memory (LRU)
+            batch_size: Rows that trigger a write without waiting for the interval
+            flush_interval_ms: Longest time a queued row waits for its batch
+            max_pending_rows: Queued rows above which writers wait for the flush
+            compress_min_bytes: Smallest value that is compressed
+        """
+        super().__init__(serde=serde)
+        self.path = path
+        self.hot_threads = hot_threads
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending_rows = max_pending_rows
+        self.compress_min_bytes = compress_min_bytes
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._read_conn = self._connect()
+        self._read_conn.executescript(_SCHEMA)
+        self._read_lock = threading.Lock()
+
+        # (thread ID, checkpoint namespace) -> latest checkpoint, most recently used last
+        self._hot: "OrderedDict[Tuple[str, str], _HotCheckpoint]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._queue: List[Tuple[str, tuple]] = []
+        self._enqueued = 0
+        self._written = 0
+        self._failures = 0
+        self._flush_requested = False
+        self._closed = False
+        self._counters = {
+            "puts": 0, "writes": 0, "hotHits": 0, "coldReads": 0, "flushes": 0, "rowsWritten": 0,
+            "aliasRows": 0, "bytesRaw": 0, "bytesStored": 0, "backpressureWaits": 0,
+            "failedFlushes": 0, "lostRows": 0,
+        }
+        self._flush_ms = 0.0
+        self._writer = threading.Thread(target=self._writer_loop, name="sqlite-checkpointer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ---------- LangGraph interface ----------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Return the requested (or latest) checkpoint of a thread, or None."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        with self._lock:
+            entry = self._hot.get((thread_id, checkpoint_ns))
+            if entry is not None and checkpoint_id in (None, entry.checkpoint_id):
+                self._hot.move_to_end((thread_id, checkpoint_ns))
+                self._counters["hotHits"] += 1
+                return self._to_tuple(thread_id, checkpoint_ns, entry)
+        self._counters["coldReads"] += 1
+        self.flush()
+        entry = self._load(thread_id, checkpoint_ns, checkpoint_id)
+        if entry is None:
+            return None
+        if checkpoint_id is None:
+            with self._lock:
+                self._remember(thread_id, checkpoint_ns, entry)
+        return self._to_tuple(thread_id, checkpoint_ns, entry)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first (by thread, namespace, ID, ``before`` and metadata ``filter``)."""
+        self.flush()
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before is not None and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                f"SELECT * FROM checkpoints {where} ORDER BY checkpoint_id DESC", params
+            ).fetchall()
+        for row in rows:
+            metadata = self.serde.loads_typed(self._unpack(row[6], row[7]))
+            if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield self._to_tuple(row[0], row[1], self._entry_from_row(row))
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint: changed channels only, queued for the writer."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values", {})
+        rows: List[Tuple[str, tuple]] = []
+
+        with self._lock:
+            previous = self._hot.get((thread_id, checkpoint_ns))
+        if parent_id and (previous is None or previous.checkpoint_id != parent_id):
+            # Not the hot checkpoint (evicted, or a fork from an older one)
+            self.flush()
+            previous = self._load(thread_id, checkpoint_ns, parent_id)
+        previous_blobs = previous.blobs if previous is not None else {}
+
+        blobs: Dict[str, Tuple[Any, Typed, str]] = {}
+        for channel, version in stored["channel_versions"].items():
+            if channel not in new_versions:
+                # Unchanged channel: reuse the blob of the parent checkpoint
+                known = previous_blobs.get(channel)
+                if known is None or known[0] != version:
+                    self.flush()
+                    known = self._load_blob(thread_id, checkpoint_ns, channel, version)
+                if known is not None:
+                    blobs[channel] = known
+                continue
+            blobs[channel] = self._blob_row(rows, thread_id, checkpoint_ns, channel, version, values, previous)
+        for channel, version in new_versions.items():
+            if channel not in blobs:
+                blobs[channel] = self._blob_row(rows, thread_id, checkpoint_ns, channel, version, values, previous)
+
+        checkpoint_typed = self.serde.dumps_typed(stored)
+        metadata_typed = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        rows.append(
+            (
+                _INSERT_CHECKPOINT,
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    parent_id,
+                    *self._pack(checkpoint_typed),
+                    *self._pack(metadata_typed),
+                ),
+            )
+        )
+        entry = _HotCheckpoint(checkpoint["id"], checkpoint_typed, metadata_typed, parent_id, blobs, {}, {})
+        with self._lock:
+            self._remember(thread_id, checkpoint_ns, entry)
+            self._counters["puts"] += 1
+        self._enqueue(rows)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store the pending writes of a task for a checkpoint."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            entry = self._hot.get((thread_id, checkpoint_ns))
+        if entry is not None and entry.checkpoint_id != checkpoint_id:
+            entry = None
+        rows: List[Tuple[str, tuple]] = []
+        for index, (channel, value) in enumerate(writes):
+            write_index = WRITES_IDX_MAP.get(channel, index)
+            if write_index >= 0 and entry is not None and (task_id, write_index) in entry.writes:
+                continue
+            typed = self.serde.dumps_typed(value)
+            known = entry.blobs.get(channel) if entry is not None else None
+            if known is not None and known[1] == typed:
+                stored = (_ALIAS, known[2].encode("utf-8"))
+                self._counters["aliasRows"] += 1
+            else:
+                stored = self._pack(typed)
+                if entry is not None:
+                    # The next checkpoint usually holds this very object: reuse its bytes there
+                    entry.written[channel] = (value, typed, stored)
+            rows.append(
+                (
+                    _INSERT_WRITE if write_index >= 0 else _REPLACE_WRITE,
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, write_index, channel, *stored, task_path),
+                )
+            )
+            if entry is not None:
+                entry.writes[(task_id, write_index)] = (task_id, channel, typed, task_path)
+        self._counters["writes"] += len(rows)
+        self._enqueue(rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint, blob and write of a thread."""
+        with self._lock:
+            for key in [key for key in self._hot if key[0] == thread_id]:
+                del self._hot[key]
+        self.flush()
+        with self._read_lock:
+            for table in ("checkpoints", "blobs", "writes"):
+                self._read_conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._read_conn.commit()
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Async ``get_tuple``; cold reads run in a worker thread."""
+        if self._is_hot(config):
+            return self.get_tuple(config)
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Async ``list`` (queried in a worker thread)."""
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """
+        Async ``put``: in memory when the parent checkpoint is hot (the database write
+        happens in the background); reads of a cold parent or blob, and waits for a full
+        queue, run in a worker thread.
+        """
+        if self._put_is_hot(config, checkpoint, new_versions):
+            return self.put(config, checkpoint, metadata, new_versions)
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Async ``put_writes`` (in memory; waits for a full queue run in a worker thread)."""
+        if self._has_room():
+            self.put_writes(config, writes, task_id, task_path)
+        else:
+            await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Async ``delete_thread``."""
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None = None) -> str:
+        """Zero-padded, monotonically increasing string versions (as LangGraph's own savers)."""
+        if current is None:
+            current_version = 0
+        elif isinstance(current, int):
+            current_version = current
+        else:
+            current_version = int(current.split(".")[0])
+        return f"{current_version + 1:032}.{random.random():016}"
+
+    # ---------- write-behind ----------
+
+    def flush(self) -> None:
+        """
+        Wait until every queued row is written.
+
+        Raises:
+            RuntimeError: When a batch failed meanwhile (it stays queued and is retried)
+        """
+        with self._cond:
+            target, failures = self._enqueued, self._failures
+            while self._written < target and self._writer.is_alive():
+                if self._failures > failures:
+                    raise RuntimeError(f"Checkpoint rows could not be written to {self.path}; retrying")
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._cond.wait(0.1)
+
+    async def aflush(self) -> None:
+        """Async ``flush``."""
+        await asyncio.to_thread(self.flush)
+
+    def close(self) -> None:
+        """Write out queued rows and stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        with self._read_lock:
+            self._read_conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counters; ``compressionRatio`` is raw / stored bytes of the written values,
+        ``avgFlushMs`` the mean time of one batch transaction.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pendingRows"] = len(self._queue)
+            stats["hotThreads"] = len(self._hot)
+        stats["compressionRatio"] = round(stats["bytesRaw"] / stats["bytesStored"], 2) if stats["bytesStored"] else 0.0
+        stats["avgFlushMs"] = round(self._flush_ms / stats["flushes"], 3) if stats["flushes"] else 0.0
+        return stats
+
+    def _enqueue(self, rows: List[Tuple[str, tuple]]) -> None:
+        if not rows:
+            return
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Checkpointer {self.path} is closed")
+            while len(self._queue) >= self.max_pending_rows and self._writer.is_alive():
+                # Backpressure: the writer is behind
+                self._counters["backpressureWaits"] += 1
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._cond.wait(0.1)
+            self._queue.extend(rows)
+            self._enqueued += len(rows)
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _writer_loop(self) -> None:
+        conn = self._connect()
+        try:
+            while True:
+                with self._cond:
+                    while not self._queue and not self._closed:
+                        self._cond.wait()
+                    if len(self._queue) < self.batch_size and not (self._closed or self._flush_requested):
+                        # Gather a batch; a full batch or a flush request wakes the writer early
+                        self._cond.wait(self.flush_interval)
+                    batch, self._queue = self._queue, []
+                    self._flush_requested = False
+                    if not batch and self._closed:
+                        return
+                started = time.perf_counter()
+                failed = False
+                try:
+                    with conn:
+                        for sql, params in batch:
+                            conn.execute(sql, params)
+                except sqlite3.Error:
+                    logger.exception("Checkpoint batch of %d rows could not be written to %s", len(batch), self.path)
+                    failed = True
+                with self._cond:
+                    if not failed:
+                        self._written += len(batch)
+                        self._counters["flushes"] += 1
+                        self._counters["rowsWritten"] += len(batch)
+                        self._flush_ms += (time.perf_counter() - started) * 1000
+                    else:
+                        self._failures += 1
+                        self._counters["failedFlushes"] += 1
+                        if self._closed:
+                            # Shutting down: nothing is left to retry it
+                            self._written += len(batch)
+                            self._counters["lostRows"] += len(batch)
+                        else:
+                            # Retry ahead of newer rows (they may depend on it)
+                            self._queue[:0] = batch
+                    self._cond.notify_all()
+                if failed and not self._closed:
+                    time.sleep(self.flush_interval)
+        finally:
+            conn.close()
+
+    # ---------- storage helpers ----------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _pack(self, typed: Typed) -> Typed:
+        """Stored form of a serialized value (compressed when large)."""
+        type_, data = typed
+        self._counters["bytesRaw"] += len(data)
+        if len(data) >= self.compress_min_bytes:
+            compressed = zlib.compress(data, 1)
+            if len(compressed) < len(data):
+                type_, data = type_ + _ZLIB, compressed
+        self._counters["bytesStored"] += len(data)
+        return type_, data
+
+    @staticmethod
+    def _unpack(type_: str, data: bytes) -> Typed:
+        if type_ and type_.endswith(_ZLIB):
+            return type_[: -len(_ZLIB)], zlib.decompress(data)
+        return type_, data
+
+    def _blob_row(
+        self,
+        rows: List[Tuple[str, tuple]],
+        thread_id: str,
+        checkpoint_ns: str,
+        channel: str,
+        version: Any,
+        values: Dict[str, Any],
+        previous: Optional[_HotCheckpoint],
+    ) -> Tuple[Any, Typed, str]:
+        """Queue the blob row of a new channel version; an unchanged value becomes an alias."""
+        written = previous.written.get(channel) if previous is not None else None
+        if channel not in values:
+            typed, stored = ("empty", b""), None
+        elif written is not None and written[0] is values[channel]:
+            typed, stored = written[1], written[2]
+        else:
+            typed, stored = self.serde.dumps_typed(values[channel]), None
+        known = previous.blobs.get(channel) if previous is not None else None
+        if known is not None and known[1] == typed:
+            rows.append((_INSERT_BLOB, (thread_id, checkpoint_ns, channel, str(version), _ALIAS, known[2].encode("utf-8"))))
+            self._counters["aliasRows"] += 1
+            return version, typed, known[2]
+        rows.append((_INSERT_BLOB, (thread_id, checkpoint_ns, channel, str(version), *(stored or self._pack(typed)))))
+        return version, typed, str(version)
+
+    def _remember(self, thread_id: str, checkpoint_ns: str, entry: _HotCheckpoint) -> None:
+        """Make ``entry`` the hot checkpoint of the thread namespace (caller holds the lock)."""
+        key = (thread_id, checkpoint_ns)
+        self._hot[key] = entry
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_threads:
+            self._hot.popitem(last=False)
+
+    def _is_hot(self, config: RunnableConfig) -> bool:
+        key = (config["configurable"]["thread_id"], config["configurable"].get("checkpoint_ns", ""))
+        with self._lock:
+            entry = self._hot.get(key)
+            return entry is not None and get_checkpoint_id(config) in (None, entry.checkpoint_id)
+
+    def _has_room(self) -> bool:
+        """Whether rows can be queued now without waiting for the writer."""
+        with self._lock:
+            return len(self._queue) < self.max_pending_rows
+
+    def _put_is_hot(self, config: RunnableConfig, checkpoint: Checkpoint, new_versions: ChannelVersions) -> bool:
+        """Whether ``put`` needs neither a database read (cold parent or blob) nor a wait for the writer."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        with self._lock:
+            if len(self._queue) >= self.max_pending_rows:
+                return False
+            previous = self._hot.get((thread_id, checkpoint_ns))
+        if parent_id and (previous is None or previous.checkpoint_id != parent_id):
+            return False
+        blobs = previous.blobs if previous is not None else {}
+        return all(
+            channel in new_versions or (channel in blobs and blobs[channel][0] == version)
+            for channel, version in checkpoint["channel_versions"].items()
+        )
+
+    def _load(self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]) -> Optional[_HotCheckpoint]:
+        """Load a checkpoint (the latest when ``checkpoint_id`` is None) from the database."""
+        with self._read_lock:
+            if checkpoint_id:
+                row = self._read_conn.execute(
+                    "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._read_conn.execute(
+                    "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+        return self._entry_from_row(row) if row is not None else None
+
+    def _entry_from_row(self, row: tuple) -> _HotCheckpoint:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id = row[0], row[1], row[2], row[3]
+        checkpoint_typed = self._unpack(row[4], row[5])
+        versions = self.serde.loads_typed(checkpoint_typed).get("channel_versions", {})
+        blobs = {}
+        for channel, version in versions.items():
+            loaded = self._load_blob(thread_id, checkpoint_ns, channel, version)
+            if loaded is not None:
+                blobs[channel] = loaded
+        with self._read_lock:
+            write_rows = self._read_conn.execute(
+                "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchall()
+        writes = {}
+        for task_id, index, channel, type_, value, task_path in write_rows:
+            if type_ == _ALIAS:
+                typed = self._load_blob(thread_id, checkpoint_ns, channel, value.decode("utf-8"))[1]
+            else:
+                typed = self._unpack(type_, value)
+            writes[(task_id, index)] = (task_id, channel, typed, task_path)
+        return _HotCheckpoint(checkpoint_id, checkpoint_typed, self._unpack(row[6], row[7]), parent_id, blobs, writes, {})
+
+    def _load_blob(
+        self, thread_id: str, checkpoint_ns: str, channel: str, version: Any
+    ) -> Optional[Tuple[Any, Typed, str]]:
+        """(version, serialized value, source version) of a channel version, following an alias."""
+        source = str(version)
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, source),
+            ).fetchone()
+            if row is not None and row[0] == _ALIAS:
+                source = row[1].decode("utf-8")
+                row = self._read_conn.execute(
+                    "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                    (thread_id, checkpoint_ns, channel, source),
+                ).fetchone()
+        if row is None:
+            return None
+        return version, self._unpack(row[0], row[1]), source
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, entry: _HotCheckpoint) -> CheckpointTuple:
+        checkpoint = self.serde.loads_typed(entry.checkpoint)
+        checkpoint["channel_values"] = {
+            channel: self.serde.loads_typed(typed)
+            for channel, (_, typed, _) in entry.blobs.items()
+            if typed[0] != "empty"
+        }
+        writes = sorted(entry.writes.items(), key=lambda item: writes_sort_key(item[1][3], *item[0]))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": entry.checkpoint_id,
+                }
+            },
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed(entry.metadata),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": entry.parent_id,
+                    }
+                }
+                if entry.parent_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed(typed)) for _, (task_id, channel, typed, _) in writes
+            ],
+        )
+
+
+_checkpointer: Optional[SQLiteCheckpointSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> SQLiteCheckpointSaver:
+    """
+    Return the process-wide checkpointer (opened on first use).
+
+    V3_CHECKPOINT_DB sets the database file (default ``checkpoints.sqlite`` in the working
+    directory) and V3_CHECKPOINT_HOT_THREADS the size of the hot tier (default 256).
+    """
+    global _checkpointer
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                _checkpointer = SQLiteCheckpointSaver(
+                    os.getenv("V3_CHECKPOINT_DB", "checkpoints.sqlite"),
+                    hot_threads=int(os.getenv("V3_CHECKPOINT_HOT_THREADS", "256")),
+                )
+    return _checkpointer
+
+
+def set_checkpointer(checkpointer: Optional[SQLiteCheckpointSaver]) -> None:
+    """Replace the process-wide checkpointer (None: reopen from the environment on next use)."""
+    global _checkpointer
+    with _checkpointer_lock:
+        _checkpointer = checkpointer
+
+
+def checkpointer_stats() -> Dict[str, Any]:
+    """Counters of the process-wide checkpointer ({} until a conversation opened it)."""
+    return _checkpointer.stats() if _checkpointer is not None else {}
@@ -1,6 +1,14 @@
-from BL.agents.entry_services.agent_service import agent_invoke_simple, agent_invoke_complex
+from BL.agents.entry_services.agent_service import (
+    agent_invoke_simple,
+    agent_invoke_complex,
+    agent_stream_simple,
+    agent_stream_complex,
+)
+from BL.v3.accounting.run_accounting import get_run_accounting
+from BL.v3.streaming.http_stream import NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE, encode_stream, wants_sse
 from core.helper.exception_dispatch_service import catch_exception
 from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
 from core.models.return_model import ReturnModel
 
 router = APIRouter()
@@ -9,7 +17,15 @@ router = APIRouter()
 @router.post("/agent_invoke_simple")
 async def buyer_agent_mock(request: Request):
     try:
+        body = await request.json()
+        run = get_run_accounting()
+        if run is not None:
+            run.workflow = "agentic_workflow_simple.json"
+        if body.get("stream"):
+            return await _stream_response(request, body, agent_stream_simple)
         result = await agent_invoke_simple(request)
+        if body.get("runReport") and run is not None:
+            result = {**result, "runReport": run.report()}
         return ReturnModel(result, 200)
     except Exception as ex:
         return catch_exception(ex)
@@ -17,7 +33,24 @@ async def buyer_agent_mock(request: Request):
 @router.post("/agent_invoke_complex")
 async def buyer_agent_mock(request: Request):
     try:
+        body = await request.json()
+        run = get_run_accounting()
+        if run is not None:
+            run.workflow = "agentic_workflow_complex.json"
+        if body.get("stream"):
+            return await _stream_response(request, body, agent_stream_complex)
         result = await agent_invoke_complex(request)
+        if body.get("runReport") and run is not None:
+            result = {**result, "runReport": run.report()}
         return ReturnModel(result, 200)
     except Exception as ex:
-        return catch_exception(ex)
\ No newline at end of file
+        return catch_exception(ex)
+
+async def _stream_response(request: Request, body: dict, stream_fn) -> StreamingResponse:
+    """Wrap a token event stream in an NDJSON (default) or SSE streaming response"""
+    sse = wants_sse(request.headers.get("accept", ""), body)
+    events = await stream_fn(request)
+    return StreamingResponse(
+        encode_stream(events, sse),
+        media_type=SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE,
+    )
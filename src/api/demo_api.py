@@ -1,20 +1,90 @@
 """Demo API: triggers V3 workflow agent with user input (async)."""
 
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
 from core.constant import AGENTIC_WORKFLOW_JSON_PATH_SIMPLE
 from core.helper.exception_dispatch_service import catch_exception
 from core.models.return_model import ReturnModel
 from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
 
+from BL.agents.agents_model.model_router import model_router
+from BL.v3.accounting.run_accounting import get_run_accounting, workflow_histograms
+from BL.v3.cache.node_memo import memo_stats
+from BL.v3.cache.routing_cache import routing_cache_stats
+from BL.v3.cache.run_cache import run_cache_mode, run_cache_stats
+from BL.v3.cache.single_flight import single_flight_stats
+from BL.v3.cache.speculative_prefetch import prefetch_stats
+from BL.v3.graph.graph_registry import get_graph_registry
+from BL.v3.graph.parallel_branches import plan_parallel_branches
+from BL.v3.graph.workflow_analyzer import WorkflowValidationError, analyze_workflow
+from BL.v3.repository.workflow_repository import get_workflow_repository
+from BL.v3.routing.pre_router import pre_router_stats
+from BL.v3.streaming.node_events import DEFAULT_EVENT_TYPES, TOKEN, StreamFilter, astream_node_events
+from BL.v3.streaming.http_stream import NDJSON_MEDIA_TYPE, SSE_MEDIA_TYPE, encode_stream, wants_sse
+from BL.v3.utils.tool_call_memo import tool_call_memo_stats
 from BL.v3.workflow_builder import (
     ainvoke_workflow,
+    astream_workflow_tokens,
+    bind_conversation,
     build_initial_state_from_user_input,
+    client_metadata,
     get_v3_graph_for_file,
+    get_v3_graph_for_workflow,
 )
 from core.utils.common_functions import get_file_path
+from DAL.chat_history_store import chat_history_enabled, chat_history_stats, get_chat_history_store, turn_messages
+from DAL.sqlite_checkpointer import checkpointer_stats
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+async def _get_requested_graph(body: dict):
+    """
+    Return (graph, workflow label) for the request: ``workflowId`` (+ optional
+    ``version``) through the workflow repository, else the default all.json.
+    """
+    workflow_id = body.get("workflowId")
+    if workflow_id:
+        graph = await get_v3_graph_for_workflow(workflow_id, body.get("version"))
+        return graph, workflow_id
+    # Default workflow when the request names none
+    file_path = get_file_path("all.json")
+    return await get_v3_graph_for_file(file_path), "all.json"
+
+
+def _record_history(thread_id: Optional[str], query: str, final_state: Dict[str, Any]) -> None:
+    """
+    Buffer the turn's transcript and run summary in the chat history store (never waits).
+
+    Only conversations (requests with a ``threadId``) are recorded, under the run
+    accounting's run ID, so the history matches the run report.
+    """
+    if not chat_history_enabled() or not thread_id:
+        return
+    run = get_run_accounting()
+    if run is None:
+        # Every request is accounted by the middleware; without a run there is no run ID
+        return
+    report = run.report() if run.records else None
+    messages = turn_messages(final_state.get("messages") or [], query)
+    if not get_chat_history_store().record_turn(thread_id, run.run_id, messages, report):
+        logger.warning("Chat history buffer full: dropped turn %s of thread %s", run.run_id, thread_id)
+
+
+async def _recording_history(
+    events: AsyncIterator[Dict[str, Any]], thread_id: Optional[str], query: str
+) -> AsyncIterator[Dict[str, Any]]:
+    """Pass stream events through, recording the turn when the final event arrives."""
+    async for event in events:
+        if event.get("type") == "final":
+            _record_history(thread_id, query, event.get("data") or {})
+        yield event
+
+
 @router.post("/v3/invoke")
 async def v3_agent_invoke(request: Request):
     """
@@ -22,11 +92,28 @@ async def v3_agent_invoke(request: Request):
 
     Request body:
     {
-        "query": "User message or question"  // required
+        "query": "User message or question",  // required
+        "workflowId": "<agenticWorkflowId>",  // optional: workflow to run (default all.json)
+        "version": "<version>",                // optional: exact version (default latest)
+        "stream": false,                       // optional: stream tokens as they are generated
+        "streamFormat": "ndjson",              // optional: "ndjson" (default) or "sse"
+        "runReport": false,                    // optional: include per-node latency/token/cost report
+        "metadata": {},                        // optional: "metadata" of the previous turn's final state
+                                               //   (memoized node results and context summaries are
+                                               //   ignored: they carry over through threadId only)
+        "threadId": "<conversation id>"        // optional: continue a conversation stored by the
+                                               //   checkpointer (history, flow and metadata carry over)
     }
 
+    Request headers (with V3_RUN_CACHE=1, for workflows without side effects):
+        X-Run-Cache: bypass | refresh          // skip the run cache, or run and overwrite it
+        Cache-Control: no-store | no-cache     // same as bypass | refresh
+
     Returns:
-        Final workflow state (messages, flow, nodes, etc.)
+        Final workflow state (messages, flow, nodes, etc.), or a streaming response of
+        token events followed by a final event carrying that state. The X-Run-Cache
+        response header reports hit, miss, refresh, bypass or ineligible. The turn is
+        recorded in the chat history store after the response (see /v3/threads/{id}/history).
     """
     try:
         body = await request.json()
@@ -36,14 +123,217 @@ async def v3_agent_invoke(request: Request):
                 {"error": "Missing or empty 'query' or 'message' in request body"},
                 400,
             )
-        
-        # should change file name dynamically
-        file_path = get_file_path("all.json")
-        # end
-        graph = await get_v3_graph_for_file(file_path)
-        initial_state = build_initial_state_from_user_input(query)
-
-        result = await ainvoke_workflow(graph, initial_state)
+
+        try:
+            graph, workflow_label = await _get_requested_graph(body)
+        except LookupError as ex:
+            return ReturnModel({"error": str(ex)}, 404)
+        except WorkflowValidationError as ex:
+            return ReturnModel({"error": str(ex), "issues": [issue.to_dict() for issue in ex.issues]}, 422)
+        run = get_run_accounting()
+        if run is not None:
+            run.workflow = workflow_label
+        initial_state = build_initial_state_from_user_input(query, metadata=client_metadata(body.get("metadata")))
+
+        if body.get("stream"):
+            sse = wants_sse(request.headers.get("accept", ""), body)
+            return StreamingResponse(
+                encode_stream(
+                    _recording_history(
+                        astream_workflow_tokens(graph, initial_state, body.get("threadId")), body.get("threadId"), query
+                    ),
+                    sse,
+                ),
+                media_type=SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE,
+            )
+
+        result = await ainvoke_workflow(
+            graph, initial_state, run_cache=run_cache_mode(request.headers), thread_id=body.get("threadId")
+        )
+        _record_history(body.get("threadId"), query, result)
+        if body.get("runReport") and run is not None:
+            result = {**result, "runReport": run.report()}
         return ReturnModel(result, 200)
     except Exception as ex:
         return catch_exception(ex)
+
+
+@router.post("/v3/invoke/stream")
+async def v3_agent_invoke_stream(request: Request):
+    """
+    Trigger the V3 workflow agent and stream node-level events as nodes finish.
+
+    Request body:
+    {
+        "query": "User message or question",                 // required
+        "workflowId": "<agenticWorkflowId>",                  // optional (default all.json)
+        "version": "<version>",                               // optional (default latest)
+        "fields": ["flow.partialViewData", "flow.isPvRendered"], // optional state paths ("*" = all), default ["flow"]
+        "events": ["node_start", "node_end", "state_delta", "run_end"], // optional event types
+        "tokens": false,                                       // optional: include token events
+        "streamFormat": "ndjson",                              // optional: "ndjson" (default) or "sse"
+        "metadata": {},                                        // optional: "metadata" of the previous turn's final state
+                                                               //   (without node memos and context summaries)
+        "threadId": "<conversation id>"                        // optional: continue a checkpointed conversation
+    }
+
+    Returns:
+        Streaming response of node_start / node_end / state_delta events and a final
+        run_end event with the requested fields of the final state. With a threadId the
+        turn is recorded in the chat history store when the run ends.
+    """
+    try:
+        body = await request.json()
+        query = body.get("query") or body.get("message") or ""
+        if not query.strip():
+            return ReturnModel(
+                {"error": "Missing or empty 'query' or 'message' in request body"},
+                400,
+            )
+
+        try:
+            graph, workflow_label = await _get_requested_graph(body)
+        except LookupError as ex:
+            return ReturnModel({"error": str(ex)}, 404)
+        except WorkflowValidationError as ex:
+            return ReturnModel({"error": str(ex), "issues": [issue.to_dict() for issue in ex.issues]}, 422)
+        run = get_run_accounting()
+        if run is not None:
+            run.workflow = workflow_label
+        initial_state = build_initial_state_from_user_input(query, metadata=client_metadata(body.get("metadata")))
+        config = None
+        if body.get("threadId"):
+            graph, config, initial_state = await bind_conversation(graph, body["threadId"], initial_state)
+
+        event_types = list(body.get("events") or DEFAULT_EVENT_TYPES)
+        if body.get("tokens"):
+            event_types.append(TOKEN)
+        stream_filter = StreamFilter(event_types=event_types, fields=body.get("fields"))
+
+        sse = wants_sse(request.headers.get("accept", ""), body)
+        events = astream_node_events(
+            graph,
+            initial_state,
+            stream_filter,
+            config,
+            on_run_end=lambda final_state: _record_history(body.get("threadId"), query, final_state),
+        )
+        return StreamingResponse(
+            encode_stream(events, sse),
+            media_type=SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE,
+        )
+    except Exception as ex:
+        return catch_exception(ex)
+
+
+@router.get("/v3/threads/{thread_id}/history")
+async def v3_thread_history(thread_id: str, limit: int = 100):
+    """
+    Return the recorded transcript and run summaries of a conversation.
+
+    Turns still buffered by the write-behind store are written out first.
+
+    Returns:
+        The last ``limit`` messages and run summaries of the thread, oldest first
+    """
+    try:
+        store = get_chat_history_store()
+        messages = await store.transcript(thread_id, limit)
+        runs = await store.runs(thread_id, limit)
+        return ReturnModel(
+            {
+                "threadId": thread_id,
+                "messages": [message.to_dict() for message in messages],
+                "runs": [run.to_dict() for run in runs],
+            },
+            200,
+        )
+    except Exception as ex:
+        return catch_exception(ex)
+
+
+@router.get("/v3/workflows")
+async def v3_workflows():
+    """
+    List the workflows known to the workflow repository.
+
+    Returns:
+        Indexed workflows (agenticWorkflowId, version, name, file) and repository stats
+    """
+    try:
+        repository = get_workflow_repository()
+        await repository.arefresh()
+        return ReturnModel(
+            {
+                "workflows": [entry.to_dict() for entry in repository.entries()],
+                "repository": repository.stats(),
+                "graphs": get_graph_registry().stats(),
+            },
+            200,
+        )
+    except Exception as ex:
+        return catch_exception(ex)
+
+
+@router.get("/v3/workflows/{workflow_id}/analysis")
+async def v3_workflow_analysis(workflow_id: str, version: str = None):
+    """
+    Run the static analysis pass on a workflow without compiling it.
+
+    Returns:
+        Nodes left out of the graph, the issues found (severity, code, node, message)
+        and the fan-outs that run in parallel or stay sequential
+    """
+    try:
+        definition = await get_workflow_repository().aload(workflow_id, version)
+        if definition is None:
+            return ReturnModel({"error": f"Workflow {workflow_id} (version {version or 'latest'}) not found"}, 404)
+        analysis = analyze_workflow(definition)
+        parallel = plan_parallel_branches(analysis.definition)
+        return ReturnModel({**analysis.to_dict(), "parallel": parallel.to_dict()}, 200)
+    except Exception as ex:
+        return catch_exception(ex)
+
+
+@router.post("/v3/workflows/reload")
+async def v3_workflows_reload():
+    """
+    Reload workflows whose files changed: prompt-only edits are patched in place,
+    other edits rebuild the workflow and the workflows embedding it.
+
+    Returns:
+        Reload report (patched, rebuilt, removed, failed, ms)
+    """
+    try:
+        return ReturnModel(await get_graph_registry().areload(), 200)
+    except Exception as ex:
+        return catch_exception(ex)
+
+
+@router.get("/v3/metrics")
+async def v3_metrics():
+    """
+    Return process-level V3 runtime metrics (caches, counters).
+
+    Returns:
+        Metrics grouped by component
+    """
+    try:
+        return ReturnModel(
+            {
+                "routingCache": routing_cache_stats(),
+                "singleFlight": single_flight_stats(),
+                "speculativePrefetch": prefetch_stats.stats(),
+                "nodeMemo": memo_stats.stats(),
+                "runCache": run_cache_stats.stats(),
+                "toolCallDedup": tool_call_memo_stats.stats(),
+                "checkpointer": checkpointer_stats(),
+                "chatHistory": chat_history_stats(),
+                "preRouter": pre_router_stats(),
+                "modelRouter": model_router.stats(),
+                "workflows": workflow_histograms.stats(),
+            },
+            200,
+        )
+    except Exception as ex:
+        return catch_exception(ex)
@@ -0,0 +1 @@
+"""Offline benchmarks for workflow and agent performance options."""
@@ -0,0 +1,191 @@
+"""
+Benchmark: write-behind chat history store vs writing each turn inline.
+
+``--turns`` turns (a user message, an assistant reply and a run summary) are
+recorded by ``--concurrency`` concurrent simulated requests:
+- ``inline``: each request writes its turn to SQLite before responding.
+- ``write-behind``: each request buffers its turn with ``record_turn``; the store
+  writes batches in the background.
+Reported: request-path time per turn and the number of batch writes. Every turn
+must be readable afterwards.
+
+Two more checks use a backend that takes ``--slow-ms`` per batch and a buffer of
+``--max-pending`` records: ``record_turn`` must drop turns instead of waiting,
+``arecord_turn`` must wait for room, and the buffer must never exceed its bound.
+A backend that fails once must not lose the batch.
+
+Usage (from src/):
+    python -m benchmarks.chat_history_benchmark [--turns 2000] [--concurrency 50] [--slow-ms 50] [--max-pending 300]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Sequence
+
+from DAL.chat_history_store import (
+    ChatHistoryStore,
+    HistoryMessage,
+    RunSummary,
+    SQLiteChatHistoryBackend,
+)
+
+REPORT = {"workflow": "all.json", "totalMs": 812.5, "totals": {"inputTokens": 950, "outputTokens": 120, "costUsd": 0.0011}}
+
+
+def _turn(index: int) -> List[Dict[str, str]]:
+    return [
+        {"role": "user", "content": f"What is the end date of contract CDR{index:07d}?"},
+        {"role": "assistant", "content": f"Contract CDR{index:07d} ends on 2027-03-31. " + "Details. " * 20},
+    ]
+
+
+class SlowBackend(SQLiteChatHistoryBackend):
+    """SQLite backend whose batch writes take ``latency`` seconds longer; fails ``failures`` times first."""
+
+    def __init__(self, path: str, latency: float, failures: int = 0):
+        super().__init__(path)
+        self.latency = latency
+        self.failures = failures
+
+    async def write_batch(self, messages: Sequence[HistoryMessage], runs: Sequence[RunSummary]) -> None:
+        await asyncio.sleep(self.latency)
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk unavailable")
+        await super().write_batch(messages, runs)
+
+
+async def _requests(turns: int, concurrency: int, record: Any) -> List[float]:
+    """Run ``turns`` simulated requests, ``concurrency`` at a time; return request-path ms per turn."""
+    elapsed: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(index: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await record(f"thread-{index % 100}", f"run-{index}", _turn(index))
+            elapsed.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(request(index) for index in range(turns)))
+    return elapsed
+
+
+async def _count(backend: SQLiteChatHistoryBackend) -> int:
+    rows = await asyncio.to_thread(backend._query, "SELECT COUNT(*) FROM chat_messages", ())
+    return rows[0][0]
+
+
+async def run(turns: int, concurrency: int, slow_ms: float, max_pending: int) -> int:
+    directory = tempfile.mkdtemp(prefix="chat-history-bench-")
+    failures = 0
+
+    inline_backend = SQLiteChatHistoryBackend(os.path.join(directory, "inline.sqlite"))
+
+    async def record_inline(thread_id: str, run_id: str, messages: List[Dict[str, str]]) -> None:
+        now = time.time()
+        await inline_backend.write_batch(
+            [HistoryMessage(thread_id, run_id, m["role"], m["content"], now) for m in messages],
+            [RunSummary.from_report(run_id, thread_id, REPORT, now)],
+        )
+
+    started = time.perf_counter()
+    inline_ms = await _requests(turns, concurrency, record_inline)
+    inline_total = time.perf_counter() - started
+
+    store = ChatHistoryStore(SQLiteChatHistoryBackend(os.path.join(directory, "behind.sqlite")))
+
+    async def record_behind(thread_id: str, run_id: str, messages: List[Dict[str, str]]) -> None:
+        store.record_turn(thread_id, run_id, messages, REPORT)
+
+    started = time.perf_counter()
+    behind_ms = await _requests(turns, concurrency, record_behind)
+    behind_total = time.perf_counter() - started
+    await store.flush()
+
+    print(f"  {'mode':<13} {'turns':>6} {'request median ms':>18} {'request p99 ms':>15} {'total s':>8} {'batches':>8}")
+    for name, elapsed, total, batches in (
+        ("inline", inline_ms, inline_total, turns),
+        ("write-behind", behind_ms, behind_total, store.stats.stats()["flushes"]),
+    ):
+        ordered = sorted(elapsed)
+        print(
+            f"  {name:<13} {len(ordered):>6} {statistics.median(ordered):>18.4f} "
+            f"{ordered[int(len(ordered) * 0.99) - 1]:>15.4f} {total:>8.2f} {batches:>8}"
+        )
+    stored = await _count(store.backend)
+    transcript = await store.transcript("thread-7")
+    if stored != 2 * turns or len(transcript) != 2 * (turns // 100 + (1 if turns % 100 > 7 else 0)):
+        failures += 1
+        print(f"  stored {stored} messages, thread-7 has {len(transcript)}")
+    print(f"Write-behind store: {store.stats.stats()}")
+    await store.aclose()
+    await inline_backend.close()
+
+    # Slow backend, small buffer: record_turn sheds load, arecord_turn waits
+    slow = ChatHistoryStore(
+        SlowBackend(os.path.join(directory, "slow.sqlite"), slow_ms / 1000),
+        batch_size=50, flush_interval_ms=10, max_pending=max_pending,
+    )
+    peak = 0
+
+    async def record_shedding(thread_id: str, run_id: str, messages: List[Dict[str, str]]) -> None:
+        nonlocal peak
+        slow.record_turn(thread_id, run_id, messages, REPORT)
+        peak = max(peak, slow.pending)
+        await asyncio.sleep(0)
+
+    await _requests(turns, concurrency, record_shedding)
+    dropped = slow.stats.stats()["dropped"]
+
+    async def record_waiting(thread_id: str, run_id: str, messages: List[Dict[str, str]]) -> None:
+        nonlocal peak
+        await slow.arecord_turn(thread_id, run_id, messages, REPORT)
+        peak = max(peak, slow.pending)
+
+    await _requests(turns, concurrency, record_waiting)
+    await slow.flush()
+    stats = slow.stats.stats()
+    print(
+        f"Slow backend ({slow_ms:.0f} ms per batch, {max_pending} records max): record_turn dropped "
+        f"{dropped} records; arecord_turn waited "
+        f"{stats['backpressureWaits']} times, dropped {stats['dropped'] - dropped}; peak buffer {peak}"
+    )
+    if peak > max_pending or stats["dropped"] != dropped or not stats["backpressureWaits"]:
+        failures += 1
+    await slow.aclose()
+
+    # A failed batch is retried, not lost
+    flaky = ChatHistoryStore(SlowBackend(os.path.join(directory, "flaky.sqlite"), 0, failures=1), flush_interval_ms=10)
+    for index in range(10):
+        flaky.record_turn("flaky", f"run-{index}", _turn(index), REPORT)
+    await flaky.flush()
+    await flaky.flush()
+    recovered = len(await flaky.transcript("flaky"))
+    print(f"Failing backend: {flaky.stats.stats()['failedFlushes']} failed batch, {recovered}/20 messages stored")
+    failures += 0 if recovered == 20 else 1
+    await flaky.aclose()
+
+    print(f"Checks failed: {failures}")
+    return failures
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--slow-ms", type=float, default=50.0)
+    parser.add_argument("--max-pending", type=int, default=300)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.CRITICAL)
+    failures = asyncio.run(run(args.turns, args.concurrency, args.slow_ms, args.max_pending))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
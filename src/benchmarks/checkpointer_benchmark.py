@@ -0,0 +1,180 @@
+"""
+Benchmark: SQLite checkpointer overhead per conversation turn.
+
+``--threads`` conversations of ``--turns`` turns each run a two-node workflow
+(a simulated LLM answer, then a simulated summary) through ``ainvoke_workflow``
+with a ``thread_id``. The time spent inside the checkpointer (loading the thread,
+storing each superstep and its writes) is measured per turn:
+- ``hot``: the latest checkpoint of every thread stays in the in-memory tier.
+- ``cold``: the hot tier holds one thread and turns alternate between threads, so
+  every turn loads its thread from SQLite.
+
+Every thread must end with the full history (two messages per turn) and the flow
+variables carried over from turn to turn; a reopened checkpointer must see it too.
+
+Usage (from src/):
+    python -m benchmarks.checkpointer_benchmark [--threads 20] [--turns 10] [--reply-chars 600]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.nodes.executors.llm_executor import LLMNodeExecutor
+from BL.v3.nodes.node_registry import NodeRegistry
+from BL.v3.workflow_builder import ainvoke_workflow, build_initial_state_from_user_input
+from DAL.sqlite_checkpointer import SQLiteCheckpointSaver, set_checkpointer
+
+
+class ConversationLLMExecutor(LLMNodeExecutor):
+    """LLM node that answers instantly and counts the turns of the conversation."""
+
+    reply_chars = 600
+
+    async def execute(self, node_config: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+        query = state.get("system", {}).get("userQuery", "")
+        text = f"{node_config.get('name', '')}: {query} " + "x" * self.reply_chars
+        output = {"text": text, "prompt": query, "usage": {}}
+        state = self._apply_variable_updates(output, node_config, state)
+        if node_config.get("name") == "answer":
+            state["messages"] = list(state.get("messages") or []) + [{"role": "assistant", "content": text}]
+            state["flow"] = {**state["flow"], "turnCount": state["flow"].get("turnCount", 0) + 1}
+        return {"output": output, "state": state}
+
+
+class TimedCheckpointSaver(SQLiteCheckpointSaver):
+    """Checkpointer that adds the time spent in each call to ``elapsed``."""
+
+    elapsed = 0.0
+
+    async def aget_tuple(self, config: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await super().aget_tuple(config)
+        finally:
+            self.elapsed += time.perf_counter() - started
+
+    async def aput(self, config: Any, checkpoint: Any, metadata: Any, new_versions: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await super().aput(config, checkpoint, metadata, new_versions)
+        finally:
+            self.elapsed += time.perf_counter() - started
+
+    async def aput_writes(self, config: Any, writes: Any, task_id: str, task_path: str = "") -> None:
+        started = time.perf_counter()
+        try:
+            await super().aput_writes(config, writes, task_id, task_path)
+        finally:
+            self.elapsed += time.perf_counter() - started
+
+
+def _workflow() -> Dict[str, Any]:
+    nodes = [
+        {"id": "s", "type": "start"},
+        {"id": "o", "type": "output", "config": {}},
+        {
+            "id": "answer",
+            "type": "llm",
+            "name": "answer",
+            "config": {"prompt": "Answer {{system.userQuery}}"},
+            "variableUpdates": [{"fieldName": "flow.answer", "operation": "set", "value": "{{nodeOutput.text}}"}],
+        },
+        {
+            "id": "summary",
+            "type": "llm",
+            "name": "summary",
+            "config": {"prompt": "Summarize {{flow.answer}}"},
+            "variableUpdates": [{"fieldName": "flow.summary", "operation": "set", "value": "{{nodeOutput.text}}"}],
+        },
+    ]
+    edges = [{"source": "s", "target": "answer"}, {"source": "answer", "target": "summary"}, {"source": "summary", "target": "o"}]
+    return {"agenticWorkflowId": "checkpointer-bench", "name": "checkpointer-bench", "nodes": nodes, "edges": edges}
+
+
+async def _run_tier(name: str, path: str, hot_threads: int, threads: int, turns: int) -> Dict[str, Any]:
+    saver = TimedCheckpointSaver(path, hot_threads=hot_threads)
+    set_checkpointer(saver)
+    graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None).build(_workflow())
+    checkpoint_ms, turn_ms = [], []
+    final: Dict[str, Dict[str, Any]] = {}
+    for turn in range(turns):
+        for thread in range(threads):
+            thread_id = f"{name}-{thread}"
+            saver.elapsed = 0.0
+            started = time.perf_counter()
+            state = await ainvoke_workflow(
+                graph, build_initial_state_from_user_input(f"question {turn}"), thread_id=thread_id
+            )
+            turn_ms.append((time.perf_counter() - started) * 1000)
+            checkpoint_ms.append(saver.elapsed * 1000)
+            final[thread_id] = state
+    await saver.aflush()
+    return {"saver": saver, "checkpoint_ms": checkpoint_ms, "turn_ms": turn_ms, "final": final}
+
+
+def _check(final: Dict[str, Dict[str, Any]], turns: int) -> int:
+    failures = 0
+    for thread_id, state in final.items():
+        ok = len(state.get("messages", [])) == 2 * turns and state["flow"].get("turnCount") == turns
+        if not ok:
+            failures += 1
+            print(f"  {thread_id}: {len(state.get('messages', []))} messages, turnCount {state['flow'].get('turnCount')}")
+    return failures
+
+
+async def run(threads: int, turns: int, reply_chars: int) -> int:
+    ConversationLLMExecutor.reply_chars = reply_chars
+    NodeRegistry.register("llm", ConversationLLMExecutor)
+    directory = tempfile.mkdtemp(prefix="checkpointer-bench-")
+    path = os.path.join(directory, "checkpoints.sqlite")
+
+    failures = 0
+    print(f"  {'tier':<6} {'turns':>6} {'ckpt median ms':>15} {'ckpt p95 ms':>12} {'turn median ms':>15}")
+    for name, hot_threads in (("hot", threads), ("cold", 1)):
+        result = await _run_tier(name, path, hot_threads, threads, turns)
+        checkpoint_ms = sorted(result["checkpoint_ms"])
+        p95 = checkpoint_ms[int(len(checkpoint_ms) * 0.95) - 1]
+        print(
+            f"  {name:<6} {len(checkpoint_ms):>6} {statistics.median(checkpoint_ms):>15.3f} {p95:>12.3f} "
+            f"{statistics.median(result['turn_ms']):>15.3f}"
+        )
+        failures += _check(result["final"], turns)
+        stats = result["saver"].stats()
+        result["saver"].close()
+    print(f"Checkpointer ({name} tier): {stats}")
+    print(f"Database: {os.path.getsize(path)} bytes")
+
+    # A new process (here: a new checkpointer) continues the conversations from SQLite
+    reopened = SQLiteCheckpointSaver(path)
+    set_checkpointer(reopened)
+    graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None).build(_workflow())
+    state = await ainvoke_workflow(graph, build_initial_state_from_user_input("one more"), thread_id="hot-0")
+    if len(state["messages"]) != 2 * (turns + 1) or state["flow"].get("turnCount") != turns + 1:
+        failures += 1
+        print(f"  reopened: {len(state['messages'])} messages, turnCount {state['flow'].get('turnCount')}")
+    reopened.close()
+    print(f"Checks failed: {failures}")
+    return failures
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--reply-chars", type=int, default=600)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+    failures = asyncio.run(run(max(2, args.threads), args.turns, args.reply_chars))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
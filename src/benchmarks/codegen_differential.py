@@ -0,0 +1,150 @@
+"""
+Differential harness: generated workflow modules vs the interpreted engines.
+
+Every segment of the shipped workflows that the native interpreter accepts (see
+``benchmarks.node_fusion_benchmark``) is compiled with codegen into a scratch
+directory and checked at two levels:
+
+1. Routers: each generated rule router is called on ``--states`` fuzzed states and
+   must return the same target as the interpreted router.
+2. Runs: each segment runs on the generated module, the native interpreter and
+   LangGraph, with the sample initial states and the fuzzed ones. The final states
+   must be identical.
+
+Any difference is printed and the exit code is 1. Router timings and the share of
+rule branches the fuzzed states reached are reported as well.
+
+Usage (from src/):
+    python -m benchmarks.codegen_differential [--states 200] [--seed 7]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.native_engine_benchmark import INITIAL_STATES
+from benchmarks.node_fusion_benchmark import JSON_DIR, SIMULATED, SimulatedNodeExecutor, workflow_segments
+from BL.v3.graph.workflow_analyzer import TEMPLATE_PATTERN, analyze_workflow
+from BL.v3.graph.workflow_codegen import GeneratedProgram
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.nodes.node_registry import NodeRegistry
+from BL.v3.workflow_builder import build_initial_state_from_user_input
+
+VALUE_POOL = ["", " ", "x", "0", "1", "1.5", "true", "false", "[]", '""', 0, 1, 2.5, True, False, [], ["a"], {"k": "v"}]
+
+
+def _referenced_variables(definition: Dict[str, Any]) -> Dict[str, set]:
+    """flow/system variable names referenced by any template of the workflow."""
+    names: Dict[str, set] = {"flow": set(), "system": set()}
+    for match in TEMPLATE_PATTERN.finditer(json.dumps(definition)):
+        parts = match.group(1).strip().split(".")
+        if len(parts) >= 2 and parts[0] in names:
+            names[parts[0]].add(parts[1])
+    return names
+
+
+def _fuzzed_state(rng: random.Random, variables: Dict[str, set]) -> Dict[str, Any]:
+    flow = {name: rng.choice(VALUE_POOL) for name in sorted(variables["flow"]) if rng.random() < 0.8}
+    system = {name: rng.choice(VALUE_POOL) for name in sorted(variables["system"]) if rng.random() < 0.8}
+    query = rng.choice(["hello", "", "extend CDR0027626"])
+    return build_initial_state_from_user_input(query, flow=flow, system=system)
+
+
+async def run(state_count: int, seed: int, workflow_filter: List[str]) -> int:
+    NodeRegistry.register(SIMULATED, SimulatedNodeExecutor)
+    rng = random.Random(seed)
+    # Generated modules go to a scratch directory
+    os.environ["V3_CODEGEN_DIR"] = tempfile.mkdtemp(prefix="codegen-diff-")
+    router_checks = run_checks = mismatches = generated = 0
+    router_us = {"interpreted": [], "generated": []}
+    branches_seen, branches_total = set(), 0
+
+    for path in sorted(JSON_DIR.rglob("*.json")):
+        if workflow_filter and path.name not in workflow_filter:
+            continue
+        workflow = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(workflow, dict) or "nodes" not in workflow:
+            continue
+        definition = analyze_workflow(workflow).definition
+        variables = _referenced_variables(definition)
+        for label, segment in workflow_segments(definition):
+            graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None, codegen=True).build(segment)
+            program = graph.native_program
+            if not isinstance(program, GeneratedProgram):
+                continue
+            generated += 1
+            states = [make_state() for make_state in INITIAL_STATES]
+            states += [_fuzzed_state(rng, variables) for _ in range(state_count)]
+
+            # 1. Routers
+            for step_id, router in program.program.routers.items():
+                branches_total += len(set(router.targets))
+                generated_router = getattr(program.module, f"_route_{list(program.program.steps).index(step_id)}")
+                for state in states:
+                    router_checks += 1
+                    started = time.perf_counter()
+                    expected = router(state)
+                    router_us["interpreted"].append((time.perf_counter() - started) * 1e6)
+                    started = time.perf_counter()
+                    actual = generated_router(state)
+                    router_us["generated"].append((time.perf_counter() - started) * 1e6)
+                    branches_seen.add((label, step_id, expected))
+                    if actual != expected:
+                        mismatches += 1
+                        print(f"  ROUTER MISMATCH {path.name} / {label} / {step_id}: {actual!r} != {expected!r}")
+
+            # 2. Whole runs
+            for state in states:
+                run_checks += 1
+                results = {
+                    "generated": await _outcome(program.ainvoke, state),
+                    "native": await _outcome(program.program.ainvoke, state),
+                    "langgraph": await _outcome(graph.ainvoke, state),
+                }
+                if not (results["generated"] == results["native"] == results["langgraph"]):
+                    mismatches += 1
+                    print(f"  RUN MISMATCH {path.name} / {label}")
+
+    print(
+        f"Generated modules: {generated}; router checks: {router_checks}; runs on three engines: {run_checks}; "
+        f"mismatches: {mismatches}"
+    )
+    if router_us["generated"]:
+        print(f"Rule branches taken: {len(branches_seen)} of {branches_total}")
+        print(
+            f"Router call: interpreted {statistics.median(router_us['interpreted']):.2f} us, "
+            f"generated {statistics.median(router_us['generated']):.2f} us (median)"
+        )
+    return mismatches
+
+
+async def _outcome(invoke: Any, state: Dict[str, Any]) -> Any:
+    """Final state with key order, or the exception type for runs that fail."""
+    try:
+        result = await invoke(json.loads(json.dumps(state)))
+        return list(result.items())
+    except Exception as ex:
+        return type(ex).__name__
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--states", type=int, default=200, help="Fuzzed states per segment")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workflow", action="append", help="Only this JSON file name (repeatable)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+    mismatches = asyncio.run(run(args.states, args.seed, args.workflow or []))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
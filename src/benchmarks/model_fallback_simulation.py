@@ -0,0 +1,104 @@
+"""
+Simulation: model fallback chains under scripted latency and failures.
+
+Runs a RoutedChatModel over fake chat models whose per-call latencies and errors
+are scripted, and prints which model served each call, the circuit states and the
+p95 latencies the router saw. No API keys are needed.
+
+Usage (from src/):
+    python -m benchmarks.model_fallback_simulation [--calls 60] [--slo-ms 40]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from collections import Counter
+from itertools import cycle
+from typing import Any, Iterable, List, Optional
+
+from BL.agents.agents_model.model_router import ModelRouter, get_routed_model_instance
+
+
+class ScriptedFakeChatModel:
+    """Fake chat model: each call sleeps for the next scripted latency; ``None`` raises instead."""
+
+    def __init__(self, code: str, latencies_ms: Iterable[Optional[float]]):
+        self.code = code
+        self._script = cycle(list(latencies_ms))
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        latency = next(self._script)
+        if latency is None:
+            raise RuntimeError(f"{self.code}: scripted failure")
+        await asyncio.sleep(latency / 1000)
+        return {"model": self.code, "content": "ok"}
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedFakeChatModel":
+        return self
+
+
+SCENARIOS = {
+    # Primary degrades to ~80 ms after 15 calls; the chain should move to the mini model
+    "slo_breach": {
+        "gpt-4.1": [10] * 15 + [80] * 200,
+        "gpt-4.1-mini": [15],
+        "gemini-2.0-flash-lite-001": [20],
+    },
+    # Primary fails outright for a stretch; its circuit should open, then close after cooldown
+    "outage": {
+        "gpt-4.1": [10] * 10 + [None] * 5 + [10] * 200,
+        "gpt-4.1-mini": [None, 15, 15, 15],
+        "gemini-2.0-flash-lite-001": [20],
+    },
+}
+
+
+async def run_scenario(name: str, calls: int, slo_ms: float) -> None:
+    script = SCENARIOS[name]
+    clock_now = [0.0]
+    router = ModelRouter(window=20, min_samples=5, failure_threshold=3, cooldown_seconds=10.0, clock=lambda: clock_now[0])
+    model = get_routed_model_instance(
+        {"code": "gpt-4.1", "fallbacks": ["gpt-4.1-mini", "gemini-2.0-flash-lite-001"], "sloP95Ms": slo_ms},
+        router=router,
+        factory=lambda code, temperature: ScriptedFakeChatModel(code, script[code]),
+    )
+
+    served: List[str] = []
+    for _ in range(calls):
+        # Simulated time: one second between calls so cooldowns elapse during the run
+        clock_now[0] += 1.0
+        try:
+            response = await model.ainvoke([{"role": "user", "content": "hi"}])
+            served.append(response["model"])
+        except RuntimeError:
+            served.append("<all failed>")
+
+    print(f"\n== {name} (SLO p95 {slo_ms:.0f} ms, {calls} calls) ==")
+    print("  served by: " + ", ".join(f"{code} x{count}" for code, count in Counter(served).items()))
+    runs: List[List[Any]] = []
+    for code in served:
+        if runs and runs[-1][0] == code:
+            runs[-1][1] += 1
+        else:
+            runs.append([code, 1])
+    print("  timeline:  " + " -> ".join(f"{code} x{count}" for code, count in runs))
+    stats = router.stats()
+    print(f"  fallbacks: {stats['fallbacks']}, SLO reroutes: {stats['sloReroutes']}")
+    for code, model_stats in stats["models"].items():
+        print(f"  {code:<28} {model_stats}")
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=60)
+    parser.add_argument("--slo-ms", type=float, default=40.0)
+    args = parser.parse_args(argv)
+    # Fallback warnings are expected here; the summary below reports them
+    logging.getLogger("BL.agents.agents_model.model_router").setLevel(logging.ERROR)
+    for name in SCENARIOS:
+        asyncio.run(run_scenario(name, args.calls, args.slo_ms))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,138 @@
+"""
+Differential check and benchmark: native interpreter vs LangGraph for acyclic workflows.
+
+1. Differential check: every segment of the shipped workflows (see
+   ``benchmarks.node_fusion_benchmark``) that the native interpreter accepts is run
+   on both engines, with and without node fusion, for several initial states. The
+   final states must be identical, including key order; any difference is printed
+   and the exit code is 1.
+2. Per-step overhead: straight-line workflows of 1..N simulated nodes are run on
+   both engines. The slope of latency over chain length is the cost of one step.
+
+Usage (from src/):
+    python -m benchmarks.native_engine_benchmark [--runs 200] [--max-steps 50]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.node_fusion_benchmark import JSON_DIR, SIMULATED, SimulatedNodeExecutor, workflow_segments
+from BL.v3.graph.workflow_analyzer import analyze_workflow
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.nodes.node_registry import NodeRegistry
+from BL.v3.workflow_builder import build_initial_state_from_user_input
+
+INITIAL_STATES: List[Callable[[], Dict[str, Any]]] = [
+    lambda: build_initial_state_from_user_input("I want to extend contract CDR0027626"),
+    lambda: build_initial_state_from_user_input(
+        "Selected supplier from the grid", flow={"isPvRendered": True, "selectedAgentId": "contract-extension"}
+    ),
+    lambda: build_initial_state_from_user_input(
+        "", flow={"partialViewData": [{"supplier": "Acme"}]}, interface_inputs={"partialViewData": "[]"}
+    ),
+]
+
+
+async def differential_check(workflow_filter: List[str]) -> int:
+    """Run every eligible segment on both engines; return the number of mismatches."""
+    checked = mismatches = skipped = 0
+    for path in sorted(JSON_DIR.rglob("*.json")):
+        if workflow_filter and path.name not in workflow_filter:
+            continue
+        workflow = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(workflow, dict) or "nodes" not in workflow:
+            continue
+        definition = analyze_workflow(workflow).definition
+        for label, segment in workflow_segments(definition):
+            for fuse in (False, True):
+                graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None, fuse_nodes=fuse).build(segment)
+                program = graph.native_program
+                if program is None:
+                    skipped += 1
+                    continue
+                for make_state in INITIAL_STATES:
+                    expected = await graph.ainvoke(make_state())
+                    actual = await program.ainvoke(make_state())
+                    checked += 1
+                    if actual != expected or list(actual) != list(expected):
+                        mismatches += 1
+                        print(f"  MISMATCH {path.name} / {label} (fusion {'on' if fuse else 'off'})")
+    print(
+        f"Differential check: {checked} runs identical on both engines, {mismatches} mismatches, "
+        f"{skipped} segment builds need LangGraph (cycles or fan-out)"
+    )
+    return mismatches
+
+
+def _chain(length: int) -> Dict[str, Any]:
+    nodes = [{"id": "s", "type": "start"}, {"id": "o", "type": "output", "config": {}}]
+    edges = [{"source": "s", "target": "n0"}]
+    for index in range(length):
+        nodes.append(
+            {
+                "id": f"n{index}",
+                "type": SIMULATED,
+                "name": f"n{index}",
+                "variableUpdates": [{"fieldName": "flow.counter", "operation": "set", "value": str(index)}],
+            }
+        )
+        edges.append({"source": f"n{index}", "target": f"n{index + 1}" if index + 1 < length else "o"})
+    return {"agenticWorkflowId": f"chain-{length}", "name": f"chain-{length}", "nodes": nodes, "edges": edges}
+
+
+async def _mean_ms(run: Callable, runs: int) -> float:
+    await run()
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await run()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return statistics.mean(latencies)
+
+
+async def step_overhead(runs: int, max_steps: int) -> None:
+    """Print latency per run over chain length for both engines and the per-step slope."""
+    lengths = sorted({1, max(2, max_steps // 10), max(3, max_steps // 2), max_steps})
+    measured = {"langgraph": {}, "native": {}}
+    print(f"\n  {'steps':>5} {'LangGraph ms':>13} {'native ms':>10}")
+    for length in lengths:
+        graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None, fuse_nodes=False).build(_chain(length))
+        measured["langgraph"][length] = await _mean_ms(
+            lambda: graph.ainvoke(build_initial_state_from_user_input("benchmark")), runs
+        )
+        measured["native"][length] = await _mean_ms(
+            lambda: graph.native_program.ainvoke(build_initial_state_from_user_input("benchmark")), runs
+        )
+        print(f"  {length:>5} {measured['langgraph'][length]:>13.3f} {measured['native'][length]:>10.3f}")
+    span = lengths[-1] - lengths[0]
+    for engine, by_length in measured.items():
+        per_step_us = 1000 * (by_length[lengths[-1]] - by_length[lengths[0]]) / span
+        print(f"  {engine:<10} ~{per_step_us:.0f} us per step, {1000 * by_length[lengths[0]]:.0f} us fixed per run")
+
+
+async def run(runs: int, max_steps: int, workflow_filter: List[str]) -> int:
+    NodeRegistry.register(SIMULATED, SimulatedNodeExecutor)
+    mismatches = await differential_check(workflow_filter)
+    await step_overhead(runs, max_steps)
+    return mismatches
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--max-steps", type=int, default=50)
+    parser.add_argument("--workflow", action="append", help="Only this JSON file name (repeatable)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+    mismatches = asyncio.run(run(args.runs, args.max_steps, args.workflow or []))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
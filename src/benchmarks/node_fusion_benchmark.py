@@ -0,0 +1,145 @@
+"""
+Benchmark: LangGraph supersteps and latency per run with and without node fusion.
+
+Each shipped workflow is cut into segments: from the entry point, and from every
+node that does real work (agent, llm, tool, http request, workflow), up to the next
+such node. The working node is replaced by a simulated executor that applies its
+variable updates and returns at once, so only the graph's own cost is measured;
+variable and rule nodes run their real executors. Every segment is compiled once
+with ``fuse_nodes=False`` and once with ``fuse_nodes=True`` and run ``--runs`` times;
+segments whose final state differs between the two are reported.
+
+Usage (from src/):
+    python -m benchmarks.node_fusion_benchmark [--runs 50] [--workflow all.json]
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from BL.v3.graph.node_fusion import FUSIBLE_NODE_TYPES
+from BL.v3.graph.workflow_analyzer import analyze_workflow
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.nodes.executors.base_executor import BaseNodeExecutor
+from BL.v3.nodes.node_registry import NodeRegistry
+from BL.v3.workflow_builder import build_initial_state_from_user_input
+
+JSON_DIR = Path(__file__).resolve().parent.parent / "core" / "jsons"
+SIMULATED = "simulated"
+
+
+class SimulatedNodeExecutor(BaseNodeExecutor):
+    """Stand-in for a working node: applies its variable updates, no I/O."""
+
+    async def execute(self, node_config: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+        output = {"status": "simulated"}
+        return {"output": output, "state": self._apply_variable_updates(output, node_config, state)}
+
+
+def workflow_segments(definition: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """(label, mini workflow) per segment: start -> head -> cheap nodes -> output."""
+    nodes = {node["id"]: node for node in definition["nodes"]}
+    start = next(node for node in nodes.values() if node["type"] == "start")
+    cheap = {node_id for node_id, node in nodes.items() if node["type"] in FUSIBLE_NODE_TYPES}
+    entry = next((e["target"] for e in definition["edges"] if e["source"] == start["id"]), None)
+    heads = [entry] + [
+        node_id for node_id, node in nodes.items()
+        if node_id != entry and node["type"] not in FUSIBLE_NODE_TYPES + ("start", "output")
+    ]
+    segments = []
+    for head in heads:
+        if head is None:
+            continue
+        kept = cheap | {head}
+        mini_nodes = [{**start, "variableUpdates": []}, {"id": "__bench_output__", "type": "output", "config": {}}]
+        for node_id in kept:
+            node = copy.deepcopy(nodes[node_id])
+            if node["type"] not in FUSIBLE_NODE_TYPES:
+                node["type"] = SIMULATED
+            mini_nodes.append(node)
+        mini_edges = [{"source": start["id"], "target": head}]
+        for edge in definition["edges"]:
+            if edge["source"] in kept:
+                target = edge["target"] if edge["target"] in kept else "__bench_output__"
+                mini_edges.append({**edge, "target": target})
+        label = f"{nodes[head].get('name') or head} ({nodes[head]['type']})"
+        segments.append(
+            (label, {"agenticWorkflowId": f"bench-{head}", "name": label, "nodes": mini_nodes, "edges": mini_edges})
+        )
+    return segments
+
+
+async def _run(graph: Any, runs: int) -> Tuple[int, float, Dict[str, Any]]:
+    """(supersteps of one run, mean latency in ms over ``runs`` runs, final state)."""
+    steps = set()
+    async for event in graph.astream(build_initial_state_from_user_input("benchmark"), stream_mode="debug"):
+        if event.get("type") == "task":
+            steps.add(event.get("step"))
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        final_state = await graph.ainvoke(build_initial_state_from_user_input("benchmark"))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return len(steps), statistics.mean(latencies), final_state
+
+
+async def run(runs: int, workflow_filter: List[str]) -> None:
+    NodeRegistry.register(SIMULATED, SimulatedNodeExecutor)
+    totals = {False: [0, 0.0], True: [0, 0.0]}
+    for path in sorted(JSON_DIR.rglob("*.json")):
+        if workflow_filter and path.name not in workflow_filter:
+            continue
+        workflow = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(workflow, dict) or "nodes" not in workflow:
+            continue
+        definition = analyze_workflow(workflow).definition
+        print(f"\n== {path.relative_to(JSON_DIR).as_posix()} ==")
+        print(f"  {'segment':<52} {'steps':>11} {'ms/run':>17}")
+        file_totals = {False: [0, 0.0], True: [0, 0.0]}
+        for label, segment in workflow_segments(definition):
+            measured = {}
+            for fuse in (False, True):
+                graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None, fuse_nodes=fuse).build(segment)
+                measured[fuse] = await _run(graph, runs)
+                file_totals[fuse][0] += measured[fuse][0]
+                file_totals[fuse][1] += measured[fuse][1]
+            if measured[False][2] != measured[True][2]:
+                print(f"  {label[:52]:<52} final state differs with fusion")
+            if measured[False][0] != measured[True][0]:
+                print(
+                    f"  {label[:52]:<52} {measured[False][0]:>4} -> {measured[True][0]:<4} "
+                    f"{measured[False][1]:>7.3f} -> {measured[True][1]:<7.3f}"
+                )
+        print(
+            f"  {'all segments':<52} {file_totals[False][0]:>4} -> {file_totals[True][0]:<4} "
+            f"{file_totals[False][1]:>7.3f} -> {file_totals[True][1]:<7.3f}"
+        )
+        for fuse in (False, True):
+            totals[fuse][0] += file_totals[fuse][0]
+            totals[fuse][1] += file_totals[fuse][1]
+    saved_steps = 100 * (1 - totals[True][0] / max(totals[False][0], 1))
+    saved_ms = 100 * (1 - totals[True][1] / max(totals[False][1], 1e-9))
+    print(
+        f"\nTotal: {totals[False][0]} -> {totals[True][0]} supersteps ({saved_steps:.0f}% fewer), "
+        f"{totals[False][1]:.2f} -> {totals[True][1]:.2f} ms ({saved_ms:.0f}% faster)"
+    )
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--workflow", action="append", help="Only this JSON file name (repeatable)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(run(args.runs, args.workflow or []))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,157 @@
+"""
+Benchmark: cross-turn memoization of a slow tool node.
+
+A conversation of five turns runs one workflow. A memoized ``lookup_contract`` tool
+(``--tool-ms``) reads ``flow.contractNumber``; its memo also depends on
+``flow.customerTier`` and is invalidated by ``update_contract``, which a rule runs when
+the user asks for a change. Each turn starts from the ``metadata`` of the previous
+turn's final state, as a checkpointed thread carries it over on the server:
+1. Contract A: miss
+2. Contract A again: hit
+3. Contract B: miss (different request)
+4. Contract B, update: hit, then ``update_contract`` drops the entry
+5. Contract B: miss (invalidated)
+
+Per turn, the run latency, the ``lookup_contract`` node's own latency and upstream
+calls, and the memo status are printed (turn 4's run latency is ``update_contract``'s
+call; its memo entry is gone by the end of the turn). The hits and misses must follow
+the pattern above, and a hit must make no ``lookup_contract`` call.
+
+Usage (from src/):
+    python -m benchmarks.node_memo_benchmark [--tool-ms 150]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+from BL.v3.accounting.run_accounting import RunAccounting, bind_run_accounting
+from BL.v3.cache.node_memo import memo_stats
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.nodes.executors.tool_executor import ToolNodeExecutor
+from BL.v3.nodes.node_registry import NodeRegistry
+from BL.v3.workflow_builder import ainvoke_workflow, build_initial_state_from_user_input
+
+# (query, contract number, action, expected memo hit)
+TURNS = [
+    ("show contract A", "CDR0000001", "show", False),
+    ("show it again", "CDR0000001", "show", True),
+    ("now contract B", "CDR0000002", "show", False),
+    ("extend contract B", "CDR0000002", "update", True),
+    ("show contract B", "CDR0000002", "show", False),
+]
+
+
+class SlowToolExecutor(ToolNodeExecutor):
+    """Tool node whose upstream call takes ``latency`` seconds."""
+
+    latency = 0.15
+    calls: Counter = Counter()
+
+    async def _call_tool(self, tool_id: str, resolved_params: Dict[str, Any]) -> Dict[str, Any]:
+        SlowToolExecutor.calls[tool_id] += 1
+        await asyncio.sleep(self.latency)
+        return await super()._call_tool(tool_id, resolved_params)
+
+
+def _workflow() -> Dict[str, Any]:
+    nodes = [
+        {"id": "s", "type": "start"},
+        {"id": "o", "type": "output", "config": {}},
+        {
+            "id": "lookup_contract",
+            "type": "tool",
+            "name": "lookup_contract",
+            "config": {
+                "toolId": "lookup_contract",
+                "parameters": {"contract": "{{flow.contractNumber}}"},
+                "memoize": {
+                    "ttlSeconds": 300,
+                    "dependsOn": ["flow.customerTier"],
+                    "invalidatedBy": ["update_contract"],
+                },
+            },
+            "variableUpdates": [{"fieldName": "flow.contract", "operation": "set", "value": "{{nodeOutput.toolId}}"}],
+        },
+        {
+            "id": "route",
+            "type": "rule",
+            "name": "route",
+            "config": {
+                "rules": [
+                    {
+                        "ruleId": "r-update",
+                        "logicType": "AND",
+                        "conditions": [{"field": "{{flow.action}}", "operator": "equals", "value": "update"}],
+                    }
+                ]
+            },
+        },
+        {
+            "id": "update_contract",
+            "type": "tool",
+            "name": "update_contract",
+            "config": {"toolId": "update_contract", "parameters": {"contract": "{{flow.contractNumber}}"}},
+        },
+    ]
+    edges = [
+        {"source": "s", "target": "lookup_contract"},
+        {"source": "lookup_contract", "target": "route"},
+        {"source": "route", "target": "update_contract", "sourceHandle": "r-update"},
+        {"source": "route", "target": "o", "sourceHandle": "else"},
+        {"source": "update_contract", "target": "o"},
+    ]
+    return {"agenticWorkflowId": "node-memo", "name": "node-memo", "nodes": nodes, "edges": edges}
+
+
+async def run(tool_ms: float) -> int:
+    SlowToolExecutor.latency = tool_ms / 1000
+    NodeRegistry.register("tool", SlowToolExecutor)
+    graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None).build(_workflow())
+
+    metadata: Dict[str, Any] = {}
+    failures = 0
+    print(f"  {'turn':<20} {'run ms':>7} {'lookup ms':>10} {'lookups':>8}  memo")
+    for query, contract, action, expected_hit in TURNS:
+        initial_state = build_initial_state_from_user_input(
+            query,
+            flow={"contractNumber": contract, "customerTier": "gold", "action": action},
+            metadata=metadata,
+        )
+        SlowToolExecutor.calls.clear()
+        run = RunAccounting("node-memo")
+        started = time.perf_counter()
+        with bind_run_accounting(run):
+            final_state = await ainvoke_workflow(graph, initial_state)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        lookup_ms = sum(n["wallMs"] for n in run.report()["nodes"] if n["nodeId"] == "lookup_contract")
+        lookups = SlowToolExecutor.calls["lookup_contract"]
+        memo = final_state["nodes"]["lookup_contract"].get("memo", {})
+        failures += 0 if memo.get("hit") == expected_hit and lookups == (0 if expected_hit else 1) else 1
+        entries = sorted(final_state.get("metadata", {}).get("nodeMemo", {}))
+        print(
+            f"  {query:<20} {elapsed_ms:>7.1f} {lookup_ms:>10.1f} {lookups:>8}  "
+            f"{'hit' if memo.get('hit') else 'miss'}  entries={entries}"
+        )
+        metadata = final_state.get("metadata", {})
+
+    print(f"Memo counters: {memo_stats.stats()}")
+    print(f"Turns matching the expected hit/miss pattern: {len(TURNS) - failures}/{len(TURNS)}")
+    return failures
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tool-ms", type=float, default=150.0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+    failures = asyncio.run(run(args.tool_ms))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
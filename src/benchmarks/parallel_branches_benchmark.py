@@ -0,0 +1,173 @@
+"""
+Benchmark and equivalence check: independent branches run in parallel vs one after another.
+
+A workflow fans out from one node into ``--branches`` branches of slow tool calls
+(``--latency-ms`` each, every other branch followed by a variable update) that
+write separate flow variables, then joins in a variable update and a rule. The
+same nodes chained one after another are the sequential reference: both runs
+must end in the same state, on LangGraph and on the native interpreter. A
+variant where two branches write the same variable shows the refusal.
+
+Usage (from src/):
+    python -m benchmarks.parallel_branches_benchmark [--branches 4] [--latency-ms 50] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from BL.v3.graph.parallel_branches import node_effects, plan_parallel_branches
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.nodes.executors.tool_executor import ToolNodeExecutor
+from BL.v3.nodes.node_registry import NodeRegistry
+from BL.v3.workflow_builder import build_initial_state_from_user_input
+
+SLOW_TOOL = "tool"
+
+
+class SlowToolExecutor(ToolNodeExecutor):
+    """Tool node whose upstream call waits ``latency`` seconds (an I/O-bound tool or HTTP call)."""
+
+    latency = 0.05
+
+    async def _call_tool(self, tool_id: str, resolved_params: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return await super()._call_tool(tool_id, resolved_params)
+
+
+def _workflow(branch_count: int, chained: bool, conflict: bool = False) -> Dict[str, Any]:
+    """Fan-out workflow, or (``chained``) the same nodes one after another."""
+    nodes: List[Dict[str, Any]] = [
+        {"id": "s", "type": "start"},
+        {"id": "o", "type": "output", "config": {}},
+        {
+            "id": "prepare",
+            "type": "variable",
+            "name": "prepare",
+            "variableUpdates": [{"fieldName": "flow.query", "operation": "set", "value": "{{system.userQuery}}"}],
+        },
+    ]
+    branches: List[List[str]] = []
+    for index in range(branch_count):
+        variable = "flow.result0" if conflict and index == 1 else f"flow.result{index}"
+        nodes.append(
+            {
+                "id": f"tool{index}",
+                "type": SLOW_TOOL,
+                "name": f"tool{index}",
+                "config": {"toolId": f"T{index}", "parameters": {"query": "{{flow.query}}", "index": str(index)}},
+                "variableUpdates": [{"fieldName": variable, "operation": "set", "value": "{{nodeOutput.toolId}}"}],
+            }
+        )
+        branch = [f"tool{index}"]
+        if index % 2:
+            nodes.append(
+                {
+                    "id": f"note{index}",
+                    "type": "variable",
+                    "name": f"note{index}",
+                    "variableUpdates": [
+                        {"fieldName": f"flow.note{index}", "operation": "set", "value": f"{{{{nodes.tool{index}.status}}}}"}
+                    ],
+                }
+            )
+            branch.append(f"note{index}")
+        branches.append(branch)
+    summary = "-".join(f"{{{{flow.result{index}}}}}" for index in range(branch_count))
+    nodes += [
+        {
+            "id": "join",
+            "type": "variable",
+            "name": "join",
+            "variableUpdates": [{"fieldName": "flow.summary", "operation": "set", "value": summary}],
+        },
+        {
+            "id": "check",
+            "type": "rule",
+            "name": "check",
+            "config": {
+                "rules": [
+                    {
+                        "ruleId": "r-done",
+                        "logicType": "AND",
+                        "conditions": [{"field": "{{flow.summary}}", "operator": "is not empty", "value": ""}],
+                    }
+                ]
+            },
+        },
+    ]
+
+    pairs = [("s", "prepare")]
+    if chained:
+        sequence = ["prepare"] + [node_id for branch in branches for node_id in branch] + ["join"]
+        pairs += list(zip(sequence, sequence[1:]))
+    else:
+        for branch in branches:
+            pairs += list(zip(["prepare"] + branch, branch + ["join"]))
+    pairs.append(("join", "check"))
+    edges = [{"source": source, "target": target} for source, target in pairs]
+    edges += [
+        {"source": "check", "target": "o", "sourceHandle": "r-done"},
+        {"source": "check", "target": "o", "sourceHandle": "else"},
+    ]
+    name = f"fan-out-{branch_count}{'-chained' if chained else ''}{'-conflict' if conflict else ''}"
+    return {"agenticWorkflowId": name, "name": name, "nodes": nodes, "edges": edges}
+
+
+async def _timed(invoke: Any, runs: int) -> Any:
+    latencies, result = [], None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await invoke(build_initial_state_from_user_input("supplier report"))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(latencies)
+
+
+async def run(branch_count: int, latency_ms: float, runs: int) -> int:
+    SlowToolExecutor.latency = latency_ms / 1000
+    NodeRegistry.register(SLOW_TOOL, SlowToolExecutor)
+    builder = WorkflowGraphBuilder(workflow_loader=lambda _: None)
+    fan_out = _workflow(branch_count, chained=False)
+    plan = plan_parallel_branches(fan_out)
+    for group in plan.groups.values():
+        print(f"Parallel group after {group.source}: {group.branches} -> join {group.join}")
+    for branch in next(iter(plan.groups.values())).branches[:2]:
+        print(f"  {branch[0]}: {node_effects(next(n for n in fan_out['nodes'] if n['id'] == branch[0])).to_dict()}")
+
+    parallel_graph = await builder.build(fan_out)
+    chained_graph = await builder.build(_workflow(branch_count, chained=True))
+    results = {
+        "sequential (LangGraph)": await _timed(chained_graph.ainvoke, runs),
+        "parallel (LangGraph)": await _timed(parallel_graph.ainvoke, runs),
+        "parallel (native)": await _timed(parallel_graph.native_program.ainvoke, runs),
+    }
+    reference = results["sequential (LangGraph)"][0]
+    mismatches = 0
+    print(f"\n  {'engine':<24} {'median ms':>10}  same final state")
+    for label, (final_state, median_ms) in results.items():
+        same = final_state == reference and list(final_state) == list(reference)
+        mismatches += 0 if same else 1
+        print(f"  {label:<24} {median_ms:>10.1f}  {'yes' if same else 'NO'}")
+
+    conflict = plan_parallel_branches(_workflow(branch_count, chained=False, conflict=True))
+    print(f"\nConflicting variant stays sequential: {conflict.refused}")
+    return mismatches
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--branches", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Latency of each tool call")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+    mismatches = asyncio.run(run(max(2, args.branches), args.latency_ms, args.runs))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,143 @@
+"""
+Benchmark: full-run result cache for side-effect free workflows.
+
+A workflow runs a slow simulated LLM (``--llm-ms``) and an idempotent lookup tool
+(``--tool-ms``). Each of ``--queries`` distinct queries is asked ``--repeats``
+times through ``ainvoke_workflow`` with V3_RUN_CACHE on. Every repeat must return
+the state of the first run of its query. The same queries with ``refresh`` and
+``bypass`` must run the workflow again. A variant whose tool is not marked
+idempotent must be refused by the static analysis and never cached.
+
+Usage (from src/):
+    python -m benchmarks.run_cache_benchmark [--queries 4] [--repeats 5] [--llm-ms 200] [--tool-ms 100]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from BL.v3.cache.run_cache import BYPASS, REFRESH, USE, MemoryRunCacheBackend, run_cache_stats, set_run_cache_backend
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.nodes.executors.llm_executor import LLMNodeExecutor
+from BL.v3.nodes.executors.tool_executor import ToolNodeExecutor
+from BL.v3.nodes.node_registry import NodeRegistry
+from BL.v3.workflow_builder import ainvoke_workflow, build_initial_state_from_user_input
+
+
+class SimulatedLLMExecutor(LLMNodeExecutor):
+    """LLM node that takes ``latency`` seconds and echoes the query."""
+
+    latency = 0.2
+    calls = 0
+
+    async def execute(self, node_config: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        SimulatedLLMExecutor.calls += 1
+        query = state.get("system", {}).get("userQuery", "")
+        output = {"text": f"summary of {query}", "prompt": query, "usage": {}}
+        return {"output": output, "state": self._apply_variable_updates(output, node_config, state)}
+
+
+class SlowToolExecutor(ToolNodeExecutor):
+    """Tool node whose upstream call takes ``latency`` seconds."""
+
+    latency = 0.1
+
+    async def _call_tool(self, tool_id: str, resolved_params: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return await super()._call_tool(tool_id, resolved_params)
+
+
+def _workflow(idempotent: bool) -> Dict[str, Any]:
+    name = f"run-cache-{'pure' if idempotent else 'side-effects'}"
+    nodes = [
+        {"id": "s", "type": "start"},
+        {"id": "o", "type": "output", "config": {}},
+        {
+            "id": "lookup",
+            "type": "tool",
+            "name": "lookup",
+            "config": {"toolId": "lookup", "parameters": {"query": "{{system.userQuery}}"}, "idempotent": idempotent},
+            "variableUpdates": [{"fieldName": "flow.lookup", "operation": "set", "value": "{{nodeOutput.toolId}}"}],
+        },
+        {
+            "id": "answer",
+            "type": "llm",
+            "name": "answer",
+            "config": {"prompt": "Answer {{system.userQuery}} using {{flow.lookup}}"},
+            "variableUpdates": [{"fieldName": "flow.answer", "operation": "set", "value": "{{nodeOutput.text}}"}],
+        },
+    ]
+    edges = [{"source": "s", "target": "lookup"}, {"source": "lookup", "target": "answer"}, {"source": "answer", "target": "o"}]
+    return {"agenticWorkflowId": name, "name": name, "nodes": nodes, "edges": edges}
+
+
+async def _timed(graph: Any, query: str, mode: str = USE) -> Any:
+    started = time.perf_counter()
+    state = await ainvoke_workflow(graph, build_initial_state_from_user_input(query), run_cache=mode)
+    return state, (time.perf_counter() - started) * 1000
+
+
+async def run(queries: int, repeats: int, llm_ms: float, tool_ms: float) -> int:
+    SimulatedLLMExecutor.latency = llm_ms / 1000
+    SlowToolExecutor.latency = tool_ms / 1000
+    NodeRegistry.register("llm", SimulatedLLMExecutor)
+    NodeRegistry.register("tool", SlowToolExecutor)
+    os.environ["V3_RUN_CACHE"] = "1"
+    set_run_cache_backend(MemoryRunCacheBackend())
+
+    builder = WorkflowGraphBuilder(workflow_loader=lambda _: None)
+    pure_graph = await builder.build(_workflow(idempotent=True))
+    side_effect_graph = await builder.build(_workflow(idempotent=False))
+    print(f"Cacheable workflow:   {pure_graph.run_cache_policy.to_dict()}")
+    print(f"Side-effect workflow: {side_effect_graph.run_cache_policy.to_dict()}")
+
+    failures = 0
+    cold, warm = [], []
+    for index in range(queries):
+        query = f"contract report {index}"
+        first, elapsed_ms = await _timed(pure_graph, query)
+        cold.append(elapsed_ms)
+        for _ in range(repeats - 1):
+            state, elapsed_ms = await _timed(pure_graph, query)
+            warm.append(elapsed_ms)
+            failures += 0 if state == first else 1
+
+    calls_before = SimulatedLLMExecutor.calls
+    for mode in (REFRESH, BYPASS):
+        state, _ = await _timed(pure_graph, "contract report 0", mode)
+        failures += 0 if state["flow"]["answer"] == "summary of contract report 0" else 1
+    failures += 0 if SimulatedLLMExecutor.calls - calls_before == 2 else 1
+
+    calls_before = SimulatedLLMExecutor.calls
+    for _ in range(repeats):
+        await _timed(side_effect_graph, "contract report 0")
+    failures += 0 if SimulatedLLMExecutor.calls - calls_before == repeats else 1
+
+    print(f"\n  {'runs':<22} {'count':>6} {'median ms':>10}")
+    print(f"  {'first run of a query':<22} {len(cold):>6} {statistics.median(cold):>10.2f}")
+    print(f"  {'repeated query':<22} {len(warm):>6} {statistics.median(warm):>10.2f}")
+    print(f"Run cache: {run_cache_stats.stats()}")
+    print(f"Checks failed: {failures}")
+    return failures
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--llm-ms", type=float, default=200.0)
+    parser.add_argument("--tool-ms", type=float, default=100.0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+    failures = asyncio.run(run(args.queries, max(2, args.repeats), args.llm_ms, args.tool_ms))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
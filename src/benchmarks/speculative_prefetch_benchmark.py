@@ -0,0 +1,175 @@
+"""
+Benchmark: speculative prefetch of idempotent tool calls behind a slow LLM step.
+
+A supervisor-style workflow runs a slow simulated LLM (``--llm-ms``) that classifies
+the request into ``flow.intent``. A rule then routes to one of three tools
+(``--tool-ms`` each):
+- ``lookup_contract`` reads ``flow.contractNumber``, which is known before the LLM runs.
+- ``search_catalog`` reads ``system.userQuery``.
+- ``escalate`` reads ``flow.intent``. The LLM writes that variable, so this tool is
+  never prefetched.
+
+The first two tools are marked idempotent. With prefetch on, both start while the
+LLM runs, and the one the rule picks is committed. The final state must match a run
+without prefetch. Latency and the prefetch counters (hit rate, waste) are printed.
+
+Usage (from src/):
+    python -m benchmarks.speculative_prefetch_benchmark [--runs 10] [--llm-ms 200] [--tool-ms 150]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+from BL.v3.cache.speculative_prefetch import PrefetchStats, prefetch_stats
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.nodes.executors.llm_executor import LLMNodeExecutor
+from BL.v3.nodes.executors.tool_executor import ToolNodeExecutor
+from BL.v3.nodes.node_registry import NodeRegistry
+from BL.v3.workflow_builder import ainvoke_workflow, build_initial_state_from_user_input
+
+QUERIES = [
+    ("extend my contract please", "extend"),
+    ("find a supplier for laptops", "search"),
+    ("I want to talk to a human", "escalate"),
+    ("extend it by one year", "extend"),
+]
+
+
+class SimulatedLLMExecutor(LLMNodeExecutor):
+    """LLM node that takes ``latency`` seconds and answers with the intent in the query."""
+
+    latency = 0.2
+
+    async def execute(self, node_config: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        query = state.get("system", {}).get("userQuery", "")
+        intent = next((intent for text, intent in QUERIES if text == query), "search")
+        output = {"text": intent, "prompt": query, "usage": {}}
+        return {"output": output, "state": self._apply_variable_updates(output, node_config, state)}
+
+
+class SlowToolExecutor(ToolNodeExecutor):
+    """Tool node whose upstream call takes ``latency`` seconds."""
+
+    latency = 0.15
+
+    async def _call_tool(self, tool_id: str, resolved_params: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return await super()._call_tool(tool_id, resolved_params)
+
+
+def _tool(node_id: str, parameters: Dict[str, str], idempotent: bool) -> Dict[str, Any]:
+    return {
+        "id": node_id,
+        "type": "tool",
+        "name": node_id,
+        "config": {"toolId": node_id, "parameters": parameters, "idempotent": idempotent},
+        "variableUpdates": [{"fieldName": "flow.answer", "operation": "set", "value": "{{nodeOutput.toolId}}"}],
+    }
+
+
+def _workflow() -> Dict[str, Any]:
+    nodes = [
+        {"id": "s", "type": "start"},
+        {"id": "o", "type": "output", "config": {}},
+        {
+            "id": "supervisor",
+            "type": "llm",
+            "name": "supervisor",
+            "config": {"prompt": "Classify: {{system.userQuery}}"},
+            "variableUpdates": [{"fieldName": "flow.intent", "operation": "set", "value": "{{nodeOutput.text}}"}],
+        },
+        {
+            "id": "route",
+            "type": "rule",
+            "name": "route",
+            "config": {
+                "rules": [
+                    {
+                        "ruleId": f"r-{intent}",
+                        "logicType": "AND",
+                        "conditions": [{"field": "{{flow.intent}}", "operator": "equals", "value": intent}],
+                    }
+                    for intent in ("extend", "search")
+                ]
+            },
+        },
+        _tool("lookup_contract", {"contract": "{{flow.contractNumber}}"}, idempotent=True),
+        _tool("search_catalog", {"query": "{{system.userQuery}}"}, idempotent=True),
+        _tool("escalate", {"reason": "{{flow.intent}}"}, idempotent=True),
+    ]
+    edges = [
+        {"source": "s", "target": "supervisor"},
+        {"source": "supervisor", "target": "route"},
+        {"source": "route", "target": "lookup_contract", "sourceHandle": "r-extend"},
+        {"source": "route", "target": "search_catalog", "sourceHandle": "r-search"},
+        {"source": "route", "target": "escalate", "sourceHandle": "else"},
+    ]
+    edges += [{"source": tool, "target": "o"} for tool in ("lookup_contract", "search_catalog", "escalate")]
+    return {"agenticWorkflowId": "speculative-prefetch", "name": "speculative-prefetch", "nodes": nodes, "edges": edges}
+
+
+def _initial_state(query: str) -> Dict[str, Any]:
+    return build_initial_state_from_user_input(query, flow={"contractNumber": "CDR0027626"})
+
+
+async def _measure(graph: Any, runs: int) -> Any:
+    latencies, final_states = [], []
+    for index in range(runs):
+        query = QUERIES[index % len(QUERIES)][0]
+        started = time.perf_counter()
+        final_states.append(await ainvoke_workflow(graph, _initial_state(query)))
+        latencies.append((time.perf_counter() - started) * 1000)
+    # Discarded calls finish in the background
+    await asyncio.sleep(SlowToolExecutor.latency * 2)
+    return final_states, statistics.median(latencies)
+
+
+async def run(runs: int, llm_ms: float, tool_ms: float) -> int:
+    SimulatedLLMExecutor.latency = llm_ms / 1000
+    SlowToolExecutor.latency = tool_ms / 1000
+    NodeRegistry.register("llm", SimulatedLLMExecutor)
+    NodeRegistry.register("tool", SlowToolExecutor)
+
+    baseline_graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None, speculative_prefetch=False).build(
+        _workflow()
+    )
+    prefetch_graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None, speculative_prefetch=True).build(
+        _workflow()
+    )
+    baseline_states, baseline_ms = await _measure(baseline_graph, runs)
+    prefetch_stats.__init__()
+    prefetch_states, prefetch_ms = await _measure(prefetch_graph, runs)
+    counters = prefetch_stats.stats()
+
+    mismatches = sum(1 for expected, actual in zip(baseline_states, prefetch_states) if expected != actual)
+    print(f"  {'mode':<12} {'median ms':>10}")
+    print(f"  {'no prefetch':<12} {baseline_ms:>10.1f}")
+    print(f"  {'prefetch':<12} {prefetch_ms:>10.1f}")
+    print(f"Final states identical: {runs - mismatches}/{runs}")
+    print(
+        f"Prefetch: {counters['started']} started, {counters['committed']} committed, {counters['wasted']} wasted, "
+        f"hit rate {counters['hitRate']:.0%}, {counters['hiddenMs'] / max(1, counters['committed']):.0f} ms hidden "
+        f"per committed call"
+    )
+    return mismatches
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=12)
+    parser.add_argument("--llm-ms", type=float, default=200.0)
+    parser.add_argument("--tool-ms", type=float, default=150.0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+    mismatches = asyncio.run(run(args.runs, args.llm_ms, args.tool_ms))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
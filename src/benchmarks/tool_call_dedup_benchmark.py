@@ -0,0 +1,148 @@
+"""
+Benchmark: run-scoped tool call deduplication and loop detection in the agent loop.
+
+A scripted model (``--llm-ms`` per call) drives the LangGraph agent loop of
+``LangGraphAgentWorkflowBuilder`` with slow tools (``--tool-ms`` per call):
+- ``repeat``: the model asks for the same lookup on every turn.
+- ``cycle``: the model alternates between a lookup and a search.
+- ``progress``: the model makes two different calls, repeats the first once, then answers.
+
+Each script runs with ``toolCallDedup`` disabled and enabled (the default). Reported
+per run: model calls, tool executions, deduplicated calls and latency. Loops stop
+after the pattern repeats ``loopRepeats`` (3) times, with one final reply made
+without tools, instead of running to ``maxIterations``. The progress script must
+end with the same reply either way.
+
+Usage (from src/):
+    python -m benchmarks.tool_call_dedup_benchmark [--llm-ms 20] [--tool-ms 50] [--max-iterations 10]
+"""
+
+import argparse
+import logging
+import sys
+import time
+from typing import Any, Dict, List
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+
+import BL.agents.entry_services.build_services.build_agent_workflow_service as agent_service
+from BL.agents.entry_services.build_services.build_agent_workflow_service import LangGraphAgentWorkflowBuilder
+
+LOOKUP = {"name": "lookup_contract", "args": {"contract": "CDR0027626", "fields": ["end", "start"]}}
+SEARCH = {"name": "search_supplier", "args": {"query": "acme"}}
+
+SCRIPTS = {
+    "repeat": lambda turn: [LOOKUP],
+    "cycle": lambda turn: [LOOKUP if turn % 2 == 0 else SEARCH],
+    "progress": lambda turn: [[LOOKUP], [SEARCH], [LOOKUP]][turn] if turn < 3 else [],
+}
+
+
+class ScriptedModel:
+    """Chat model stand-in: tool calls from a script, a plain answer when tools are off."""
+
+    def __init__(self, script: Any, latency: float, tool_choice: str = "auto", counters: Dict[str, int] = None):
+        self.script = script
+        self.latency = latency
+        self.tool_choice = tool_choice
+        self.counters = counters if counters is not None else {"llm": 0}
+
+    def bind_tools(self, tools: List[Any], **kwargs: Any) -> "ScriptedModel":
+        return ScriptedModel(self.script, self.latency, kwargs.get("tool_choice", "auto"), self.counters)
+
+    def invoke(self, messages: List[Any]) -> AIMessage:
+        time.sleep(self.latency)
+        self.counters["llm"] += 1
+        turn = sum(1 for message in messages if isinstance(message, AIMessage))
+        calls = self.script(turn) if self.tool_choice != "none" else []
+        if not calls:
+            results = [message.content for message in messages if isinstance(message, ToolMessage)]
+            return AIMessage(content=f"answer from {len(set(results))} distinct results")
+        return AIMessage(
+            content="",
+            tool_calls=[{**call, "id": f"call_{turn}_{index}"} for index, call in enumerate(calls)],
+        )
+
+
+def _workflow(dedup: bool, max_iterations: int) -> Dict[str, Any]:
+    agent = {
+        "id": "agent",
+        "type": "agent",
+        "name": "contract_agent",
+        "config": {
+            "maxIterations": max_iterations,
+            "toolCallDedup": {"enable": dedup},
+            "promptTemplate": [{"role": "system", "text": "You manage contracts."}],
+            "tools": [],
+        },
+    }
+    return {"nodes": [{"id": "start", "type": "start"}, agent], "edges": [{"source": "start", "target": "agent"}]}
+
+
+def _tools(latency: float, counters: Dict[str, int]) -> List[StructuredTool]:
+    def lookup_contract(contract: str, fields: List[str]) -> str:
+        """Look up contract fields."""
+        time.sleep(latency)
+        counters["tools"] += 1
+        return f"{contract}: {', '.join(fields)}"
+
+    def search_supplier(query: str) -> str:
+        """Search suppliers by name."""
+        time.sleep(latency)
+        counters["tools"] += 1
+        return f"suppliers matching {query}: Acme"
+
+    return [StructuredTool.from_function(lookup_contract), StructuredTool.from_function(search_supplier)]
+
+
+def _run(script_name: str, dedup: bool, args: argparse.Namespace) -> Dict[str, Any]:
+    counters = {"llm": 0, "tools": 0}
+    model = ScriptedModel(SCRIPTS[script_name], args.llm_ms / 1000, counters=counters)
+    agent_service.get_routed_model_instance = lambda *_, **__: model
+    builder = LangGraphAgentWorkflowBuilder(_workflow(dedup, args.max_iterations))
+    builder._build_tools_for_agent = lambda agent_id: _tools(args.tool_ms / 1000, counters)
+    graph = builder.build_root_agent()
+
+    started = time.perf_counter()
+    final_state = graph.invoke({"messages": [], "iteration_count": 0}, {"recursion_limit": 100})
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    messages = final_state["messages"]
+    memoized = sum(1 for m in messages if isinstance(m, ToolMessage) and m.additional_kwargs.get("memoized"))
+    return {
+        "llm": counters["llm"],
+        "tools": counters["tools"],
+        "memoized": memoized,
+        "ms": elapsed_ms,
+        "loop": bool(final_state.get("loop_detected")),
+        "reply": messages[-1].content,
+    }
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-ms", type=float, default=20.0)
+    parser.add_argument("--tool-ms", type=float, default=50.0)
+    parser.add_argument("--max-iterations", type=int, default=10)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+
+    failures = 0
+    print(f"  {'script':<10} {'dedup':<6} {'llm':>4} {'tools':>6} {'memoized':>9} {'ms':>8}  loop stopped")
+    for script_name in SCRIPTS:
+        results = {dedup: _run(script_name, dedup, args) for dedup in (False, True)}
+        for dedup, result in results.items():
+            print(
+                f"  {script_name:<10} {'on' if dedup else 'off':<6} {result['llm']:>4} {result['tools']:>6} "
+                f"{result['memoized']:>9} {result['ms']:>8.1f}  {'yes' if result['loop'] else 'no'}"
+            )
+        if script_name == "progress" and results[False]["reply"] != results[True]["reply"]:
+            failures += 1
+            print(f"  progress replies differ: {results[False]['reply']!r} vs {results[True]['reply']!r}")
+        elif script_name != "progress" and not results[True]["loop"]:
+            failures += 1
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
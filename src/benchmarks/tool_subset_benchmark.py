@@ -0,0 +1,128 @@
+"""
+Benchmark: full tool binding vs BM25-ranked tool subsets on the shipped workflows.
+
+Reports, per agent with tools, the estimated tool-schema prompt tokens sent with
+every LLM call when all tools are bound and when only the top-k ranked tools are,
+plus the cost of ranking itself. With ``--live`` each query is also sent to the
+agent's model both ways and the measured input tokens and latency are reported.
+
+Usage (from src/):
+    python -m benchmarks.tool_subset_benchmark [--top-k 5] [--query "..."] [--live]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from BL.v3.utils.context_window import estimate_tokens
+from BL.v3.utils.tool_ranker import ToolSelector
+
+JSON_DIR = Path(__file__).resolve().parent.parent / "core" / "jsons"
+
+SAMPLE_QUERIES = [
+    "I want to extend contract CDR0027626",
+    "Search supplier Acme Industrial by name",
+    "Selected supplier from the grid, proceed",
+    "Change the contract end date to 31 Dec 2026",
+    "Terminate the agreement with PC-2025.003552 because of poor performance",
+    "Update the supplier bank account and address",
+    "Confirm and submit the summary",
+]
+
+
+def _openai_tool(tool_json: Dict[str, Any]) -> Dict[str, Any]:
+    """Tool as sent to the provider (OpenAI function format)."""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool_json.get("name", ""),
+            "description": tool_json.get("description", ""),
+            "parameters": tool_json.get("config", {}).get("schema") or {"type": "object", "properties": {}},
+        },
+    }
+
+
+def _load_agents() -> List[Dict[str, Any]]:
+    agents = []
+    for path in sorted(JSON_DIR.rglob("*.json")):
+        workflow = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(workflow, dict):
+            continue
+        for node in workflow.get("nodes", []):
+            tools = [t for t in node.get("config", {}).get("tools", []) if t.get("name")]
+            if node.get("type") == "agent" and tools:
+                agents.append({"file": path.relative_to(JSON_DIR).as_posix(), "node": node, "tools": tools})
+    return agents
+
+
+def _invoke_timed(llm: Any, tools: List[Dict[str, Any]], query: str) -> Dict[str, Any]:
+    from langchain_core.messages import HumanMessage
+
+    from BL.v3.utils.token_usage import extract_token_usage
+
+    start = time.perf_counter()
+    response = llm.bind_tools(tools).invoke([HumanMessage(content=query)])
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return {"latencyMs": elapsed_ms, "inputTokens": extract_token_usage(response)["inputTokens"]}
+
+
+def run(top_k: int, queries: List[str], live: bool) -> None:
+    for agent in _load_agents():
+        tools = agent["tools"]
+        schemas = {t["name"]: _openai_tool(t) for t in tools}
+        schema_tokens = {name: estimate_tokens(json.dumps(schema)) for name, schema in schemas.items()}
+        full_tokens = sum(schema_tokens.values())
+
+        start = time.perf_counter()
+        selector = ToolSelector([(t["name"], t.get("description", "")) for t in tools], top_k=top_k)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        node = agent["node"]
+        print(f"\n{agent['file']} :: {node.get('name', node['id'])} ({len(tools)} tools, build {build_ms:.2f} ms)")
+        print(f"  all tools bound: ~{full_tokens} prompt tokens per call")
+
+        llm = None
+        if live:
+            from BL.agents.agents_model.model_selection import get_default_model_name, get_dynamic_model_instance
+
+            model_code = node.get("config", {}).get("model", {}).get("code", "gpt-4.1")
+            llm = get_dynamic_model_instance(get_default_model_name(model_code), temperature=0.0)
+
+        subset_tokens, select_us = [], []
+        for query in queries:
+            start = time.perf_counter()
+            names = selector.select(query)
+            select_us.append((time.perf_counter() - start) * 1e6)
+            tokens = sum(schema_tokens[n] for n in names)
+            subset_tokens.append(tokens)
+            print(f"  top-{top_k} ~{tokens:>6} tokens [{', '.join(names)}] <- {query!r}")
+            if llm is not None:
+                full = _invoke_timed(llm, list(schemas.values()), query)
+                subset = _invoke_timed(llm, [schemas[n] for n in names], query)
+                print(
+                    f"    live: all {full['inputTokens']} tok / {full['latencyMs']:.0f} ms, "
+                    f"subset {subset['inputTokens']} tok / {subset['latencyMs']:.0f} ms"
+                )
+
+        mean_subset = statistics.mean(subset_tokens)
+        print(
+            f"  mean subset ~{mean_subset:.0f} tokens ({100 * (1 - mean_subset / full_tokens):.0f}% smaller), "
+            f"ranking {statistics.mean(select_us):.0f} us/call"
+        )
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--query", action="append", help="Query to rank tools for (repeatable)")
+    parser.add_argument("--live", action="store_true", help="Also call the model (needs API keys)")
+    args = parser.parse_args(argv)
+    run(args.top_k, args.query or SAMPLE_QUERIES, args.live)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
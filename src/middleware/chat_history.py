@@ -0,0 +1,13 @@
+from fastapi import FastAPI
+
+from DAL.chat_history_store import aclose_chat_history_store, chat_history_enabled
+
+
+def register_chat_history(app: FastAPI) -> None:
+    """
+    Write out chat history still buffered by the write-behind store when the app
+    shuts down. Disabled with V3_CHAT_HISTORY=0.
+    """
+    if not chat_history_enabled():
+        return
+    app.add_event_handler("shutdown", aclose_chat_history_store)
@@ -1,13 +1,25 @@
 from fastapi import FastAPI
 
 
+from middleware.chat_history import register_chat_history
+from middleware.run_accounting_middleware import register_run_accounting
+from middleware.workflow_hot_reload import register_workflow_hot_reload
 from routing import modules_injection
 
 def register_middlewares(app: FastAPI) -> None:
     """
     Register middleware for the given FastAPI application.
     """
-    
+
+    # Per-run node accounting and Server-Timing header
+    register_run_accounting(app)
+
+    # Optional hot reload of workflow JSON files
+    register_workflow_hot_reload(app)
+
+    # Write out buffered chat history on shutdown
+    register_chat_history(app)
+
     # Include the API routes
     for router in modules_injection.routers:
         app.include_router(router)
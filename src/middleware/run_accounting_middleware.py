@@ -0,0 +1,39 @@
+from typing import AsyncIterator
+
+from fastapi import FastAPI, Request
+
+from BL.v3.accounting.run_accounting import RunAccounting, bind_run_accounting, workflow_histograms
+
+
+def register_run_accounting(app: FastAPI) -> None:
+    """
+    Account every request as one run: node executions record into it, and the
+    response gets a Server-Timing header (and X-Run-Cache when the run cache was
+    consulted); the run is rolled up into the per-workflow histograms under the
+    workflow label the endpoint sets (the URL path otherwise). Streaming
+    responses finish after the headers are sent: they get no headers and are
+    rolled up once the body has been sent.
+    """
+
+    @app.middleware("http")
+    async def run_accounting_middleware(request: Request, call_next):
+        run = RunAccounting(workflow=request.url.path)
+        with bind_run_accounting(run):
+            response = await call_next(request)
+        if run.cache_status is not None:
+            response.headers["X-Run-Cache"] = run.cache_status
+        if run.records:
+            response.headers["Server-Timing"] = run.server_timing()
+            workflow_histograms.observe(run)
+        elif hasattr(response, "body_iterator"):
+            response.body_iterator = _observe_when_sent(response.body_iterator, run)
+        return response
+
+
+async def _observe_when_sent(body: AsyncIterator[bytes], run: RunAccounting) -> AsyncIterator[bytes]:
+    """Pass a streamed body through, then roll its run up (no-op when no node ran)."""
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        workflow_histograms.observe(run)
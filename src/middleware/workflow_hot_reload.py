@@ -0,0 +1,20 @@
+import os
+
+from fastapi import FastAPI
+
+from BL.v3.graph.graph_registry import WorkflowWatcher, get_graph_registry
+
+
+def register_workflow_hot_reload(app: FastAPI) -> None:
+    """
+    Watch the workflow JSON directories and hot reload changed workflows while the
+    app runs. Enabled with V3_WORKFLOW_WATCH=1; V3_WORKFLOW_WATCH_INTERVAL sets the
+    polling interval in seconds (default 2).
+    """
+    if os.getenv("V3_WORKFLOW_WATCH", "").lower() not in ("1", "true", "yes"):
+        return
+    watcher = WorkflowWatcher(
+        get_graph_registry(), interval=float(os.getenv("V3_WORKFLOW_WATCH_INTERVAL", "2"))
+    )
+    app.add_event_handler("startup", watcher.start)
+    app.add_event_handler("shutdown", watcher.stop)
@@ -0,0 +1,55 @@
+"""Shared fixtures. Run from src/: ``python -m pytest tests``."""
+
+import itertools
+import os
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+# Imports below build agents and stores; keep them offline and out of the source tree
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("V3_CHAT_HISTORY", "0")
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import BL.v3.nodes.executors.agent_executor as agent_executor
+import BL.v3.nodes.executors.llm_executor as llm_executor
+
+
+class StubChatModel(GenericFakeChatModel):
+    """Fake chat model that accepts tools; ``bind_tools`` records the bound tool names."""
+
+    stub: Any = None
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "StubChatModel":
+        self.stub.bound_tools.append([tool["function"]["name"] for tool in tools])
+        return self
+
+
+class StubModel:
+    """
+    Stands in for ``get_routed_model_instance``: every model answers ``reply``, calling
+    the tool named ``tool_call`` when it is set.
+    """
+
+    def __init__(self, reply: str = "ok"):
+        self.reply = reply
+        self.tool_call: Optional[str] = None
+        self.calls: List[Dict[str, Any]] = []
+        self.bound_tools: List[List[str]] = []
+
+    def __call__(self, model_config: Dict[str, Any], *args: Any, **kwargs: Any) -> StubChatModel:
+        self.calls.append(model_config)
+        tool_calls = [{"name": self.tool_call, "args": {}, "id": "call-1"}] if self.tool_call else []
+        message = AIMessage(content=self.reply, tool_calls=tool_calls)
+        return StubChatModel(messages=itertools.repeat(message), stub=self)
+
+
+@pytest.fixture
+def stub_model(monkeypatch) -> StubModel:
+    """Route v3 agent and LLM nodes to a StubModel."""
+    model = StubModel()
+    monkeypatch.setattr(agent_executor, "get_routed_model_instance", model)
+    monkeypatch.setattr(llm_executor, "get_routed_model_instance", model)
+    return model
@@ -0,0 +1,117 @@
+"""Agent routing: the route comes from what the agent produced, and the pre-router keeps learning."""
+
+import asyncio
+import threading
+
+import BL.v3.routing.pre_router as pre_router
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.nodes.executors.agent_executor import AgentNodeExecutor
+from BL.v3.routing.pre_router import PreRouter, RoutingDecisionLog
+from BL.v3.workflow_builder import ainvoke_workflow, build_initial_state_from_user_input
+
+WORKFLOW = {
+    "agenticWorkflowId": "agent-routing",
+    "name": "agent-routing",
+    "nodes": [
+        {"id": "start", "type": "start"},
+        {"id": "out", "type": "output", "config": {}},
+        {
+            "id": "intake",
+            "type": "agent",
+            "name": "intake",
+            "config": {"tools": [{"_id": "t-ext", "name": "contract_extension", "description": "Extend a contract"}]},
+        },
+        {
+            "id": "ext",
+            "type": "variable",
+            "name": "extension_assistant",
+            "config": {},
+            "variableUpdates": [{"fieldName": "flow.handledBy", "operation": "set", "value": "extension"}],
+        },
+    ],
+    "edges": [
+        {"source": "start", "target": "intake"},
+        {"source": "intake", "target": "out"},
+        {"source": "intake", "target": "ext", "type": "handoff", "data": {"toolId": "t-ext"}},
+        {"source": "ext", "target": "out"},
+    ],
+}
+
+
+def _run(query: str):
+    async def run():
+        graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None).build(WORKFLOW)
+        return await ainvoke_workflow(graph, build_initial_state_from_user_input(query))
+
+    return asyncio.run(run())
+
+
+def test_handoff_tool_call_routes_to_its_target(stub_model):
+    stub_model.tool_call = "contract_extension"
+    state = _run("extend contract CDR0027626")
+
+    assert state["nodes"]["intake"]["route"] == "contract_extension"
+    assert state["flow"]["handledBy"] == "extension"
+
+
+def test_without_tool_call_the_regular_edge_is_taken(stub_model):
+    state = _run("hello")
+
+    assert "route" not in state["nodes"]["intake"]
+    assert "handledBy" not in state["flow"]
+
+
+def test_current_agent_name_update_is_the_route(stub_model):
+    stub_model.reply = "extension_assistant"
+    node = {
+        "id": "intake",
+        "type": "agent",
+        "name": "intake",
+        "config": {},
+        "variableUpdates": [{"fieldName": "flow.currentAgentName", "operation": "set", "value": "{{nodeOutput.text}}"}],
+    }
+    result = asyncio.run(AgentNodeExecutor().execute(node, build_initial_state_from_user_input("extend it")))
+
+    assert result["output"]["route"] == "extension_assistant"
+
+
+def test_pre_router_retrains_from_llm_decisions(tmp_path):
+    router = PreRouter(decision_log=RoutingDecisionLog(tmp_path / "decisions.jsonl"), min_examples=4, retrain_every=4)
+    assert router.decide("extend my contract") is None
+
+    for query, route in [
+        ("extend my contract", "extension"),
+        ("please extend the contract end date", "extension"),
+        ("terminate the contract", "termination"),
+        ("end the agreement early, terminate it", "termination"),
+    ]:
+        router.record_llm_decision(query, route)
+    router.wait_for_retrain(5)
+
+    assert router.stats()["retrains"] == 1
+    assert router.classifier.predict("extend contract")[0] == "extension"
+
+
+def test_decision_log_and_first_training_stay_off_the_callers_thread(tmp_path, monkeypatch):
+    opened = []
+
+    def recording_open(file, mode="r", *args, **kwargs):
+        opened.append((mode, threading.get_ident()))
+        return open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr(pre_router, "open", recording_open, raising=False)
+    path = tmp_path / "decisions.jsonl"
+    log = RoutingDecisionLog(path, flush_interval_ms=60000)
+    for index in range(4):
+        log.append(f"extend contract {index}", "extension", "llm")
+        log.append(f"terminate contract {index}", "termination", "llm")
+    assert not path.exists()
+    assert log.flush(5) and len(path.read_text(encoding="utf-8").splitlines()) == 8
+
+    config = {"classifier": {"enable": True, "decisionLog": str(path), "minExamples": 4}}
+    router = PreRouter.from_config(config)
+    router.wait_for_retrain(5)
+    log.close()
+
+    assert router.classifier.predict("extend contract")[0] == "extension"
+    assert opened and all(thread != threading.get_ident() for _, thread in opened)
@@ -0,0 +1,55 @@
+"""Generated modules are only ever built from the generated source, in a private directory."""
+
+import asyncio
+import json
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from BL.v3.graph.workflow_codegen import GeneratedProgram, private_dir
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.nodes.register_nodes import register_all_nodes
+
+WORKFLOW = Path(__file__).resolve().parents[1] / "core" / "jsons" / "complex_agents" / "supplier_profile_update_assistant.json"
+
+
+def _build(directory: Path) -> GeneratedProgram:
+    register_all_nodes()
+    definition = json.loads(WORKFLOW.read_text(encoding="utf-8"))
+    graph = asyncio.run(WorkflowGraphBuilder(codegen=True).build(definition))
+    program = graph.native_program
+    assert isinstance(program, GeneratedProgram) and program.path.parent == directory
+    return program
+
+
+def test_planted_module_is_not_executed(stub_model, monkeypatch, tmp_path):
+    directory = tmp_path / "codegen"
+    monkeypatch.setenv("V3_CODEGEN_DIR", str(directory))
+    path = _build(directory).path
+    generated = path.read_text(encoding="utf-8")
+
+    # Same name and fingerprint, plus code of someone else's choosing (and stale bytecode)
+    marker = tmp_path / "executed"
+    path.write_text(f"open({str(marker)!r}, 'w').close()\n" + generated, encoding="utf-8")
+    (directory / "__pycache__").mkdir()
+    (directory / "__pycache__" / f"{path.stem}.cpython-311.pyc").write_bytes(b"not bytecode")
+
+    assert _build(directory).path == path
+    assert not marker.exists()
+    assert path.read_text(encoding="utf-8") == generated
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_codegen_directory_is_private(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o777)
+    os.chmod(shared, 0o777)
+    assert stat.S_IMODE(os.stat(private_dir(shared)).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(private_dir(tmp_path / "new" / "dir")).st_mode) == 0o700
+
+    link = tmp_path / "link"
+    link.symlink_to(shared, target_is_directory=True)
+    with pytest.raises(ValueError):
+        private_dir(link)
@@ -0,0 +1,77 @@
+"""The context window keeps the prompt, summary included, within the node's budget."""
+
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from BL.v3.nodes.executors.llm_executor import LLMNodeExecutor
+from BL.v3.utils.context_window import ContextWindowManager, estimate_messages_tokens
+
+BUDGET = 200
+
+
+def _conversation(turns: int = 12):
+    messages = [{"role": "system", "content": "You answer questions about contracts."}]
+    for index in range(turns):
+        messages.append({"role": "user", "content": f"Question {index} about contract CDR{index:07d}. " * 3})
+        messages.append({"role": "assistant", "content": f"Answer {index}: the contract ends in 2027. " * 3})
+    return messages
+
+
+class Summarizer:
+    """Returns ``replies`` in turn and records the requested caps."""
+
+    def __init__(self, *replies: str):
+        self.replies = list(replies)
+        self.caps = []
+
+    def __call__(self, previous_summary, messages, max_tokens):
+        self.caps.append(max_tokens)
+        return self.replies.pop(0)
+
+    async def acall(self, previous_summary, messages, max_tokens):
+        return self(previous_summary, messages, max_tokens)
+
+
+def test_oversized_summary_is_summarized_again_to_the_room_left():
+    summarizer = Summarizer("fact " * 400, "short summary")
+    fitted, record, stats = ContextWindowManager(BUDGET).fit(_conversation(), None, summarizer)
+
+    assert len(summarizer.caps) == 2 and summarizer.caps[1] < summarizer.caps[0]
+    assert record["text"] == "short summary" and not stats["summaryTruncated"]
+    assert stats["tokensAfter"] == estimate_messages_tokens(fitted) <= BUDGET
+
+
+def test_summary_that_still_does_not_fit_is_truncated_when_sent():
+    summarizer = Summarizer("fact " * 400, "fact " * 300)
+    fitted, record, stats = asyncio.run(ContextWindowManager(BUDGET).afit(_conversation(), None, summarizer.acall))
+
+    assert stats["summaryTruncated"] and stats["tokensAfter"] <= BUDGET
+    # The stored summary stays whole; only the copy sent is cut
+    assert record["text"] == "fact " * 300
+    assert any("Summary of the earlier conversation" in str(m.content) for m in fitted if hasattr(m, "content"))
+
+
+def test_summary_that_fits_is_not_summarized_again():
+    summarizer = Summarizer("short summary")
+    _, record, stats = ContextWindowManager(BUDGET).fit(_conversation(), None, summarizer)
+
+    assert len(summarizer.caps) == 1 and record["text"] == "short summary" and stats["summarized"]
+
+
+class SummaryModel:
+    async def ainvoke(self, messages):
+        return AIMessage(content="short summary")
+
+
+def test_summaries_are_scoped_by_workflow():
+    node = {"id": "answer", "config": {"contextWindow": {"maxTokens": BUDGET}}}
+    executor = LLMNodeExecutor()
+    executor.workflow_key = "wf-a:2"
+    state = {"metadata": {"contextSummaries": {"answer": {"text": "other workflow", "coveredUpto": 3}}}}
+
+    _, state, _ = asyncio.run(executor._fit_context_window(node, _conversation(), state, SummaryModel()))
+
+    summaries = state["metadata"]["contextSummaries"]
+    assert summaries["wf-a:2:answer"]["text"] == "short summary"
+    assert summaries["answer"]["text"] == "other workflow"
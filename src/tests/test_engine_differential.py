@@ -0,0 +1,149 @@
+"""Whole workflows end in the same state on LangGraph, the native interpreter and generated modules."""
+
+import asyncio
+import copy
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from BL.v3.graph.workflow_codegen import GeneratedProgram
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.workflow_builder import build_initial_state_from_user_input
+
+JSON_DIR = Path(__file__).resolve().parents[1] / "core" / "jsons"
+SHIPPED = sorted(
+    path.relative_to(JSON_DIR).as_posix()
+    for path in JSON_DIR.rglob("*.json")
+    if "nodes" in json.loads(path.read_text(encoding="utf-8"))
+)
+
+# Acyclic workflow: an agent that may hand off to the output, then a rule-routed branch
+HANDOFF_WORKFLOW = {
+    "agenticWorkflowId": "engine-differential",
+    "name": "engine-differential",
+    "nodes": [
+        {"id": "start", "type": "start"},
+        {"id": "out", "type": "output", "config": {}},
+        {
+            "id": "triage",
+            "type": "agent",
+            "name": "triage",
+            "config": {"systemPrompt": "Triage {{system.userQuery}}", "tools": [{"_id": "t1", "name": "finish"}]},
+            "variableUpdates": [{"fieldName": "flow.triaged", "operation": "set", "value": "{{nodeOutput.text}}"}],
+        },
+        {
+            "id": "review",
+            "type": "llm",
+            "name": "review",
+            "config": {"prompt": "Review {{flow.triaged}}"},
+            "variableUpdates": [{"fieldName": "flow.review", "operation": "set", "value": "{{nodeOutput.text}}"}],
+        },
+        {
+            "id": "check",
+            "type": "rule",
+            "config": {
+                "rules": [
+                    {
+                        "ruleId": "r-ok",
+                        "logicType": "AND",
+                        "conditions": [{"field": "{{flow.review}}", "operator": "equals", "value": "ok"}],
+                    },
+                    {"ruleId": "r-else", "logicType": "default", "conditions": []},
+                ]
+            },
+        },
+        {
+            "id": "mark",
+            "type": "variable",
+            "config": {},
+            "variableUpdates": [{"fieldName": "flow.approved", "operation": "set", "value": "yes"}],
+        },
+    ],
+    "edges": [
+        {"source": "start", "target": "triage"},
+        {"source": "triage", "target": "review"},
+        {"source": "triage", "target": "out", "type": "handoff", "data": {"toolId": "t1"}},
+        {"source": "review", "target": "check"},
+        {"source": "check", "target": "mark", "sourceHandle": "r-ok"},
+        {"source": "check", "target": "out", "sourceHandle": "r-else"},
+        {"source": "mark", "target": "out"},
+    ],
+}
+
+
+def _initial_states() -> List[Dict[str, Any]]:
+    return [
+        build_initial_state_from_user_input("I want to extend contract CDR0027626"),
+        build_initial_state_from_user_input(
+            "Selected supplier from the grid", flow={"isPvRendered": True, "selectedAgentId": "contract-extension"}
+        ),
+        build_initial_state_from_user_input(
+            "", flow={"partialViewData": [{"supplier": "Acme"}]}, interface_inputs={"partialViewData": "[]"}
+        ),
+    ]
+
+
+async def _outcomes(definition: Dict[str, Any], monkeypatch) -> Dict[str, List[Any]]:
+    """Final state (or exception type) per engine and fusion setting, for each initial state."""
+    outcomes: Dict[str, List[Any]] = {}
+    for fuse in (False, True):
+        graph = await WorkflowGraphBuilder(fuse_nodes=fuse, codegen=True).build(copy.deepcopy(definition))
+        program = graph.native_program
+        engines = {"langgraph": ("0", graph.ainvoke)}
+        if isinstance(program, GeneratedProgram):
+            engines["native"] = ("1", program.program.ainvoke)
+            engines["generated"] = ("1", program.ainvoke)
+        for engine, (native_setting, invoke) in engines.items():
+            # Embedded child workflows follow the same engine setting
+            monkeypatch.setenv("V3_NATIVE_ENGINE", native_setting)
+            results = []
+            for state in _initial_states():
+                try:
+                    results.append(list((await invoke(state)).items()))
+                except Exception as ex:
+                    results.append(type(ex).__name__)
+            outcomes[f"{engine} fuse={fuse}"] = results
+    return outcomes
+
+
+def _assert_same(outcomes: Dict[str, List[Any]]) -> None:
+    (reference_name, reference), *others = outcomes.items()
+    for name, results in others:
+        assert results == reference, f"{name} differs from {reference_name}"
+
+
+@pytest.mark.parametrize("workflow_file", SHIPPED)
+def test_shipped_workflow_same_final_state_on_every_engine(workflow_file, stub_model, monkeypatch, tmp_path):
+    monkeypatch.setenv("V3_CODEGEN_DIR", str(tmp_path))
+    definition = json.loads((JSON_DIR / workflow_file).read_text(encoding="utf-8"))
+    outcomes = asyncio.run(_outcomes(definition, monkeypatch))
+    _assert_same(outcomes)
+    assert all(isinstance(result, list) for result in outcomes["langgraph fuse=False"])
+
+
+def test_acyclic_shipped_workflow_runs_from_generated_module(stub_model, monkeypatch, tmp_path):
+    monkeypatch.setenv("V3_CODEGEN_DIR", str(tmp_path))
+    path = JSON_DIR / "complex_agents" / "supplier_profile_update_assistant.json"
+    graph = asyncio.run(WorkflowGraphBuilder(codegen=True).build(json.loads(path.read_text(encoding="utf-8"))))
+    assert isinstance(graph.native_program, GeneratedProgram)
+
+
+def test_handoff_workflow_same_final_state_on_every_engine(stub_model, monkeypatch, tmp_path):
+    monkeypatch.setenv("V3_CODEGEN_DIR", str(tmp_path))
+    outcomes = asyncio.run(_outcomes(HANDOFF_WORKFLOW, monkeypatch))
+    engines = ("langgraph", "native", "generated")
+    assert set(outcomes) == {f"{engine} fuse={fuse}" for engine in engines for fuse in (False, True)}
+    _assert_same(outcomes)
+    final_flow = dict(outcomes["generated fuse=True"][0])["flow"]
+    assert final_flow["review"] == "ok" and final_flow["approved"] == "yes"
+
+
+def test_handoff_taken_on_every_engine(stub_model, monkeypatch, tmp_path):
+    monkeypatch.setenv("V3_CODEGEN_DIR", str(tmp_path))
+    stub_model.tool_call = "finish"
+    outcomes = asyncio.run(_outcomes(HANDOFF_WORKFLOW, monkeypatch))
+    _assert_same(outcomes)
+    final_state = dict(outcomes["generated fuse=True"][0])
+    assert final_state["nodes"]["triage"]["route"] == "finish" and "review" not in final_state["flow"]
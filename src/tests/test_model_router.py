@@ -0,0 +1,104 @@
+"""Circuit breaker transitions and SLO reroutes of the model fallback router."""
+
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from BL.agents.agents_model import model_selection
+from BL.agents.agents_model.model_router import CLOSED, HALF_OPEN, OPEN, ModelRouter, get_routed_model_instance
+
+CHAIN = {"code": "gpt-4.1", "fallbacks": ["gpt-4.1-mini"]}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeModel:
+    """Chat model that answers with its code, or raises when ``fail`` is set."""
+
+    def __init__(self, code: str):
+        self.code = code
+        self.fail = False
+        self.calls = 0
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError(f"{self.code} unavailable")
+        return AIMessage(content=self.code)
+
+
+def _routed(router: ModelRouter, slo_p95_ms=None):
+    models = {code: FakeModel(code) for code in ("gpt-4.1", "gpt-4.1-mini")}
+    config = {**CHAIN, "sloP95Ms": slo_p95_ms} if slo_p95_ms else CHAIN
+    routed = get_routed_model_instance(config, router=router, factory=lambda code, temperature: models[code])
+    return routed, models
+
+
+def test_circuit_opens_probes_half_open_and_closes():
+    clock = FakeClock()
+    router = ModelRouter(failure_threshold=3, cooldown_seconds=30, clock=clock)
+    routed, models = _routed(router)
+    models["gpt-4.1"].fail = True
+
+    for _ in range(3):
+        assert asyncio.run(routed.ainvoke("hi")).content == "gpt-4.1-mini"
+    assert router.health("gpt-4.1").state == OPEN
+    assert router.stats()["fallbacks"] == 3
+
+    # Open: skipped without a call until the cooldown has passed
+    asyncio.run(routed.ainvoke("hi"))
+    assert models["gpt-4.1"].calls == 3
+
+    # Half-open: one probe; a failed probe reopens the circuit
+    clock.now = 31
+    assert router.order(["gpt-4.1", "gpt-4.1-mini"]) == ["gpt-4.1", "gpt-4.1-mini"]
+    assert router.health("gpt-4.1").state == HALF_OPEN
+    assert router.order(["gpt-4.1", "gpt-4.1-mini"]) == ["gpt-4.1-mini"]
+    router.record("gpt-4.1", 5.0, ok=False)
+    assert router.health("gpt-4.1").state == OPEN
+
+    # A successful probe closes it with a fresh window
+    clock.now = 62
+    models["gpt-4.1"].fail = False
+    assert asyncio.run(routed.ainvoke("hi")).content == "gpt-4.1"
+    health = router.health("gpt-4.1")
+    assert health.state == CLOSED and len(health.samples) == 1 and health.consecutive_failures == 0
+
+
+def test_slo_breach_reroutes_and_is_counted():
+    clock = FakeClock()
+    router = ModelRouter(min_samples=5, cooldown_seconds=30, clock=clock)
+    for _ in range(5):
+        router.record("gpt-4.1", 900.0, ok=True)
+    routed, models = _routed(router, slo_p95_ms=500)
+
+    assert asyncio.run(routed.ainvoke("hi")).content == "gpt-4.1-mini"
+    stats = router.stats()
+    assert stats["sloReroutes"] == 1 and stats["fallbacks"] == 0
+    assert models["gpt-4.1"].calls == 0
+
+    # Without an SLO the preferred model keeps its place and nothing is counted
+    plain, _ = _routed(router)
+    assert asyncio.run(plain.ainvoke("hi")).content == "gpt-4.1"
+    assert router.stats()["sloReroutes"] == 1
+
+    # After the cooldown the slow model is probed again
+    clock.now = 31
+    assert asyncio.run(routed.ainvoke("hi")).content == "gpt-4.1"
+    assert router.stats()["sloReroutes"] == 1
+
+
+def test_default_factory_is_looked_up_at_call_time(monkeypatch):
+    created = []
+    monkeypatch.setattr(
+        model_selection, "get_dynamic_model_instance", lambda code, temperature=0.0: created.append(code) or FakeModel(code)
+    )
+    routed = get_routed_model_instance(CHAIN, router=ModelRouter())
+    assert created == ["gpt-4.1", "gpt-4.1-mini"]
+    assert asyncio.run(routed.ainvoke("hi")).content == "gpt-4.1"
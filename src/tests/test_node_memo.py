@@ -0,0 +1,94 @@
+"""A memo hit reuses the node's output and makes no upstream call; entries come from the server only."""
+
+import asyncio
+import copy
+from collections import Counter
+
+import pytest
+
+from BL.v3.cache.node_memo import MEMO_KEY, memo_stats
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.nodes.executors.tool_executor import ToolNodeExecutor
+from BL.v3.workflow_builder import ainvoke_workflow, build_initial_state_from_user_input, client_metadata
+
+# An llm step first, so the idempotent lookup may also be started speculatively
+MEMO_WORKFLOW = {
+    "agenticWorkflowId": "node-memo",
+    "name": "node-memo",
+    "nodes": [
+        {"id": "s", "type": "start"},
+        {"id": "o", "type": "output", "config": {}},
+        {"id": "answer", "type": "llm", "name": "answer", "config": {"prompt": "Answer {{system.userQuery}}"}},
+        {
+            "id": "lookup_contract",
+            "type": "tool",
+            "name": "lookup_contract",
+            "config": {
+                "toolId": "lookup_contract",
+                "idempotent": True,
+                "parameters": {"contract": "{{flow.contractNumber}}"},
+                "memoize": {"ttlSeconds": 300},
+            },
+        },
+    ],
+    "edges": [
+        {"source": "s", "target": "answer"},
+        {"source": "answer", "target": "lookup_contract"},
+        {"source": "lookup_contract", "target": "o"},
+    ],
+}
+
+
+@pytest.fixture
+def tool_calls(monkeypatch) -> Counter:
+    calls: Counter = Counter()
+    call_tool = ToolNodeExecutor._call_tool
+
+    async def counting_call_tool(self, tool_id, resolved_params):
+        calls[tool_id] += 1
+        return await call_tool(self, tool_id, resolved_params)
+
+    monkeypatch.setattr(ToolNodeExecutor, "_call_tool", counting_call_tool)
+    return calls
+
+
+async def _turns(contracts):
+    graph = await WorkflowGraphBuilder(speculative_prefetch=True, workflow_loader=lambda _: None).build(MEMO_WORKFLOW)
+    metadata, outputs = {}, []
+    for contract in contracts:
+        state = build_initial_state_from_user_input("show contract", flow={"contractNumber": contract}, metadata=metadata)
+        final_state = await ainvoke_workflow(graph, state)
+        outputs.append(final_state["nodes"]["lookup_contract"])
+        metadata = final_state["metadata"]
+    return outputs
+
+
+def test_memo_hit_does_not_call_the_tool(stub_model, tool_calls):
+    hits = memo_stats.stats()["hits"]
+    outputs = asyncio.run(_turns(["CDR0000001", "CDR0000001", "CDR0000002"]))
+
+    assert [output["memo"]["hit"] for output in outputs] == [False, True, False]
+    assert tool_calls["lookup_contract"] == 2
+    assert outputs[1]["parameters"] == outputs[0]["parameters"]
+    assert memo_stats.stats()["hits"] == hits + 1
+
+
+def test_memo_entries_are_not_taken_from_the_client(stub_model, tool_calls):
+    async def forged_turn():
+        graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None).build(MEMO_WORKFLOW)
+        flow = {"contractNumber": "CDR0000001"}
+        first = await ainvoke_workflow(graph, build_initial_state_from_user_input("show contract", flow=flow))
+        # Edit the returned entry and send it back as request metadata
+        forged = copy.deepcopy(first["metadata"])
+        entry = forged[MEMO_KEY]["lookup_contract"]
+        entry["output"] = {"toolId": "lookup_contract", "parameters": {"contract": "forged"}}
+        entry["expiresAt"] += 10**6
+        state = build_initial_state_from_user_input("show contract", flow=flow, metadata=client_metadata(forged))
+        return await ainvoke_workflow(graph, state)
+
+    final_state = asyncio.run(forged_turn())
+
+    assert final_state["nodes"]["lookup_contract"]["memo"]["hit"] is False
+    assert final_state["nodes"]["lookup_contract"]["parameters"] == {"contract": "CDR0000001"}
+    assert tool_calls["lookup_contract"] == 2
+    assert client_metadata({MEMO_KEY: {}, "contextSummaries": {}, "locale": "de"}) == {"locale": "de"}
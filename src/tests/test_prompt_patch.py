@@ -0,0 +1,96 @@
+"""A prompt-only hot reload swaps in copies of the nodes and a new run cache version."""
+
+import asyncio
+import json
+import os
+
+from langchain_core.messages import AIMessage
+
+import BL.v3.nodes.executors.llm_executor as llm_executor
+from BL.v3.graph.graph_registry import WorkflowGraphRegistry
+from BL.v3.nodes.register_nodes import register_all_nodes
+from BL.v3.repository.workflow_repository import WorkflowRepository
+from BL.v3.workflow_builder import ainvoke_workflow, build_initial_state_from_user_input
+
+
+def _child(prompt: str):
+    def llm(node_id):
+        return {
+            "id": node_id,
+            "type": "llm",
+            "name": node_id,
+            "config": {"prompt": "{{system.userQuery}}", "promptTemplate": [{"role": "system", "text": f"{prompt} {node_id}"}]},
+        }
+
+    return {
+        "agenticWorkflowId": "prompt-child",
+        "name": "prompt-child",
+        "nodes": [{"id": "s", "type": "start"}, llm("first"), llm("second"), {"id": "o", "type": "output", "config": {}}],
+        "edges": [{"source": "s", "target": "first"}, {"source": "first", "target": "second"}, {"source": "second", "target": "o"}],
+    }
+
+
+PARENT = {
+    "agenticWorkflowId": "prompt-parent",
+    "name": "prompt-parent",
+    "nodes": [
+        {"id": "s", "type": "start"},
+        {"id": "child", "type": "workflow", "name": "child", "config": {"agenticWorkflowId": "prompt-child"}},
+        {"id": "o", "type": "output", "config": {}},
+    ],
+    "edges": [{"source": "s", "target": "child"}, {"source": "child", "target": "o"}],
+}
+
+
+class PausingModel:
+    """Records system prompts; the first call waits until ``resume`` is set."""
+
+    def __init__(self):
+        self.systems = []
+        self.called = asyncio.Event()
+        self.resume = asyncio.Event()
+
+    async def ainvoke(self, messages, **kwargs):
+        self.systems.append(messages[0].content)
+        if not self.called.is_set():
+            self.called.set()
+            await self.resume.wait()
+        return AIMessage(content="ok")
+
+
+def _write(path, definition, mtime):
+    path.write_text(json.dumps(definition), encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_prompt_patch_applies_from_the_next_run(monkeypatch, tmp_path):
+    register_all_nodes()
+    child_path = tmp_path / "prompt_child.json"
+    _write(child_path, _child("Old"), 10**18)
+    _write(tmp_path / "prompt_parent.json", PARENT, 10**18)
+    registry = WorkflowGraphRegistry(WorkflowRepository([tmp_path], refresh_interval=None))
+
+    async def scenario():
+        model = PausingModel()
+        monkeypatch.setattr(llm_executor, "get_routed_model_instance", lambda *args, **kwargs: model)
+        child = await registry.aget("prompt-child")
+        parent = await registry.aget("prompt-parent")
+        versions = (child.run_cache_policy.version, parent.run_cache_policy.version)
+
+        state = build_initial_state_from_user_input("hello")
+        in_flight = asyncio.create_task(ainvoke_workflow(child, state))
+        await model.called.wait()
+        _write(child_path, _child("New"), 10**18 + 10**9)
+        report = await registry.areload()
+        model.resume.set()
+        await in_flight
+        await ainvoke_workflow(child, state)
+        return model.systems, report, versions, child, parent
+
+    systems, report, versions, child, parent = asyncio.run(scenario())
+
+    assert report["patched"] == ["prompt-child"] and not report["rebuilt"]
+    # The run that started before the reload finished on the old prompt
+    assert systems == ["Old first", "Old second", "New first", "New second"]
+    assert child.run_cache_policy.version != versions[0]
+    assert parent.run_cache_policy.version != versions[1]
@@ -0,0 +1,58 @@
+"""Routing caches are scoped to one node of one workflow version."""
+
+import asyncio
+import copy
+
+from BL.v3.cache.routing_cache import routing_cache_stats
+from BL.v3.graph.workflow_graph_builder import WorkflowGraphBuilder
+from BL.v3.workflow_builder import ainvoke_workflow, build_initial_state_from_user_input
+
+
+def _workflow(workflow_id: str, version: str):
+    return {
+        "agenticWorkflowId": workflow_id,
+        "version": version,
+        "name": workflow_id,
+        "nodes": [
+            {"id": "start", "type": "start"},
+            {"id": "out", "type": "output", "config": {}},
+            {"id": "intake", "type": "agent", "name": "intake", "config": {"routingCache": {"enable": True}}},
+        ],
+        "edges": [{"source": "start", "target": "intake"}, {"source": "intake", "target": "out"}],
+    }
+
+
+def test_same_node_id_in_other_workflows_and_versions_has_its_own_cache(stub_model):
+    async def run(workflow, reply):
+        stub_model.reply = reply
+        graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None).build(copy.deepcopy(workflow))
+        state = await ainvoke_workflow(graph, build_initial_state_from_user_input("extend contract CDR0027626"))
+        return state["messages"][-1]["content"]
+
+    async def scenario():
+        first = await run(_workflow("scope-a", "v1"), "route a")
+        other_workflow = await run(_workflow("scope-b", "v1"), "route b")
+        other_version = await run(_workflow("scope-a", "v2"), "route a2")
+        cached = await run(_workflow("scope-a", "v1"), "not called")
+        return first, other_workflow, other_version, cached
+
+    assert asyncio.run(scenario()) == ("route a", "route b", "route a2", "route a")
+    assert {"scope-a:v1:intake", "scope-b:v1:intake", "scope-a:v2:intake"} <= set(routing_cache_stats())
+
+
+def test_verification_compares_the_routing_decision_only(stub_model):
+    workflow = _workflow("verify-route", "v1")
+    intake = workflow["nodes"][2]
+    intake["config"]["routingCache"]["verifySampleRate"] = 1.0
+    intake["config"]["variableUpdates"] = [{"fieldName": "flow.currentAgentName", "value": "billing"}]
+
+    async def scenario():
+        graph = await WorkflowGraphBuilder(workflow_loader=lambda _: None).build(workflow)
+        for reply, tool_call in (("Billing can help.", None), ("Let me pass you to billing.", None), ("Sales.", "to_sales")):
+            stub_model.reply, stub_model.tool_call = reply, tool_call
+            await ainvoke_workflow(graph, build_initial_state_from_user_input("extend contract CDR0027626"))
+
+    asyncio.run(scenario())
+    stats = routing_cache_stats()["verify-route:v1:intake"]
+    # Other wording with the same route is not a false positive; another handoff is
+    assert stats["hits"] == 2 and stats["falsePositives"] == 1
@@ -0,0 +1,127 @@
+"""Single-flight coalescing: shared calls survive cancelled callers."""
+
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+import BL.v3.nodes.executors.llm_executor as llm_executor
+from BL.v3.cache.single_flight import SingleFlight
+from BL.v3.nodes.executors.llm_executor import LLMNodeExecutor
+from BL.v3.nodes.executors.tool_executor import ToolNodeExecutor
+
+
+class Upstream:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = False
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return {"value": 42}
+
+
+def test_cancelled_first_caller_does_not_cancel_followers():
+    async def scenario():
+        group, upstream = SingleFlight("test"), Upstream()
+        first = asyncio.create_task(group.do("key", upstream))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(group.do("key", upstream))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result, led = await follower
+        assert first.cancelled() and not led
+        return group, upstream, result
+
+    group, upstream, result = asyncio.run(scenario())
+    assert result == {"value": 42}
+    assert upstream.calls == 1 and not upstream.cancelled
+    assert group.stats()["coalesced"] == 1 and group.stats()["cancelled"] == 0
+
+
+def test_call_is_cancelled_when_last_caller_leaves():
+    async def scenario():
+        group, upstream = SingleFlight("test"), Upstream()
+        callers = [asyncio.create_task(group.do("key", upstream)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        # A new caller starts a fresh call instead of joining the cancelled one
+        result, led = await group.do("key", upstream)
+        assert led
+        return group, upstream, result
+
+    group, upstream, result = asyncio.run(scenario())
+    assert upstream.cancelled and upstream.calls == 2
+    assert result == {"value": 42}
+    assert group.stats()["cancelled"] == 1 and group.stats()["inFlight"] == 0
+
+
+def test_errors_reach_every_caller():
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def scenario():
+        group = SingleFlight("test")
+        results = await asyncio.gather(*(group.do("key", failing) for _ in range(3)), return_exceptions=True)
+        return group, results
+
+    group, results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert group.stats()["upstreamCalls"] == 1 and group.stats()["errors"] == 1
+
+
+def test_tool_nodes_coalesce_only_when_idempotent(monkeypatch):
+    executor = ToolNodeExecutor()
+    calls = []
+
+    async def call_tool(tool_id, params):
+        calls.append(tool_id)
+        await asyncio.sleep(0.01)
+        return {"toolId": tool_id}
+
+    monkeypatch.setattr(executor, "_call_tool", call_tool)
+
+    async def run_twice(config):
+        node = {"id": "t", "type": "tool", "config": {"toolId": "lookup", **config}}
+        state = {"flow": {}, "system": {}, "nodes": {}, "messages": []}
+        await asyncio.gather(executor.execute(node, dict(state)), executor.execute(node, dict(state)))
+
+    for config, expected in (({}, 2), ({"idempotent": True}, 1), ({"singleFlight": True}, 1)):
+        calls.clear()
+        asyncio.run(run_twice(config))
+        assert len(calls) == expected, config
+
+
+class SlowModel:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return AIMessage(content="ok", usage_metadata={"input_tokens": 120, "output_tokens": 8, "total_tokens": 128})
+
+
+def test_shared_llm_call_is_accounted_once(monkeypatch):
+    model = SlowModel()
+    monkeypatch.setattr(llm_executor, "get_routed_model_instance", lambda *args, **kwargs: model)
+    executor = LLMNodeExecutor()
+    node = {"id": "answer", "type": "llm", "config": {"prompt": "Summarize contract CDR0000001"}}
+
+    async def scenario():
+        state = {"flow": {}, "system": {}, "nodes": {}, "messages": []}
+        return await asyncio.gather(*(executor.execute(node, dict(state)) for _ in range(3)))
+
+    outputs = [result["output"] for result in asyncio.run(scenario())]
+    assert model.calls == 1
+    assert sum(output["usage"]["inputTokens"] for output in outputs) == 120
+    assert [output.get("singleFlight", {}).get("shared", False) for output in outputs].count(True) == 2
@@ -0,0 +1,99 @@
+"""The SQLite checkpointer keeps the event loop free and never loses a failed batch."""
+
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+
+from DAL.sqlite_checkpointer import SQLiteCheckpointSaver
+
+
+def _checkpoint(value: str, version: str):
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"flow": {"value": value}}
+    checkpoint["channel_versions"] = {"flow": version}
+    return checkpoint
+
+
+def _config(thread_id: str, checkpoint_id=None):
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+class ThreadRecordingSaver(SQLiteCheckpointSaver):
+    """Records whether each put/put_writes ran on the event loop's thread."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_loop = []
+
+    def put(self, *args, **kwargs):
+        self.on_loop.append(("put", threading.get_ident() == self.loop_thread))
+        return super().put(*args, **kwargs)
+
+    def put_writes(self, *args, **kwargs):
+        self.on_loop.append(("put_writes", threading.get_ident() == self.loop_thread))
+        return super().put_writes(*args, **kwargs)
+
+
+def test_cold_and_backpressure_paths_leave_the_event_loop(tmp_path):
+    saver = ThreadRecordingSaver(str(tmp_path / "checkpoints.sqlite"), hot_threads=1)
+
+    async def turns():
+        saver.loop_thread = threading.get_ident()
+        first = await saver.aput(_config("a"), _checkpoint("a1", "1"), {}, {"flow": "1"})
+        hot = await saver.aput(first, _checkpoint("a2", "2"), {}, {"flow": "2"})
+        await saver.aput(_config("b"), _checkpoint("b1", "1"), {}, {"flow": "1"})
+        # Thread a was evicted from the hot tier: its parent must be read from disk
+        await saver.aput(hot, _checkpoint("a3", "3"), {}, {"flow": "3"})
+        # A full queue: waiting for the writer must not block the loop
+        saver._has_room = lambda: False
+        await saver.aput_writes(hot, [("flow", {"value": "w"})], "task-1")
+
+    asyncio.run(turns())
+    assert saver.on_loop == [("put", True), ("put", True), ("put", True), ("put", False), ("put_writes", False)]
+    saver.close()
+
+
+class FailingConnection(sqlite3.Connection):
+    """Connection whose inserts fail while ``failing`` is set."""
+
+    failing = False
+
+    def execute(self, sql, *args):
+        if FailingConnection.failing and sql.startswith("INSERT"):
+            raise sqlite3.OperationalError("disk I/O error")
+        return super().execute(sql, *args)
+
+
+class FailingSaver(SQLiteCheckpointSaver):
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, factory=FailingConnection)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+
+def test_failed_batch_is_retried_not_lost(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = FailingSaver(path, flush_interval_ms=5)
+    FailingConnection.failing = True
+    try:
+        stored = saver.put(_config("a"), _checkpoint("a1", "1"), {}, {"flow": "1"})
+        with pytest.raises(RuntimeError):
+            saver.flush()
+    finally:
+        FailingConnection.failing = False
+    saver.flush()
+    stats = saver.stats()
+    assert stats["failedFlushes"] >= 1 and stats["lostRows"] == 0 and stats["pendingRows"] == 0
+    saver.close()
+
+    reopened = SQLiteCheckpointSaver(path)
+    restored = reopened.get_tuple(_config("a"))
+    assert restored.config["configurable"]["checkpoint_id"] == stored["configurable"]["checkpoint_id"]
+    assert restored.checkpoint["channel_values"]["flow"] == {"value": "a1"}
+    reopened.close()
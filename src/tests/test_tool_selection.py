@@ -0,0 +1,55 @@
+"""Tool binding of v3 agents and the relevance-ranked tool subset."""
+
+import asyncio
+
+from BL.v3.nodes.executors.agent_executor import AgentNodeExecutor
+from BL.v3.utils.tool_ranker import ToolSelector
+from BL.v3.workflow_builder import build_initial_state_from_user_input
+
+TOOLS = [
+    ("search_supplier", "Find a supplier by name"),
+    ("extend_contract", "Extend the end date of a contract"),
+    ("terminate_contract", "Terminate a contract"),
+    ("upload_document", "Upload a supporting document"),
+    ("get_user_details", "Details of the signed-in user"),
+]
+
+
+def _agent(tool_selection=None):
+    config = {
+        "model": {"code": "gpt-4.1"},
+        "tools": [
+            {"_id": f"t{i}", "name": name, "description": description, "config": {"enabled": True}}
+            for i, (name, description) in enumerate(TOOLS)
+        ]
+        + [{"_id": "off", "name": "disabled_tool", "description": "", "config": {"enabled": False}}],
+    }
+    if tool_selection:
+        config["toolSelection"] = tool_selection
+    return {"id": "agent", "type": "agent", "name": "agent", "config": config}
+
+
+def test_no_match_binds_top_k_by_prior_not_every_tool():
+    selector = ToolSelector(TOOLS, top_k=2, always_include=["get_user_details"], priors={"upload_document": 1})
+
+    assert selector.select("hello there") == ["search_supplier", "upload_document", "get_user_details"]
+    selector.record_use(["terminate_contract", "terminate_contract"])
+    assert selector.select("hello there") == ["terminate_contract", "upload_document", "get_user_details"]
+    assert selector.select("extend the contract") == ["extend_contract", "terminate_contract", "get_user_details"]
+
+
+def test_v3_agent_binds_its_enabled_tools(stub_model):
+    node = _agent()
+    executor = AgentNodeExecutor()
+    executor.prepare(node)
+    asyncio.run(executor.execute(node, build_initial_state_from_user_input("extend contract CDR0027626")))
+
+    assert stub_model.bound_tools == [[name for name, _ in TOOLS]]
+
+
+def test_v3_agent_binds_ranked_subset(stub_model):
+    node = _agent({"mode": "bm25", "topK": 1, "alwaysInclude": ["get_user_details"]})
+    executor = AgentNodeExecutor()
+    asyncio.run(executor.execute(node, build_initial_state_from_user_input("extend contract CDR0027626")))
+
+    assert stub_model.bound_tools == [["extend_contract", "get_user_details"]]
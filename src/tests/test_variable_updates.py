@@ -0,0 +1,50 @@
+"""Rules compare typed values; variable updates never mutate the state they were given."""
+
+import copy
+
+from BL.v3.utils.rule_evaluator import RuleEvaluator
+from BL.v3.utils.variable_resolver import VariableResolver
+
+
+def test_rule_compares_stored_boolean_with_json_true():
+    rule = {"ruleId": "r-pv", "conditions": [{"field": "{{flow.isPvRendered}}", "operator": "equals", "value": True}]}
+    evaluator = RuleEvaluator()
+
+    assert evaluator.evaluate_rules([rule], {"flow": {"isPvRendered": True}}) == "r-pv"
+    assert evaluator.evaluate_rules([rule], {"flow": {"isPvRendered": False}}) == "default"
+
+
+def test_updates_leave_the_input_state_unchanged():
+    state = {
+        "flow": {"items": ["a"], "profile": {"name": "Acme"}},
+        "system": {"userQuery": "hi"},
+        "messages": [{"role": "user", "content": "hi"}],
+        "nodes": {},
+    }
+    before = copy.deepcopy(state)
+    updates = [
+        {"fieldName": "flow.items", "operation": "append", "value": "b"},
+        {"fieldName": "flow.profile.name", "operation": "set", "value": "Beta"},
+        {"fieldName": "flow.history", "operation": "set", "value": "{{thread.messages}}"},
+        {"fieldName": "flow.history", "operation": "append", "value": "{{nodeOutput.text}}"},
+        {"fieldName": "thread.messages", "operation": "append", "value": "{{nodeOutput.text}}", "role": "assistant"},
+    ]
+
+    updated = VariableResolver().apply_variable_updates(updates, {"text": "hello"}, state)
+
+    assert state == before
+    assert updated["flow"]["items"] == ["a", "b"] and updated["flow"]["profile"] == {"name": "Beta"}
+    assert updated["flow"]["history"] == [{"role": "user", "content": "hi"}, "hello"]
+    assert updated["messages"][-1] == {"content": "hello", "role": "assistant"}
+
+
+def test_updates_copy_only_what_they_change():
+    catalog = {"items": [{"sku": index} for index in range(1000)]}
+    state = {"flow": {"catalog": catalog, "profile": {"name": "Acme", "address": {"city": "Bonn"}}}, "nodes": {}}
+    updates = [{"fieldName": "flow.profile.name", "operation": "set", "value": "Beta"}]
+
+    updated = VariableResolver().apply_variable_updates(updates, {}, state)
+
+    assert updated["flow"]["catalog"] is catalog
+    assert updated["flow"]["profile"]["address"] is state["flow"]["profile"]["address"]
+    assert state["flow"]["profile"]["name"] == "Acme" and updated["flow"]["profile"]["name"] == "Beta"
@@ -0,0 +1,84 @@
+"""The shipped workflows run end to end through /v3/invoke, accounted and recorded."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from BL.v3.accounting.run_accounting import WorkflowHistograms
+from DAL.chat_history_store import ChatHistoryStore, SQLiteChatHistoryBackend, set_chat_history_store
+from DAL.sqlite_checkpointer import SQLiteCheckpointSaver, set_checkpointer
+from middleware import run_accounting_middleware
+from middleware.register_middleware import register_middlewares
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    register_middlewares(app)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("native_engine", ["1", "0"])
+def test_all_json_runs_through_v3_invoke(client, stub_model, monkeypatch, native_engine):
+    monkeypatch.setenv("V3_NATIVE_ENGINE", native_engine)
+    response = client.post("/v3/invoke", json={"query": "extend contract CDR0027626", "runReport": True})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    state = body.get("data", body)
+    assert state["messages"][0] == {"role": "user", "content": "extend contract CDR0027626"}
+    assert state["messages"][-1]["content"] == "ok"
+    assert state["runReport"]["workflow"] == "all.json"
+    assert stub_model.calls
+
+
+def test_streamed_run_rolls_up_under_workflow_label(client, stub_model, monkeypatch):
+    monkeypatch.setattr(run_accounting_middleware, "workflow_histograms", WorkflowHistograms())
+
+    response = client.post("/v3/invoke/stream", json={"query": "extend contract CDR0027626"})
+
+    assert response.status_code == 200, response.text
+    assert '"run_end"' in response.text
+    assert set(run_accounting_middleware.workflow_histograms.stats()) == {"all.json"}
+
+
+@pytest.fixture
+def history(monkeypatch, tmp_path):
+    """Chat history recording on, into a store that never flushes on its own."""
+    monkeypatch.setenv("V3_CHAT_HISTORY", "1")
+    checkpointer = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    set_checkpointer(checkpointer)
+    store = ChatHistoryStore(SQLiteChatHistoryBackend(str(tmp_path / "history.sqlite")), flush_interval_ms=60000)
+    set_chat_history_store(store)
+    yield store
+    set_chat_history_store(None)
+    set_checkpointer(None)
+    checkpointer.close()
+
+
+def test_history_recorded_under_the_run_id_only_for_threads(client, stub_model, history, caplog):
+    body = {"query": "extend contract CDR0027626", "runReport": True}
+    assert client.post("/v3/invoke", json=body).status_code == 200
+    assert history.pending == 0
+
+    response = client.post("/v3/invoke", json={**body, "threadId": "thread-1"})
+    run_id = response.json().get("data", response.json())["runReport"]["runId"]
+    assert {message.run_id for message in history._messages} == {run_id}
+    assert {message.thread_id for message in history._messages} == {"thread-1"}
+
+    # The buffer is full: the next turn is dropped with a warning
+    history.max_pending = history.pending
+    with caplog.at_level("WARNING", logger="api.demo_api"):
+        client.post("/v3/invoke", json={**body, "threadId": "thread-1"})
+    assert history.stats.stats()["dropped"] and "Chat history buffer full" in caplog.text
+
+
+def test_node_event_stream_records_the_turn(client, stub_model, history):
+    body = {"query": "extend contract CDR0027626", "threadId": "thread-2", "events": ["node_end"]}
+    response = client.post("/v3/invoke/stream", json=body)
+
+    assert response.status_code == 200, response.text
+    recorded = [(message.thread_id, message.role, message.content) for message in history._messages]
+    assert recorded[0] == ("thread-2", "user", "extend contract CDR0027626")
+    assert recorded[-1] == ("thread-2", "assistant", "ok")
+    assert len({message.run_id for message in history._messages}) == 1